@@ -0,0 +1,121 @@
+"""Benchmark load generator against fake oxAuth endpoints.
+
+Drive all scenarios of ``bench`` command at a target rate against an in-process stub
+serving responses with fixed latency (and failing every n-th request), then check that
+the target rate is achieved, errors are counted, and latency percentiles reflect
+the stub latency within overhead budget. Accuracy of latency histogram is checked
+against exact percentiles of synthetic values.
+Exit with non-zero code if any check fails.
+
+Usage::
+
+    python benchmarks/bench_loadgen.py
+    python benchmarks/bench_loadgen.py --rate 500 --duration 5 --latency 0.02
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fakedocker import FakeOxauthServer  # noqa: E402
+from pygluu.compose.loadgen import MIN_THROUGHPUT  # noqa: E402
+from pygluu.compose.loadgen import PERCENTILES  # noqa: E402
+from pygluu.compose.loadgen import SUB_BUCKET_BITS  # noqa: E402
+from pygluu.compose.loadgen import Histogram  # noqa: E402
+from pygluu.compose.loadgen import LoadGenerator  # noqa: E402
+from pygluu.compose.loadgen import Options  # noqa: E402
+
+#: Scenarios and their weights.
+WEIGHTS = {"discovery": 2, "jwks": 1, "token": 1}
+
+#: Maximum latency (in seconds) added by load generator on top of stub latency at median.
+OVERHEAD_BUDGET = 0.02
+
+
+def check_histogram(samples=100000):
+    """Compare percentiles of histogram against exact percentiles of log-normally distributed values.
+
+    :returns: List of failures as strings.
+    """
+    rng = random.Random(42)
+    values = sorted(int(rng.lognormvariate(9, 1.5)) for _ in range(samples))
+    hist = Histogram()
+    for value in values:
+        hist.record(value)
+
+    failures = []
+    for percentile in PERCENTILES:
+        exact = values[max(int(len(values) * percentile / 100) - 1, 0)]
+        error = abs(hist.percentile(percentile) - exact) / max(exact, 1)
+        if error > 1 / 2 ** SUB_BUCKET_BITS:
+            failures.append(f"histogram p{percentile:g} is off by {error:.2%}")
+    return failures
+
+
+def check_load(rate, duration, latency, connections, error_every):
+    """Run load against stub and check the report.
+
+    :returns: A ``tuple`` of report and list of failures as strings.
+    """
+    with FakeOxauthServer(latency=latency, error_every=error_every) as server:
+        generator = LoadGenerator(
+            f"http://127.0.0.1:{server.port}",
+            "bench.gluu.org",
+            WEIGHTS,
+            Options("bench", "secret", ""),
+            rate=rate,
+            duration=duration,
+            warmup=0.5,
+            connections=connections,
+        )
+        generator.run()
+        report = generator.report()
+
+    failures = []
+    total = report["total"]
+    if total["throughput"] < rate * MIN_THROUGHPUT:
+        failures.append(f"throughput {total['throughput']:.1f}/s is below target rate {rate:g}/s")
+
+    expected = 1 / error_every if error_every else 0.0
+    if abs(total["error_rate"] - expected) > 0.01:
+        failures.append(f"error rate {total['error_rate']:.2%} differs from injected {expected:.2%}")
+
+    p50 = total["latency_ms"]["p50"] / 1000
+    if not latency <= p50 <= latency + OVERHEAD_BUDGET:
+        failures.append(f"median latency {p50 * 1000:.1f}ms is outside {latency * 1000:g}ms + budget")
+
+    for name, summary in report["scenarios"].items():
+        if not summary["requests"]:
+            failures.append(f"scenario {name} sent no requests")
+        unexpected = set(summary["errors"]) - {"HTTP 503"}
+        if unexpected:
+            failures.append(f"scenario {name} failed with {', '.join(sorted(unexpected))}")
+    return report, failures
+
+
+def main():
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=200.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds of measured load")
+    parser.add_argument("--latency", type=float, default=0.01, help="latency (in seconds) of stub responses")
+    parser.add_argument("--connections", type=int, default=16, help="concurrent connections")
+    parser.add_argument("--error-every", type=int, default=50, help="fail every n-th request of stub (0 disables)")
+    args = parser.parse_args()
+
+    failures = check_histogram()
+    report, load_failures = check_load(args.rate, args.duration, args.latency, args.connections, args.error_every)
+    failures += load_failures
+
+    print(json.dumps(report, indent=4))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark resolution of Compose project during ``up`` command.
+
+Run ``App.up`` against fake Docker daemon and count YAML parses of Compose files,
+with and without the memoized project and the on-disk cache of merged config.
+
+Usage::
+
+    python benchmarks/bench_project_cache.py
+"""
+
+import collections
+import contextlib
+import os
+import sys
+import time
+from unittest import mock
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from harness import fake_stack  # noqa: E402
+from harness import quiet  # noqa: E402
+from harness import workdir  # noqa: E402
+from pygluu.compose.app import App  # noqa: E402
+
+
+class UncachedApp(App):
+    """App which resolves the project on every ``top_level_cmd`` call (previous behavior)."""
+
+    @contextlib.contextmanager
+    def top_level_cmd(self):  # noqa: D102
+        self._tlc_key = None
+        with super().top_level_cmd() as tlc:
+            yield tlc
+
+    def load_config(self, compose_files, environment):  # noqa: D102
+        from compose.config import config as compose_config
+
+        config_details = compose_config.find(".", compose_files.split(":"), environment)
+        return config_details, compose_config.load(config_details)
+
+
+def run(app_cls, warm=False):
+    """Run ``up`` command and collect metrics."""
+    parsed = collections.Counter()
+    safe_load = yaml.safe_load
+
+    def counting_safe_load(stream):
+        name = getattr(stream, "name", "")
+        if name:
+            parsed[os.path.basename(name)] += 1
+        return safe_load(stream)
+
+    with workdir(), fake_stack(), mock.patch.object(yaml, "safe_load", counting_safe_load):
+        with quiet():
+            if warm:
+                # populate on-disk cache from previous invocation
+                with app_cls().top_level_cmd():
+                    parsed.clear()
+
+            app = app_cls()
+            started_at = time.perf_counter()
+            app.up()
+            elapsed = time.perf_counter() - started_at
+    return elapsed, parsed
+
+
+def main():
+    """Entrypoint of the benchmark."""
+    print(f"{'variant':<10}{'wall time':>12}{'YAML parses':>14}{'docker-compose.yml':>20}")
+    for label, app_cls, warm in [("uncached", UncachedApp, False), ("cold", App, False), ("warm", App, True)]:
+        elapsed, parsed = run(app_cls, warm)
+        print(f"{label:<10}{elapsed:>11.2f}s{sum(parsed.values()):>14}{parsed['docker-compose.yml']:>20}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark CLI startup time.
+
+Measure import time (using ``python -X importtime`` where available) of CLI modules and wall time
+of lightweight commands, then compare them against time budgets.
+Exit with non-zero code if any budget is exceeded or heavy modules are loaded eagerly.
+
+Usage::
+
+    python benchmarks/bench_startup.py
+"""
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+#: Number of runs per measurement (median is reported).
+RUNS = 5
+
+#: Budget (in seconds) of cumulative import time per module.
+IMPORT_BUDGETS = {
+    "pygluu.compose.cli": 0.1,
+    "pygluu.compose.app": 0.1,
+}
+
+#: Budget (in seconds) of wall time per command (including interpreter startup).
+COMMAND_BUDGETS = {
+    "--help": 0.25,
+    "--version": 0.25,
+    "init": 0.3,
+}
+
+#: Modules which must be loaded only by subcommands that use them.
+LAZY_MODULES = [
+    "compose",
+    "docker",
+    "requests",
+    "yaml",
+    "stdiomask",
+    "click_spinner",
+    "pygluu.compose.backends",
+    "pygluu.compose.dag",
+    "pygluu.compose.nodes",
+    "pygluu.compose.redis_topology",
+    "pygluu.compose.status",
+]
+
+
+# measures import in-process on Python 3.6, which lacks ``-X importtime``
+IMPORT_SCRIPT = """
+import sys, time
+started_at = time.perf_counter()
+import {module}
+print(time.perf_counter() - started_at)
+print(*sys.modules, sep="\\n")
+"""
+
+
+def import_time(module):
+    """Get cumulative import time of a module and list of all imported modules."""
+    if sys.version_info < (3, 7):
+        proc = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        elapsed, *imported = proc.stdout.splitlines()
+        return float(elapsed), set(imported)
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    cumulative = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative = int(cumul) / 1_000_000
+    return cumulative, imported
+
+
+def eager_modules(imported):
+    """Get heavy modules (see :data:`LAZY_MODULES`) among imported modules."""
+    return sorted(
+        name for name in imported
+        if any(name == lazy or name.startswith(f"{lazy}.") for lazy in LAZY_MODULES)
+    )
+
+
+def command_time(args, cwd):
+    """Get wall time of running CLI with given arguments."""
+    code = f"from pygluu.compose.cli import cli; cli({args!r})"
+    started_at = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=cwd,
+        check=False,
+    )
+    return time.perf_counter() - started_at
+
+
+def main():
+    """Entrypoint of the benchmark."""
+    failures = []
+
+    print(f"{'measurement':<32}{'median':>10}{'budget':>10}")
+
+    for module, budget in IMPORT_BUDGETS.items():
+        samples = []
+        for _ in range(RUNS):
+            elapsed, imported = import_time(module)
+            samples.append(elapsed)
+
+        median = statistics.median(samples)
+        print(f"{'import ' + module:<32}{median * 1000:>8.1f}ms{budget * 1000:>8.0f}ms")
+        if median > budget:
+            failures.append(f"import {module} took {median * 1000:.1f}ms")
+
+        eager = eager_modules(imported)
+        if eager:
+            failures.append(f"import {module} loads heavy modules eagerly: {', '.join(eager)}")
+
+    for command, budget in COMMAND_BUDGETS.items():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            samples = [command_time(command.split(), tmpdir) for _ in range(RUNS)]
+
+        median = statistics.median(samples)
+        print(f"{'pygluu-compose ' + command:<32}{median * 1000:>8.1f}ms{budget * 1000:>8.0f}ms")
+        if median > budget:
+            failures.append(f"pygluu-compose {command} took {median * 1000:.1f}ms")
+
+    for failure in failures:
+        print(f"[E] {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Benchmark commands end to end against fake Docker daemon.
+
+Run ``up`` (on a fresh and an already deployed project), ``ps``, ``logs``, and ``down``
+against in-process fakes of Docker Engine, Vault, and Consul APIs, and report
+wall time (median of runs), API calls, and peak memory (traced Python allocations
+of the whole process, including the fakes) of each phase.
+
+Results are compared against stored baseline; the benchmark exits with non-zero code
+if any phase regresses beyond threshold, or if the baseline was recorded with different
+latencies (unless it is re-recorded using ``--save-baseline``).
+
+Usage::
+
+    python benchmarks/bench_up.py
+    python benchmarks/bench_up.py --latency exec=0.05 --latency pull=0.5 --latency health=2
+    python benchmarks/bench_up.py --save-baseline
+"""
+
+import argparse
+import collections
+import json
+import os
+import pathlib
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fakedocker import DEFAULT_LATENCIES  # noqa: E402
+from harness import fake_stack  # noqa: E402
+from harness import quiet  # noqa: E402
+from harness import workdir  # noqa: E402
+from pygluu.compose.app import App  # noqa: E402
+
+DEFAULT_BASELINE = pathlib.Path(__file__).parent / "baselines" / "bench_up.json"
+
+#: Phases (in order of execution) and functions to run them.
+PHASES = collections.OrderedDict([
+    ("up", lambda app: app.up()),
+    ("up (deployed)", lambda app: app.up()),
+    ("ps", lambda app: app.ps("oxauth")),
+    ("logs", lambda app: app.logs(False, "all")),
+    ("down", lambda app: app.down()),
+])
+
+#: Allowed regression (as ratio of baseline) before the benchmark fails.
+THRESHOLDS = {
+    "wall": 0.25,
+    "calls": 0.10,
+    "peak_kb": 0.25,
+}
+
+#: Absolute difference ignored regardless of ratio (to tolerate noise of short phases).
+MIN_DELTAS = {
+    "wall": 0.05,
+    "calls": 2,
+    "peak_kb": 256,
+}
+
+
+def run_phases(latencies, trace_memory=False):
+    """Run all phases once.
+
+    :returns: A mapping of phase name and its metrics.
+    """
+    results = collections.OrderedDict()
+
+    with workdir(), fake_stack(latencies) as servers:
+        for phase, func in PHASES.items():
+            before = {name: server.calls.copy() for name, server in servers.items()}
+            app = App()
+
+            if trace_memory:
+                tracemalloc.start()
+
+            started_at = time.perf_counter()
+            with quiet():
+                func(app)
+            wall = time.perf_counter() - started_at
+
+            peak = 0
+            if trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            calls = {}
+            for name, server in servers.items():
+                diff = server.calls - before[name]
+                calls[name] = sum(diff.values())
+                if name == "docker":
+                    routes = diff
+            results[phase] = {
+                "wall": wall,
+                "calls": calls,
+                "routes": dict(routes.most_common()),
+                "peak_kb": peak // 1024,
+            }
+    return results
+
+
+def measure(latencies, runs):
+    """Measure all phases.
+
+    Wall time and API calls are taken from median of runs without memory tracing
+    (as tracing slows down allocations); peak memory is taken from an extra run.
+    """
+    samples = [run_phases(latencies) for _ in range(runs)]
+    memory = run_phases(latencies, trace_memory=True)
+
+    results = collections.OrderedDict()
+    for phase in PHASES:
+        runs_ = [sample[phase] for sample in samples]
+        median_run = sorted(runs_, key=lambda r: r["wall"])[len(runs_) // 2]
+        results[phase] = {
+            "wall": round(statistics.median(r["wall"] for r in runs_), 4),
+            "calls": {
+                name: int(statistics.median(r["calls"][name] for r in runs_))
+                for name in runs_[0]["calls"]
+            },
+            "routes": median_run["routes"],
+            "peak_kb": memory[phase]["peak_kb"],
+        }
+    return results
+
+
+def load_baseline(path, latencies):
+    """Load phases of stored baseline.
+
+    :param path: Path to baseline file.
+    :param latencies: Latencies of current measurement.
+    :returns: A mapping of phase name and its metrics (empty if there is no baseline).
+    :raises ValueError: If the baseline was recorded with different latencies.
+    """
+    if not path.is_file():
+        return {}
+
+    stored = json.loads(path.read_text())
+    if stored.get("latencies") != latencies:
+        raise ValueError(f"Baseline {path} was recorded with latencies {stored.get('latencies')}")
+    return stored["phases"]
+
+
+def compare(results, baseline, names=tuple(THRESHOLDS)):
+    """Compare results against baseline.
+
+    :param names: Names of metrics to compare.
+    :returns: List of regressions as strings.
+    """
+    regressions = []
+    for phase, metrics in results.items():
+        base = baseline.get(phase)
+        if not base:
+            continue
+
+        checks = [
+            ("wall", metrics["wall"], base["wall"]),
+            ("calls", sum(metrics["calls"].values()), sum(base["calls"].values())),
+            ("peak_kb", metrics["peak_kb"], base["peak_kb"]),
+        ]
+        for metric, value, expected in checks:
+            if metric not in names:
+                continue
+            if value > expected * (1 + THRESHOLDS[metric]) and value - expected > MIN_DELTAS[metric]:
+                regressions.append(f"{phase}: {metric} is {value} (baseline {expected})")
+    return regressions
+
+
+def print_results(results, baseline):
+    """Print table of results."""
+    print(f"{'phase':<16}{'wall time':>12}{'baseline':>12}{'API calls':>11}{'baseline':>10}{'peak mem':>12}{'baseline':>12}")
+    for phase, metrics in results.items():
+        base = baseline.get(phase, {})
+        calls = sum(metrics["calls"].values())
+        base_calls = sum(base.get("calls", {}).values()) if base else "-"
+        base_wall = f"{base['wall']:.3f}s" if base else "-"
+        base_peak = f"{base['peak_kb']}KB" if base else "-"
+        print(
+            f"{phase:<16}{metrics['wall']:>11.3f}s{base_wall:>12}{calls:>11}{base_calls:>10}"
+            f"{metrics['peak_kb']:>10}KB{base_peak:>12}"
+        )
+
+    print("\nAPI calls per phase (docker/vault/consul) and top Docker API routes:")
+    for phase, metrics in results.items():
+        calls = "/".join(str(metrics["calls"].get(name, 0)) for name in ("docker", "vault", "consul"))
+        routes = ", ".join(f"{route}={count}" for route, count in list(metrics["routes"].items())[:4])
+        print(f"    {phase:<16}{calls:<14}{routes}")
+
+
+def parse_latency(value):
+    """Parse ``NAME=SECONDS`` argument."""
+    name, _, seconds = value.partition("=")
+    if name not in DEFAULT_LATENCIES:
+        raise argparse.ArgumentTypeError(f"unknown latency {name}; choose from {', '.join(DEFAULT_LATENCIES)}")
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid seconds {seconds!r}")
+
+
+def main():
+    """Entrypoint of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="number of runs per phase (median is reported)")
+    parser.add_argument("--latency", type=parse_latency, action="append", default=[], metavar="NAME=SECONDS",
+                        help=f"injected latency ({', '.join(DEFAULT_LATENCIES)})")
+    parser.add_argument("--baseline", type=pathlib.Path, default=DEFAULT_BASELINE, help="path to baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as new baseline")
+    args = parser.parse_args()
+
+    latencies = dict(DEFAULT_LATENCIES, **dict(args.latency))
+
+    try:
+        baseline = load_baseline(args.baseline, latencies)
+    except ValueError as exc:
+        if not args.save_baseline:
+            print(f"[E] {exc}; use matching --latency (or --baseline) or re-record it using --save-baseline")
+            sys.exit(1)
+        baseline = {}
+
+    results = measure(latencies, args.runs)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"latencies": latencies, "phases": results}, indent=4) + "\n")
+        print(f"[I] Baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline)
+    for regression in regressions:
+        print(f"[E] Regression in {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
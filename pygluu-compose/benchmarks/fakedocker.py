@@ -0,0 +1,1058 @@
+"""In-process fake of Docker Engine API (plus Vault and Consul APIs) used by benchmarks.
+
+The fake implements the subset of Docker Engine API used by ``docker-compose``
+and ``pygluu-compose``; containers never run anything, but their lifecycle
+(including healthcheck transitions and events) is simulated.
+"""
+
+import base64
+import collections
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import queue
+import re
+import struct
+import tarfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+API_VERSION = "1.40"
+
+#: Default latencies (in seconds) injected into simulated operations.
+DEFAULT_LATENCIES = {
+    "api": 0.0,  # every Docker API request
+    "exec": 0.0,  # each ``exec_start`` call
+    "pull": 0.0,  # each image pull
+    "start": 0.0,  # each container start
+    "health": 0.2,  # from container start to ``healthy`` status
+    "stats": 0.0,  # each one-shot ``stats`` call (the daemon waits for the next CPU sample)
+}
+
+#: Size (in bytes) of each simulated image layer.
+PULL_LAYER_SIZE = 16 * 1024 * 1024
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class FakeVault:
+    """State of fake Vault server shared by CLI (exec) and HTTP interfaces."""
+
+    def __init__(self):
+        self.initialized = False
+        self.sealed = True
+        self.unseal_key = "fake-unseal-key"
+        self.root_token = "fake-root-token"
+        self.policies = {"default", "root"}
+        self.auth = {"token/": {"type": "token"}}
+        self.secrets = {}
+        self.lock = threading.Lock()
+
+    def status(self):
+        """Get seal status."""
+        return {"type": "shamir", "initialized": self.initialized, "sealed": self.sealed}
+
+    def init(self):
+        """Initialize Vault, returning its unseal key and root token."""
+        self.initialized = True
+        return {"keys_base64": [self.unseal_key], "root_token": self.root_token}
+
+    def unseal(self, key):
+        """Unseal Vault if the key matches."""
+        if key == self.unseal_key:
+            self.sealed = False
+
+    def exec_cli(self, cmd):
+        """Simulate ``vault`` CLI command."""
+        args = cmd.split()
+        commands = {
+            ("vault", "status"): self._cli_status,
+            ("vault", "operator", "init"): self._cli_init,
+            ("vault", "operator", "unseal"): self._cli_unseal,
+            ("vault", "login"): self._cli_login,
+            ("vault", "policy", "list"): lambda args: ("\n".join(sorted(self.policies)).encode(), 0),
+            ("vault", "policy", "write"): self._cli_policy_write,
+            ("vault", "auth", "list"): lambda args: (json.dumps(self.auth).encode(), 0),
+            ("vault", "auth", "enable"): self._cli_auth_enable,
+            ("vault", "read"): lambda args: (b"fake-role-id", 0),
+            ("vault", "write"): lambda args: (b"fake-secret-id", 0),
+        }
+        with self.lock:
+            # subcommands take precedence over their parent command
+            for size in (3, 2):
+                command = commands.get(tuple(args[:size]))
+                if command:
+                    return command(args[size:])
+        return b"Unknown command", 127
+
+    def _cli_status(self, args):
+        return json.dumps(self.status()).encode(), 2 if self.sealed else 0
+
+    def _cli_init(self, args):
+        data = self.init()
+        out = f"Unseal Key 1: {data['keys_base64'][0]}\n\nInitial Root Token: {data['root_token']}\n"
+        return out.encode(), 0
+
+    def _cli_unseal(self, args):
+        self.unseal(args[0])
+        return b"", 0
+
+    def _cli_login(self, args):
+        return b"", 0 if args[0] == self.root_token else 2
+
+    def _cli_policy_write(self, args):
+        self.policies.add(args[0])
+        return b"", 0
+
+    def _cli_auth_enable(self, args):
+        self.auth[f"{args[0]}/"] = {"type": args[0]}
+        return b"", 0
+
+
+class FakeConsul:
+    """State of fake Consul server shared by CLI (exec) and HTTP interfaces."""
+
+    def __init__(self):
+        self.kv = {}
+        self.catalog = {}
+        self.lock = threading.Lock()
+
+    def exec_cli(self, cmd):
+        """Simulate ``consul`` CLI command."""
+        args = cmd.split()
+        if args[:3] == ["consul", "kv", "get"]:
+            key = args[-1]
+            with self.lock:
+                if key not in self.kv:
+                    return f"Error! No key exists at: {key}".encode(), 1
+                return self.kv[key].encode(), 0
+        return b"Unknown command", 127
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # headers and body are written separately; avoid delayed ACK stalls (~40ms per request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):  # noqa: D102
+        pass
+
+    @property
+    def app(self):
+        return self.server.app
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        # raw body is kept for non-JSON payloads (e.g. archives)
+        self.raw_body = b""
+        if not length:
+            return {}
+        body = self.raw_body = self.rfile.read(length)
+        with contextlib.suppress(ValueError):
+            return json.loads(body)
+        return {}
+
+    def send_json(self, status, data=None):
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text(self, status, text):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_chunked(self, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_chunk(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = {k: v[-1] for k, v in parse_qs(parsed.query, keep_blank_values=True).items()}
+        body = self._read_json() if method in ("POST", "PUT") else {}
+        try:
+            self.app.handle(self, method, unquote(path), query, body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):  # noqa: D102
+        self._dispatch("GET")
+
+    def do_POST(self):  # noqa: D102
+        self._dispatch("POST")
+
+    def do_PUT(self):  # noqa: D102
+        self._dispatch("PUT")
+
+    def do_DELETE(self):  # noqa: D102
+        self._dispatch("DELETE")
+
+    def do_HEAD(self):  # noqa: D102
+        self._dispatch("HEAD")
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # concurrent clients (e.g. log streams) overflow default backlog of 5, causing SYN retransmits (~1s)
+    request_queue_size = 128
+
+
+class _Server:
+    """Base class of fake HTTP servers."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.stopping = threading.Event()
+        self.calls = collections.Counter()
+        self._thread = None
+        self._bind((host, port))
+
+    def _bind(self, address):
+        self.httpd = _HTTPServer(address, _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        # short poll interval keeps ``close`` (awaiting the serving loop) fast
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.01,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.close()
+
+    def close(self):
+        """Stop listening (e.g. once the container publishing the port is stopped)."""
+        if self.httpd is None:
+            return
+        if self._thread is not None:
+            # shutdown blocks until the serving loop exits, hence only if it has been started
+            self.httpd.shutdown()
+            self._thread = None
+        self.httpd.server_close()
+        self.httpd = None
+
+    def reopen(self, port):
+        """Listen again (e.g. once the container publishing the port is started)."""
+        if self.httpd is None:
+            self._bind(("127.0.0.1", port))
+            self.start()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, req, method, path, query, body):  # pragma: no cover
+        raise NotImplementedError
+
+
+class FakeVaultServer(_Server):
+    """Fake Vault HTTP API."""
+
+    def __init__(self, vault, host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self.vault = vault
+
+    def handle(self, req, method, path, query, body):  # noqa: D102
+        self.calls[f"{method} {path}"] += 1
+        vault = self.vault
+        with vault.lock:
+            if path.startswith(("/v1/sys/policy", "/v1/sys/auth")):
+                return self._handle_acl(req, path, body)
+            if path.startswith("/v1/sys/"):
+                return self._handle_sys(req, method, path, body)
+            if path.startswith("/v1/secret/"):
+                return self._handle_secret(req, method, path[len("/v1/"):], body)
+            if path == "/v1/auth/token/lookup-self":
+                ok = req.headers.get("X-Vault-Token") == vault.root_token
+                return req.send_json(200 if ok else 403, {"data": {}})
+            if path.endswith("/role-id"):
+                return req.send_json(200, {"data": {"role_id": "fake-role-id"}})
+            if path.endswith("/secret-id"):
+                return req.send_json(200, {"data": {"secret_id": "fake-secret-id"}})
+            if path.startswith("/v1/"):
+                return req.send_json(204)
+        req.send_json(404, {"errors": []})
+
+    def _handle_sys(self, req, method, path, body):
+        vault = self.vault
+        if path == "/v1/sys/health":
+            return req.send_json(200 if vault.initialized and not vault.sealed else 503, vault.status())
+        if path == "/v1/sys/seal-status":
+            return req.send_json(200, vault.status())
+        if path == "/v1/sys/init":
+            if method == "PUT":
+                return req.send_json(200, vault.init())
+            return req.send_json(200, {"initialized": vault.initialized})
+        if path == "/v1/sys/unseal":
+            vault.unseal(body.get("key"))
+            return req.send_json(200, vault.status())
+        return req.send_json(204)
+
+    def _handle_acl(self, req, path, body):
+        vault = self.vault
+        if path == "/v1/sys/policy":
+            return req.send_json(200, {"policies": sorted(vault.policies)})
+        if path.startswith("/v1/sys/policy/"):
+            vault.policies.add(path.rsplit("/", 1)[-1])
+            return req.send_json(204)
+        if path == "/v1/sys/auth":
+            return req.send_json(200, dict(vault.auth, data=vault.auth))
+        if path.startswith("/v1/sys/auth/"):
+            name = path.rsplit("/", 1)[-1]
+            vault.auth[f"{name}/"] = {"type": body.get("type", name)}
+            return req.send_json(204)
+        return req.send_json(204)
+
+    def _handle_secret(self, req, method, key, body):
+        if method in ("POST", "PUT"):
+            self.vault.secrets[key] = body
+            return req.send_json(204)
+        if key not in self.vault.secrets:
+            return req.send_json(404, {"errors": []})
+        return req.send_json(200, {"data": self.vault.secrets[key]})
+
+
+class FakeConsulServer(_Server):
+    """Fake Consul HTTP API."""
+
+    def __init__(self, consul, host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self.consul = consul
+
+    def handle(self, req, method, path, query, body):  # noqa: D102
+        self.calls[f"{method} {path}"] += 1
+        if path == "/v1/status/leader":
+            return req.send_json(200, "127.0.0.1:8300")
+        if path.startswith("/v1/kv/"):
+            key = path[len("/v1/kv/"):]
+            with self.consul.lock:
+                if key not in self.consul.kv:
+                    return req.send_json(404)
+                return req.send_text(200, self.consul.kv[key])
+        if path == "/v1/txn":
+            with self.consul.lock:
+                for op in body:
+                    kv = op["KV"]
+                    self.consul.kv[kv["Key"]] = base64.b64decode(kv["Value"]).decode()
+            return req.send_json(200, {"Results": [{"KV": {"Key": op["KV"]["Key"]}} for op in body], "Errors": None})
+        if path.startswith("/v1/catalog/service/"):
+            name = path[len("/v1/catalog/service/"):]
+            with self.consul.lock:
+                return req.send_json(200, [e for e in self.consul.catalog.values() if e["ServiceName"] == name])
+        if path.startswith("/v1/agent/service/deregister/"):
+            with self.consul.lock:
+                self.consul.catalog.pop(path[len("/v1/agent/service/deregister/"):], None)
+            return req.send_json(200)
+        if path == "/v1/agent/service/register":
+            with self.consul.lock:
+                self.consul.catalog[body["ID"]] = {
+                    "ServiceID": body["ID"],
+                    "ServiceName": body["Name"],
+                    "ServiceAddress": body.get("Address", ""),
+                    "ServicePort": body.get("Port", 0),
+                    "ServiceTags": body.get("Tags") or [],
+                }
+            return req.send_json(200)
+        req.send_json(404)
+
+
+class FakeOxauthServer(_Server):
+    """Fake oxAuth endpoints (as served by nginx) targeted by load generator.
+
+    :param latency: Time (in seconds) to serve each request.
+    :param error_every: Fail every n-th request with HTTP 503 (never if ``0``).
+    :param client: A ``tuple`` of client ID and secret accepted by token endpoint.
+    """
+
+    def __init__(self, latency=0.0, error_every=0, client=("bench", "secret"), host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self.latency = latency
+        self.error_every = error_every
+        self.credentials = "Basic " + base64.b64encode(":".join(client).encode()).decode()
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def handle(self, req, method, path, query, body):  # noqa: D102
+        self.calls[f"{method} {path}"] += 1
+        with self.lock:
+            self.requests += 1
+            failing = self.error_every and self.requests % self.error_every == 0
+        time.sleep(self.latency)
+
+        if failing:
+            return req.send_json(503, {"error": "service_unavailable"})
+        if method == "GET" and path == "/.well-known/openid-configuration":
+            host = req.headers.get("Host", "")
+            return req.send_json(200, {
+                "issuer": f"https://{host}",
+                "token_endpoint": f"https://{host}/oxauth/restv1/token",
+                "jwks_uri": f"https://{host}/oxauth/restv1/jwks",
+            })
+        if method == "GET" and path == "/oxauth/restv1/jwks":
+            return req.send_json(200, {"keys": [{"kty": "RSA", "kid": "bench", "use": "sig", "alg": "RS256"}]})
+        if method == "POST" and path == "/oxauth/restv1/token":
+            if req.headers.get("Authorization") != self.credentials:
+                return req.send_json(401, {"error": "invalid_client"})
+            return req.send_json(200, {"access_token": uuid.uuid4().hex, "token_type": "bearer", "expires_in": 299})
+        req.send_json(404, {"message": f"page not found: {method} {path}"})
+
+
+class FakeDocker(_Server):
+    """Fake Docker Engine API.
+
+    :param latencies: Overrides of :data:`DEFAULT_LATENCIES`.
+    """
+
+    def __init__(self, latencies=None, host="127.0.0.1", port=0):
+        super().__init__(host, port)
+        self.latencies = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.vault = FakeVault()
+        self.consul = FakeConsul()
+
+        self.lock = threading.RLock()
+        self.containers = collections.OrderedDict()
+        self.networks = {}
+        self.images = {}
+        self.execs = {}
+        self.redis_cluster = False
+        # indexes of OpenDJ backends (by attribute) and their types
+        self.ldap_indexes = {
+            "userRoot": {"objectClass": {"equality"}, "uid": {"equality"}, "exp": {"equality"}},
+            "metric": {"objectClass": {"equality"}},
+            "site": {"objectClass": {"equality"}},
+        }
+        # servers (e.g. fake Vault) listening only while a container publishing their port runs
+        self.published = {}
+        self.subscribers = []
+        self._ip = itertools.count(2)
+
+    @property
+    def base_url(self):
+        """Get URL of the daemon (as in ``DOCKER_HOST``)."""
+        return f"tcp://127.0.0.1:{self.port}"
+
+    # helpers
+
+    def _emit(self, container, action):
+        labels = container["Config"]["Labels"]
+        event = {
+            "status": action,
+            "id": container["Id"],
+            "from": container["Config"]["Image"],
+            "Type": "container",
+            "Action": action,
+            "Actor": {
+                "ID": container["Id"],
+                "Attributes": dict(labels, name=container["Name"][1:], image=container["Config"]["Image"]),
+            },
+            "time": int(time.time()),
+            "timeNano": int(time.time() * 1e9),
+        }
+        for subscriber in list(self.subscribers):
+            subscriber.put(event)
+
+    def _find(self, ref):
+        with self.lock:
+            if ref in self.containers:
+                return self.containers[ref]
+            for container in self.containers.values():
+                if container["Name"] == f"/{ref}" or container["Id"].startswith(ref):
+                    return container
+        return None
+
+    def _match_labels(self, labels, wanted):
+        for item in wanted:
+            key, _, value = item.partition("=")
+            if key not in labels or (value and labels[key] != value):
+                return False
+        return True
+
+    def _summary(self, container):
+        state = container["State"]
+        if state["Running"]:
+            status = "Up Less than a second"
+            health = state.get("Health", {}).get("Status")
+            if health == "starting":
+                status += " (health: starting)"
+            elif health:
+                status += f" ({health})"
+        elif state["Status"] == "created":
+            status = "Created"
+        else:
+            status = f"Exited ({state['ExitCode']}) Less than a second ago"
+
+        return {
+            "Id": container["Id"],
+            "Names": [container["Name"]],
+            "Image": container["Config"]["Image"],
+            "ImageID": container["Image"],
+            "Command": " ".join(container["Config"].get("Cmd") or []),
+            "Created": container["_created"],
+            "Labels": container["Config"]["Labels"],
+            "State": state["Status"],
+            "Status": status,
+            "Ports": [],
+            "HostConfig": {"NetworkMode": container["HostConfig"].get("NetworkMode", "default")},
+            "NetworkSettings": container["NetworkSettings"],
+            "Mounts": [],
+        }
+
+    def _public(self, container):
+        return {k: v for k, v in container.items() if not k.startswith("_")}
+
+    def _health_transition(self, container, generation):
+        time.sleep(self.latencies["health"])
+        with self.lock:
+            state = container["State"]
+            if container["_generation"] != generation or not state["Running"]:
+                return
+            state["Health"]["Status"] = "healthy"
+        self._emit(container, "health_status: healthy")
+
+    def _start(self, container):
+        time.sleep(self.latencies["start"])
+        with self.lock:
+            state = container["State"]
+            if state["Running"]:
+                return
+            container["_generation"] += 1
+            state.update(Status="running", Running=True, StartedAt=_now_iso(), ExitCode=0)
+            if container["Config"].get("Healthcheck", {}).get("Test"):
+                state["Health"] = {"Status": "starting", "FailingStreak": 0, "Log": []}
+                threading.Thread(
+                    target=self._health_transition,
+                    args=(container, container["_generation"]),
+                    daemon=True,
+                ).start()
+        self._emit(container, "start")
+        # one-off containers (e.g. ``run``) execute a command, hence exit right away
+        if container["Config"]["Labels"].get("com.docker.compose.oneoff") == "True":
+            self._stop(container)
+            return
+        self._register(container)
+        for port in self._published_ports(container):
+            self.published[port].reopen(port)
+
+    def _stats(self, container):
+        """Emulate one-shot ``stats`` of a container using a quarter of its memory limit and CPU."""
+        if not container["State"]["Running"]:
+            return {}
+        limit = container["HostConfig"].get("Memory") or 8 * 1024 ** 3
+        # CPU counters grow with time since creation, i.e. 0.25 core of 2 online CPUs
+        system = int(time.time() * 1e9) * 2
+        usage = int((time.time() - container["_created"]) * 1e9 / 4)
+        return {
+            "memory_stats": {"usage": limit // 4 + 1024 ** 2, "limit": limit, "stats": {"cache": 1024 ** 2}},
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": usage},
+                "system_cpu_usage": system,
+                "online_cpus": 2,
+                "throttling_data": {"periods": usage // 10 ** 8, "throttled_periods": usage // 10 ** 9,
+                                    "throttled_time": usage // 100},
+            },
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": usage - 25 * 10 ** 7},
+                "system_cpu_usage": system - 2 * 10 ** 9,
+            },
+        }
+
+    def _published_ports(self, container):
+        bindings = (container["HostConfig"].get("PortBindings") or {}).values()
+        ports = {int(b["HostPort"]) for binding in bindings for b in binding or [] if b.get("HostPort")}
+        return [port for port in ports if port in self.published]
+
+    def _register(self, container, deregister=False):
+        """Emulate registrator, i.e. (de)register containers having ``SERVICE_NAME`` in consul catalog.
+
+        As registrator does, service ID is derived from container name at start time
+        and deregistered by the same ID (even if another container has been registered under it since).
+        """
+        if deregister:
+            with self.consul.lock:
+                self.consul.catalog.pop(container.pop("_service_id", None), None)
+            return
+
+        env = dict(var.partition("=")[::2] for var in container["Config"].get("Env") or [])
+        name = container["Config"]["Labels"].get("SERVICE_NAME") or env.get("SERVICE_NAME")
+        if not name:
+            return
+        service_id = container["_service_id"] = f"registrator:{container['Name'][1:]}:8080"
+        networks = container["NetworkSettings"]["Networks"]
+        with self.consul.lock:
+            self.consul.catalog[service_id] = {
+                "ServiceID": service_id,
+                "ServiceName": name,
+                "ServiceAddress": next((n["IPAddress"] for n in networks.values()), ""),
+                "ServicePort": 8080,
+                "ServiceTags": [],
+            }
+
+    def _stop(self, container, action="stop"):
+        with self.lock:
+            state = container["State"]
+            if not state["Running"]:
+                return
+            state.update(Status="exited", Running=False, FinishedAt=_now_iso(), ExitCode=0)
+            state.pop("Health", None)
+        self._register(container, deregister=True)
+        for port in self._published_ports(container):
+            self.published[port].close()
+        self._emit(container, "die")
+        self._emit(container, action)
+
+    def exec_cli(self, container, cmd):
+        """Run command inside the container; returns output and exit code."""
+        if isinstance(cmd, list):
+            cmd = " ".join(cmd)
+        if cmd.startswith("vault "):
+            return self.vault.exec_cli(cmd)
+        if cmd.startswith("consul snapshot "):
+            return self.consul_snapshot(container, cmd)
+        if cmd.startswith("consul "):
+            return self.consul.exec_cli(cmd)
+        if "id -u" in cmd:
+            return b"1000\n1000\n", 0
+        if cmd.startswith("rm -f "):
+            with self.lock:
+                container.get("_files", {}).pop(cmd.split()[-1], None)
+            return b"", 0
+        if "redis-cli" in cmd:
+            return self.redis_cli(cmd)
+        if "/opt/opendj/bin/" in cmd:
+            return self.opendj_tool(cmd, container)
+        return b"", 0
+
+    def host_path(self, container, path):
+        """Get host path of a path inside the container (if it is bind-mounted)."""
+        for bind in container["HostConfig"].get("Binds") or []:
+            source, target = bind.split(":")[:2]
+            if path == target or path.startswith(f"{target}/"):
+                return source + path[len(target):]
+        return None
+
+    def consul_snapshot(self, container, cmd):
+        """Emulate ``consul snapshot save`` and ``consul snapshot restore`` of KV store."""
+        args = cmd.split()
+        path = self.host_path(container, args[-1])
+        if path is None:
+            return b"Error saving snapshot: path is not mounted", 1
+        if args[2] == "save":
+            with self.consul.lock, open(path, "w") as f:
+                json.dump(self.consul.kv, f)
+            return b"Saved and verified snapshot to index 1\n", 0
+        with self.consul.lock, open(path) as f:
+            self.consul.kv = json.load(f)
+        return b"Restored snapshot\n", 0
+
+    def opendj_tool(self, cmd, container=None):
+        """Emulate ``dsconfig`` (listing indexes and batch of index changes), ``rebuild-index`` and ``backup``."""
+        password_file = re.search(r"--bindPasswordFile (\S+)", cmd)
+        if password_file and password_file.group(1) not in (container or {}).get("_files", {}):
+            return f"Unable to read password file {password_file.group(1)}\n".encode(), 1
+        if "list-backend-indexes" in cmd:
+            backend = re.search(r"--backend-name (\S+)", cmd).group(1)
+            lines = [f"{name}\t{', '.join(sorted(types))}" for name, types in self.ldap_indexes[backend].items()]
+            return "\n".join(lines).encode() + b"\n", 0
+        if "--batchFilePath" in cmd:
+            # batch lines are passed as positional arguments of ``sh -c``
+            for match in re.finditer(r"(create-backend-index|set-backend-index-prop) --backend-name (\S+) "
+                                     r"--index-name (\S+)((?: --(?:set|add) index-type:\w+)+)", cmd):
+                _, backend, name, types = match.groups()
+                indexes = self.ldap_indexes[backend]
+                indexes.setdefault(name, set()).update(re.findall(r"index-type:(\w+)", types))
+            return b"The server was configured successfully\n", 0
+        if "rebuild-index" in cmd:
+            return b"Rebuild Index task completed successfully\n", 0
+        if "/opt/opendj/bin/backup " in cmd:
+            return b"The backup process completed successfully\n", 0
+        return b"", 0
+
+    def redis_cli(self, cmd):
+        """Emulate ``redis-cli`` subcommands used to bootstrap Redis cluster."""
+        if "--cluster create" in cmd:
+            self.redis_cluster = True
+            return b"[OK] All 16384 slots covered.\n", 0
+        if "cluster info" in cmd:
+            return f"cluster_state:{'ok' if self.redis_cluster else 'fail'}\n".encode(), 0
+        return b"PONG\n", 0
+
+    # routing
+
+    def handle(self, req, method, path, query, body):  # noqa: C901, D102
+        path = re.sub(r"^/v[\d.]+/", "/", path)
+        route = re.sub(r"/(containers|exec|networks|volumes)/(?!json$|create$|prune$)[^/]+", r"/\1/{id}", path)
+        route = re.sub(r"^/images/.+/json$", "/images/{name}/json", route)
+        self.calls[f"{method} {route}"] += 1
+
+        if self.latencies["api"]:
+            time.sleep(self.latencies["api"])
+
+        if path == "/_ping":
+            return req.send_text(200, "OK")
+        if path == "/version":
+            return req.send_json(200, {
+                "ApiVersion": API_VERSION, "MinAPIVersion": "1.12", "Version": "19.03.15",
+                "Os": "linux", "Arch": "amd64", "KernelVersion": "5.4.0",
+            })
+        if path == "/info":
+            return req.send_json(200, {
+                "ServerVersion": "19.03.15", "NCPU": 4, "MemTotal": 8 * 1024 ** 3,
+                "Swarm": {"LocalNodeState": "inactive"},
+            })
+
+        if path == "/events":
+            return self._events(req, query)
+
+        if path.startswith("/containers") or path.startswith("/exec"):
+            return self._handle_containers(req, method, path, query, body)
+        if path.startswith("/images"):
+            return self._handle_images(req, method, path, query, body)
+        if path.startswith("/networks"):
+            return self._handle_networks(req, method, path, query, body)
+        if path.startswith("/volumes"):
+            if method == "GET" and path != "/volumes":
+                return req.send_json(404, {"message": "no such volume"})
+            return req.send_json(201 if method == "POST" else 200, {"Volumes": [], "Name": body.get("Name")})
+
+        req.send_json(404, {"message": f"page not found: {method} {path}"})
+
+    def _events(self, req, query):
+        filters = json.loads(query.get("filters") or "{}")
+        subscriber = queue.Queue()
+        self.subscribers.append(subscriber)
+        req.start_chunked()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    event = subscriber.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+                if filters.get("type") and event["Type"] not in filters["type"]:
+                    continue
+                if filters.get("event") and event["Action"].split(":")[0] not in filters["event"]:
+                    continue
+                if not self._match_labels(event["Actor"]["Attributes"], filters.get("label", [])):
+                    continue
+                req.write_chunk(json.dumps(event) + "\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.subscribers.remove(subscriber)
+            with contextlib.suppress(OSError):
+                req.end_chunked()
+
+    def _handle_containers(self, req, method, path, query, body):  # noqa: C901
+        parts = path.strip("/").split("/")
+
+        if path == "/containers/json":
+            filters = json.loads(query.get("filters") or "{}")
+            show_all = query.get("all") in ("1", "true", "True")
+            with self.lock:
+                result = []
+                for container in self.containers.values():
+                    if not show_all and not container["State"]["Running"]:
+                        continue
+                    if not self._match_labels(container["Config"]["Labels"], filters.get("label", [])):
+                        continue
+                    if filters.get("name") and not any(
+                        re.search(name, container["Name"]) for name in filters["name"]
+                    ):
+                        continue
+                    if filters.get("status") and container["State"]["Status"] not in filters["status"]:
+                        continue
+                    health = (container["State"].get("Health") or {}).get("Status", "none")
+                    if filters.get("health") and health not in filters["health"]:
+                        continue
+                    result.append(self._summary(container))
+            return req.send_json(200, result)
+
+        if path == "/containers/create":
+            return self._create(req, query, body)
+
+        if parts[0] == "exec":
+            return self._handle_exec(req, method, parts, body)
+
+        container = self._find(parts[1])
+        if container is None:
+            return req.send_json(404, {"message": f"No such container: {parts[1]}"})
+
+        action = parts[2] if len(parts) > 2 else ""
+
+        if method == "GET" and action == "json":
+            with self.lock:
+                return req.send_json(200, self._public(container))
+        if method == "DELETE":
+            with self.lock:
+                self.containers.pop(container["Id"], None)
+            self._emit(container, "destroy")
+            return req.send_json(204)
+        if action == "start":
+            self._start(container)
+            return req.send_json(204)
+        if action in ("stop", "kill"):
+            self._stop(container, action)
+            return req.send_json(204)
+        if action == "restart":
+            self._stop(container)
+            self._start(container)
+            return req.send_json(204)
+        if action == "wait":
+            while container["State"]["Running"] and not self.stopping.is_set():
+                time.sleep(0.05)
+            return req.send_json(200, {"StatusCode": container["State"]["ExitCode"]})
+        if action == "rename":
+            with self.lock:
+                container["Name"] = f"/{query['name']}"
+            return req.send_json(204)
+        if action == "logs":
+            return self._logs(req, container, query)
+        if action == "exec":
+            exec_id = uuid.uuid4().hex
+            with self.lock:
+                self.execs[exec_id] = {"container": container, "cmd": body.get("Cmd"), "ExitCode": None}
+            return req.send_json(201, {"Id": exec_id})
+        if action == "stats":
+            time.sleep(self.latencies["stats"])
+            return req.send_json(200, container.get("_stats") or self._stats(container))
+        if action == "top":
+            return req.send_json(200, {"Titles": [], "Processes": []})
+        if method == "PUT" and action == "archive":
+            with tarfile.open(fileobj=io.BytesIO(req.raw_body)) as tar:
+                for member in tar.getmembers():
+                    data = tar.extractfile(member).read()
+                    with self.lock:
+                        container.setdefault("_files", {})[f"{query['path']}/{member.name}"] = (data, member.mode)
+            return req.send_json(200)
+        if action in ("pause", "unpause", "attach"):
+            return req.send_json(204)
+
+        req.send_json(404, {"message": f"page not found: {method} {path}"})
+
+    def _create(self, req, query, body):
+        name = query.get("name") or uuid.uuid4().hex[:12]
+        with self.lock:
+            if self._find(name) is not None:
+                return req.send_json(409, {"message": f'Conflict. The container name "/{name}" is already in use'})
+
+            cid = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+            image = body.get("Image", "")
+            networks = {}
+            for net, cfg in ((body.get("NetworkingConfig") or {}).get("EndpointsConfig") or {}).items():
+                networks[net] = self._endpoint(cid, cfg)
+
+            container = {
+                "Id": cid,
+                "Name": f"/{name}",
+                "Created": _now_iso(),
+                "Image": self.images.get(image, {}).get("Id", ""),
+                "Config": {
+                    "Image": image,
+                    "Labels": body.get("Labels") or {},
+                    "Env": body.get("Env") or [],
+                    "Cmd": body.get("Cmd"),
+                    "Hostname": body.get("Hostname") or cid[:12],
+                    "Healthcheck": body.get("Healthcheck") or {},
+                    "Tty": bool(body.get("Tty")),
+                },
+                "HostConfig": body.get("HostConfig") or {},
+                "State": {
+                    "Status": "created", "Running": False, "Paused": False, "Restarting": False,
+                    "OOMKilled": False, "Dead": False, "ExitCode": 0,
+                    "StartedAt": "0001-01-01T00:00:00Z", "FinishedAt": "0001-01-01T00:00:00Z",
+                },
+                "NetworkSettings": {"Networks": networks, "Ports": {}},
+                "Mounts": [],
+                "RestartCount": 0,
+                "_created": int(time.time()),
+                "_generation": 0,
+                "_logs": [f"{name} is starting\n", f"INFO - {name} is ready\n"],
+            }
+            self.containers[cid] = container
+        self._emit(container, "create")
+        req.send_json(201, {"Id": cid, "Warnings": []})
+
+    def _endpoint(self, cid, cfg):
+        aliases = list((cfg or {}).get("Aliases") or [])
+        if cid[:12] not in aliases:
+            aliases.append(cid[:12])
+        return {"Aliases": aliases, "IPAddress": f"172.18.0.{next(self._ip)}", "NetworkID": ""}
+
+    def _handle_exec(self, req, method, parts, body):
+        exec_ = self.execs.get(parts[1])
+        if exec_ is None:
+            return req.send_json(404, {"message": "No such exec instance"})
+
+        if parts[2] == "json":
+            return req.send_json(200, {"ExitCode": exec_["ExitCode"], "Running": False})
+
+        time.sleep(self.latencies["exec"])
+        output, exit_code = self.exec_cli(exec_["container"], exec_["cmd"])
+        exec_["ExitCode"] = exit_code
+
+        # emulate hijacked connection which is read until closed
+        req.close_connection = True
+        req.send_response(200)
+        req.send_header("Content-Type", "application/vnd.docker.raw-stream")
+        req.send_header("Connection", "close")
+        req.end_headers()
+        req.wfile.flush()
+        # let the client consume response headers before the payload
+        time.sleep(0.005)
+        if output:
+            req.wfile.write(struct.pack(">BxxxL", 1, len(output)) + output)
+        req.wfile.flush()
+
+    def _logs(self, req, container, query):
+        req.start_chunked("application/vnd.docker.raw-stream")
+        lines = list(container["_logs"])
+        tail = query.get("tail", "all")
+        if tail not in ("all", ""):
+            lines = lines[-int(tail):] if int(tail) else []
+        timestamps = query.get("timestamps") in ("1", "true", "True")
+        for line in lines:
+            if timestamps:
+                line = f"{_now_iso()} {line}"
+            data = line.encode()
+            req.write_chunk(struct.pack(">BxxxL", 1, len(data)) + data)
+
+        if query.get("follow") in ("1", "true", "True"):
+            while container["State"]["Running"] and not self.stopping.is_set():
+                time.sleep(0.05)
+        req.end_chunked()
+
+    def _handle_images(self, req, method, path, query, body):
+        if path == "/images/json":
+            return req.send_json(200, [
+                {"Id": img["Id"], "RepoTags": [name], "RepoDigests": img["RepoDigests"]}
+                for name, img in self.images.items()
+            ])
+
+        if path == "/images/create":
+            name = query.get("fromImage", "")
+            tag = query.get("tag") or "latest"
+            ref = f"{name}:{tag}" if ":" not in name.rsplit("/", 1)[-1] else name
+            req.start_chunked()
+            req.write_chunk(json.dumps({"status": f"Pulling from {name}", "id": tag}) + "\n")
+            # simulate download progress of two layers
+            layers = [hashlib.sha256(f"{ref}{i}".encode()).hexdigest()[:12] for i in range(2)]
+            for current in (PULL_LAYER_SIZE // 2, PULL_LAYER_SIZE):
+                time.sleep(self.latencies["pull"] / 2)
+                for layer in layers:
+                    req.write_chunk(json.dumps({
+                        "status": "Downloading",
+                        "id": layer,
+                        "progressDetail": {"current": current, "total": PULL_LAYER_SIZE},
+                    }) + "\n")
+            for layer in layers:
+                req.write_chunk(json.dumps({"status": "Pull complete", "id": layer}) + "\n")
+            digest = "sha256:" + hashlib.sha256(ref.encode()).hexdigest()
+            with self.lock:
+                self.images[ref] = {
+                    "Id": "sha256:" + hashlib.sha256(digest.encode()).hexdigest(),
+                    "RepoTags": [ref],
+                    "RepoDigests": [f"{name}@{digest}"],
+                }
+            req.write_chunk(json.dumps({"status": f"Digest: {digest}"}) + "\n")
+            req.write_chunk(json.dumps({"status": f"Status: Downloaded newer image for {ref}"}) + "\n")
+            return req.end_chunked()
+
+        match = re.match(r"^/images/(.+)/json$", path)
+        if match and method == "GET":
+            ref = match.group(1)
+            if ":" not in ref.rsplit("/", 1)[-1] and not ref.startswith("sha256:"):
+                ref += ":latest"
+            with self.lock:
+                image = self.images.get(ref)
+                if image is None:
+                    image = next((img for img in self.images.values() if img["Id"] == ref), None)
+            if image is None:
+                return req.send_json(404, {"message": f"No such image: {ref}"})
+            return req.send_json(200, dict(image, Config={}, ContainerConfig={}))
+
+        req.send_json(404, {"message": f"page not found: {method} {path}"})
+
+    def _handle_networks(self, req, method, path, query, body):
+        parts = path.strip("/").split("/")
+
+        if path == "/networks" and method == "GET":
+            with self.lock:
+                return req.send_json(200, list(self.networks.values()))
+        if path == "/networks/create":
+            name = body["Name"]
+            with self.lock:
+                self.networks[name] = {
+                    "Name": name, "Id": uuid.uuid4().hex, "Driver": body.get("Driver") or "bridge",
+                    "Options": body.get("Options") or {}, "Labels": body.get("Labels") or {},
+                    "Internal": False, "EnableIPv6": False, "IPAM": {"Driver": "default", "Config": []},
+                    "Containers": {},
+                }
+            return req.send_json(201, {"Id": self.networks[name]["Id"], "Warning": ""})
+
+        with self.lock:
+            network = self.networks.get(parts[1]) or next(
+                (net for net in self.networks.values() if net["Id"] == parts[1]), None
+            )
+        if network is None:
+            return req.send_json(404, {"message": f"network {parts[1]} not found"})
+
+        action = parts[2] if len(parts) > 2 else ""
+        if method == "GET":
+            return req.send_json(200, network)
+        if method == "DELETE":
+            with self.lock:
+                self.networks.pop(network["Name"], None)
+            return req.send_json(204)
+        if action in ("connect", "disconnect"):
+            container = self._find(body.get("Container", ""))
+            if container is None:
+                return req.send_json(404, {"message": "No such container"})
+            with self.lock:
+                networks = container["NetworkSettings"]["Networks"]
+                if action == "connect":
+                    networks[network["Name"]] = self._endpoint(container["Id"], body.get("EndpointConfig"))
+                else:
+                    networks.pop(network["Name"], None)
+            return req.send_json(200)
+
+        req.send_json(404, {"message": f"page not found: {method} {path}"})
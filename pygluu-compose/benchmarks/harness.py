@@ -0,0 +1,82 @@
+"""Helpers shared by benchmarks to run commands against fake Docker daemon."""
+
+import contextlib
+import os
+import pathlib
+import tempfile
+from unittest import mock
+
+from fakedocker import FakeConsulServer
+from fakedocker import FakeDocker
+from fakedocker import FakeVaultServer
+from pygluu.compose.app import App
+
+# docker-compose keeps reference to output stream across runs, hence a long-lived stream
+DEVNULL = open(os.devnull, "w")
+
+SETTINGS = """
+HOST_IP = "127.0.0.1"
+DOMAIN = "demoexample.gluu.org"
+ADMIN_PW = "Secret1234%"
+LDAP_PW = "Secret1234%"
+EMAIL = "support@gluu.org"
+ORG_NAME = "Gluu"
+COUNTRY_CODE = "US"
+STATE = "TX"
+CITY = "Austin"
+SVC_NGINX_PORTS = False
+"""
+
+
+@contextlib.contextmanager
+def workdir(settings=SETTINGS):
+    """Create temporary working directory populated by ``init`` command."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            with contextlib.redirect_stdout(DEVNULL):
+                app = App()
+                app.touch_files()
+                app.copy_templates()
+            pathlib.Path("settings.py").write_text(settings)
+            yield tmpdir
+        finally:
+            os.chdir(cwd)
+
+
+@contextlib.contextmanager
+def fake_stack(latencies=None):
+    """Run fake Docker daemon, Vault, and Consul servers.
+
+    :returns: A ``tuple`` of fake Docker, Vault, and Consul servers (Vault or Consul is ``None``
+              if its port is taken, hence CLI fallback is used).
+    """
+    docker = FakeDocker(latencies).start()
+    servers = {"docker": docker}
+
+    for name, cls, state, port in [
+        ("vault", FakeVaultServer, docker.vault, 8200),
+        ("consul", FakeConsulServer, docker.consul, 8500),
+    ]:
+        # fallback to CLI (exec) if the published port is taken
+        with contextlib.suppress(OSError):
+            servers[name] = cls(state, port=port)
+            # the port is published by container, hence listens only while the container runs
+            servers[name].close()
+            docker.published[port] = servers[name]
+
+    env = {"DOCKER_HOST": docker.base_url, "COMPOSE_PROJECT_NAME": "bench"}
+    try:
+        with mock.patch.dict(os.environ, env):
+            yield servers
+    finally:
+        for server in servers.values():
+            server.stop()
+
+
+@contextlib.contextmanager
+def quiet():
+    """Suppress output of commands."""
+    with contextlib.redirect_stdout(DEVNULL), contextlib.redirect_stderr(DEVNULL):
+        yield
@@ -1,30 +1,32 @@
 """Application to manage containers."""
 
 import contextlib
-import io
+import functools
 import ipaddress
 import json
 import os
 import pathlib
 import re
-import shutil
-import socket
+import threading
 import time
 
 import click
-import click_spinner
-import stdiomask
-from compose.cli.command import get_project
-from compose.cli.command import get_config_path_from_options
-from compose.cli.main import TopLevelCommand
-from compose.config.config import yaml
-from compose.config.environment import Environment
 
+from .profiler import span
 from .settings import DEFAULT_SETTINGS
 from .settings import COMPOSE_MAPPINGS
+from .settings import SCALE_MAPPINGS
 from .version import __gluu_version__
+from .wait import wait_for
 
 CONFIG_DIR = "volumes/config-init/db"
+
+# directory (relative to working directory) to store internal state, e.g. caches
+STATE_DIR = ".pygluu"
+
+# reference to environment variable in Compose files, i.e. ``${VAR}``, ``${VAR:-default}``, or ``$VAR``
+COMPOSE_VARIABLE_RE = re.compile(r"\$(?:\{([_a-zA-Z][_a-zA-Z0-9]*)|([_a-zA-Z][_a-zA-Z0-9]*))")
+
 EMAIL_RGX = re.compile(
     r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
 )
@@ -32,26 +34,64 @@ PASSWD_RGX = re.compile(
     r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*\W)[a-zA-Z0-9\S]{6,}$"
 )
 
+# services defined in ``job.*.yml`` run to completion, hence excluded from readiness check
+JOB_SERVICES = tuple(
+    filename.split(".")[1] for key, filename in COMPOSE_MAPPINGS.items()
+    if key.startswith("JOB_")
+)
+
+# known start order of services; each stage is started after the previous (non-empty) stage,
+# secrets are bootstrapped right after the stage of ``vault`` (as is redis cluster after the stage of ``redis``),
+# and unlisted services go to the last stage
+STARTUP_STAGES = (
+    ("consul",),
+    ("vault", "registrator"),
+    ("configuration",),
+    ("ldap", "mysql", "postgresql", "redis", "jackrabbit"),
+    ("persistence",),
+)
+
+
+def _write_if_changed(path, content):
+    """Write a generated file only if its content changed, hence its modification time is kept intact otherwise.
+
+    :param path: Path to the file (its parent directory is created if missing).
+    :param content: Content of the file.
+    """
+    path = pathlib.Path(path)
+    if path.is_file() and path.read_text() == content:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def _startup_stage(name):
+    """Get index of startup stage (see :data:`STARTUP_STAGES`) of a service.
+
+    Nodes of Redis topology are staged as ``redis``, and unlisted services get index of the last stage.
+    """
+    from .redis_topology import is_redis_node
+
+    name = "redis" if is_redis_node(name) else name
+    return next((index for index, stage in enumerate(STARTUP_STAGES) if name in stage), len(STARTUP_STAGES))
+
 
 class ContainerHelper:
     """Thin wrapper to act with container.
 
     :param name: Service name.
     :param docker_client: An instance of Docker client.
+    :param snapshot: An instance of :class:`~pygluu.compose.status.StatusSnapshot`
+                     (taken from current working directory if omitted).
     """
 
-    def __init__(self, name, docker_client):
-        containers = docker_client.containers(filters={'label': [
-            'com.docker.compose.service=' + name,
-            'com.docker.compose.project.working_dir=' + os.getcwd(),
-        ]})
-        if containers:
-            names = containers[0]['Names']
-            if names:
-                # get first name of container and crop leading slash
-                name = names[0][1:]
-
-        self.name = name
+    def __init__(self, name, docker_client, snapshot=None):
+        from .status import StatusSnapshot
+
+        if snapshot is None:
+            snapshot = StatusSnapshot.fetch(docker_client, working_dir=os.getcwd())
+
+        self.name = snapshot.container_name(name) or name
         self.docker = docker_client
 
     def exec(self, cmd):  # noqa: A003
@@ -60,16 +100,230 @@ class ContainerHelper:
         :param cmd: Command string to be executed.
         :returns: A ``tuple`` of raw output and exit code.
         """
-        exec_id = self.docker.exec_create(self.name, cmd).get("Id")
-        retval = self.docker.exec_start(exec_id)
-        retcode = self.docker.exec_inspect(exec_id).get("ExitCode")
+        # span is named by leading subcommands only to keep arguments (e.g. tokens) out of profile
+        words = []
+        for word in cmd.split()[:3]:
+            if not re.fullmatch(r"[a-z_-]+", word):
+                break
+            words.append(word)
+
+        with span(f"{self.name}: {' '.join(words)}", "exec"):
+            exec_id = self.docker.exec_create(self.name, cmd).get("Id")
+            retval = self.docker.exec_start(exec_id)
+            retcode = self.docker.exec_inspect(exec_id).get("ExitCode")
         return retval, retcode
 
+    @contextlib.contextmanager
+    def secret_file(self, content):
+        """Write a secret into a temporary file (readable only by user of the container) inside the container.
+
+        Unlike command arguments, the file is neither listed by ``ps`` nor kept by exec instances.
+
+        :param content: Content of the file.
+        :returns: Context manager yielding path of the file, which is removed on exit.
+        """
+        import io
+        import tarfile
+        import uuid
+
+        # the file is owned by user running exec commands, which is not necessarily root
+        output, _ = self.exec("sh -c 'id -u; id -g'")
+        ids = output.decode(errors="replace").split()
+
+        data = content.encode()
+        info = tarfile.TarInfo(f".pygluu-{uuid.uuid4().hex}")
+        info.size = len(data)
+        info.mode = 0o600
+        if len(ids) == 2 and all(id_.isdigit() for id_ in ids):
+            info.uid, info.gid = int(ids[0]), int(ids[1])
+
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w") as tar:
+            tar.addfile(info, io.BytesIO(data))
+
+        path = f"/tmp/{info.name}"
+        self.docker.put_archive(self.name, "/tmp", archive.getvalue())
+        try:
+            yield path
+        finally:
+            self.exec(f"rm -f {path}")
+
+
+class ReadinessWatcher:
+    """Watch services until all of them are ready.
+
+    Readiness is driven by container transitions from Docker events stream
+    (``health_status: healthy`` for services with healthcheck, ``start`` for the rest),
+    combined with HTTP probes (using adaptive backoff) for selected services.
+
+    :param project: An instance of ``compose.project.Project``.
+    :param services: List of service names to watch.
+    :param probes: A mapping of service name and URL to probe.
+    :param started_at: Reference time (from ``time.monotonic``) to calculate time-to-ready.
+    """
+
+    #: Initial delay (in seconds) between HTTP probes.
+    PROBE_MIN_DELAY = 0.25
+
+    #: Maximum delay (in seconds) between HTTP probes.
+    PROBE_MAX_DELAY = 10.0
+
+    #: Interval (in seconds) to resync states in case of missed events.
+    RESYNC_INTERVAL = 5.0
+
+    def __init__(self, project, services, probes=None, started_at=None):
+        self.project = project
+        self.services = list(services)
+        self.probes = {
+            name: url for name, url in (probes or {}).items()
+            if name in self.services
+        }
+        self.started_at = started_at or time.monotonic()
+        self.ready = {}
+
+        self._changed = threading.Event()
+        self._lock = threading.Lock()
+        self._stream = None
+        self._probe_delay = dict.fromkeys(self.probes, self.PROBE_MIN_DELAY)
+        self._probe_at = dict.fromkeys(self.probes, 0.0)
+
+    def _has_healthcheck(self, service):
+        healthcheck = self.project.get_service(service).options.get("healthcheck") or {}
+        return bool(healthcheck) and not healthcheck.get("disable", False)
+
+    def _mark_ready(self, service):
+        with self._lock:
+            if service in self.services and service not in self.ready:
+                self.ready[service] = time.monotonic() - self.started_at
+        self._changed.set()
+
+    def _rewind_probe(self, service):
+        # container state has changed, probe the endpoint as soon as possible
+        if service in self.probes:
+            self._probe_delay[service] = self.PROBE_MIN_DELAY
+            self._probe_at[service] = 0.0
+            self._changed.set()
+
+    def _watch_events(self):
+        try:
+            self._stream = self.project.client.events(
+                filters={
+                    "type": "container",
+                    "label": f"com.docker.compose.project={self.project.name}",
+                },
+                decode=True,
+            )
+            for event in self._stream:
+                attrs = event.get("Actor", {}).get("Attributes", {})
+                service = attrs.get("com.docker.compose.service", "")
+                status = event.get("status", "")
+
+                if service not in self.services:
+                    continue
+
+                if status == "health_status: healthy":
+                    self._mark_ready(service)
+                elif status == "start":
+                    if not self._has_healthcheck(service):
+                        self._mark_ready(service)
+                    self._rewind_probe(service)
+        except Exception as exc:  # noqa: B902
+            # periodic resync acts as fallback
+            print(f"\n[W] Unable to watch Docker events; reason={exc}")
+
+    def _resync(self):
+        from .status import StatusSnapshot
+
+        snapshot = StatusSnapshot.fetch(self.project.client, self.project.name, health=True)
+        for service in self.pending:
+            containers = snapshot.running(service)
+            if self._has_healthcheck(service):
+                containers = [c for c in containers if c.health == "healthy"]
+            if containers:
+                self._mark_ready(service)
+
+    def _probe(self, url):
+        import requests
+
+        with contextlib.suppress(requests.exceptions.RequestException):
+            return requests.get(url, verify=False, timeout=5).ok
+        return False
+
+    def _run_probes(self):
+        now = time.monotonic()
+        for service, url in self.probes.items():
+            if service in self.ready or now < self._probe_at[service]:
+                continue
+
+            if self._probe(url):
+                self._mark_ready(service)
+                continue
+
+            delay = self._probe_delay[service]
+            self._probe_at[service] = time.monotonic() + delay
+            self._probe_delay[service] = min(delay * 2, self.PROBE_MAX_DELAY)
+
+    @property
+    def pending(self):
+        """Get services which are not ready yet."""
+        return [svc for svc in self.services if svc not in self.ready]
+
+    def wait(self, timeout):
+        """Wait until all services are ready.
+
+        :param timeout: Maximum time (in seconds) to wait.
+        :returns: ``True`` if all services are ready, otherwise ``False``.
+        """
+        deadline = time.monotonic() + timeout
+        threading.Thread(target=self._watch_events, daemon=True).start()
+
+        resync_at = 0.0
+        try:
+            while self.pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    return False
+
+                if now >= resync_at:
+                    self._resync()
+                    resync_at = now + self.RESYNC_INTERVAL
+
+                self._run_probes()
+
+                wakeups = [deadline, resync_at] + [
+                    self._probe_at[svc] for svc in self.probes if svc not in self.ready
+                ]
+                self._changed.wait(max(min(wakeups) - time.monotonic(), 0))
+                self._changed.clear()
+            return True
+        finally:
+            if self._stream is not None:
+                with contextlib.suppress(Exception):
+                    self._stream.close()
+
+    def report(self):
+        """Print time-to-ready of each service."""
+        if self.ready:
+            print("[I] Time-to-ready per service:")
+            for service, elapsed in sorted(self.ready.items(), key=lambda item: item[1]):
+                print(f"    {service:<24}{elapsed:>8.1f}s")
+
+            slowest = max(self.ready, key=self.ready.get)
+            print(f"[I] Slowest service is {slowest} ({self.ready[slowest]:.1f}s)")
+
+        if self.pending:
+            print(f"[W] Services not ready yet: {', '.join(self.pending)}")
+
 
 class Secret:
     """Thin wrapper to interact with Vault container.
 
+    Vault HTTP API is used (if available), otherwise commands are executed
+    using Vault CLI inside the container.
+
     :param docker_client: An instance of Docker client.
+    :param api: An instance of :class:`~pygluu.compose.backends.VaultAPI` (optional).
+    :param snapshot: An instance of :class:`~pygluu.compose.status.StatusSnapshot` (optional).
     """
 
     UNSEAL_KEY_RE = re.compile(r"^Unseal Key 1: (.+)", re.M)
@@ -79,15 +333,41 @@ class Secret:
 
     ROOT_TOKEN_RE = re.compile(r"^Initial Root Token: (.+)", re.M)
 
-    def __init__(self, docker_client):
-        self.container = ContainerHelper("vault", docker_client)
+    POLICY_FILE = "vault_gluu_policy.hcl"
+
+    def __init__(self, docker_client, api=None, snapshot=None):
+        self.container = ContainerHelper("vault", docker_client, snapshot)
+        self.api = api
+        self._token = ""
+
+    def _disable_api(self, exc):
+        print(f"[W] Unable to use Vault HTTP API; falling back to Vault CLI; reason={exc}")
+        self.api = None
+        if self._token:
+            self.container.exec("vault login {}".format(self._token))
 
     @contextlib.contextmanager
     def login(self):
         """Log in to Vault using specific token."""
-        token = self.creds["token"]
+        from .backends import APIError
+
+        self._token = token = self.creds["token"]
+
+        def token_accepted():
+            if self.api is not None:
+                try:
+                    self.api.token = token
+                    return self.api.token_valid()
+                except APIError as exc:
+                    self._disable_api(exc)
+
+            _, retcode = self.container.exec("vault login {}".format(token))
+            return retcode == 0
+
         try:
-            self.container.exec("vault login {}".format(token))
+            if not wait_for(token_accepted, "Vault to accept root token").ok:
+                print("[E] Unable to log in to Vault")
+                raise click.Abort()
             yield
         except Exception:  # noqa: B902
             raise
@@ -111,49 +391,109 @@ class Secret:
             token = self.ROOT_TOKEN_RE.findall(txt)[0]
         return {"key": key, "token": token}
 
-    def status(self):
+    def status(self, predicate=None, label="Vault status"):
         """Check Vault status.
 
+        :param predicate: Optional callable to check the status against;
+                          Vault status is polled until the callable returns ``True``.
+        :param label: Short description of the awaited status.
         :returns: A mapping contains of data from Vault status output.
         """
+        import yaml
+
+        from .backends import APIError
+
         print("[I] Checking Vault status")
 
-        status = {}
-        retry = 1
-        while retry <= 3:
-            raw, _ = self.container.exec("vault status -format yaml")
-            with contextlib.suppress(yaml.scanner.ScannerError):
+        def get_status():
+            status = None
+
+            if self.api is not None:
+                try:
+                    status = self.api.seal_status()
+                except APIError as exc:
+                    self._disable_api(exc)
+
+            if status is None:
+                raw, _ = self.container.exec("vault status -format yaml")
                 status = yaml.safe_load(raw)
-                if status:
-                    break
 
-            print("[W] Unable to get seal status in Vault; retrying ...")
-            retry += 1
-            time.sleep(5)
-        return status
+            if isinstance(status, dict) and (predicate is None or predicate(status)):
+                return status
+            return {}
+
+        result = wait_for(get_status, label, exceptions=(yaml.YAMLError,))
+        if not result.ok:
+            print("[E] Unable to get expected status from Vault")
+            raise click.Abort()
+        return result.value
 
     def initialize(self):
         """Initialize Vault."""
+        from .backends import APIError
+
         print("[I] Initializing Vault with 1 recovery key and token")
-        out, _ = self.container.exec(
-            "vault operator init "
-            "-key-shares=1 "
-            "-key-threshold=1 "
-            "-recovery-shares=1 "
-            "-recovery-threshold=1",
-        )
 
-        pathlib.Path("vault_key_token.txt").write_text(out.decode())
+        out = ""
+        if self.api is not None:
+            try:
+                resp = self.api.init()
+                lines = [
+                    f"Unseal Key {idx}: {key}"
+                    for idx, key in enumerate(resp.get("keys_base64") or [], 1)
+                ] + [
+                    f"Recovery Key {idx}: {key}"
+                    for idx, key in enumerate(resp.get("recovery_keys_base64") or [], 1)
+                ]
+                out = "\n".join(lines + ["", f"Initial Root Token: {resp['root_token']}", ""])
+            except APIError as exc:
+                self._disable_api(exc)
+
+        if not out:
+            raw, _ = self.container.exec(
+                "vault operator init "
+                "-key-shares=1 "
+                "-key-threshold=1 "
+                "-recovery-shares=1 "
+                "-recovery-threshold=1",
+            )
+            out = raw.decode()
+
+        pathlib.Path("vault_key_token.txt").write_text(out)
         print("[I] Vault recovery key and root token "
               "saved to vault_key_token.txt")
 
     def unseal(self):
         """Run process to unseal Vault."""
+        from .backends import APIError
+
         print("[I] Unsealing Vault manually")
+
+        if self.api is not None:
+            try:
+                self.api.unseal(self.creds["key"])
+                return
+            except APIError as exc:
+                self._disable_api(exc)
+
         self.container.exec("vault operator unseal {}".format(self.creds["key"]))
 
     def write_policy(self):
         """Create policy required by the application."""
+        from .backends import APIError
+
+        policy_file = pathlib.Path(self.POLICY_FILE)
+
+        if self.api is not None and policy_file.is_file():
+            try:
+                if "gluu" in self.api.policies():
+                    return
+                print("[I] Creating Vault policy for Gluu")
+                self.api.write_policy("gluu", policy_file.read_text())
+                return
+            except APIError as exc:
+                self._disable_api(exc)
+
         policies, _ = self.container.exec("vault policy list")
         if b"gluu" in policies.splitlines():
             return
@@ -163,6 +503,17 @@ class Secret:
 
     def enable_approle(self):
         """Enable Vault's AppRole authentication."""
+        from .backends import APIError
+
+        if self.api is not None:
+            try:
+                self._enable_approle_api()
+                return
+            except APIError as exc:
+                self._disable_api(exc)
+
+        import yaml
+
         raw, retcode = self.container.exec("vault auth list -format yaml")
 
         if retcode != 0:
@@ -193,57 +544,101 @@ class Secret:
         secret_id, _ = self.container.exec("vault write -f -field=secret_id auth/approle/role/gluu/secret-id")
         pathlib.Path("vault_secret_id.txt").write_text(secret_id.decode())
 
+    def _enable_approle_api(self):
+        if "approle/" in self.api.auth_methods():
+            return
+
+        print("[I] Enabling Vault AppRole auth")
+
+        self.api.enable_auth("approle")
+        self.api.write("auth/approle/role/gluu", {
+            "policies": "gluu",
+            "secret_id_ttl": 0,
+            "token_num_uses": 0,
+            "token_ttl": "20m",
+            "token_max_ttl": "30m",
+            "secret_id_num_uses": 0,
+        })
+
+        role_id = self.api.read("auth/approle/role/gluu/role-id")["role_id"]
+        pathlib.Path("vault_role_id.txt").write_text(role_id)
+
+        secret_id = self.api.write("auth/approle/role/gluu/secret-id")["secret_id"]
+        pathlib.Path("vault_secret_id.txt").write_text(secret_id)
+
     def setup(self):
         """Set up Vault for the application."""
+        if self.api is not None and not wait_for(self.api.available, "Vault HTTP API", timeout=10.0).ok:
+            print("[W] Vault HTTP API is unreachable; falling back to Vault CLI")
+            self.api = None
+
         status = self.status()
         if not status["initialized"]:
-            self.initialize()
+            with span("initialize", "vault"):
+                self.initialize()
+                status = self.status(lambda st: st["initialized"], "Vault to be initialized")
 
-        # double check status
-        time.sleep(5)
-        status = self.status()
         if status["sealed"]:
-            self.unseal()
+            with span("unseal", "vault"):
+                # auto-unseal (non-shamir seal) is handled by Vault itself
+                if status.get("type", "shamir") == "shamir":
+                    self.unseal()
+                self.status(lambda st: not st["sealed"], "Vault to be unsealed")
 
-        time.sleep(5)
         with self.login():
-            time.sleep(5)
-            self.write_policy()
-            time.sleep(5)
-            self.enable_approle()
+            with span("write policy", "vault"):
+                self.write_policy()
+            with span("enable approle", "vault"):
+                self.enable_approle()
 
 
 class Config:
     """Thin wrapper to interact with Consul container.
 
+    Consul HTTP API is used (if available), otherwise commands are executed
+    using Consul CLI inside the container.
+
     :param docker_client: An instance of Docker client.
+    :param api: An instance of :class:`~pygluu.compose.backends.ConsulAPI` (optional).
+    :param snapshot: An instance of :class:`~pygluu.compose.status.StatusSnapshot` (optional).
     """
 
-    def __init__(self, docker_client):
-        self.container = ContainerHelper("consul", docker_client)
+    def __init__(self, docker_client, api=None, snapshot=None):
+        self.container = ContainerHelper("consul", docker_client, snapshot)
+        self.api = api
 
     def hostname_from_backend(self):
         """Get hostname from configs backend (Consul).
 
         :returns: Hostname.
         """
+        from .backends import APIError
+
         print("[I] Attempting to gather FQDN from Consul")
 
         hostname = ""
-        retry = 1
 
-        while retry <= 3:
-            value, _ = self.container.exec(
+        def kv_get():
+            nonlocal hostname
+
+            if self.api is not None:
+                with contextlib.suppress(APIError):
+                    hostname = self.api.kv_get("gluu/config/hostname") or ""
+                    return True
+
+            value, retcode = self.container.exec(
                 "consul kv get -http-addr=http://consul:8500 gluu/config/hostname"
             )
-            if not value.startswith(b"Error"):
+            if retcode == 0:
                 hostname = value.strip().decode()
-                break
+                return True
 
-            print("[W] Unable to get FQDN from Consul; retrying ...")
-            retry += 1
-            time.sleep(5)
-        return hostname
+            # missing key means Consul KV is reachable but hostname is not set yet
+            return b"No key exists" in value
+
+        with span("get hostname", "consul"):
+            wait_for(kv_get, "Consul KV to be reachable", timeout=15.0)
+        return hostname.strip()
 
     def hostname_from_file(self, file_):
         """Get hostname defined in a JSON file.
@@ -263,42 +658,201 @@ class App:
 
     def __init__(self):
         self.settings = self.get_settings()
+        self.started_at = time.monotonic()
+
+        # memoized TopLevelCommand (and its project) keyed by Compose files and settings
+        self._tlc_key = None
+        self._tlc = None
+        self._tlc_lock = threading.RLock()
+
+        # memoized dev overrides keyed by Compose files
+        self._dev_overrides_key = None
+        self._dev_overrides = None
+
+        # memoized definitions of scaled services keyed by Compose files
+        self._scale_definitions_key = None
+        self._scale_definitions = None
+
+        # memoized definitions of redis topology keyed by Compose file and topology
+        self._redis_definitions_key = None
+        self._redis_definitions = None
+
+        # fingerprints of services and bootstrap recorded by last successful ``up`` (loaded by ``up``)
+        self._fingerprints = None
+
+        # preflight probes started by ``up`` before the project is resolved
+        self._probes = None
+
+        # memoized projects of nodes (in multi-node mode) keyed by Compose files and settings
+        self._cluster_key = None
+        self._cluster = None
+        self._cluster_lock = threading.RLock()
+
+    def _files_signature(self, files):
+        """Get signature of files based on their path and modification time."""
+        signature = []
+        for file_ in files:
+            try:
+                signature.append((file_, os.stat(file_).st_mtime_ns))
+            except FileNotFoundError:
+                signature.append((file_, None))
+        return tuple(signature)
+
+    def _project_key(self, compose_files):
+        """Get cache key of resolved project."""
+        import hashlib
+
+        settings_hash = hashlib.sha256(
+            json.dumps(self.settings, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return (settings_hash, self._files_signature(compose_files.split(":")))
+
+    def _compose_environment(self, compose_files):
+        """Export settings as environment variables used for interpolation of Compose files.
+
+        :param compose_files: List of Compose files as colon-separated string.
+        :returns: An instance of ``compose.config.environment.Environment``.
+        """
+        from compose.config.environment import Environment
+
+        os.environ["COMPOSE_FILE"] = compose_files
+
+        for k, v in self.settings.items():
+            # structured settings (e.g. ``NODES``) are not used for interpolation
+            if isinstance(v, (dict, list)):
+                continue
+            if isinstance(v, bool):
+                v = f"{v}".lower()
+            if isinstance(v, int):
+                v = str(v)
+            os.environ[k] = v
+
+        env = Environment()
+        env.update(os.environ)
+        return env
 
     @contextlib.contextmanager
     def top_level_cmd(self):
-        """Get TopLevelCommand instance."""
-        try:
+        """Get TopLevelCommand instance.
+
+        The instance (and its project) is resolved once and reused by subsequent calls
+        as long as selected Compose files, their modification time, and settings are unchanged.
+        """
+        with self._tlc_lock:
             compose_files = self.get_compose_files()
-            config_path = get_config_path_from_options(
-                ".",
-                {},
-                {"COMPOSE_FILE": compose_files},
-            )
+            key = self._project_key(compose_files)
 
-            os.environ["COMPOSE_FILE"] = compose_files
+            if key != self._tlc_key:
+                from compose.cli.main import TopLevelCommand
 
-            for k, v in self.settings.items():
-                if isinstance(v, bool):
-                    v = f"{v}".lower()
-                if isinstance(v, int):
-                    v = str(v)
-                os.environ[k] = v
+                env = self._compose_environment(compose_files)
 
-            env = Environment()
-            env.update(os.environ)
+                with span("resolve project", "compose"):
+                    project = self.get_project(compose_files, env)
+                self._tlc = TopLevelCommand(project)
+                self._tlc_key = key
+            tlc = self._tlc
 
-            project = get_project(os.getcwd(), config_path, environment=env)
-            tlc = TopLevelCommand(project)
-            yield tlc
-        except Exception:  # noqa: B902
-            raise
+        yield tlc
+
+    def get_project(self, compose_files, environment):
+        """Resolve project from merged Compose config (see :meth:`load_config`).
+
+        Mirrors ``compose.cli.command.get_project`` except loading of the config.
+
+        :param compose_files: List of Compose files as colon-separated string.
+        :param environment: An instance of ``compose.config.environment.Environment``.
+        :returns: An instance of ``compose.project.Project``.
+        """
+        from compose.cli import errors
+        from compose.cli.command import execution_context_labels
+        from compose.cli.command import get_client
+        from compose.cli.command import get_project_name
+        from compose.project import Project
+
+        config_details, config_data = self.load_config(compose_files, environment)
+        project_name = get_project_name(config_details.working_dir, environment=environment)
+        client = get_client(environment=environment, version=environment.get("COMPOSE_API_VERSION"))
+
+        with errors.handle_connection_errors(client):
+            return Project.from_config(
+                project_name,
+                config_data,
+                client,
+                environment.get("DOCKER_DEFAULT_PLATFORM"),
+                execution_context_labels(config_details, None),
+            )
+
+    def load_config(self, compose_files, environment):
+        """Load merged Compose config, served from on-disk cache if possible.
+
+        The cache is keyed by content of selected Compose files and values of environment
+        variables they reference; on cache hit, parsing, merging, and interpolating
+        Compose files are skipped entirely. The config is cached as JSON (see :mod:`~pygluu.compose.configcache`),
+        and as interpolated config may contain secrets, the cache is only readable by its owner.
+
+        :param compose_files: List of Compose files as colon-separated string.
+        :param environment: An instance of ``compose.config.environment.Environment``.
+        :returns: A ``tuple`` of ``compose.config.config.ConfigDetails`` and merged config.
+        """
+        import hashlib
+
+        from compose import __version__ as compose_version
+        from compose.config import config as compose_config
+
+        from .configcache import dumps
+        from .configcache import loads
+
+        filenames = compose_files.split(":")
+        digest = hashlib.sha256(compose_version.encode())
+        variables = set()
+        for file_ in filenames:
+            content = b""
+            with contextlib.suppress(FileNotFoundError):
+                content = pathlib.Path(file_).read_bytes()
+            digest.update(json.dumps([file_, len(content)]).encode())
+            digest.update(content)
+            for match in COMPOSE_VARIABLE_RE.finditer(content.decode(errors="replace")):
+                variables.add(match.group(1) or match.group(2))
+        digest.update(json.dumps({k: environment.get(k) for k in sorted(variables)}, sort_keys=True).encode())
+        key = digest.hexdigest()
+
+        cache_file = pathlib.Path(STATE_DIR, "compose-config.json")
+        # key is stored on the first line, hence the config is only parsed on cache hit
+        with contextlib.suppress(OSError, ValueError):
+            cached_key, _, text = cache_file.read_text().partition("\n")
+            if cached_key == key:
+                # skip parsing files as their merged config is loaded from cache
+                config_details = compose_config.ConfigDetails(
+                    ".",
+                    [compose_config.ConfigFile(os.path.join(".", f), {}) for f in filenames],
+                    environment,
+                )
+                return config_details, loads(text)
+
+        config_details = compose_config.find(".", filenames, environment)
+        config_data = compose_config.load(config_details)
+
+        with contextlib.suppress(OSError, TypeError):
+            text = dumps(config_data)
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".tmp")
+            with contextlib.suppress(FileNotFoundError):
+                tmp_file.unlink()
+            with os.fdopen(os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+                f.write(f"{key}\n{text}")
+            tmp_file.replace(cache_file)
+            # cache of previous versions was pickled; loading it could run arbitrary code
+            with contextlib.suppress(FileNotFoundError):
+                cache_file.with_name("compose-config.cache").unlink()
+        return config_details, config_data
 
     def get_settings(self):
         """Get merged settings (default and custom settings from local Python file).
 
         :returns: A mapping of pre-populated configs.
         """
-        settings = DEFAULT_SETTINGS
+        settings = dict(DEFAULT_SETTINGS)
         custom_settings = {}
 
         with contextlib.suppress(FileNotFoundError):
@@ -312,8 +866,48 @@ class App:
         }
 
         settings.update(custom_settings)
+
+        # connection to bundled multi-node redis (if any) is derived from its topology
+        topology = self.redis_topology(settings)
+        if topology:
+            settings.update(topology.connection_settings())
+
+        # in multi-node mode, FQDN is resolved to the node running nginx
+        inventory = self.inventory(settings)
+        if inventory and not settings["HOST_IP"]:
+            settings["HOST_IP"] = inventory.node_of("nginx").address
         return settings
 
+    def redis_topology(self, settings=None):
+        """Get topology of bundled Redis.
+
+        :param settings: Settings to read from (current settings if omitted).
+        :returns: An instance of :class:`~pygluu.compose.redis_topology.RedisTopology`
+                  or ``None`` if Redis runs as single node.
+        """
+        from .redis_topology import RedisTopology
+
+        try:
+            return RedisTopology.from_settings(settings or self.settings)
+        except ValueError as exc:
+            print(f"[E] Invalid Redis topology; reason={exc}")
+            raise click.Abort()
+
+    def inventory(self, settings=None):
+        """Get inventory of nodes.
+
+        :param settings: Settings to read from (current settings if omitted).
+        :returns: An instance of :class:`~pygluu.compose.nodes.Inventory`
+                  or ``None`` if all services run on single host.
+        """
+        from .nodes import Inventory
+
+        try:
+            return Inventory.from_settings(settings or self.settings)
+        except ValueError as exc:
+            print(f"[E] Invalid inventory of nodes; reason={exc}")
+            raise click.Abort()
+
     def get_compose_files(self):
         """Get all enabled Compose files.
 
@@ -323,9 +917,69 @@ class App:
         for svc, filename in COMPOSE_MAPPINGS.items():
             if all([svc in self.settings, self.settings.get(svc), os.path.isfile(filename)]):
                 files.append(filename)
+        enabled_files = list(files)
+
+        # replace definitions of scaled services (if any) with their replica-safe version
+        replicas = self.replicas()
+        scaled_files = [
+            file_ for file_ in files
+            if file_.startswith("svc.") and replicas.get(file_.split(".")[1], 1) > 1
+        ]
+        if scaled_files:
+            with span("write scale definitions", "compose"):
+                self.write_scale_definitions(scaled_files)
+            files = [file_ for file_ in files if file_ not in scaled_files]
+            files.append("docker-compose.scale.yml")
+
+        # replace single-node redis with multi-node topology (if any)
+        topology = self.redis_topology()
+        if topology and "svc.redis.yml" in files:
+            with span("write redis definitions", "compose"):
+                self.write_redis_definitions(topology)
+            files[files.index("svc.redis.yml")] = "docker-compose.redis.yml"
 
         # add dev override (if any)
         if self.settings.get("ENABLE_DEV_OVERRIDE", False) is True:
+            with span("write dev overrides", "compose"):
+                self.write_dev_overrides(files)
+            files.append("docker-compose.dev.yml")
+
+        # add resources computed from host size (if enabled)
+        if self.settings.get("ENABLE_AUTO_SIZING", False) is True:
+            with span("write sizing overrides", "compose"):
+                self.write_sizing_overrides(enabled_files)
+            files.append("docker-compose.sizing.yml")
+
+        # add tuning of bundled SQL database and connection pools of its clients (if enabled)
+        if self.settings.get("ENABLE_SQL_TUNING", False) is True:
+            plans = self.sql_plans(enabled_files)
+            if plans:
+                with span("write SQL tuning", "compose"):
+                    self.write_sql_tuning(plans)
+                files.append("docker-compose.sql.yml")
+
+        # add JVM heap of OpenDJ computed from its memory limit (if enabled)
+        if self.settings.get("ENABLE_LDAP_TUNING", False) is True and "svc.ldap.yml" in enabled_files:
+            with span("write LDAP tuning", "compose"):
+                self.write_ldap_tuning(self.ldap_plan(enabled_files))
+            files.append("docker-compose.ldap.yml")
+
+        # add custom override (if any)
+        if self.settings.get("ENABLE_OVERRIDE", False) is True and os.path.isfile("docker-compose.override.yml"):
+            files.append("docker-compose.override.yml")
+
+        return ":".join(files)
+
+    def write_dev_overrides(self, files):
+        """Write ``docker-compose.dev.yml`` to override images with their dev version.
+
+        :param files: List of Compose files to get images from.
+        """
+        import yaml
+
+        key = self._files_signature(files)
+
+        if key != self._dev_overrides_key:
             dev_overrides = {"version": "2.4", "services": {}}
 
             for file_ in files:
@@ -346,132 +1000,600 @@ class App:
                     finally:
                         dev_overrides["services"][name] = {"image": f"{image_name}:{__gluu_version__}_dev"}
 
-            with open("docker-compose.dev.yml", "w") as f:
-                yaml.dump(dev_overrides, f)
-            files.append("docker-compose.dev.yml")
+            self._dev_overrides = yaml.dump(dev_overrides)
+            self._dev_overrides_key = key
 
-        # add custom override (if any)
-        if self.settings.get("ENABLE_OVERRIDE", False) is True and os.path.isfile("docker-compose.override.yml"):
-            files.append("docker-compose.override.yml")
+        _write_if_changed("docker-compose.dev.yml", self._dev_overrides)
 
-        return ":".join(files)
+    def replicas(self):
+        """Get number of replicas of scalable services.
 
-    def logs(self, follow, tail, services=None):
-        """View output from containers."""
-        with self.top_level_cmd() as tlc:
-            tlc.logs({
-                "SERVICE": services or [],
-                "--tail": tail,
-                "--follow": follow,
-                "--timestamps": False,
-                "--no-color": False,
-            })
+        :returns: A mapping of service name and its number of replicas (from ``SCALE_*`` settings).
+        """
+        return {
+            svc: max(int(self.settings.get(key) or 1), 1)
+            for key, svc in SCALE_MAPPINGS.items()
+        }
 
-    def config(self):
-        """Validate and view the Compose files."""
-        with self.top_level_cmd() as tlc:
-            tlc.config({
-                "--resolve-image-digests": False,
-                "--quiet": False,
-                "--services": False,
-                "--volumes": False,
-                "--hash": None,
-                "--no-interpolate": False,
-            })
+    def write_scale_definitions(self, files):
+        """Write ``docker-compose.scale.yml`` containing definitions of services which run multiple replicas.
 
-    def down(self):
-        """Teardown running containers."""
-        with self.top_level_cmd() as tlc:
-            tlc.down({
-                "--rmi": False,
-                "--volumes": False,
-                "--remove-orphans": True,
-            })
+        Definitions are copied from their Compose files without fixed container name,
+        as Docker requires unique name for each container. Replicas are registered to consul
+        by registrator (based on ``SERVICE_NAME`` label), hence load-balanced by nginx.
 
-    def _up(self, services=None):
-        with self.top_level_cmd() as tlc:
-            tlc.up({
-                "SERVICE": services or [],
-                "--no-deps": False,
-                "--always-recreate-deps": False,
-                "--abort-on-container-exit": False,
-                "--remove-orphans": True,
-                "--detach": True,
-                "--no-recreate": False,
-                "--force-recreate": False,
-                "--build": False,
-                "--no-build": True,
-                "--scale": {},
-                "--no-color": False,
-                "--quiet-pull": False,
-            })
+        :param files: List of Compose files of scaled services.
+        """
+        import yaml
 
-    def ps(self, service):
-        """Get a list of running container.
+        key = self._files_signature(files)
+
+        if key != self._scale_definitions_key:
+            definitions = {"version": "2.4", "services": {}}
+
+            for file_ in files:
+                with open(file_) as f:
+                    data = yaml.safe_load(f)
+
+                for name, svc in data["services"].items():
+                    svc.pop("container_name", None)
+                    definitions["services"][name] = svc
+
+            self._scale_definitions = yaml.dump(definitions)
+            self._scale_definitions_key = key
+
+        _write_if_changed("docker-compose.scale.yml", self._scale_definitions)
+
+    def write_redis_definitions(self, topology):
+        """Write ``docker-compose.redis.yml`` containing all nodes of Redis topology.
 
-        :returns: List of running container as string.
+        Each node is based on definition of ``redis`` service in ``svc.redis.yml``.
+
+        :param topology: An instance of :class:`~pygluu.compose.redis_topology.RedisTopology`.
         """
-        trap = io.StringIO()
+        import yaml
 
-        # suppress output of `ps` command
-        with contextlib.redirect_stdout(trap):
-            with self.top_level_cmd() as tlc:
-                tlc.ps({
-                    "--quiet": True,
-                    "--services": False,
-                    "--all": False,
-                    "SERVICE": [service],
-                })
-        return trap.getvalue().strip()
+        key = (self._files_signature(["svc.redis.yml"]), vars(topology))
+
+        if key != self._redis_definitions_key:
+            with open("svc.redis.yml") as f:
+                base = yaml.safe_load(f)["services"]["redis"]
+            self._redis_definitions = yaml.dump(topology.definitions(base))
+            self._redis_definitions_key = key
+
+        _write_if_changed("docker-compose.redis.yml", self._redis_definitions)
+
+    def bootstrap_redis(self):
+        """Assign cluster slots to Redis nodes (if not assigned yet)."""
+        topology = self.redis_topology()
+        snapshot = self.status_snapshot()
 
-    @property
-    def network_name(self):
-        """Get docker network name used by the application."""
         with self.top_level_cmd() as tlc:
-            return f"{tlc.project.name}_default"
+            client = tlc.project.client
+        network = self.network_name
+        nodes = [ContainerHelper(name, client, snapshot) for name in topology.node_names]
+        auth = 'REDISCLI_AUTH="$REDIS_PW"'
 
-    def gather_ip(self):
-        """Gather IP address.
+        def nodes_ready():
+            return all(b"PONG" in node.exec(f"sh -c '{auth} redis-cli ping'")[0] for node in nodes)
 
-        :returns: IP address.
-        """
+        if not wait_for(nodes_ready, "Redis nodes to accept connections", timeout=60.0).ok:
+            print("[E] Unable to bootstrap Redis cluster; reason=nodes are unreachable")
+            raise click.Abort()
 
-        def auto_detect_ip():
-            # detect IP address automatically (if possible)
-            ip = ""
+        info, _ = nodes[0].exec(f"sh -c '{auth} redis-cli cluster info'")
+        if b"cluster_state:ok" in info:
+            print("[I] Redis cluster is already bootstrapped")
+            return
+
+        addresses = [
+            client.inspect_container(node.name)["NetworkSettings"]["Networks"][network]["IPAddress"]
+            for node in nodes
+        ]
+        output, retcode = nodes[0].exec(topology.bootstrap_command(addresses))
+        if retcode != 0:
+            print(f"[E] Unable to bootstrap Redis cluster; reason={output.decode(errors='replace').strip()}")
+            raise click.Abort()
+        print(f"[I] Bootstrapped Redis cluster of {topology.nodes} node(s)")
 
-            socket.setdefaulttimeout(30.0)
+    def sizing_plan(self, files=None):
+        """Compute resources of enabled services based on host resources.
 
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-                sock.connect(("8.8.8.8", 80))
-                ip, _ = sock.getsockname()
-            return ip
+        Host memory and CPUs can be overridden by ``SIZING_MEMORY`` (e.g. ``16G``)
+        and ``SIZING_CPUS`` settings respectively.
 
-        print("[I] Attempting to gather external IP address")
-        ip = self.settings["HOST_IP"] or auto_detect_ip() or click.prompt("Please input the host's external IP address")
+        :param files: List of enabled Compose files; computed from settings if omitted.
+        :returns: An instance of :class:`~pygluu.compose.sizing.Plan`.
+        :raises ValueError: If host memory is unknown or settings are invalid.
+        """
+        from .sizing import enabled_services
+        from .sizing import host_resources
+        from .sizing import parse_size
+        from .sizing import plan_resources
+
+        if files is None:
+            files = ["docker-compose.yml"] + [
+                filename for svc, filename in COMPOSE_MAPPINGS.items()
+                if self.settings.get(svc) and os.path.isfile(filename)
+            ]
+
+        memory, cpus = host_resources()
+        if self.settings.get("SIZING_MEMORY"):
+            memory = parse_size(self.settings["SIZING_MEMORY"])
+        if self.settings.get("SIZING_CPUS"):
+            cpus = int(self.settings["SIZING_CPUS"])
+        if memory <= 0:
+            raise ValueError("Unable to detect host memory; set SIZING_MEMORY (e.g. 16G) in settings.py")
+        replicas = self.replicas()
+        topology = self.redis_topology()
+        if topology:
+            replicas["redis"] = topology.nodes
+        return plan_resources(enabled_services(files), memory, cpus, replicas)
+
+    def write_sizing_overrides(self, files):
+        """Write ``docker-compose.sizing.yml`` to set resources of services based on host resources.
+
+        :param files: List of enabled Compose files.
+        """
+        import yaml
+
+        from .sizing import overrides
 
         try:
-            ipaddress.ip_address(ip)
-            print(f"[I] Using {ip} as external IP address")
-            self.settings["HOST_IP"] = ip
+            plan = self.sizing_plan(files)
         except ValueError as exc:
-            print(f"[E] Cannot determine IP address; reason={exc}")
+            print(f"[E] Unable to compute resources of services; reason={exc}")
             raise click.Abort()
 
-    def generate_params(self, file_):
-        """Generate parameters required to bootstrap the application and containers.
+        if plan.undersized:
+            print(f"[W] Host memory ({plan.memory_mb}MB) is below minimum requirement of enabled services; "
+                  "run `pygluu-compose plan` for details")
 
-        :returns: A mapping of pre-populated parameters.
-        """
+        # resources of redis apply to each node of its topology (if any)
+        topology = self.redis_topology()
+        aliases = {"redis": topology.node_names} if topology else {}
+        _write_if_changed("docker-compose.sizing.yml", yaml.dump(overrides(plan, aliases)))
 
-        def prompt_hostname():
-            while True:
-                value = click.prompt("Enter hostname", default="demoexample.gluu.org")
-                if len(value.split(".")) > 2:
-                    return value
-                click.echo("Hostname has to be at least three domain components.")
+    def _mem_limit(self, service, filename):
+        """Get memory limit (in MB) of a service from its Compose file and custom override (``0`` if unset)."""
+        import yaml
 
-        def prompt_country_code():
+        from .sizing import MB
+        from .sizing import parse_size
+
+        mem_limit = 0
+        overrides = [filename]
+        if self.settings.get("ENABLE_OVERRIDE", False) is True and os.path.isfile("docker-compose.override.yml"):
+            overrides.append("docker-compose.override.yml")
+        for file_ in overrides:
+            with open(file_) as f:
+                svc = ((yaml.safe_load(f) or {}).get("services") or {}).get(service) or {}
+            if svc.get("mem_limit"):
+                mem_limit = parse_size(svc["mem_limit"]) // MB
+        return mem_limit
+
+    def sql_plans(self, files=None):
+        """Compute tuning of bundled SQL databases (if any) and connection pools of their clients.
+
+        Memory of each database is taken from its sizing plan (if ``ENABLE_AUTO_SIZING`` is on),
+        otherwise from its ``mem_limit``, otherwise from a share of host memory.
+
+        :param files: List of enabled Compose files; computed from settings if omitted.
+        :returns: List of :class:`~pygluu.compose.sqltuning.SqlPlan`.
+        """
+        from .sizing import enabled_services
+        from .sqltuning import enabled_engines
+        from .sqltuning import plan_databases
+
+        if files is None:
+            files = ["docker-compose.yml"] + [
+                filename for svc, filename in COMPOSE_MAPPINGS.items()
+                if self.settings.get(svc) and os.path.isfile(filename)
+            ]
+
+        engines = enabled_engines(files)
+        if not engines:
+            return []
+
+        try:
+            return plan_databases(
+                {engine: self._mem_limit(engine, filename) for engine, filename in engines},
+                self.sizing_plan(files),
+                enabled_services(files),
+                self.settings.get("SQL_TUNING_PROFILE") or "balanced",
+                self.settings.get("ENABLE_AUTO_SIZING", False) is True,
+            )
+        except ValueError as exc:
+            print(f"[E] Unable to compute tuning of SQL database; reason={exc}")
+            raise click.Abort()
+
+    def write_sql_tuning(self, plans):
+        """Write config file of each SQL database and ``docker-compose.sql.yml`` mounting them.
+
+        :param plans: List of :class:`~pygluu.compose.sqltuning.SqlPlan`.
+        """
+        import yaml
+
+        from .sqltuning import CONFIG_FILES
+        from .sqltuning import merged_overrides
+        from .sqltuning import render
+
+        for plan in plans:
+            _write_if_changed(CONFIG_FILES[plan.engine], render(plan))
+        _write_if_changed("docker-compose.sql.yml", yaml.dump(merged_overrides(plans)))
+
+    def ldap_plan(self, files=None):
+        """Compute JVM heap and database cache of OpenDJ.
+
+        Memory of ldap container is taken from its sizing plan (if ``ENABLE_AUTO_SIZING`` is on),
+        otherwise from its ``mem_limit``, otherwise from its default size.
+
+        :param files: List of enabled Compose files; computed from settings if omitted.
+        :returns: An instance of :class:`~pygluu.compose.ldaptune.LdapPlan`.
+        """
+        from .ldaptune import backend_ids
+        from .ldaptune import plan_ldap
+        from .sizing import SERVICE_PROFILES
+
+        try:
+            mem_mb = 0
+            if self.settings.get("ENABLE_AUTO_SIZING", False) is True:
+                sizing = self.sizing_plan(files)
+                mem_mb = next((alloc.mem_mb for alloc in sizing.allocations if alloc.service == "ldap"), 0)
+            mem_mb = mem_mb or self._mem_limit("ldap", "svc.ldap.yml") or SERVICE_PROFILES["ldap"].default_mb
+        except ValueError as exc:
+            print(f"[E] Unable to compute tuning of OpenDJ; reason={exc}")
+            raise click.Abort()
+        return plan_ldap(mem_mb, backend_ids())
+
+    def write_ldap_tuning(self, plan):
+        """Write ``docker-compose.ldap.yml`` to set JVM heap of OpenDJ.
+
+        :param plan: An instance of :class:`~pygluu.compose.ldaptune.LdapPlan`.
+        """
+        import yaml
+
+        content = yaml.dump({"version": "2.4", "services": {
+            "ldap": {"environment": {"GLUU_MAX_RAM_PERCENTAGE": str(plan.max_ram_percentage)}},
+        }})
+
+        _write_if_changed("docker-compose.ldap.yml", content)
+
+    def plan(self):
+        """Print resources computed for enabled services."""
+        from .sizing import summary as sizing_summary
+        from .sqltuning import summary as sql_summary
+
+        try:
+            plan = self.sizing_plan()
+        except ValueError as exc:
+            print(f"[E] Unable to compute resources of services; reason={exc}")
+            raise click.Abort()
+
+        for line in sizing_summary(plan):
+            print(line)
+        if self.settings.get("ENABLE_AUTO_SIZING", False) is not True:
+            print("[I] Set ENABLE_AUTO_SIZING to true in settings.py to apply this plan on next `up`")
+
+        for sql in self.sql_plans():
+            for line in sql_summary(sql):
+                print(line)
+            if self.settings.get("ENABLE_SQL_TUNING", False) is not True:
+                print("[I] Set ENABLE_SQL_TUNING to true in settings.py to apply this tuning on next `up`")
+
+    def logs(self, follow, tail, services=None, since="", pattern="", level="", as_json=False):
+        """View output from containers.
+
+        Logs of all selected containers are streamed concurrently and filtered on the client side.
+
+        :param follow: Keep streaming new output.
+        :param tail: Number of lines to show from the end of the logs for each container.
+        :param services: Service names (all services if omitted).
+        :param since: Show logs since relative duration (e.g. ``10m``), UNIX timestamp, or datetime.
+        :param pattern: Show only lines matching the regex.
+        :param level: Show only lines with at least given log level.
+        :param as_json: Print each line as JSON document.
+        """
+        from .logs import LogMultiplexer
+        from .logs import parse_since
+
+        try:
+            since = parse_since(since)
+            re.compile(pattern)
+        except (ValueError, re.error) as exc:
+            print(f"[E] Invalid logs filter; reason={exc}")
+            raise click.Abort()
+
+        clients = {}
+        if self.inventory():
+            snapshot, clients = self.cluster().snapshot()
+        else:
+            snapshot = self.status_snapshot()
+
+        unknown = [svc for svc in services or [] if svc not in snapshot.services]
+        if unknown:
+            print(f"[E] No such service(s): {', '.join(unknown)}")
+            raise click.Abort()
+
+        containers = [c for svc in services or snapshot.services for c in snapshot.get(svc)]
+        if not containers:
+            print("[W] No containers found")
+            return
+
+        if clients:
+            client = None
+        else:
+            with self.top_level_cmd() as tlc:
+                client = tlc.project.client
+
+        LogMultiplexer(
+            client,
+            containers,
+            clients=clients,
+            follow=follow,
+            tail=tail,
+            since=since,
+            pattern=pattern,
+            level=level,
+            as_json=as_json,
+        ).run()
+
+    def config(self):
+        """Validate and view the Compose files."""
+        with self.top_level_cmd() as tlc:
+            tlc.config({
+                "--resolve-image-digests": False,
+                "--quiet": False,
+                "--services": False,
+                "--volumes": False,
+                "--hash": None,
+                "--no-interpolate": False,
+            })
+
+    def down(self):
+        """Teardown running containers (on all nodes in multi-node mode)."""
+        if self.inventory():
+            from compose.parallel import ParallelStreamWriter
+
+            noansi = ParallelStreamWriter.noansi
+            ParallelStreamWriter.set_noansi()
+            try:
+                self.cluster().down()
+            finally:
+                ParallelStreamWriter.set_noansi(noansi)
+            return
+
+        with self.top_level_cmd() as tlc:
+            tlc.down({
+                "--rmi": False,
+                "--volumes": False,
+                "--remove-orphans": True,
+            })
+
+    def pull(self, parallel=4, force=False):
+        """Pull images of enabled services concurrently.
+
+        Images which are present locally and unchanged since last pull
+        (as recorded in ``images.json`` manifest) are skipped.
+
+        :param parallel: Maximum number of concurrent pulls.
+        :param force: Pull all images regardless of the manifest.
+        """
+        from .images import ImageManifest
+        from .images import ImagePuller
+
+        with self.top_level_cmd() as tlc:
+            refs = [svc.image_name for svc in tlc.project.services if "image" in svc.options]
+            manifest = ImageManifest(pathlib.Path(STATE_DIR, "images.json"))
+            puller = ImagePuller(tlc.project.client, manifest, max_workers=parallel)
+            pulled, skipped, failed = puller.pull(refs, force=force)
+
+        print(f"[I] Pulled {len(pulled)} image(s); skipped {len(skipped)} unchanged image(s)")
+        if failed:
+            print(f"[E] Unable to pull {len(failed)} image(s)")
+            raise click.Abort()
+
+    def status_snapshot(self, health=False):
+        """Get containers state of all services using single Docker API call.
+
+        :param health: Get health state of containers (using an extra call per health state, see
+                       :meth:`~pygluu.compose.status.StatusSnapshot.fetch`).
+        :returns: An instance of :class:`~pygluu.compose.status.StatusSnapshot`.
+        """
+        from .status import StatusSnapshot
+
+        with self.top_level_cmd() as tlc:
+            return StatusSnapshot.fetch(
+                tlc.project.client,
+                tlc.project.name,
+                services=tlc.project.service_names,
+                health=health,
+            )
+
+    def status(self, as_json=False):
+        """Print containers state of all services.
+
+        :param as_json: Print the state as JSON document.
+        """
+        snapshot = self.status_snapshot(health=True)
+
+        if as_json:
+            print(json.dumps(snapshot.as_dict(), indent=4))
+            return
+
+        print(f"{'SERVICE':<20}{'CONTAINER':<36}{'STATE':<12}{'HEALTH':<10}")
+        for service, containers in snapshot.services.items():
+            for container in containers or [None]:
+                if container is None:
+                    print(f"{service:<20}{'-':<36}{'-':<12}{'-':<10}")
+                else:
+                    print(f"{service:<20}{container.name:<36}{container.state:<12}{container.health or '-':<10}")
+
+    def metrics(self, host="127.0.0.1", port=9101, interval=15.0, window=60):
+        """Serve resource use of containers against their limits in Prometheus format (until interrupted).
+
+        :param host: Address to listen on.
+        :param port: Port to listen on.
+        :param interval: Seconds between sampling rounds.
+        :param window: Number of samples kept per service (for peak and average utilization).
+        """
+        from .metrics import Collector
+        from .metrics import MetricsServer
+
+        with self.top_level_cmd() as tlc:
+            collector = Collector(tlc.project.client, tlc.project.name, window=window)
+
+        try:
+            server = MetricsServer(collector, host, port)
+        except OSError as exc:
+            print(f"[E] Unable to listen on {host}:{port}; reason={exc}")
+            raise click.Abort()
+
+        stopped = threading.Event()
+
+        def sample():
+            while not stopped.is_set():
+                try:
+                    collector.sample()
+                except Exception as exc:  # noqa: B902
+                    print(f"[W] Unable to sample containers; reason={exc}")
+                stopped.wait(interval)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+
+        print(f"[I] Serving metrics at http://{host}:{server.server_port}/metrics; press CTRL+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stopped.set()
+            server.server_close()
+            collector.close()
+
+    def bench(self, weights, rate=50.0, duration=30.0, warmup=0.0, connections=16,
+              client_id="", client_secret="", scope="", url="", as_json=False):
+        """Send load to oxAuth endpoints at a target rate and report latency, throughput, and errors.
+
+        :param weights: A mapping of scenario name and its weight (see :data:`~pygluu.compose.loadgen.SCENARIOS`).
+        :param rate: Target rate (requests per second).
+        :param duration: Duration (in seconds) of measured load.
+        :param warmup: Duration (in seconds) of load sent before measurement.
+        :param connections: Number of concurrent connections.
+        :param client_id: ID of OAuth client (required by ``token`` scenario).
+        :param client_secret: Secret of OAuth client (required by ``token`` scenario).
+        :param scope: Scope requested by ``token`` scenario.
+        :param url: Base URL of the application (defaults to ``https://HOST_IP``).
+        :param as_json: Print the report as JSON document.
+        """
+        from .loadgen import SCENARIOS
+        from .loadgen import LoadGenerator
+        from .loadgen import Options
+        from .loadgen import summary
+
+        if any(SCENARIOS[name].needs_client for name in weights) and not (client_id and client_secret):
+            print("[E] Scenario token requires --client-id and --client-secret of an OAuth client")
+            raise click.Abort()
+
+        url = url or (f"https://{self.settings['HOST_IP']}" if self.settings["HOST_IP"] else "")
+        if not url:
+            print("[E] Unable to determine URL of the application; please set HOST_IP or use --url")
+            raise click.Abort()
+
+        server_name = self.settings["DOMAIN"]
+        generator = LoadGenerator(
+            url,
+            server_name,
+            weights,
+            Options(client_id, client_secret, scope),
+            rate=rate,
+            duration=duration,
+            warmup=warmup,
+            connections=connections,
+        )
+
+        if not as_json:
+            print(
+                f"[I] Sending {rate:g} requests/s of {', '.join(weights)} to {url} "
+                f"(Host: {generator.server_name}) for {duration:g}s"
+            )
+        with span("bench", "app"):
+            generator.run()
+        report = generator.report()
+
+        if as_json:
+            print(json.dumps(report, indent=4))
+            return
+        for line in summary(report):
+            print(line)
+
+    def ps(self, service):
+        """Get a list of running container.
+
+        :returns: IDs of running containers (across all nodes in multi-node mode) as newline-separated string.
+        """
+        snapshot = self.cluster().snapshot()[0] if self.inventory() else self.status_snapshot()
+        return "\n".join(c.id for c in snapshot.running(service))
+
+    @property
+    def network_name(self):
+        """Get docker network name used by the application."""
+        with self.top_level_cmd() as tlc:
+            return f"{tlc.project.name}_default"
+
+    def _published_url(self, project, service, port):
+        """Get URL of container port published to the host (if any)."""
+        if service not in project.service_names:
+            return ""
+
+        for sp in project.get_service(service).options.get("ports", []):
+            with contextlib.suppress(AttributeError, TypeError, ValueError):
+                if int(sp.target) == port and sp.published:
+                    host = sp.external_ip or "127.0.0.1"
+                    if host == "0.0.0.0":
+                        host = "127.0.0.1"
+                    return f"http://{host}:{int(sp.published)}"
+        return ""
+
+    def gather_ip(self, detected=None):
+        """Gather IP address (from settings, local interfaces, or prompt).
+
+        :param detected: A future of detected IP address (see :meth:`~pygluu.compose.preflight.Probes.detect_ip`);
+                         the address is detected here if omitted.
+        :returns: IP address.
+        """
+        from .preflight import detect_ip
+
+        print("[I] Attempting to gather external IP address")
+        ip = (
+            self.settings["HOST_IP"]
+            or (detected.result() if detected else detect_ip())
+            or click.prompt("Please input the host's external IP address")
+        )
+
+        try:
+            ipaddress.ip_address(ip)
+            print(f"[I] Using {ip} as external IP address")
+            self.settings["HOST_IP"] = ip
+        except ValueError as exc:
+            print(f"[E] Cannot determine IP address; reason={exc}")
+            raise click.Abort()
+
+    def generate_params(self, file_):
+        """Generate parameters required to bootstrap the application and containers.
+
+        :returns: A mapping of pre-populated parameters.
+        """
+
+        def prompt_hostname():
+            while True:
+                value = click.prompt("Enter hostname", default="demoexample.gluu.org")
+                if len(value.split(".")) > 2:
+                    return value
+                click.echo("Hostname has to be at least three domain components.")
+
+        def prompt_country_code():
             while True:
                 value = click.prompt("Enter country code", default="US")
                 if len(value) == 2 and value.isupper():
@@ -486,6 +1608,8 @@ class App:
                 print("Invalid email address.")
 
         def prompt_password(prompt="Enter password: "):
+            import stdiomask
+
             # FIXME: stdiomask doesn't handle CTRL+C
             while True:
                 passwd = stdiomask.getpass(prompt=prompt)
@@ -521,88 +1645,796 @@ class App:
         pathlib.Path(file_).write_text(json.dumps(params, sort_keys=True, indent=4))
         return params
 
+    def _bootstrap_key(self, snapshot):
+        """Get key of bootstrap inputs, i.e. Vault and Consul containers, Vault policy, and AppRole credentials."""
+        import hashlib
+
+        from .fingerprint import bootstrap_key
+
+        digests = []
+        for file_ in (Secret.POLICY_FILE, "vault_role_id.txt", "vault_secret_id.txt"):
+            path = pathlib.Path(file_)
+            digests.append(hashlib.sha256(path.read_bytes()).hexdigest() if path.is_file() else "")
+        return bootstrap_key([c.id for c in snapshot.get("vault") + snapshot.get("consul")], digests)
+
     def prepare_config_secret(self):
-        """Prepare configs and secrets required by the application before deploying containers."""
-        workdir = os.getcwd()
+        """Prepare configs and secrets required by the application before deploying containers.
+
+        Consul and Vault containers must be started beforehand. The bootstrap is skipped if its inputs
+        are unchanged since last bootstrap (recorded by ``up``) and Vault is unsealed.
+        """
+        from .backends import ConsulAPI
+        from .backends import VaultAPI
+        from .backends import pooled_session
 
         with self.top_level_cmd() as tlc:
-            if not self.ps("consul"):
-                self._up(["consul"])
+            session = pooled_session()
+            snapshot = self.status_snapshot()
 
-            if not self.ps("vault"):
-                self._up(["vault"])
+            vault_url = self._published_url(tlc.project, "vault", 8200)
+            secret = Secret(tlc.project.client, VaultAPI(vault_url, session) if vault_url else None, snapshot)
+
+            record = self._fingerprints.bootstrap if self._fingerprints is not None else {}
+            if record.get("domain") and record.get("key") == self._bootstrap_key(snapshot):
+                if not secret.status().get("sealed", True):
+                    self.settings["DOMAIN"] = record["domain"]
+                    print(f"[I] Vault and Consul are unchanged since last bootstrap; using {self.settings['DOMAIN']} as FQDN")
+                    return
 
-            secret = Secret(tlc.project.client)
             secret.setup()
 
-            config = Config(tlc.project.client)
+            consul_url = self._published_url(tlc.project, "consul", 8500)
+            config = Config(tlc.project.client, ConsulAPI(consul_url, session) if consul_url else None, snapshot)
+            if not self.seed_from_dump(secret.api, config.api):
+                self.resolve_domain(config)
 
-            hostname = config.hostname_from_backend()
-            if hostname:
-                self.settings["DOMAIN"] = hostname
-                print(f"[I] Using {self.settings['DOMAIN']} as FQDN")
-                return
+        if self._fingerprints is not None:
+            self._fingerprints.bootstrap = {"key": self._bootstrap_key(snapshot), "domain": self.settings["DOMAIN"]}
 
-            cfg_file = f"{workdir}/{CONFIG_DIR}/config.json"
-            gen_file = f"{workdir}/generate.json"
+    def seed_from_dump(self, vault, consul, config_file="", secret_file=""):
+        """Seed configs and secrets in bulk from dumps of ``config-init`` (if any) via HTTP APIs.
 
-            hostname = config.hostname_from_file(cfg_file)
-            if hostname:
-                self.settings["DOMAIN"] = hostname
-            else:
-                if not os.path.isfile(gen_file):
-                    params = self.generate_params(gen_file)
-                else:
-                    with open(gen_file) as f:
-                        params = json.loads(f.read())
-                self.settings["DOMAIN"] = params["hostname"]
+        :param vault: An instance of :class:`~pygluu.compose.backends.VaultAPI` (logged in) or ``None``.
+        :param consul: An instance of :class:`~pygluu.compose.backends.ConsulAPI` or ``None``.
+        :param config_file: Path to configs dump (defaults to ``config.json`` under :data:`CONFIG_DIR`).
+        :param secret_file: Path to secrets dump (defaults to ``secret.json`` under :data:`CONFIG_DIR`).
+        :returns: ``True`` if configs and secrets are seeded (hence FQDN is resolved), otherwise ``False``.
+        """
+        from .backends import APIError
+        from .seed import Seeder
+        from .seed import load_dump
+
+        config_file = config_file or f"{CONFIG_DIR}/config.json"
+        secret_file = secret_file or f"{CONFIG_DIR}/secret.json"
+        if vault is None or consul is None or not (os.path.isfile(config_file) and os.path.isfile(secret_file)):
+            return False
+
+        try:
+            configs, secrets = load_dump(config_file, secret_file)
+        except ValueError as exc:
+            print(f"[W] Unable to load configs and secrets from {config_file} and {secret_file}; reason={exc}")
+            return False
+
+        if not configs.get("hostname"):
+            return False
+
+        try:
+            with span("seed", "app"):
+                result = Seeder(consul, vault).seed(configs, secrets)
+        except APIError as exc:
+            print(f"[W] Unable to seed configs and secrets; reason={exc}")
+            return False
+
+        if result.configs or result.secrets:
+            print(f"[I] Seeded {len(result.configs)} config(s) and {len(result.secrets)} secret(s); "
+                  f"skipped {result.unchanged} unchanged")
+        else:
+            print("[I] Configs and secrets are unchanged since last seed")
+
+        self.settings["DOMAIN"] = configs["hostname"]
+        print(f"[I] Using {self.settings['DOMAIN']} as FQDN")
+        return True
+
+    def seed(self, config_file="", secret_file=""):
+        """Seed configs and secrets in bulk from dumps of ``config-init`` into running Consul and Vault.
+
+        :param config_file: Path to configs dump (defaults to ``config.json`` under :data:`CONFIG_DIR`).
+        :param secret_file: Path to secrets dump (defaults to ``secret.json`` under :data:`CONFIG_DIR`).
+        """
+        from .backends import ConsulAPI
+        from .backends import VaultAPI
+        from .backends import pooled_session
+
+        config_file = config_file or f"{CONFIG_DIR}/config.json"
+        secret_file = secret_file or f"{CONFIG_DIR}/secret.json"
+        missing = [file_ for file_ in (config_file, secret_file) if not os.path.isfile(file_)]
+        if missing:
+            print(f"[E] Unable to find {', '.join(missing)}")
+            raise click.Abort()
+
+        with self.top_level_cmd() as tlc:
+            snapshot = self.status_snapshot()
+            session = pooled_session()
+
+            vault_url = self._published_url(tlc.project, "vault", 8200)
+            consul_url = self._published_url(tlc.project, "consul", 8500)
+            if not (vault_url and consul_url and snapshot.running("vault") and snapshot.running("consul")):
+                print("[E] Vault and Consul must be running with published HTTP API ports; please run 'up' first")
+                raise click.Abort()
+
+            secret = Secret(tlc.project.client, VaultAPI(vault_url, session), snapshot)
+            with secret.login():
+                seeded = secret.api is not None and self.seed_from_dump(
+                    secret.api, ConsulAPI(consul_url, session), config_file, secret_file,
+                )
+
+        if not seeded:
+            print("[E] Unable to seed configs and secrets")
+            raise click.Abort()
+
+    def backup(self, repo="backups"):
+        """Backup persistent volumes into a repository of content-addressed chunks.
+
+        Only files changed since the latest snapshot are read, and only new chunks are stored.
+        If ldap is running, OpenDJ backends are backed up online (hence its live database is skipped).
+        Likewise, if consul is running, its snapshot is saved instead of copying its live data
+        (and live data of Vault, which is kept in Consul).
+
+        :param repo: Directory of the backup repository.
+        """
+        from .backup import VOLUMES_DIR
+        from .backup import BackupError
+        from .backup import Repository
+        from .backup import ServiceData
+
+        if not os.path.isdir(VOLUMES_DIR):
+            print(f"[E] Unable to find {VOLUMES_DIR} directory")
+            raise click.Abort()
+
+        snapshot = self.status_snapshot()
+        running = [svc for svc in ("ldap", "consul", "vault") if snapshot.running(svc)]
+        with self.top_level_cmd() as tlc:
+            data = ServiceData(tlc.project, lambda name: ContainerHelper(name, tlc.project.client, snapshot))
+            try:
+                extra, exclude = data.backup_live(
+                    running,
+                    lambda: self.settings["LDAP_PW"] or click.prompt("Enter LDAP admin password", hide_input=True),
+                )
+            except BackupError as exc:
+                print(f"[E] {exc}")
+                raise click.Abort()
+
+        try:
+            with span("backup volumes", "backup"):
+                result = Repository(repo).backup(VOLUMES_DIR, exclude=exclude, extra=extra)
+        except (OSError, BackupError) as exc:
+            print(f"[E] Unable to backup {VOLUMES_DIR}; reason={exc}")
+            raise click.Abort()
+
+        print(
+            f"[I] Created snapshot {result.snapshot} of {result.files} files in {repo}; "
+            f"{result.changed} changed files ({result.read / 1024 ** 2:.1f}MB) read, "
+            f"{result.chunks} new chunks ({result.written / 1024 ** 2:.1f}MB) stored"
+        )
+
+    def restore(self, snapshot_id="", repo="backups"):
+        """Restore persistent volumes from a snapshot.
+
+        All containers must be stopped beforehand. Files unchanged since the snapshot are left as-is.
+        OpenDJ backends and Consul are then restored from their backups in the snapshot (if any).
+
+        :param snapshot_id: ID of the snapshot (latest snapshot if omitted).
+        :param repo: Directory of the backup repository.
+        """
+        from .backup import BackupError
+        from .backup import Repository
+        from .backup import ServiceData
+
+        snapshot = self.status_snapshot()
+        running = [svc for svc in snapshot.services if snapshot.running(svc)]
+        if running:
+            print(f"[E] Unable to restore while {', '.join(running)} are running; please run 'down' first")
+            raise click.Abort()
+
+        repository = Repository(repo)
+        try:
+            manifest = repository.load(snapshot_id)
+            with span("restore volumes", "backup"):
+                result = repository.restore(manifest["id"])
+        except (OSError, BackupError) as exc:
+            print(f"[E] Unable to restore snapshot {snapshot_id or '(latest)'}; reason={exc}")
+            raise click.Abort()
+
+        print(
+            f"[I] Restored snapshot {result.snapshot} ({result.files} files) from {repo}; "
+            f"{result.changed} files written, {result.removed} files removed"
+        )
+
+        if not manifest.get("opendj_backends") and not manifest.get("consul_snapshot"):
+            return
+
+        with self.top_level_cmd() as tlc:
+            # containers are started by the restore, hence looked up afresh
+            data = ServiceData(tlc.project, lambda name: ContainerHelper(name, tlc.project.client))
+            try:
+                if manifest.get("opendj_backends"):
+                    data.restore_opendj(manifest["opendj_backends"])
+                if manifest.get("consul_snapshot"):
+                    data.restore_consul(manifest["consul_snapshot"])
+            except BackupError as exc:
+                print(f"[E] {exc}")
+                raise click.Abort()
+
+    def ldap_tune(self, check=False, top=20):
+        """Tune OpenDJ and report its unindexed searches.
+
+        Database cache of each backend is sized from JVM heap (derived from memory limit of ldap container),
+        and missing indexes of the catalogue are created and rebuilt online, then verified.
+
+        :param check: Only verify indexes and report unindexed searches (nothing is changed).
+        :param top: Number of unindexed search filters to report.
+        """
+        from .ldaptune import INDEXES
+        from .ldaptune import OPENDJ_LOGS_DIR
+        from .ldaptune import IndexTuner
+        from .ldaptune import LdapTuneError
+        from .ldaptune import access_logs
+        from .ldaptune import backend_ids
+        from .ldaptune import scan_access_logs
+        from .ldaptune import summary
+
+        if not self.settings.get("SVC_LDAP"):
+            print("[E] Unable to tune OpenDJ as ldap service is disabled")
+            raise click.Abort()
 
+        plan = self.ldap_plan()
+        caches = ", ".join(f"{backend}={size}MB" for backend, size in plan.db_cache_mb.items())
+        print(f"[I] OpenDJ has {plan.mem_mb}MB of memory; JVM heap is {plan.heap_mb}MB "
+              f"({plan.max_ram_percentage}%) and database cache is {caches}")
+        if self.settings.get("ENABLE_LDAP_TUNING", False) is not True:
+            print("[I] Set ENABLE_LDAP_TUNING to true in settings.py to apply JVM heap on next `up`")
+
+        snapshot = self.status_snapshot()
+        if not snapshot.running("ldap"):
+            print("[W] Unable to tune database cache and indexes as ldap is not running")
+        else:
+            password = self.settings["LDAP_PW"] or click.prompt("Enter LDAP admin password", hide_input=True)
+            with self.top_level_cmd() as tlc:
+                ldap = ContainerHelper("ldap", tlc.project.client, snapshot)
+            backends = backend_ids()
+
+            with ldap.secret_file(password) as password_file:
+                try:
+                    changes = IndexTuner(ldap, backends, password_file).tune(plan, check)
+                except LdapTuneError as exc:
+                    print(f"[E] {exc}")
+                    raise click.Abort()
+
+            if not changes:
+                verified = sum(index.backend in backends for index in INDEXES)
+                print(f"[I] Verified {verified} index(es) of OpenDJ backends {', '.join(backends)}")
+
+        paths = access_logs()
+        if not paths:
+            print(f"[W] No access logs found in {OPENDJ_LOGS_DIR}; enable File-Based Access Logger of OpenDJ "
+                  "to report unindexed searches")
+            return
+
+        with span("scan access logs", "ldap"):
+            unindexed, searches = scan_access_logs(paths)
+        for line in summary(unindexed, searches, len(paths), top):
+            print(line)
+
+    def resolve_domain(self, config):
+        """Resolve FQDN from config backend, config file, or generated parameters (in that order).
+
+        :param config: An instance of :class:`Config`.
+        """
+        workdir = os.getcwd()
+
+        hostname = config.hostname_from_backend()
+        if hostname:
+            self.settings["DOMAIN"] = hostname
             print(f"[I] Using {self.settings['DOMAIN']} as FQDN")
+            return
+
+        cfg_file = f"{workdir}/{CONFIG_DIR}/config.json"
+        gen_file = f"{workdir}/generate.json"
+
+        hostname = config.hostname_from_file(cfg_file)
+        if hostname:
+            self.settings["DOMAIN"] = hostname
+        else:
+            if not os.path.isfile(gen_file):
+                params = self.generate_params(gen_file)
+            else:
+                with open(gen_file) as f:
+                    params = json.loads(f.read())
+            self.settings["DOMAIN"] = params["hostname"]
+
+        print(f"[I] Using {self.settings['DOMAIN']} as FQDN")
+
+    def _initialize_project(self):
+        """Create networks and volumes, and remove orphan containers."""
+        with self.top_level_cmd() as tlc:
+            tlc.project.initialize()
+            tlc.project.find_orphan_containers(remove_orphans=True)
+
+    def _start_service(self, name):
+        """Create (or recreate) and start containers of a service without its dependencies."""
+        from compose.service import BuildAction
+
+        with self.top_level_cmd() as tlc:
+            tlc.project.up(
+                service_names=[name],
+                start_deps=False,
+                do_build=BuildAction.skip,
+                detached=True,
+                ignore_orphans=True,
+                silent=True,
+                scale_override={name: self.replicas().get(name, 1)},
+            )
+
+    def service_fingerprints(self):
+        """Get fingerprints of effective config of all enabled services.
+
+        :returns: A mapping of service name and its fingerprint.
+        """
+        from .fingerprint import service_fingerprint
+        from .images import ImageManifest
+
+        manifest = ImageManifest(pathlib.Path(STATE_DIR, "images.json"))
+        replicas = self.replicas()
+
+        with self.top_level_cmd() as tlc:
+            return {
+                svc.name: service_fingerprint(svc, manifest.get(svc.image_name), replicas.get(svc.name, 1))
+                for svc in tlc.project.services
+            }
+
+    def bringup_plan(self, fingerprints, current):
+        """Get planned action of each service by comparing current fingerprints against recorded ones.
+
+        :param fingerprints: An instance of :class:`~pygluu.compose.fingerprint.Fingerprints`.
+        :param current: A mapping of service name and its current fingerprint.
+        :returns: List of :class:`~pygluu.compose.fingerprint.PlanEntry`.
+        """
+        snapshot = self.status_snapshot()
+        replicas = self.replicas()
+
+        satisfied = set()
+        for name in current:
+            containers = snapshot.get(name)
+            if not containers:
+                continue
+            if name in JOB_SERVICES:
+                completed = all(c.state == "running" or c.status.startswith("Exited (0)") for c in containers)
+            else:
+                completed = len(snapshot.running(name)) == len(containers) == replicas.get(name, 1)
+            if completed:
+                satisfied.add(name)
+
+        existing = {name for name in current if snapshot.get(name)}
+        return fingerprints.plan(current, existing, satisfied)
+
+    def print_bringup_plan(self, entries):
+        """Print planned action of each service."""
+        print("[I] Plan of bring-up (+ create, ~ reconcile, = keep, - remove):")
+        for entry in entries:
+            print(f"    {entry.action} {entry.service:<20}{entry.reason}")
+
+    def bringup_dag(self, keep=()):
+        """Get graph of tasks to bring up the application.
+
+        Preflight checks and image pulls have no dependencies, hence they run right away;
+        each service is started once its image is available, its ``depends_on`` services are started,
+        and the previous stage (see :data:`STARTUP_STAGES`) is completed.
+
+        :param keep: Names of services to keep as-is (their image is neither pulled nor containers touched).
+        :returns: An instance of :class:`~pygluu.compose.dag.DAG`.
+        """
+        from compose.service import BuildAction
+
+        from .dag import DAG
+
+        dag = DAG()
+        dag.add("preflight", self.preflight)
+        dag.add("initialize", self._initialize_project, ["preflight"])
+
+        with self.top_level_cmd() as tlc:
+            services = tlc.project.services
+
+        # prefetch images of all services; services sharing the same image wait for single pull
+        pulls = {}
+        for svc in services:
+            if svc.name in keep:
+                continue
+            task = f"pull {svc.image_name}"
+            if task not in dag.tasks:
+                dag.add(task, functools.partial(svc.ensure_image_exists, do_build=BuildAction.skip, silent=True))
+            pulls[svc.name] = task
+
+        topology = self.redis_topology()
+
+        previous = ["initialize"]
+        for index, stage in enumerate(STARTUP_STAGES + ((),)):
+            started = [
+                self._add_start_task(dag, svc, previous, pulls.get(svc.name))
+                for svc in services if _startup_stage(svc.name) == index
+            ]
+            previous = started or previous
+
+            if "vault" in stage:
+                dag.add("bootstrap secrets", self.prepare_config_secret, previous)
+                previous = ["bootstrap secrets"]
+
+            if "redis" in stage and topology and topology.mode == "CLUSTER":
+                dag.add("bootstrap redis", self.bootstrap_redis, previous)
+                previous = ["bootstrap redis"]
+        return dag
+
+    def _add_start_task(self, dag, service, previous, pull):
+        """Add task starting a service to graph of :meth:`bringup_dag`.
+
+        :param dag: An instance of :class:`~pygluu.compose.dag.DAG`.
+        :param service: An instance of ``compose.service.Service``.
+        :param previous: Names of tasks of the previous stage.
+        :param pull: Name of task pulling image of the service, or ``None`` if the service is kept as-is.
+        :returns: Name of the task.
+        """
+        name = f"start {service.name}"
+        deps = previous + [f"start {dep}" for dep in service.get_dependency_names()]
+        if pull is None:
+            dag.add(name, lambda: None, deps)
+        else:
+            dag.add(name, functools.partial(self._start_service, service.name), deps + [pull])
+        return name
 
     def up(self):
-        """Build, (re)create, start, and attach to containers for services."""
-        self.check_ports()
-        self.gather_ip()
-        self.prepare_config_secret()
-        self._up()
+        """Build, (re)create, start, and attach to containers for services.
+
+        Only services whose effective config changed since last successful ``up``
+        (or which are not running) are (re)created; the rest are kept as-is.
+        """
+        from compose.parallel import ParallelStreamWriter
+
+        from .fingerprint import Fingerprints
+
+        if self.inventory():
+            self.nodes_up()
+            return
+
+        self._fingerprints = Fingerprints(pathlib.Path(STATE_DIR, "fingerprints.json"))
+        self._probes = self.start_probes()
+
+        with span("plan bring-up", "app"):
+            # settings interpolated into Compose files must be resolved before fingerprinting;
+            # FQDN is assumed from last bootstrap until bootstrap of this run resolves it
+            self.gather_ip(None if self.settings["HOST_IP"] else self._probes.detect_ip())
+            if not self.settings["DOMAIN"]:
+                self.settings["DOMAIN"] = self._fingerprints.bootstrap.get("domain", "")
+            current = self.service_fingerprints()
+            entries = self.bringup_plan(self._fingerprints, current)
+            self.print_bringup_plan(entries)
+            dag = self.bringup_dag(keep=[entry.service for entry in entries if entry.action == "="])
+        try:
+            dag.validate()
+        except ValueError as exc:
+            print(f"[E] Unable to plan bring-up of services; reason={exc}")
+            raise click.Abort()
+
+        # progress lines of concurrent operations can't be rewritten in-place
+        noansi = ParallelStreamWriter.noansi
+        ParallelStreamWriter.set_noansi()
+        try:
+            dag.run()
+
+            # kept services are reconciled if bootstrap resolved FQDN other than the assumed one
+            resolved = self.service_fingerprints()
+            for entry in entries:
+                if entry.action == "=" and resolved.get(entry.service) != current.get(entry.service):
+                    print(f"[I] Reconciling {entry.service} as FQDN is resolved to {self.settings['DOMAIN']}")
+                    self._start_service(entry.service)
+        finally:
+            ParallelStreamWriter.set_noansi(noansi)
+
+        self._fingerprints.services = resolved
+        self._fingerprints.save()
+
+        dag.report()
         self.healthcheck()
 
     def healthcheck(self):
         """Run healthcheck against the application.
 
-        The process involves making request to oxTrust container periodically.
-        If the request returns a success response, mark the deployment as complete.
-        Otherwise, retry the healthcheck until certain threshold (currently set at 300 seconds)
+        The process watches health transitions of all enabled services (from Docker events stream)
+        and probes oxTrust health-check endpoint using adaptive backoff.
+        Once all services are ready, mark the deployment as complete.
+        Otherwise, wait until certain threshold (currently set at 300 seconds)
         is reached and error message is thrown.
         """
-        import requests
+        import click_spinner
         import urllib3
         urllib3.disable_warnings()
 
         wait_max = 300
-        wait_delay = 10
 
         print(
             "[I] Launching Gluu Server; to see logs on deployment process, "
             "please run 'logs -f' command on separate terminal"
         )
-        with click_spinner.spinner():
-            elapsed = 0
-            while elapsed <= wait_max:
-                with contextlib.suppress(requests.exceptions.ConnectionError):
-                    req = requests.get(
-                        f"https://{self.settings['HOST_IP']}/identity/restv1/health-check",
-                        verify=False,
-                    )
-                    if req.ok:
-                        print(f"\n[I] Gluu Server installed successfully; please visit https://{self.settings['DOMAIN']}")
-                        return
-
-                time.sleep(wait_delay)
-                elapsed += wait_delay
+        with self.top_level_cmd() as tlc:
+            services = [svc.name for svc in tlc.project.services if svc.name not in JOB_SERVICES]
+            watcher = ReadinessWatcher(
+                tlc.project,
+                services,
+                probes={"oxtrust": f"https://{self.settings['HOST_IP']}/identity/restv1/health-check"},
+                started_at=self.started_at,
+            )
 
+            with click_spinner.spinner(), span("healthcheck", "app"):
+                completed = watcher.wait(wait_max)
+
+        print("")
+        watcher.report()
+
+        if completed:
+            print(f"[I] Gluu Server installed successfully; please visit https://{self.settings['DOMAIN']}")
+        else:
             # healthcheck likely failed
-            print(f"\n[W] Unable to get healthcheck status; please check the logs or visit https://{self.settings['DOMAIN']}")
+            print(f"[W] Unable to get healthcheck status; please check the logs or visit https://{self.settings['DOMAIN']}")
+
+    def write_node_definitions(self, inventory, config):
+        """Write Compose file of each node (``nodes/docker-compose.NAME.yml``).
+
+        :param inventory: An instance of :class:`~pygluu.compose.nodes.Inventory`.
+        :param config: Merged Compose config of all enabled services (as loaded by Compose).
+        :returns: A mapping of node name and absolute path to its Compose file.
+        """
+        import yaml
+        from compose.config.serialize import serialize_config
+
+        try:
+            rendered = inventory.render(yaml.safe_load(serialize_config(config)))
+        except ValueError as exc:
+            print(f"[E] Unable to render definitions of nodes; reason={exc}")
+            raise click.Abort()
+
+        paths = {}
+        for name, content in rendered.items():
+            path = pathlib.Path("nodes", f"docker-compose.{name}.yml")
+            _write_if_changed(path, yaml.dump(content))
+            paths[name] = str(path.resolve())
+        return paths
+
+    def cluster(self):
+        """Get projects of all nodes (in multi-node mode).
+
+        Each project is loaded from Compose file of its node and talks to Docker API of the node.
+        Projects are resolved once and reused as long as Compose files and settings are unchanged.
+
+        :returns: An instance of :class:`~pygluu.compose.nodes.Cluster`.
+        """
+        from compose.cli.command import get_project_name
+
+        from .nodes import Cluster
+
+        inventory = self.inventory()
+
+        with self._cluster_lock:
+            compose_files = self.get_compose_files()
+            key = self._project_key(compose_files)
+
+            if key != self._cluster_key:
+                env = self._compose_environment(compose_files)
+                with span("render node definitions", "compose"):
+                    _, config = self.load_config(compose_files, env)
+                paths = self.write_node_definitions(inventory, config)
+                project_name = get_project_name(os.getcwd(), environment=env)
+                self._cluster = Cluster.load(inventory.nodes, paths, project_name, env)
+                self._cluster_key = key
+            return self._cluster
+
+    def _bootstrap_nodes(self, cluster):
+        """Prepare configs and secrets using Vault and Consul of their nodes."""
+        from .backends import ConsulAPI
+        from .backends import VaultAPI
+        from .backends import pooled_session
+
+        inventory = self.inventory()
+        session = pooled_session()
+
+        vault_node = inventory.node_of("vault")
+        secret = Secret(cluster.client(vault_node), VaultAPI(f"http://{vault_node.address}:8200", session))
+        secret.setup()
+
+        consul_node = inventory.consul_servers[0]
+        config = Config(cluster.client(consul_node), ConsulAPI(f"http://{consul_node.address}:8500", session))
+        if not self.seed_from_dump(secret.api, config.api):
+            self.resolve_domain(config)
+
+    def nodes_up(self):
+        """Bring up services across nodes (in multi-node mode).
+
+        Each stage (see :data:`STARTUP_STAGES`) is started on all nodes concurrently;
+        secrets are bootstrapped once Vault (and Consul cluster) is started.
+        """
+        from compose.parallel import ParallelStreamWriter
+
+        cluster = self.cluster()
+        replicas = self.replicas()
+
+        with span("prepare nodes", "app"):
+            cluster.prepare()
+
+        # progress lines of concurrent operations can't be rewritten in-place
+        noansi = ParallelStreamWriter.noansi
+        ParallelStreamWriter.set_noansi()
+        try:
+            # unlisted services go to the last stage
+            for index, stage in enumerate(STARTUP_STAGES + (None,)):
+                with span(f"start {', '.join(stage) if stage else 'other services'}", "app"):
+                    cluster.up(lambda name: _startup_stage(name) == index, replicas)
+
+                if stage and "vault" in stage:
+                    with span("bootstrap secrets", "app"):
+                        self._bootstrap_nodes(cluster)
+                    # FQDN resolved by the bootstrap is interpolated into definitions of subsequent stages
+                    cluster = self.cluster()
+        finally:
+            ParallelStreamWriter.set_noansi(noansi)
+
+        print(f"[I] Launching Gluu Server on {len(cluster.projects)} nodes")
+        ready = functools.partial(cluster.ready, JOB_SERVICES)
+        if wait_for(ready, "services on all nodes to be ready", timeout=300.0, max_delay=5.0).ok:
+            print(f"[I] Gluu Server installed successfully; please visit https://{self.settings['DOMAIN']}")
+        else:
+            print(f"[W] Unable to get healthcheck status; please check the logs or visit https://{self.settings['DOMAIN']}")
+
+    def update_settings(self, updates):
+        """Persist settings to ``settings.py`` file.
+
+        Existing assignment of each setting is replaced in-place, otherwise a new one is appended.
+
+        :param updates: A mapping of setting name and its value.
+        """
+        path = pathlib.Path("settings.py")
+        text = path.read_text() if path.is_file() else ""
+
+        for key, value in updates.items():
+            line = f"{key} = {value!r}"
+            text, count = re.subn(rf"^{key}\s*=.*$", line, text, flags=re.MULTILINE)
+            if not count:
+                text = f"{text.rstrip()}\n{line}\n".lstrip()
+            self.settings[key] = value
+        path.write_text(text)
+
+    def scale(self, replicas):
+        """Set number of replicas of services.
+
+        Running replicas are kept; only missing replicas are created (or surplus replicas removed).
+        New replicas are registered to consul by registrator, hence nginx balances requests across them.
+        The number of replicas is stored in ``SCALE_*`` settings to be honored by subsequent ``up``.
+
+        :param replicas: A mapping of service name and its number of replicas.
+        """
+        keys = {svc: key for key, svc in SCALE_MAPPINGS.items()}
+
+        unsupported = [svc for svc in replicas if svc not in keys]
+        if unsupported:
+            print(f"[E] Unable to scale {', '.join(unsupported)}; "
+                  f"supported services are {', '.join(SCALE_MAPPINGS.values())}")
+            raise click.Abort()
+
+        disabled = [svc for svc in replicas if not self.settings.get(f"SVC_{svc.upper()}")]
+        if disabled:
+            print(f"[E] Unable to scale disabled service(s) {', '.join(disabled)}; "
+                  "enable them in settings.py first")
+            raise click.Abort()
+
+        self.update_settings({keys[svc]: num for svc, num in replicas.items()})
+
+        snapshot = self.status_snapshot()
+        scaled = {}
+        with self.top_level_cmd() as tlc:
+            for svc, num in replicas.items():
+                if not snapshot.running(svc):
+                    print(f"[W] Service {svc} is not running; {num} replica(s) will be started on next up")
+                    continue
+
+                with span(f"scale {svc}", "compose"):
+                    tlc.project.get_service(svc).scale(num)
+                scaled[svc] = num
+
+        def replicas_ready():
+            snapshot = self.status_snapshot(health=True)
+            return all(
+                len([c for c in snapshot.running(svc) if c.health in ("healthy", "")]) >= num
+                for svc, num in scaled.items()
+            )
+
+        if scaled and wait_for(replicas_ready, "replicas to be healthy", timeout=300.0, max_delay=5.0).ok:
+            for svc, num in scaled.items():
+                print(f"[I] Service {svc} is running {num} replica(s)")
+
+    def _rollout_consul(self, project):
+        """Get Consul API used by rollout to deregister old containers.
+
+        :param project: An instance of ``compose.project.Project``.
+        :returns: An instance of :class:`~pygluu.compose.backends.ConsulAPI`, or ``None`` if the API is unreachable.
+        """
+        from .backends import ConsulAPI
+
+        consul_url = self._published_url(project, "consul", 8500)
+        if consul_url:
+            consul = ConsulAPI(consul_url)
+            if consul.available():
+                return consul
+
+        print("[W] Consul API is unreachable; old containers are deregistered by registrator once stopped")
+        return None
+
+    def rollout(self, services=(), max_unavailable=1, drain=5.0, force=False):
+        """Replace outdated containers of stateless services without downtime.
+
+        Each new container is started next to the old one, and the old one is stopped only after
+        the new one is healthy and takes over requests (see :class:`~pygluu.compose.rollout.Rollout`).
+
+        :param services: Names of services (all running stateless services if omitted).
+        :param max_unavailable: Maximum number of containers replaced at once.
+        :param drain: Time (in seconds) to wait for in-flight requests before stopping old container.
+        :param force: Replace containers even if their config is unchanged.
+        """
+        from compose.service import BuildAction
+
+        from .fingerprint import Fingerprints
+        from .rollout import Rollout
+
+        supported = list(SCALE_MAPPINGS.values())
+        unsupported = [svc for svc in services if svc not in supported]
+        if unsupported:
+            print(f"[E] Unable to roll out {', '.join(unsupported)}; "
+                  f"supported services are {', '.join(supported)}")
+            raise click.Abort()
+
+        snapshot = self.status_snapshot()
+        with self.top_level_cmd() as tlc:
+            enabled = [svc for svc in supported if svc in tlc.project.service_names]
+            disabled = [svc for svc in services if svc not in enabled]
+            if disabled:
+                print(f"[E] Unable to roll out disabled service(s) {', '.join(disabled)}")
+                raise click.Abort()
+
+            names = [svc for svc in (services or enabled) if snapshot.running(svc)]
+            for svc in names:
+                with span(f"pull {svc}", "rollout"):
+                    tlc.project.get_service(svc).ensure_image_exists(do_build=BuildAction.skip, silent=True)
+
+            consul = self._rollout_consul(tlc.project)
+            rollout = Rollout(tlc.project, consul, max_unavailable=max_unavailable, drain=drain)
+            pairs = rollout.outdated(names, force=force)
+            if not pairs:
+                print("[I] All containers are up-to-date")
+                return
+
+            print(f"[I] Rolling out {len(pairs)} container(s), {max_unavailable} at a time:")
+            for svc, container in pairs:
+                print(f"    {svc.name:<20}{container.name}")
+
+            errors = rollout.run(pairs)
+
+        for error in errors:
+            print(f"[E] {error}")
+        if errors:
+            raise click.Abort()
+
+        # record new config of rolled out services, hence subsequent ``up`` keeps them as-is
+        fingerprints = Fingerprints(pathlib.Path(STATE_DIR, "fingerprints.json"))
+        if fingerprints.services:
+            current = self.service_fingerprints()
+            fingerprints.services.update({svc.name: current[svc.name] for svc, _ in pairs})
+            fingerprints.save()
+        print(f"[I] Rolled out {len(pairs)} container(s)")
 
     def touch_files(self):
         """Create pre-defined files in current directory."""
@@ -624,6 +2456,8 @@ class App:
 
     def copy_templates(self):
         """Copy pre-defined templates to current directory."""
+        import shutil
+
         entries = pathlib.Path(
             os.path.join(os.path.dirname(__file__), "templates")
         )
@@ -636,32 +2470,50 @@ class App:
             shutil.copy(entry, dst)
             print(f"[I] Creating new {dst}")
 
-    def check_ports(self):
-        """Check whether ports required by the application are available.
+    def start_probes(self):
+        """Start preflight checks which need no project (Docker daemon and free disk space under ``volumes``).
 
-        :returns: Ports availability as boolean.
+        :returns: An instance of :class:`~pygluu.compose.preflight.Probes`.
         """
-        def _check(host, port):
-            socket.setdefaulttimeout(30.0)
+        from .preflight import Probes
+        from .preflight import check_disk
+        from .preflight import check_docker
 
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                conn = sock.connect_ex((host, port))
-                if conn == 0:
-                    # port is not available
-                    return False
-                return True
+        probes = Probes()
+        probes.check(check_docker)
+        probes.check(check_disk, "volumes" if os.path.isdir("volumes") else ".")
+        return probes
 
-        with self.top_level_cmd() as tlc:
-            ngx_svc = tlc.project.get_service("nginx")
-            if ngx_svc.containers():
-                return
+    def preflight(self):
+        """Check host resources required by the application.
 
-            # published service ports must be available if nginx has not run yet
-            for port in [sp.published for sp in ngx_svc.options["ports"]]:
-                port_available = _check("0.0.0.0", port)
-                if not port_available:
-                    print(f"[W] Required port {port} is bind to another process")
-                    raise click.Abort()
+        All checks (Docker daemon, published ports of enabled services which are not running yet,
+        and free disk space under ``volumes``) run concurrently, each bounded by its own timeout.
+        Checks started by ``up`` (see :meth:`start_probes`) are joined by port checks.
+        """
+        from .preflight import check_port
+
+        probes, self._probes = self._probes or self.start_probes(), None
+
+        snapshot = self.status_snapshot()
+        with self.top_level_cmd() as tlc:
+            # published ports must be available unless their service is already running
+            for svc in tlc.project.services:
+                if snapshot.running(svc.name):
+                    continue
+                for sp in svc.options.get("ports", []):
+                    with contextlib.suppress(AttributeError, TypeError, ValueError):
+                        if sp.published and sp.protocol in (None, "tcp"):
+                            probes.check(check_port, sp.external_ip or "0.0.0.0", int(sp.published))
+
+        with span("preflight", "app"):
+            results = probes.results()
+
+        failed = [result for result in results if not result.ok]
+        for result in failed:
+            print(f"[{'E' if result.fatal else 'W'}] {result.message}")
+        if any(result.fatal for result in failed):
+            raise click.Abort()
 
     def check_workdir(self):
         """Check whether current directory is a working directory.
@@ -0,0 +1,237 @@
+"""Clients to interact with Vault and Consul over their HTTP APIs."""
+
+from .profiler import span
+
+
+def pooled_session(pool_maxsize=4):
+    """Create HTTP session backed by keep-alive connection pool.
+
+    :param pool_maxsize: Maximum number of connections kept in the pool.
+    :returns: An instance of ``requests.Session``.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class APIError(Exception):
+    """Error returned by HTTP API."""
+
+
+class BaseAPI:
+    """Base class of HTTP API client.
+
+    :param addr: Base URL of the API, e.g. ``http://127.0.0.1:8200``.
+    :param session: An instance of ``requests.Session`` (a pooled session is created if omitted).
+    :param timeout: Timeout (in seconds) of each request.
+    """
+
+    #: Path used to check whether the API is reachable.
+    ping_path = "/"
+
+    def __init__(self, addr, session=None, timeout=5.0):
+        self.addr = addr.rstrip("/")
+        self.session = session or pooled_session()
+        self.timeout = timeout
+
+    def request(self, method, path, allowed_statuses=(), **kwargs):
+        """Send request to the API.
+
+        :param method: HTTP method.
+        :param path: Path relative to base URL.
+        :param allowed_statuses: Non-2xx statuses that must not raise error.
+        :returns: An instance of ``requests.Response``.
+        """
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            with span(f"{method} {path}", "http"):
+                resp = self.session.request(method, f"{self.addr}{path}", **kwargs)
+        except requests.exceptions.RequestException as exc:
+            raise APIError(f"{method} {path} failed; reason={exc}") from exc
+
+        if not resp.ok and resp.status_code not in allowed_statuses:
+            raise APIError(f"{method} {path} returned {resp.status_code}; reason={resp.text.strip()}")
+        return resp
+
+    def available(self):
+        """Check whether the API is reachable.
+
+        :returns: ``True`` if the API returns any HTTP response, otherwise ``False``.
+        """
+        import requests
+
+        try:
+            self.session.get(f"{self.addr}{self.ping_path}", timeout=self.timeout)
+            return True
+        except requests.exceptions.RequestException:
+            return False
+
+
+class VaultAPI(BaseAPI):
+    """Client of Vault HTTP API.
+
+    :param addr: Base URL of the API, e.g. ``http://127.0.0.1:8200``.
+    :param session: An instance of ``requests.Session`` (a pooled session is created if omitted).
+    :param timeout: Timeout (in seconds) of each request.
+    """
+
+    ping_path = "/v1/sys/health"
+
+    def __init__(self, addr, session=None, timeout=5.0):
+        super().__init__(addr, session, timeout)
+        self.token = ""
+
+    def request(self, method, path, allowed_statuses=(), **kwargs):  # noqa: D102
+        if self.token:
+            kwargs.setdefault("headers", {})["X-Vault-Token"] = self.token
+        return super().request(method, path, allowed_statuses, **kwargs)
+
+    def seal_status(self):
+        """Get seal status.
+
+        :returns: A mapping contains of ``initialized``, ``sealed``, and ``type`` keys (among others).
+        """
+        status = self.request("GET", "/v1/sys/seal-status").json()
+        if "initialized" not in status:
+            status["initialized"] = self.request("GET", "/v1/sys/init").json()["initialized"]
+        return status
+
+    def init(self, shares=1, threshold=1):
+        """Initialize Vault.
+
+        :returns: A mapping contains of (recovery) keys and root token.
+        """
+        return self.request("PUT", "/v1/sys/init", json={
+            "secret_shares": shares,
+            "secret_threshold": threshold,
+            "recovery_shares": shares,
+            "recovery_threshold": threshold,
+        }).json()
+
+    def unseal(self, key):
+        """Submit unseal key.
+
+        :param key: Unseal key.
+        :returns: Seal status.
+        """
+        return self.request("PUT", "/v1/sys/unseal", json={"key": key}).json()
+
+    def token_valid(self):
+        """Check whether current token is accepted by Vault."""
+        resp = self.request("GET", "/v1/auth/token/lookup-self", allowed_statuses=(400, 403, 503))
+        return resp.ok
+
+    def policies(self):
+        """Get list of policy names."""
+        data = self.request("GET", "/v1/sys/policy").json()
+        return data.get("policies") or data.get("data", {}).get("keys", [])
+
+    def write_policy(self, name, rules):
+        """Create or update policy.
+
+        :param name: Name of the policy.
+        :param rules: Policy document in HCL format.
+        """
+        self.request("PUT", f"/v1/sys/policy/{name}", json={"policy": rules})
+
+    def auth_methods(self):
+        """Get mapping of enabled auth methods (keyed by path, e.g. ``approle/``)."""
+        data = self.request("GET", "/v1/sys/auth").json()
+        return data.get("data") or {k: v for k, v in data.items() if k.endswith("/")}
+
+    def enable_auth(self, method):
+        """Enable auth method at default path.
+
+        :param method: Type of auth method, e.g. ``approle``.
+        """
+        self.request("POST", f"/v1/sys/auth/{method}", json={"type": method})
+
+    def read(self, path):
+        """Read data at given path.
+
+        :param path: Path relative to ``/v1/``.
+        :returns: Value of ``data`` key from response.
+        """
+        return self.request("GET", f"/v1/{path}").json().get("data", {})
+
+    def write(self, path, data=None):
+        """Write data at given path.
+
+        :param path: Path relative to ``/v1/``.
+        :param data: Payload to write.
+        :returns: Value of ``data`` key from response (if any).
+        """
+        resp = self.request("POST", f"/v1/{path}", json=data or {})
+        if resp.status_code == 204 or not resp.content:
+            return {}
+        return resp.json().get("data", {})
+
+
+class ConsulAPI(BaseAPI):
+    """Client of Consul HTTP API.
+
+    :param addr: Base URL of the API, e.g. ``http://127.0.0.1:8500``.
+    :param session: An instance of ``requests.Session`` (a pooled session is created if omitted).
+    :param timeout: Timeout (in seconds) of each request.
+    """
+
+    ping_path = "/v1/status/leader"
+
+    def kv_get(self, key):
+        """Get raw value of a key.
+
+        :param key: Key name.
+        :returns: Value as string or ``None`` if key is not found.
+        """
+        resp = self.request("GET", f"/v1/kv/{key}", params={"raw": ""}, allowed_statuses=(404,))
+        if resp.status_code == 404:
+            return None
+        return resp.text
+
+    def txn(self, ops):
+        """Run operations in single transaction; either all of them are applied or none.
+
+        :param ops: List of operations, e.g. ``{"KV": {"Verb": "set", "Key": ..., "Value": ...}}``.
+        :returns: Results of the operations.
+        """
+        resp = self.request("PUT", "/v1/txn", json=ops, allowed_statuses=(409,))
+        data = resp.json() or {}
+        if resp.status_code == 409:
+            errors = "; ".join(err.get("What", "") for err in data.get("Errors") or [])
+            raise APIError(f"PUT /v1/txn was rolled back; reason={errors}")
+        return data.get("Results") or []
+
+    def catalog_service(self, name):
+        """Get instances of a service registered in the catalog.
+
+        :param name: Service name.
+        :returns: List of service instances (each has ``ServiceID`` and ``ServiceAddress``).
+        """
+        return self.request("GET", f"/v1/catalog/service/{name}").json()
+
+    def deregister_service(self, service_id):
+        """Deregister a service instance from local agent.
+
+        :param service_id: ID of the service instance.
+        """
+        self.request("PUT", f"/v1/agent/service/deregister/{service_id}")
+
+    def register_service(self, entry):
+        """Register a service instance to local agent.
+
+        :param entry: Service instance as returned by :meth:`catalog_service`.
+        """
+        self.request("PUT", "/v1/agent/service/register", json={
+            "ID": entry["ServiceID"],
+            "Name": entry["ServiceName"],
+            "Address": entry.get("ServiceAddress", ""),
+            "Port": entry.get("ServicePort", 0),
+            "Tags": entry.get("ServiceTags") or [],
+        })
@@ -0,0 +1,496 @@
+"""Incremental backup and restore of persistent volumes using a content-addressed chunk store."""
+
+import collections
+import datetime
+import hashlib
+import json
+import os
+import shlex
+import stat
+import threading
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .ldaptune import backup_command
+from .profiler import span
+from .wait import wait_for
+
+# files are split into chunks at fixed offsets; stateful services mostly append to their files
+# (e.g. JE logs of OpenDJ), hence unchanged parts of changed files map to the same chunks
+CHUNK_SIZE = 4 * 1024 ** 2
+
+# zlib level of chunks; low levels keep compression faster than reading from disk
+COMPRESS_LEVEL = 3
+
+# directory of persistent volumes (relative to working directory)
+VOLUMES_DIR = "volumes"
+
+# host directories of OpenDJ database and its backups (mounted as ``/opt/opendj/db`` and ``/opt/opendj/bak``)
+OPENDJ_DB_DIR = "volumes/opendj/db"
+OPENDJ_BACKUP_DIR = "volumes/opendj/backup"
+
+# host directory of Consul data (mounted as ``/consul/data``)
+CONSUL_DATA_DIR = "volumes/consul"
+
+# snapshot saved by ``consul snapshot save`` (relative to Consul data directory)
+CONSUL_SNAPSHOT = "backup/consul.snap"
+
+# host directory of Vault data (mounted as ``/vault/data``); unused as long as Vault keeps its data in Consul
+VAULT_DATA_DIR = "volumes/vault/data"
+
+BackupResult = namedtuple("BackupResult", ["snapshot", "files", "changed", "chunks", "read", "written"])
+BackupResult.__doc__ = """Outcome of :meth:`Repository.backup`.
+
+:param snapshot: ID of the snapshot.
+:param files: Number of files in the snapshot.
+:param changed: Number of files read (new or changed since previous snapshot).
+:param chunks: Number of chunks added to the store.
+:param read: Number of bytes read from changed files.
+:param written: Number of (compressed) bytes added to the store.
+"""
+
+RestoreResult = namedtuple("RestoreResult", ["snapshot", "files", "changed", "removed"])
+RestoreResult.__doc__ = """Outcome of :meth:`Repository.restore`.
+
+:param snapshot: ID of the snapshot.
+:param files: Number of files in the snapshot.
+:param changed: Number of files written (the rest are unchanged on disk).
+:param removed: Number of files removed as they are absent in the snapshot.
+"""
+
+
+class BackupError(Exception):
+    """Error while reading or writing backup."""
+
+
+def _ordered(executor, func, items, window):
+    """Apply a function to items concurrently while yielding results in order.
+
+    At most ``window`` items are in flight, hence memory usage is bounded regardless of number of items.
+    """
+    pending = collections.deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _read_chunks(path):
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+
+def _excluded(path, exclude):
+    return any(path == prefix or path.startswith(f"{prefix}/") for prefix in exclude)
+
+
+def opendj_backends():
+    """Get IDs of OpenDJ backends, i.e. subdirectories of its database directory."""
+    if not os.path.isdir(OPENDJ_DB_DIR):
+        return []
+    return sorted(entry.name for entry in os.scandir(OPENDJ_DB_DIR) if entry.is_dir())
+
+
+def live_consul_paths():
+    """Get paths of live data of Consul, i.e. everything in its data directory except its snapshot."""
+    if not os.path.isdir(CONSUL_DATA_DIR):
+        return []
+    keep = CONSUL_SNAPSHOT.split("/")[0]
+    return sorted(os.path.join(CONSUL_DATA_DIR, name) for name in os.listdir(CONSUL_DATA_DIR) if name != keep)
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ChunkStore:
+    """Store of compressed chunks named by SHA-256 digest of their (uncompressed) content.
+
+    :param root: Directory of the store.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest):
+        """Get path of a chunk."""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest):
+        """Check whether a chunk is stored."""
+        return os.path.isfile(self.path(digest))
+
+    def put(self, data):
+        """Add a chunk (if missing).
+
+        :returns: A ``tuple`` of digest and number of bytes written (zero if the chunk exists).
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.isfile(path):
+            return digest, 0
+
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, compressed)
+        return digest, len(compressed)
+
+    def get(self, digest):
+        """Get content of a chunk (verified against its digest)."""
+        try:
+            with open(self.path(digest), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error) as exc:
+            raise BackupError(f"Unable to read chunk {digest}; reason={exc}")
+
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupError(f"Chunk {digest} is corrupted")
+        return data
+
+
+class Repository:
+    """Backup repository containing chunk store and snapshot manifests.
+
+    Layout of the repository::
+
+        chunks/<2 first hex digits>/<sha256>    zlib-compressed chunks
+        snapshots/<id>.json                     manifest of each snapshot
+
+    :param root: Directory of the repository.
+    :param max_workers: Maximum number of chunks hashed/compressed (or decompressed) concurrently.
+    """
+
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self.store = ChunkStore(os.path.join(root, "chunks"))
+        self.max_workers = max_workers
+
+    def snapshots(self):
+        """List IDs of stored snapshots, oldest first."""
+        try:
+            names = os.listdir(os.path.join(self.root, "snapshots"))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+    def load(self, snapshot_id=""):
+        """Load manifest of a snapshot (latest snapshot if ID is omitted)."""
+        snapshots = self.snapshots()
+        snapshot_id = snapshot_id or (snapshots[-1] if snapshots else "")
+        if snapshot_id not in snapshots:
+            raise BackupError(f"Snapshot {snapshot_id or '(latest)'} is not found in {self.root}")
+
+        with open(os.path.join(self.root, "snapshots", f"{snapshot_id}.json")) as f:
+            return json.load(f)
+
+    def save(self, manifest):
+        """Write manifest of a snapshot."""
+        path = os.path.join(self.root, "snapshots", f"{manifest['id']}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, json.dumps(manifest, indent=1).encode())
+
+    def backup(self, root=VOLUMES_DIR, exclude=(), extra=None):
+        """Take a snapshot of a directory.
+
+        Files whose size and modification time are unchanged since the latest snapshot
+        reuse its chunks without being read; changed files are streamed chunk by chunk
+        and only chunks missing from the store are compressed and written.
+
+        :param root: Directory to backup (relative to working directory).
+        :param exclude: Paths (relative to working directory) to skip.
+        :param extra: A mapping of additional metadata stored in the manifest.
+        :returns: An instance of :class:`BackupResult`.
+        """
+        try:
+            previous = {entry["path"]: entry for entry in self.load()["entries"]}
+        except BackupError:
+            previous = {}
+
+        snapshot_id = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        entries = []
+        changed = chunks = read = written = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for path, st in self._scan(root, exclude):
+                entry = {"path": path, "mode": stat.S_IMODE(st.st_mode)}
+                if stat.S_ISDIR(st.st_mode):
+                    entry["type"] = "dir"
+                elif stat.S_ISLNK(st.st_mode):
+                    entry.update(type="symlink", target=os.readlink(path))
+                else:
+                    entry.update(type="file", size=st.st_size, mtime_ns=st.st_mtime_ns)
+                    prev = previous.get(path)
+                    if (
+                        prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns
+                        and all(self.store.has(digest) for digest in prev["chunks"])
+                    ):
+                        entry["chunks"] = prev["chunks"]
+                    else:
+                        entry["chunks"] = []
+                        with span(f"backup {path}", "backup"):
+                            for digest, size in _ordered(executor, self.store.put, _read_chunks(path),
+                                                         self.max_workers * 2):
+                                entry["chunks"].append(digest)
+                                chunks += bool(size)
+                                written += size
+                        changed += 1
+                        read += st.st_size
+                entries.append(entry)
+
+        self.save(dict(
+            extra or {},
+            id=snapshot_id,
+            root=root,
+            exclude=list(exclude),
+            chunk_size=CHUNK_SIZE,
+            entries=entries,
+        ))
+        files = sum(entry["type"] == "file" for entry in entries)
+        return BackupResult(snapshot_id, files, changed, chunks, read, written)
+
+    def _scan(self, root, exclude):
+        """Walk a directory (top-down, sorted) yielding path and ``lstat`` result of each entry."""
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(
+                name for name in dirnames
+                if not _excluded(os.path.join(dirpath, name), exclude)
+            )
+            yield dirpath, os.lstat(dirpath)
+
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                if not _excluded(path, exclude):
+                    yield path, os.lstat(path)
+
+            # symlinks to directories are not followed, hence recorded as symlinks
+            for name in list(dirnames):
+                path = os.path.join(dirpath, name)
+                if os.path.islink(path):
+                    dirnames.remove(name)
+                    yield path, os.lstat(path)
+
+    def restore(self, snapshot_id=""):
+        """Restore a snapshot into its directory.
+
+        Files whose size and modification time match the snapshot are left as-is,
+        and files absent in the snapshot are removed (except excluded paths).
+
+        :param snapshot_id: ID of the snapshot (latest snapshot if omitted).
+        :returns: An instance of :class:`RestoreResult`.
+        """
+        manifest = self.load(snapshot_id)
+        removed = self._remove_extra(manifest)
+
+        changed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for entry in manifest["entries"]:
+                path = entry["path"]
+                if entry["type"] == "dir":
+                    os.makedirs(path, exist_ok=True)
+                elif entry["type"] == "symlink":
+                    if os.path.lexists(path):
+                        os.unlink(path)
+                    os.symlink(entry["target"], path)
+                elif self._restore_file(executor, entry):
+                    changed += 1
+
+        # permissions of directories are restored last as they may prevent writing their content
+        for entry in reversed(manifest["entries"]):
+            if entry["type"] != "symlink":
+                os.chmod(entry["path"], entry["mode"])
+
+        files = sum(entry["type"] == "file" for entry in manifest["entries"])
+        return RestoreResult(manifest["id"], files, changed, removed)
+
+    def _remove_extra(self, manifest):
+        """Remove files and directories absent in a snapshot (except excluded paths).
+
+        :returns: Number of removed files.
+        """
+        root = manifest["root"]
+        if not os.path.isdir(root):
+            return 0
+
+        paths = {entry["path"] for entry in manifest["entries"]}
+        removed = 0
+        # children are removed before their directories
+        for path, st in reversed(list(self._scan(root, manifest.get("exclude", [])))):
+            if path in paths:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                os.rmdir(path)
+            else:
+                os.unlink(path)
+                removed += 1
+        return removed
+
+    def _restore_file(self, executor, entry):
+        path = entry["path"]
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            st = None
+        if st and stat.S_ISREG(st.st_mode) and st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+            return False
+
+        if st and stat.S_ISDIR(st.st_mode):
+            raise BackupError(f"Unable to restore file {path}; a directory exists in its place")
+
+        tmp = f"{path}.restore.tmp"
+        with span(f"restore {path}", "backup"), open(tmp, "wb") as f:
+            for data in _ordered(executor, self.store.get, entry["chunks"], self.max_workers * 2):
+                f.write(data)
+        os.replace(tmp, path)
+        os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        return True
+
+
+class ServiceData:
+    """Back up and restore data of stateful services (OpenDJ and Consul) using their own tools.
+
+    Files of a running database change while being copied, hence its data is backed up by the database
+    itself into a mounted volume (backed up along with other files), and restored from there.
+
+    :param project: An instance of ``compose.project.Project``.
+    :param container: A callable accepting service name and returning helper of its running container
+                      (see :class:`~pygluu.compose.app.ContainerHelper`).
+    """
+
+    def __init__(self, project, container):
+        self.project = project
+        self.container = container
+
+    def backup_opendj(self, backends, password):
+        """Back up OpenDJ backends online (into ``/opt/opendj/bak`` mount) while ldap keeps running.
+
+        Each backend is backed up into its own directory; backups are incremental once a full backup of the backend exists.
+
+        :param backends: IDs of backends.
+        :param password: Password of directory manager.
+        :raises BackupError: If backup of any backend fails.
+        """
+        ldap = self.container("ldap")
+        with ldap.secret_file(password) as password_file:
+            for backend in backends:
+                # the first backup of each backend must be a full one
+                incremental = os.path.isfile(os.path.join(OPENDJ_BACKUP_DIR, backend, "backup.info"))
+                print(f"[I] Running {'incremental' if incremental else 'full'} online backup of OpenDJ backend {backend}")
+
+                cmd = backup_command(backend, f"/opt/opendj/bak/{backend}", password_file, incremental)
+                output, retcode = ldap.exec(cmd)
+                if retcode != 0:
+                    reason = output.decode(errors="replace").strip()
+                    raise BackupError(f"Unable to backup OpenDJ backend {backend}; reason={reason}")
+
+    def backup_consul(self):
+        """Save snapshot of Consul (into its data directory) while it keeps running.
+
+        Vault keeps its data in Consul, hence the snapshot covers both of them.
+
+        :returns: Path of the snapshot inside consul container.
+        :raises BackupError: If the snapshot fails.
+        """
+        os.makedirs(os.path.dirname(os.path.join(CONSUL_DATA_DIR, CONSUL_SNAPSHOT)), exist_ok=True)
+        path = f"/consul/data/{CONSUL_SNAPSHOT}"
+
+        print("[I] Saving snapshot of Consul")
+        output, retcode = self.container("consul").exec(f"consul snapshot save -http-addr=http://consul:8500 {path}")
+        if retcode != 0:
+            raise BackupError(f"Unable to save snapshot of Consul; reason={output.decode(errors='replace').strip()}")
+        return path
+
+    def backup_live(self, services, password):
+        """Back up data of running stateful services online, so their live files can be skipped.
+
+        :param services: Names of running services.
+        :param password: A callable returning password of directory manager (called only if OpenDJ has backends).
+        :returns: A ``tuple`` of details to record in snapshot manifest and paths to exclude from the snapshot.
+        :raises BackupError: If backup of any service fails.
+        """
+        extra = {"opendj_backends": [], "consul_snapshot": ""}
+        exclude = []
+        if "ldap" in services:
+            extra["opendj_backends"] = opendj_backends()
+            if extra["opendj_backends"]:
+                self.backup_opendj(extra["opendj_backends"], password())
+            exclude.append(OPENDJ_DB_DIR)
+        if "consul" in services:
+            extra["consul_snapshot"] = self.backup_consul()
+            exclude.extend(live_consul_paths())
+        if "vault" in services:
+            exclude.append(VAULT_DATA_DIR)
+        return extra, exclude
+
+    def restore_opendj(self, backends):
+        """Restore OpenDJ backends from their backups (in ``/opt/opendj/bak`` mount).
+
+        The restore runs offline in a one-off container of ldap service.
+
+        :param backends: IDs of backends to restore.
+        :raises BackupError: If the restore fails.
+        """
+        if "ldap" not in self.project.service_names:
+            print("[W] Unable to restore OpenDJ backends as ldap service is disabled")
+            return
+
+        script = " && ".join(
+            f"/opt/opendj/bin/restore --backupDirectory {shlex.quote(f'/opt/opendj/bak/{backend}')}"
+            for backend in backends
+        )
+
+        print(f"[I] Restoring OpenDJ backends {', '.join(backends)}")
+        # networks are removed by ``down``
+        self.project.initialize()
+        container = self.project.get_service("ldap").create_container(
+            one_off=True, quiet=True, entrypoint=["sh", "-c"], command=[script],
+        )
+        try:
+            container.start()
+            exit_code = container.wait()
+            if exit_code != 0:
+                raise BackupError(f"Unable to restore OpenDJ backends; exit code={exit_code}")
+        finally:
+            container.remove(force=True)
+
+    def restore_consul(self, path, timeout=60.0):
+        """Restore Consul (and Vault, which keeps its data in Consul) from its snapshot.
+
+        Consul is started for the restore, and stopped afterwards.
+
+        :param path: Path of the snapshot inside consul container.
+        :param timeout: Maximum time (in seconds) to wait for Consul to accept the snapshot.
+        :raises BackupError: If the restore fails.
+        """
+        from compose.service import BuildAction
+
+        if "consul" not in self.project.service_names:
+            print("[W] Unable to restore Consul snapshot as consul service is disabled")
+            return
+
+        print("[I] Restoring snapshot of Consul")
+        self.project.up(
+            service_names=["consul"], start_deps=False, do_build=BuildAction.skip,
+            detached=True, ignore_orphans=True, silent=True,
+        )
+        consul = self.container("consul")
+
+        def restored():
+            # the restore is rejected until Consul elects its leader
+            _, retcode = consul.exec(f"consul snapshot restore -http-addr=http://consul:8500 {path}")
+            return retcode == 0
+
+        try:
+            if not wait_for(restored, "Consul snapshot to be restored", timeout=timeout).ok:
+                raise BackupError("Unable to restore snapshot of Consul")
+        finally:
+            self.project.stop(service_names=["consul"])
@@ -1,16 +1,33 @@
 """Command-line interface (CLI) for the application."""
 
+import functools
+import time
 import warnings
 
 warnings.filterwarnings("ignore", module=".*paramiko.*")
 
 import click  # noqa: E402
 
-from .app import App  # noqa: E402
 from .version import __version__  # noqa: E402
 from .version import __gluu_version__  # noqa: E402
 
 
+def pass_app(f):
+    """Pass the application instance to the command.
+
+    The application (and its heavy dependencies) is loaded on first use,
+    hence options like ``--help`` and ``--version`` don't pay the cost.
+    """
+    @click.pass_context
+    def new_func(ctx, *args, **kwargs):
+        if ctx.obj is None:
+            from .app import App
+
+            ctx.obj = App()
+        return ctx.invoke(f, ctx.obj, *args, **kwargs)
+    return functools.update_wrapper(new_func, f)
+
+
 @click.group(context_settings={
     "help_option_names": ["-h", "--help"],
 })
@@ -20,14 +37,33 @@ from .version import __gluu_version__  # noqa: E402
     "--version",
     message=f"%(prog)s, CLI version %(version)s, Gluu version {__gluu_version__}",
 )
+@click.option(
+    "--profile",
+    default="",
+    help="Write timeline of the command to given file (in Chrome trace format) and print summary of the slowest spans",
+    metavar="FILE",
+)
 @click.pass_context
-def cli(ctx):
+def cli(ctx, profile):
     """Create groupped CLI commands."""
-    ctx.obj = App()
+    if not profile:
+        return
+
+    from .profiler import PROFILER
+
+    PROFILER.enable()
+
+    def write_profile():
+        PROFILER.add(ctx.invoked_subcommand, "command", PROFILER.started_at, time.perf_counter())
+        PROFILER.write_trace(profile)
+        PROFILER.report()
+        print(f"[I] Profile written to {profile}")
+
+    ctx.call_on_close(write_profile)
 
 
 @cli.command()
-@click.pass_obj
+@pass_app
 def init(app):
     """Initialize working directory."""
     app.touch_files()
@@ -35,7 +71,7 @@ def init(app):
 
 
 @cli.command()
-@click.pass_obj
+@pass_app
 def config(app):
     """Validate and view the Compose file."""
     app.check_workdir()
@@ -43,7 +79,7 @@ def config(app):
 
 
 @cli.command()
-@click.pass_obj
+@pass_app
 def down(app):
     """Stop and remove containers, networks, images, and volumes."""
     app.check_workdir()
@@ -53,17 +89,180 @@ def down(app):
 @cli.command()
 @click.option("-f", "--follow", default=False, help="Follow log output", is_flag=True)
 @click.option("--tail", default="all", help="Number of lines to show from the end of the logs for each container")
+@click.option("--since", default="", help="Show logs since duration (e.g. 10m), UNIX timestamp, or YYYY-MM-DDTHH:MM:SS")
+@click.option("-g", "--grep", "pattern", default="", help="Show only lines matching the regex")
+@click.option(
+    "--level",
+    default="",
+    help="Show only lines with at least given log level",
+    type=click.Choice(["", "trace", "debug", "info", "warn", "error", "fatal"], case_sensitive=False),
+)
+@click.option("--json", "as_json", default=False, help="Print each line as JSON document", is_flag=True)
 @click.argument("services", nargs=-1)
-@click.pass_obj
-def logs(app, follow, tail, services):
+@pass_app
+def logs(app, follow, tail, services, since, pattern, level, as_json):
     """View output from containers."""
     app.check_workdir()
-    app.logs(follow, tail, services)
+    app.logs(follow, tail, services, since, pattern, level, as_json)
 
 
 @cli.command()
-@click.pass_obj
+@pass_app
 def up(app):
     """Create and start containers."""
     app.check_workdir()
     app.up()
+
+
+@cli.command()
+@click.option("-p", "--parallel", default=4, help="Maximum number of concurrent pulls", type=click.IntRange(min=1))
+@click.option("--force", default=False, help="Pull images even if they are unchanged since last pull", is_flag=True)
+@pass_app
+def pull(app, parallel, force):
+    """Pull images of enabled services."""
+    app.check_workdir()
+    app.pull(parallel, force)
+
+
+@cli.command()
+@click.option("--json", "as_json", default=False, help="Print the state as JSON document", is_flag=True)
+@pass_app
+def status(app, as_json):
+    """Show state of containers of all services."""
+    app.check_workdir()
+    app.status(as_json)
+
+
+@cli.command()
+@pass_app
+def plan(app):
+    """Show memory and CPU resources computed for enabled services."""
+    app.check_workdir()
+    app.plan()
+
+
+def parse_replicas(ctx, param, value):
+    """Parse ``SERVICE=NUM`` arguments into a mapping."""
+    replicas = {}
+    for item in value:
+        svc, _, num = item.partition("=")
+        if not svc or not num.isdigit() or int(num) < 1:
+            raise click.BadParameter(f"{item!r} is not in SERVICE=NUM format (NUM must be at least 1)")
+        replicas[svc] = int(num)
+    return replicas
+
+
+@cli.command()
+@click.argument("replicas", nargs=-1, required=True, callback=parse_replicas, metavar="SERVICE=NUM...")
+@pass_app
+def scale(app, replicas):
+    """Set number of replicas of services, e.g. ``scale oxauth=4``."""
+    app.check_workdir()
+    app.scale(replicas)
+
+
+@cli.command()
+@click.option("--max-unavailable", default=1, help="Maximum number of containers replaced at once",
+              type=click.IntRange(min=1))
+@click.option("--drain", default=5.0, help="Seconds to wait for in-flight requests before stopping old container",
+              type=click.FloatRange(min=0))
+@click.option("--force", default=False, help="Replace containers even if their config is unchanged", is_flag=True)
+@click.argument("services", nargs=-1)
+@pass_app
+def rollout(app, max_unavailable, drain, force, services):
+    """Replace outdated containers of stateless services without downtime."""
+    app.check_workdir()
+    app.rollout(services, max_unavailable=max_unavailable, drain=drain, force=force)
+
+
+@cli.command()
+@click.option("--config", "config_file", default="",
+              help="Path to configs dump (defaults to volumes/config-init/db/config.json)")
+@click.option("--secret", "secret_file", default="",
+              help="Path to secrets dump (defaults to volumes/config-init/db/secret.json)")
+@pass_app
+def seed(app, config_file, secret_file):
+    """Seed configs and secrets in bulk into running Consul and Vault."""
+    app.check_workdir()
+    app.seed(config_file, secret_file)
+
+
+def parse_scenarios(ctx, param, value):
+    """Parse ``NAME[=WEIGHT]`` options into a mapping of scenario name and its weight."""
+    from .loadgen import SCENARIOS
+
+    weights = {}
+    for item in value or ("discovery", "jwks"):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS or (weight and (not weight.isdigit() or int(weight) < 1)):
+            raise click.BadParameter(
+                f"{item!r} is not in NAME[=WEIGHT] format (NAME is one of {', '.join(SCENARIOS)})"
+            )
+        weights[name] = int(weight or 1)
+    return weights
+
+
+@cli.command()
+@click.option("-s", "--scenario", "weights", multiple=True, callback=parse_scenarios, metavar="NAME[=WEIGHT]",
+              help="Scenario (discovery, jwks, or token) and its weight; repeatable (defaults to discovery and jwks)")
+@click.option("--rate", default=50.0, help="Target requests per second (defaults to 50)", type=click.FloatRange(min=0.1))
+@click.option("--duration", default=30.0, help="Seconds of measured load (defaults to 30)", type=click.FloatRange(min=1))
+@click.option("--warmup", default=0.0, help="Seconds of load before measurement (defaults to 0)",
+              type=click.FloatRange(min=0))
+@click.option("-c", "--connections", default=16, help="Concurrent connections (defaults to 16)",
+              type=click.IntRange(min=1))
+@click.option("--client-id", default="", help="ID of OAuth client used by token scenario")
+@click.option("--client-secret", default="", help="Secret of OAuth client used by token scenario")
+@click.option("--scope", default="", help="Scope requested by token scenario")
+@click.option("--url", default="", help="Base URL of the application (defaults to https://HOST_IP)")
+@click.option("--json", "as_json", default=False, help="Print the report as JSON document", is_flag=True)
+@pass_app
+def bench(app, weights, rate, duration, warmup, connections, client_id, client_secret, scope, url, as_json):
+    """Send load to oxAuth endpoints at a target rate and report latency percentiles."""
+    app.check_workdir()
+    app.bench(weights, rate, duration, warmup, connections, client_id, client_secret, scope, url, as_json)
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Address to listen on (defaults to 127.0.0.1)")
+@click.option("--port", default=9101, help="Port to listen on (defaults to 9101)", type=click.IntRange(min=0, max=65535))
+@click.option("--interval", default=15.0, help="Seconds between samples (defaults to 15)",
+              type=click.FloatRange(min=1))
+@click.option("--window", default=60, help="Samples kept per service for peak/average utilization (defaults to 60)",
+              type=click.IntRange(min=1))
+@pass_app
+def metrics(app, host, port, interval, window):
+    """Serve container resource use against limits as Prometheus metrics."""
+    app.check_workdir()
+    app.metrics(host, port, interval, window)
+
+
+@cli.command()
+@click.option("--repo", default="backups", help="Directory of the backup repository (defaults to backups)")
+@pass_app
+def backup(app, repo):
+    """Backup persistent volumes incrementally (ldap keeps running)."""
+    app.check_workdir()
+    app.backup(repo)
+
+
+@cli.command()
+@click.option("--repo", default="backups", help="Directory of the backup repository (defaults to backups)")
+@click.argument("snapshot", default="")
+@pass_app
+def restore(app, repo, snapshot):
+    """Restore persistent volumes from a snapshot (latest one if omitted)."""
+    app.check_workdir()
+    app.restore(snapshot, repo)
+
+
+@cli.command(name="ldap-tune")
+@click.option("--check", default=False, help="Verify indexes and report unindexed searches without changing anything",
+              is_flag=True)
+@click.option("--top", default=20, help="Number of unindexed search filters to report (defaults to 20)",
+              type=click.IntRange(min=1))
+@pass_app
+def ldap_tune(app, check, top):
+    """Tune OpenDJ cache and indexes, and report unindexed searches."""
+    app.check_workdir()
+    app.ldap_tune(check, top)
@@ -0,0 +1,98 @@
+"""Serialize merged Compose config as JSON, so it can be cached on disk without pickle."""
+
+import json
+
+# key tagging encoded objects of types listed by :func:`_types`
+TYPE_KEY = "__type__"
+
+
+def _types():
+    from compose.config import config
+    from compose.config import types
+    from compose.version import ComposeVersion
+
+    return {
+        cls.__name__: cls
+        for cls in (
+            config.Config,
+            types.GenericResource,
+            types.MountSpec,
+            types.SecurityOpt,
+            types.ServiceConfig,
+            types.ServiceLink,
+            types.ServicePort,
+            types.ServiceSecret,
+            types.VolumeFromSpec,
+            types.VolumeSpec,
+            ComposeVersion,
+        )
+    }
+
+
+def _encode(value, types):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(item, types) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value) or TYPE_KEY in value:
+            raise TypeError("Unable to encode mapping with non-string (or reserved) keys")
+        return {key: _encode(item, types) for key, item in value.items()}
+
+    name = type(value).__name__
+    if types.get(name) is not type(value):
+        if type(value) is tuple:
+            return {TYPE_KEY: "tuple", "value": [_encode(item, types) for item in value]}
+        raise TypeError(f"Unable to encode {type(value).__module__}.{type(value).__qualname__}")
+    if name == "ComposeVersion":
+        return {TYPE_KEY: name, "value": value.vstring}
+    if name == "MountSpec":
+        fields = {field: getattr(value, field) for field in value._fields}
+        if value.options is not None:
+            fields[value.type] = value.options
+        return {TYPE_KEY: name, "value": _encode(fields, types)}
+    # the rest are namedtuples
+    return {TYPE_KEY: name, "value": [_encode(item, types) for item in value]}
+
+
+def dumps(config):
+    """Serialize merged Compose config.
+
+    :param config: An instance of ``compose.config.config.Config``.
+    :returns: JSON document as ``str``.
+    :raises TypeError: If the config holds an object of unknown type.
+    """
+    return json.dumps(_encode(config, _types()))
+
+
+def loads(text):
+    """Rebuild merged Compose config serialized by :func:`dumps`.
+
+    Only objects of known config types are rebuilt, hence loading untrusted input can't run code.
+
+    :param text: JSON document.
+    :returns: An instance of ``compose.config.config.Config``.
+    :raises ValueError: If the document is invalid or refers to unknown type.
+    """
+    types = _types()
+
+    def hook(obj):
+        if TYPE_KEY not in obj:
+            return obj
+        name, value = obj[TYPE_KEY], obj.get("value")
+        if name == "tuple":
+            return tuple(value)
+        cls = types.get(name)
+        if cls is None:
+            raise ValueError(f"Unknown type {name}")
+        if name == "ComposeVersion":
+            return cls(value)
+        if name == "MountSpec":
+            return cls(**value)
+        return cls(*value)
+
+    try:
+        return json.loads(text, object_hook=hook)
+    except TypeError as exc:
+        # mismatched arguments of a type
+        raise ValueError(str(exc))
@@ -0,0 +1,153 @@
+"""Run interdependent tasks concurrently in dependency order."""
+
+import time
+from collections import OrderedDict
+from collections import namedtuple
+
+from .profiler import span
+
+Task = namedtuple("Task", ["name", "func", "deps"])
+
+#: Start and finish time (in seconds, relative to start of the run) of a task.
+Timing = namedtuple("Timing", ["started", "finished"])
+
+
+class DAG:
+    """Directed acyclic graph of tasks.
+
+    Each task is started on a thread pool as soon as all of its dependencies are completed,
+    hence independent tasks run concurrently.
+    """
+
+    def __init__(self):
+        self.tasks = OrderedDict()
+        self.timings = {}
+
+    def add(self, name, func, deps=()):
+        """Add task to the graph.
+
+        :param name: Unique name of the task.
+        :param func: A callable (without arguments) to run.
+        :param deps: Names of tasks that must be completed before running this task.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task {name} is already defined")
+        self.tasks[name] = Task(name, func, tuple(OrderedDict.fromkeys(deps)))
+
+    def validate(self):
+        """Check whether all dependencies are defined and the graph has no cycle."""
+        for task in self.tasks.values():
+            unknown = [dep for dep in task.deps if dep not in self.tasks]
+            if unknown:
+                raise ValueError(f"Task {task.name} depends on unknown task(s) {', '.join(unknown)}")
+
+        resolved = set()
+        remaining = dict(self.tasks)
+        while remaining:
+            ready = [name for name, task in remaining.items() if resolved.issuperset(task.deps)]
+            if not ready:
+                raise ValueError(f"Cyclic dependency between task(s) {', '.join(remaining)}")
+            resolved.update(ready)
+            for name in ready:
+                del remaining[name]
+
+    def _pop_ready(self, pending, results):
+        """Remove tasks whose dependencies are completed from pending tasks.
+
+        :param pending: A mapping of task name and :class:`Task` not started yet.
+        :param results: A mapping of completed task name and its return value.
+        :returns: List of removed tasks.
+        """
+        ready = [task for task in pending.values() if all(dep in results for dep in task.deps)]
+        for task in ready:
+            del pending[task.name]
+        return ready
+
+    def _execute(self, task, started_at):
+        started = time.monotonic() - started_at
+        try:
+            with span(task.name, "task"):
+                return task.func()
+        finally:
+            self.timings[task.name] = Timing(started, time.monotonic() - started_at)
+
+    def run(self, max_workers=None):
+        """Run all tasks.
+
+        Once a task fails, no new task is started; running tasks are awaited
+        and the error is re-raised.
+
+        :param max_workers: Maximum number of tasks running at the same time
+                            (defaults to number of tasks).
+        :returns: A mapping of task name and its return value.
+        """
+        # Python 3.6 loads multiprocessing along with concurrent.futures, hence imported lazily
+        from concurrent.futures import FIRST_COMPLETED
+        from concurrent.futures import ThreadPoolExecutor
+        from concurrent.futures import wait
+
+        self.validate()
+        self.timings = {}
+
+        pending = OrderedDict(self.tasks)
+        futures = {}
+        results = {}
+        error = None
+        started_at = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(self.tasks) or 1) as executor:
+            while True:
+                if error is None:
+                    for task in self._pop_ready(pending, results):
+                        futures[executor.submit(self._execute, task, started_at)] = task.name
+
+                if not futures:
+                    break
+
+                completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    name = futures.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as exc:
+                        error = error or exc
+
+        if error is not None:
+            raise error
+        return results
+
+    def critical_path(self):
+        """Get the chain of tasks which determined total time of the last run.
+
+        Starting from the task finished last, walk back through the dependency
+        that was completed last (i.e. the one which unblocked the task).
+
+        :returns: List of task names ordered by execution.
+        """
+        if not self.timings:
+            return []
+
+        path = []
+        name = max(self.timings, key=lambda n: self.timings[n].finished)
+        while name:
+            path.append(name)
+            deps = [dep for dep in self.tasks[name].deps if dep in self.timings]
+            name = max(deps, key=lambda n: self.timings[n].finished) if deps else None
+        return path[::-1]
+
+    def report(self):
+        """Print critical path of the last run."""
+        path = self.critical_path()
+        if not path:
+            return
+
+        total = self.timings[path[-1]].finished
+        print(f"[I] Critical path ({total:.2f}s):")
+
+        width = max(len(name) for name in path)
+        for name in path:
+            timing = self.timings[name]
+            print(
+                f"    {name:<{width}}  {timing.started:>7.2f}s -> {timing.finished:>7.2f}s"
+                f"  ({timing.finished - timing.started:.2f}s)"
+            )
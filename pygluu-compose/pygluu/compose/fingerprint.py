@@ -0,0 +1,106 @@
+"""Track effective config of services to bring up only the changed ones."""
+
+import contextlib
+import hashlib
+import json
+import pathlib
+from collections import namedtuple
+
+PlanEntry = namedtuple("PlanEntry", ["service", "action", "reason"])
+PlanEntry.__doc__ = """Planned action of a service.
+
+:param service: Service name.
+:param action: One of ``+`` (create), ``~`` (reconcile), ``=`` (keep), or ``-`` (remove).
+:param reason: Short description of the action.
+"""
+
+
+def _hash(value):
+    from compose.utils import json_hash
+
+    return json_hash(value)
+
+
+def service_fingerprint(service, image_id="", scale=1):
+    """Get fingerprint of effective config of a service.
+
+    Each top-level option of merged (and interpolated) Compose definition is hashed separately,
+    hence changed options can be reported; the image ID (as recorded by last pull) and
+    number of replicas are included as well.
+
+    :param service: An instance of ``compose.service.Service``.
+    :param image_id: ID of the service image as recorded by last pull (if any).
+    :param scale: Number of replicas.
+    :returns: A mapping of option name and its hash.
+    """
+    fingerprint = {key: _hash(value) for key, value in service.options.items()}
+    fingerprint["networks"] = _hash(service.networks)
+    fingerprint["image_id"] = _hash(image_id)
+    fingerprint["scale"] = _hash(scale)
+    return fingerprint
+
+
+def changed_keys(old, new):
+    """Get names of options that differ between two fingerprints."""
+    return sorted(key for key in set(old) | set(new) if old.get(key) != new.get(key))
+
+
+def bootstrap_key(*parts):
+    """Get key of bootstrap inputs (e.g. container IDs and content of related files)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class Fingerprints:
+    """Fingerprints of services (and bootstrap) recorded by the last successful ``up``.
+
+    :param path: Path to JSON file of the fingerprints.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.services = {}
+        self.bootstrap = {}
+        with contextlib.suppress(OSError, ValueError):
+            data = json.loads(self.path.read_text())
+            self.services = data.get("services", {})
+            self.bootstrap = data.get("bootstrap", {})
+
+    def plan(self, current, existing, satisfied):
+        """Compare fingerprints of current services against recorded ones.
+
+        :param current: A mapping of service name and its current fingerprint.
+        :param existing: Names of services having container(s).
+        :param satisfied: Names of services having all of their containers running
+                          (or completed successfully, for one-off jobs).
+        :returns: List of :class:`PlanEntry`.
+        """
+        entries = []
+        for name, fingerprint in current.items():
+            recorded = self.services.get(name)
+            if recorded is None:
+                if name in existing:
+                    entries.append(PlanEntry(name, "~", "not tracked yet"))
+                else:
+                    entries.append(PlanEntry(name, "+", "new"))
+            elif recorded != fingerprint:
+                entries.append(PlanEntry(name, "~", f"changed {', '.join(changed_keys(recorded, fingerprint))}"))
+            elif name not in satisfied:
+                entries.append(PlanEntry(name, "~", "not running"))
+            else:
+                entries.append(PlanEntry(name, "=", "unchanged"))
+
+        for name in self.services:
+            if name not in current:
+                entries.append(PlanEntry(name, "-", "removed"))
+        return entries
+
+    def save(self):
+        """Write the fingerprints to file atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(
+            {"services": self.services, "bootstrap": self.bootstrap},
+            sort_keys=True,
+            indent=4,
+        ))
+        tmp_file.replace(self.path)
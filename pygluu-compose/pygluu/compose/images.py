@@ -0,0 +1,199 @@
+"""Pull images concurrently and keep track of their digests."""
+
+import contextlib
+import json
+import pathlib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiler import span
+
+
+class PullError(Exception):
+    """Error while pulling image."""
+
+
+class ImageManifest:
+    """Local record of pulled images.
+
+    Each image reference is mapped to its local image ID and repository digests,
+    as seen right after the last successful pull.
+
+    :param path: Path to JSON file of the manifest.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.images = {}
+        with contextlib.suppress(OSError, ValueError):
+            self.images = json.loads(self.path.read_text())
+
+    def get(self, ref):
+        """Get recorded image ID of an image reference (if any)."""
+        return self.images.get(ref, {}).get("id", "")
+
+    def record(self, ref, image):
+        """Record image (as returned by ``inspect_image``) of an image reference."""
+        self.images[ref] = {
+            "id": image.get("Id", ""),
+            "digests": image.get("RepoDigests") or [],
+        }
+
+    def save(self):
+        """Write the manifest to file atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(self.images, sort_keys=True, indent=4))
+        tmp_file.replace(self.path)
+
+
+class PullProgress:
+    """Aggregate download progress of concurrent pulls into single line.
+
+    :param total: Number of images to pull.
+    :param stream: Output stream; progress line is rewritten in-place only if the stream is a TTY.
+    """
+
+    #: Minimum interval (in seconds) between rewrites of progress line.
+    REFRESH_INTERVAL = 0.1
+
+    def __init__(self, total, stream=None):
+        self.total = total
+        self.stream = stream or sys.stdout
+        self.tty = self.stream.isatty()
+        self.completed = 0
+        self.layers = {}
+        self.lock = threading.Lock()
+        self.last_render = 0.0
+
+    def update(self, ref, event):
+        """Update progress of a layer from pull event."""
+        layer = event.get("id")
+        if not layer or layer == ref.rsplit(":", 1)[-1]:
+            return
+
+        detail = event.get("progressDetail") or {}
+        with self.lock:
+            current, total = self.layers.get((ref, layer), (0, 0))
+            if event.get("status") == "Downloading" and detail.get("total"):
+                current, total = detail.get("current", 0), detail["total"]
+            elif event.get("status") in ("Download complete", "Pull complete", "Already exists"):
+                current = total
+            self.layers[(ref, layer)] = (current, total)
+        self.render()
+
+    def done(self, ref, message):
+        """Mark image as completed."""
+        with self.lock:
+            self.completed += 1
+        self.render(force=True, message=message)
+
+    def render(self, force=False, message=""):
+        """Print progress line (and optional message above it)."""
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_render < self.REFRESH_INTERVAL:
+                return
+            self.last_render = now
+
+            if message:
+                self.stream.write(f"\r\033[K{message}\n" if self.tty else f"{message}\n")
+
+            if self.tty:
+                current = sum(c for c, _ in self.layers.values()) / 1024 / 1024
+                total = sum(t for _, t in self.layers.values()) / 1024 / 1024
+                self.stream.write(
+                    f"\r\033[K[I] Pulled {self.completed}/{self.total} image(s); "
+                    f"downloaded {current:.1f}/{total:.1f} MB"
+                )
+            self.stream.flush()
+
+    def close(self):
+        """Terminate progress line."""
+        if self.tty:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+class ImagePuller:
+    """Pull images concurrently, skipping the ones that are present and unchanged since last pull.
+
+    :param client: An instance of Docker API client.
+    :param manifest: An instance of :class:`ImageManifest`.
+    :param max_workers: Maximum number of concurrent pulls.
+    """
+
+    def __init__(self, client, manifest, max_workers=4):
+        self.client = client
+        self.manifest = manifest
+        self.max_workers = max_workers
+
+    def local_image(self, ref):
+        """Inspect local image (if any)."""
+        from docker.errors import ImageNotFound
+
+        try:
+            return self.client.inspect_image(ref)
+        except ImageNotFound:
+            return {}
+
+    def is_current(self, ref):
+        """Check whether image is present locally and unchanged since last pull.
+
+        Only local Docker daemon is contacted, hence no registry round-trip.
+        """
+        recorded = self.manifest.get(ref)
+        return bool(recorded) and self.local_image(ref).get("Id") == recorded
+
+    def pull_one(self, ref, progress):
+        """Pull single image and record it in the manifest."""
+        from docker.utils import parse_repository_tag
+
+        repo, tag = parse_repository_tag(ref)
+        started_at = time.monotonic()
+
+        with span(f"pull {ref}", "image"):
+            for event in self.client.pull(repo, tag=tag or "latest", stream=True, decode=True):
+                if "error" in event:
+                    raise PullError(event["error"])
+                progress.update(ref, event)
+
+        self.manifest.record(ref, self.local_image(ref))
+        return time.monotonic() - started_at
+
+    def pull(self, refs, force=False, stream=None):
+        """Pull images.
+
+        :param refs: Image references, e.g. ``gluufederation/oxauth:4.5.5-1``.
+        :param force: Pull images even if they are present and unchanged.
+        :param stream: Output stream of progress.
+        :returns: A ``tuple`` of pulled references, skipped references, and mapping of failed references and their errors.
+        """
+        refs = list(dict.fromkeys(refs))
+        skipped = [] if force else [ref for ref in refs if self.is_current(ref)]
+        pending = [ref for ref in refs if ref not in skipped]
+
+        pulled = []
+        failed = {}
+        progress = PullProgress(len(pending), stream)
+
+        def task(ref):
+            try:
+                elapsed = self.pull_one(ref, progress)
+            except Exception as exc:
+                failed[ref] = exc
+                progress.done(ref, f"[E] Unable to pull {ref}; reason={exc}")
+            else:
+                pulled.append(ref)
+                progress.done(ref, f"[I] Pulled {ref} ({elapsed:.1f}s)")
+
+        if pending:
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    list(executor.map(task, pending))
+            finally:
+                progress.close()
+                self.manifest.save()
+        return pulled, skipped, failed
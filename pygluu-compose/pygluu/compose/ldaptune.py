@@ -0,0 +1,472 @@
+"""Tune OpenDJ (JVM heap, database cache, and indexes) and find its unindexed searches."""
+
+import collections
+import gzip
+import os
+import re
+import shlex
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiler import span
+from .sizing import max_ram_percentage
+
+# host directory of OpenDJ logs (mounted as ``/opt/opendj/logs``)
+OPENDJ_LOGS_DIR = "volumes/opendj/logs"
+
+# host directory of OpenDJ databases (mounted as ``/opt/opendj/db``); each subdirectory is a JE backend
+OPENDJ_DB_DIR = "volumes/opendj/db"
+
+# path of dsconfig batch file inside the container
+BATCH_FILE = "/tmp/ldap-tune.batch"
+
+#: Base DN of each backend created by Gluu.
+BACKEND_BASE_DNS = collections.OrderedDict([
+    ("userRoot", "o=gluu"),
+    ("metric", "o=metric"),
+    ("site", "o=site"),
+])
+
+#: Relative share of database cache of each backend; ``userRoot`` holds tokens, sessions, clients and people.
+CACHE_WEIGHTS = {"userRoot": 8, "metric": 1, "site": 1}
+
+# share of JVM heap used by database cache of all backends; the rest is left for short-lived
+# objects of token and session writes (less GC pressure)
+DB_CACHE_SHARE = 0.5
+
+# minimum database cache (in MB) of each backend
+MIN_DB_CACHE_MB = 16
+
+Index = namedtuple("Index", ["backend", "attribute", "types", "usage"])
+Index.__doc__ = """Index of an attribute in a backend.
+
+:param backend: ID of the backend.
+:param attribute: Name of the attribute.
+:param types: Index types (e.g. ``equality``, ``ordering``).
+:param usage: Search filters served by the index.
+"""
+
+#: Indexes of hot search filters of Gluu services.
+INDEXES = [
+    Index("userRoot", "objectClass", ("equality",), "all searches by entry type"),
+    Index("userRoot", "inum", ("equality",), "clients, scopes, people by ID"),
+    Index("userRoot", "uid", ("equality",), "people by username (authentication)"),
+    Index("userRoot", "mail", ("equality",), "people by email"),
+    Index("userRoot", "oxExternalUid", ("equality",), "people by external (e.g. social) ID"),
+    Index("userRoot", "tknCde", ("equality",), "tokens by code (token, introspection, userinfo)"),
+    Index("userRoot", "grtId", ("equality",), "tokens of a grant (refresh, revocation)"),
+    Index("userRoot", "ssnId", ("equality",), "tokens of a session (logout)"),
+    Index("userRoot", "clnId", ("equality",), "tokens of a client"),
+    Index("userRoot", "usrId", ("equality",), "tokens of a user"),
+    Index("userRoot", "oxId", ("equality",), "sessions by ID"),
+    Index("userRoot", "sid", ("equality",), "sessions by front/back-channel logout ID"),
+    Index("userRoot", "oxAuthUserDN", ("equality",), "sessions of a user"),
+    Index("userRoot", "del", ("equality",), "expired entries (cleaner)"),
+    Index("userRoot", "exp", ("ordering",), "expired entries (cleaner)"),
+    Index("userRoot", "oxAuthExpiration", ("ordering",), "expired dynamic clients (cleaner)"),
+    Index("metric", "oxMetricType", ("equality",), "metrics by type"),
+    Index("metric", "oxApplicationType", ("equality",), "metrics by application"),
+    Index("metric", "oxStartDate", ("ordering",), "metrics by period"),
+    Index("metric", "creationDate", ("ordering",), "expired metrics (cleaner)"),
+]
+
+LdapPlan = namedtuple("LdapPlan", ["mem_mb", "max_ram_percentage", "heap_mb", "db_cache_mb"])
+LdapPlan.__doc__ = """Memory tuning of OpenDJ.
+
+:param mem_mb: Memory limit (in MB) of ldap container.
+:param max_ram_percentage: Percentage of container memory usable by JVM heap.
+:param heap_mb: Maximum JVM heap (in MB).
+:param db_cache_mb: A mapping of backend ID and its database cache (in MB).
+"""
+
+IndexChange = namedtuple("IndexChange", ["backend", "attribute", "types", "create"])
+IndexChange.__doc__ = """Change needed to match the catalogue.
+
+:param backend: ID of the backend.
+:param attribute: Name of the attribute.
+:param types: Index types to add.
+:param create: Whether the index is missing (rather than lacking some types).
+"""
+
+UnindexedSearch = namedtuple("UnindexedSearch", ["filter", "base", "count", "total_ms", "max_ms", "attributes"])
+UnindexedSearch.__doc__ = """Unindexed searches of the same shape (filter values are masked).
+
+:param filter: Search filter with values replaced by ``?``.
+:param base: Base DN of the searches.
+:param count: Number of searches.
+:param total_ms: Total elapsed time (in milliseconds) of the searches.
+:param max_ms: Maximum elapsed time (in milliseconds) of a search.
+:param attributes: Attributes used by the filter (except ``objectClass``).
+"""
+
+# leaf of search filter, e.g. ``(tknCde=abc)`` or ``(exp<=20220101000000Z)``
+FILTER_ITEM_RGX = re.compile(r"\(([\w.;-]+)(~=|>=|<=|=)([^()]*)\)")
+
+# connection and operation IDs of access log entry
+OPERATION_RGX = re.compile(r"\bconn=(-?\d+) op=(\d+)")
+
+BASE_RGX = re.compile(r'\bbase="((?:[^"\\]|\\.)*)"')
+FILTER_RGX = re.compile(r'\bfilter="((?:[^"\\]|\\.)*)"')
+ETIME_RGX = re.compile(r"\betime=(\d+)")
+
+# searches awaiting their result; bounds memory when results are missing (e.g. log rotated in between)
+MAX_PENDING = 100000
+
+
+def plan_ldap(mem_mb, backends):
+    """Compute JVM heap and database cache of each backend from memory limit of ldap container.
+
+    :param mem_mb: Memory limit (in MB) of ldap container.
+    :param backends: IDs of backends.
+    :returns: An instance of :class:`LdapPlan`.
+    """
+    percentage = max_ram_percentage(mem_mb)
+    heap_mb = mem_mb * percentage // 100
+    weights = {backend: CACHE_WEIGHTS.get(backend, 1) for backend in backends}
+    total = sum(weights.values()) or 1
+    db_cache_mb = collections.OrderedDict(
+        (backend, max(int(heap_mb * DB_CACHE_SHARE * weight / total), MIN_DB_CACHE_MB))
+        for backend, weight in weights.items()
+    )
+    return LdapPlan(mem_mb, percentage, heap_mb, db_cache_mb)
+
+
+def backend_ids(db_dir=OPENDJ_DB_DIR):
+    """Get IDs of backends found in database directory (backends created by Gluu if not initialized yet)."""
+    if not os.path.isdir(db_dir):
+        return list(BACKEND_BASE_DNS)
+    found = sorted(entry.name for entry in os.scandir(db_dir) if entry.is_dir())
+    return found or list(BACKEND_BASE_DNS)
+
+
+def admin_args(password_file, prompt=True):
+    """Get arguments of OpenDJ tools to connect to administration port of local server.
+
+    The password is read from a file, hence it is neither listed by ``ps`` nor kept by exec instances.
+
+    :param password_file: Path (inside the container) of file holding password of directory manager.
+    :param prompt: Whether the tool has interactive mode to disable; task-based tools
+                   (e.g. ``backup`` and ``rebuild-index``) reject ``--no-prompt``.
+    """
+    args = [
+        "--hostname", "localhost",
+        "--port", "4444",
+        "--bindDN", "cn=directory manager",
+        "--bindPasswordFile", password_file,
+        "--trustAll",
+        "--noPropertiesFile",
+    ]
+    if prompt:
+        args.append("--no-prompt")
+    return args
+
+
+def _command(args):
+    return " ".join(shlex.quote(str(arg)) for arg in args)
+
+
+def list_indexes_command(backend, password_file):
+    """Get command listing indexes (and their types) of a backend."""
+    return _command([
+        "/opt/opendj/bin/dsconfig", "list-backend-indexes",
+        "--backend-name", backend,
+        "--property", "index-type",
+        "--script-friendly",
+    ] + admin_args(password_file))
+
+
+def parse_indexes(output):
+    """Parse script-friendly output of ``dsconfig list-backend-indexes``.
+
+    :returns: A mapping of attribute name (lowercased) and its index types.
+    """
+    indexes = {}
+    for line in output.splitlines():
+        name, _, types = line.strip().partition("\t")
+        if name:
+            indexes[name.lower()] = {t for t in re.split(r"[,\s]+", types) if t}
+    return indexes
+
+
+def index_changes(existing, backends, catalogue=INDEXES):
+    """Compare indexes of backends against the catalogue.
+
+    :param existing: A mapping of backend ID and its indexes (as returned by :func:`parse_indexes`).
+    :param backends: IDs of backends present in the server; indexes of other backends are skipped.
+    :returns: List of :class:`IndexChange`.
+    """
+    changes = []
+    for index in catalogue:
+        if index.backend not in backends:
+            continue
+        types = existing.get(index.backend, {}).get(index.attribute.lower())
+        if types is None:
+            changes.append(IndexChange(index.backend, index.attribute, index.types, True))
+        elif set(index.types) - types:
+            missing = tuple(t for t in index.types if t not in types)
+            changes.append(IndexChange(index.backend, index.attribute, missing, False))
+    return changes
+
+
+def batch(plan, changes):
+    """Get ``dsconfig`` batch setting database cache of backends and applying index changes.
+
+    :param plan: An instance of :class:`LdapPlan`.
+    :param changes: List of :class:`IndexChange`.
+    :returns: List of ``dsconfig`` subcommands (one per line of batch file).
+    """
+    lines = [
+        _command(["set-backend-prop", "--backend-name", backend, "--set", f"db-cache-size:{size}mb"])
+        for backend, size in plan.db_cache_mb.items()
+    ]
+    for change in changes:
+        if change.create:
+            args = ["create-backend-index", "--backend-name", change.backend, "--index-name", change.attribute]
+            for index_type in change.types:
+                args += ["--set", f"index-type:{index_type}"]
+        else:
+            args = ["set-backend-index-prop", "--backend-name", change.backend, "--index-name", change.attribute]
+            for index_type in change.types:
+                args += ["--add", f"index-type:{index_type}"]
+        lines.append(_command(args))
+    return lines
+
+
+def apply_command(lines, password_file):
+    """Get command writing the batch into the container and running it in a single ``dsconfig`` process."""
+    script = "printf '%s\\n' \"$@\" > {0} && /opt/opendj/bin/dsconfig --batchFilePath {0} {1}; rc=$?; rm -f {0}; exit $rc"
+    script = script.format(BATCH_FILE, _command(admin_args(password_file)))
+    return _command(["sh", "-c", script, "sh"] + list(lines))
+
+
+def rebuild_command(backend, attributes, password_file):
+    """Get command rebuilding indexes of a backend online."""
+    args = ["/opt/opendj/bin/rebuild-index", "--baseDN", BACKEND_BASE_DNS.get(backend, backend)]
+    for attribute in attributes:
+        args += ["--index", attribute]
+    return _command(args + admin_args(password_file, prompt=False))
+
+
+def backup_command(backend, directory, password_file, incremental=False):
+    """Get command backing up a backend online.
+
+    :param backend: ID of the backend.
+    :param directory: Backup directory (inside the container) of the backend.
+    :param password_file: Path (inside the container) of file holding password of directory manager.
+    :param incremental: Whether to back up only changes since the latest backup in the directory.
+    """
+    args = ["/opt/opendj/bin/backup", "--backendID", backend, "--backupDirectory", directory]
+    if incremental:
+        args.append("--incremental")
+    return _command(args + admin_args(password_file, prompt=False))
+
+
+class LdapTuneError(Exception):
+    """Error while tuning OpenDJ online."""
+
+
+class IndexTuner:
+    """Set database cache and create missing indexes of OpenDJ backends while ldap keeps running.
+
+    :param ldap: Helper of ldap container (see :class:`~pygluu.compose.app.ContainerHelper`).
+    :param backends: IDs of backends present in the server.
+    :param password_file: Path (inside the container) of file holding password of directory manager.
+    """
+
+    def __init__(self, ldap, backends, password_file):
+        self.ldap = ldap
+        self.backends = backends
+        self.password_file = password_file
+
+    def _exec(self, cmd, error):
+        output, retcode = self.ldap.exec(cmd)
+        output = output.decode(errors="replace")
+        if retcode != 0:
+            raise LdapTuneError(f"{error}; reason={output.strip()}")
+        return output
+
+    def indexes(self):
+        """Get indexes of backends (listed concurrently as each ``dsconfig`` run starts its own JVM).
+
+        :returns: A mapping of backend ID and its indexes.
+        """
+        def list_indexes(backend):
+            return parse_indexes(self._exec(
+                list_indexes_command(backend, self.password_file),
+                f"Unable to list indexes of OpenDJ backend {backend}",
+            ))
+
+        with ThreadPoolExecutor(max_workers=len(self.backends) or 1) as executor:
+            return dict(zip(self.backends, executor.map(list_indexes, self.backends)))
+
+    def changes(self):
+        """Get changes of indexes needed to match the catalogue (see :func:`index_changes`)."""
+        return index_changes(self.indexes(), self.backends)
+
+    def tune(self, plan, check=False):
+        """Apply tuning (see :meth:`apply`), or only report missing indexes.
+
+        :param plan: An instance of :class:`LdapPlan`.
+        :param check: Only report missing indexes (nothing is changed).
+        :returns: List of :class:`IndexChange` still needed (empty once tuning is applied).
+        :raises LdapTuneError: If any tool fails or indexes are still missing afterwards.
+        """
+        with span("list indexes", "ldap"):
+            changes = self.changes()
+
+        if check:
+            for change in changes:
+                print(f"[W] Index {change.attribute} ({', '.join(change.types)}) "
+                      f"is missing in OpenDJ backend {change.backend}")
+            return changes
+
+        self.apply(plan, changes)
+        return []
+
+    def apply(self, plan, changes):
+        """Set database cache and apply index changes in a single ``dsconfig`` batch, then rebuild and verify new indexes.
+
+        :param plan: An instance of :class:`LdapPlan`.
+        :param changes: List of :class:`IndexChange`.
+        :raises LdapTuneError: If any tool fails or indexes are still missing afterwards.
+        """
+        if changes:
+            print(f"[I] Creating {len(changes)} index(es) and setting database cache of OpenDJ backends")
+        else:
+            print("[I] Setting database cache of OpenDJ backends")
+        with span("apply tuning", "ldap"):
+            self._exec(apply_command(batch(plan, changes), self.password_file), "Unable to tune OpenDJ")
+
+        # new indexes are unusable (hence searches stay unindexed) until rebuilt
+        for backend in self.backends:
+            attributes = [change.attribute for change in changes if change.backend == backend]
+            if not attributes:
+                continue
+            print(f"[I] Rebuilding index(es) {', '.join(attributes)} of OpenDJ backend {backend}")
+            with span(f"rebuild indexes of {backend}", "ldap"):
+                self._exec(
+                    rebuild_command(backend, attributes, self.password_file),
+                    f"Unable to rebuild indexes of OpenDJ backend {backend}",
+                )
+
+        with span("verify indexes", "ldap"):
+            missing = self.changes()
+        if missing:
+            names = ", ".join(f"{change.backend}/{change.attribute}" for change in missing)
+            raise LdapTuneError(f"Unable to verify indexes of OpenDJ; reason=missing {names}")
+
+
+def mask_filter(search_filter):
+    """Replace values of a search filter by ``?`` (except ``objectClass`` values and presence)."""
+    def mask(match):
+        attribute, operator, value = match.groups()
+        if attribute.lower() != "objectclass" and value != "*":
+            value = re.sub(r"[^*]+", "?", value)
+        return f"({attribute}{operator}{value})"
+
+    return FILTER_ITEM_RGX.sub(mask, search_filter)
+
+
+def filter_attributes(search_filter):
+    """Get attributes used by a search filter (except ``objectClass``)."""
+    attributes = [match.group(1) for match in FILTER_ITEM_RGX.finditer(search_filter)]
+    return tuple(dict.fromkeys(attr for attr in attributes if attr.lower() != "objectclass"))
+
+
+def access_logs(logs_dir=OPENDJ_LOGS_DIR):
+    """Get access log files of OpenDJ (including rotated ones), oldest first."""
+    if not os.path.isdir(logs_dir):
+        return []
+    paths = [
+        entry.path for entry in os.scandir(logs_dir)
+        if entry.is_file() and entry.name.startswith("access")
+    ]
+    return sorted(paths, key=os.path.getmtime)
+
+
+def _open_log(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    return open(path, errors="replace")
+
+
+def scan_access_logs(paths):
+    """Find unindexed searches in OpenDJ access logs.
+
+    Both separate (``SEARCH REQ`` and ``SEARCH RES``) and combined log formats are supported;
+    results flagged as ``unindexed`` are matched to their request by connection and operation ID.
+
+    :param paths: List of access log files.
+    :returns: A ``tuple`` of list of :class:`UnindexedSearch` (slowest in total first) and number of searches.
+    """
+    pending = collections.OrderedDict()
+    groups = {}
+    searches = 0
+
+    for path in paths:
+        with _open_log(path) as f:
+            for line in f:
+                if " SEARCH " not in line:
+                    continue
+                op = OPERATION_RGX.search(line)
+                if not op:
+                    continue
+
+                key = op.groups()
+                search_filter = FILTER_RGX.search(line)
+                if search_filter:
+                    base = BASE_RGX.search(line)
+                    pending[key] = (base.group(1) if base else "", search_filter.group(1))
+                    if len(pending) > MAX_PENDING:
+                        pending.popitem(last=False)
+
+                etime = ETIME_RGX.search(line)
+                if not etime:
+                    continue
+                searches += 1
+                request = pending.pop(key, None)
+                if request is None or " unindexed" not in line:
+                    continue
+
+                base, search_filter = request
+                shape = (mask_filter(search_filter), base)
+                count, total_ms, max_ms = groups.get(shape, (0, 0, 0))
+                elapsed = int(etime.group(1))
+                groups[shape] = (count + 1, total_ms + elapsed, max(max_ms, elapsed))
+
+    unindexed = [
+        UnindexedSearch(shape, base, count, total_ms, max_ms, filter_attributes(shape))
+        for (shape, base), (count, total_ms, max_ms) in groups.items()
+    ]
+    unindexed.sort(key=lambda s: (-s.total_ms, -s.count))
+    return unindexed, searches
+
+
+def summary(unindexed, searches, logs, top=20):
+    """Render unindexed searches as table, followed by warning of their attributes outside the index catalogue.
+
+    :param unindexed: List of :class:`UnindexedSearch` (see :func:`scan_access_logs`).
+    :param searches: Number of all searches.
+    :param logs: Number of scanned access logs.
+    :param top: Number of unindexed search filters to list.
+    :returns: List of lines.
+    """
+    if not unindexed:
+        return [f"[I] No unindexed searches found among {searches} search(es) in {logs} access log(s)"]
+
+    lines = [
+        f"[W] Found {sum(s.count for s in unindexed)} unindexed search(es) of {len(unindexed)} filter(s) "
+        f"among {searches} search(es) in {logs} access log(s)",
+        f"    {'COUNT':>7}{'TOTAL':>10}{'MAX':>8}  {'BASE':<24}FILTER",
+    ]
+    for search in unindexed[:top]:
+        lines.append(f"    {search.count:>7}{search.total_ms:>8}ms{search.max_ms:>6}ms  {search.base:<24}{search.filter}")
+
+    indexed = {index.attribute.lower() for index in INDEXES}
+    candidates = {
+        attribute for search in unindexed[:top] for attribute in search.attributes
+        if attribute.lower() not in indexed
+    }
+    if candidates:
+        lines.append(f"[W] Attributes of unindexed searches outside the index catalogue: {', '.join(sorted(candidates))}")
+    return lines
@@ -0,0 +1,414 @@
+"""Generate load against oxAuth endpoints (behind nginx) at a target rate."""
+
+import asyncio
+import base64
+import collections
+import ssl
+from collections import namedtuple
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+# significant bits of histogram buckets; 7 bits keep relative error of recorded values below 1%
+SUB_BUCKET_BITS = 7
+
+# percentiles reported per scenario
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+# timeout (in seconds) of each request, including connecting
+REQUEST_TIMEOUT = 10.0
+
+# achieved throughput (as ratio of target rate) below which requests are deemed behind schedule
+MIN_THROUGHPUT = 0.95
+
+Request = namedtuple("Request", ["method", "path", "headers", "body"])
+
+Scenario = namedtuple("Scenario", ["name", "description", "build", "needs_client"])
+Scenario.__doc__ = """A kind of request sent by load generator.
+
+:param name: Short name of the scenario.
+:param description: Description of the scenario.
+:param build: A callable accepting :class:`Options` and returning :class:`Request`.
+:param needs_client: Whether the scenario requires OAuth client credentials.
+"""
+
+Options = namedtuple("Options", ["client_id", "client_secret", "scope"])
+Options.__doc__ = """Options of scenarios.
+
+:param client_id: ID of OAuth client (for token grants).
+:param client_secret: Secret of OAuth client (for token grants).
+:param scope: Scope requested by token grants.
+"""
+
+
+def _token_request(options):
+    credentials = base64.b64encode(f"{options.client_id}:{options.client_secret}".encode()).decode()
+    params = {"grant_type": "client_credentials"}
+    if options.scope:
+        params["scope"] = options.scope
+    return Request(
+        "POST",
+        "/oxauth/restv1/token",
+        {"Authorization": f"Basic {credentials}", "Content-Type": "application/x-www-form-urlencoded"},
+        urlencode(params).encode(),
+    )
+
+
+#: Known scenarios.
+SCENARIOS = collections.OrderedDict((scenario.name, scenario) for scenario in [
+    Scenario(
+        "discovery", "OpenID Connect discovery document",
+        lambda options: Request("GET", "/.well-known/openid-configuration", {}, b""), False,
+    ),
+    Scenario(
+        "jwks", "JSON Web Key Set",
+        lambda options: Request("GET", "/oxauth/restv1/jwks", {}, b""), False,
+    ),
+    Scenario(
+        "token", "client credentials grant at token endpoint",
+        _token_request, True,
+    ),
+])
+
+
+class Histogram:
+    """Histogram of values (e.g. latencies in microseconds) with bounded relative error, as HdrHistogram does.
+
+    Values are counted in log-linear buckets: each power of two range is split into
+    ``2 ** SUB_BUCKET_BITS`` linear sub-buckets, hence memory is bounded by the value range
+    while percentiles are accurate to ``1 / 2 ** SUB_BUCKET_BITS`` of the value.
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def _key(value):
+        shift = max(value.bit_length() - SUB_BUCKET_BITS - 1, 0)
+        return shift, value >> shift
+
+    def record(self, value):
+        """Add a value (negative values count as zero)."""
+        value = max(int(value), 0)
+        self.counts[self._key(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """Add values of another histogram."""
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile):
+        """Get highest value (equivalent within precision) at or below which a percentage of values fall."""
+        if not self.count:
+            return 0
+        threshold = max(self.count * percentile / 100.0, 1)
+        seen = 0
+        for shift, sub in sorted(self.counts):
+            seen += self.counts[(shift, sub)]
+            if seen >= threshold:
+                # highest value of the bucket, capped by the actual maximum
+                return min(((sub + 1) << shift) - 1, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        """Get mean of values."""
+        return self.total / self.count if self.count else 0.0
+
+
+class Stats:
+    """Outcome of requests of a scenario.
+
+    Latency is measured from the time each request was scheduled (rather than sent),
+    hence queueing behind slow responses is accounted for (no coordinated omission).
+    """
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = collections.Counter()
+        self.requests = 0
+
+    def merge(self, other):
+        """Add outcome of another set of requests of the scenario."""
+        self.latency.merge(other.latency)
+        self.errors.update(other.errors)
+        self.requests += other.requests
+
+    def as_dict(self, elapsed):
+        """Get summary as JSON-serializable mapping (latencies in milliseconds)."""
+        failed = sum(self.errors.values())
+        return {
+            "requests": self.requests,
+            "throughput": self.requests / elapsed if elapsed else 0.0,
+            "error_rate": failed / self.requests if self.requests else 0.0,
+            "errors": dict(self.errors),
+            "latency_ms": dict(
+                {f"p{p:g}": self.latency.percentile(p) / 1000 for p in PERCENTILES},
+                min=(self.latency.min or 0) / 1000,
+                mean=self.latency.mean / 1000,
+                max=self.latency.max / 1000,
+            ),
+        }
+
+
+class HTTPError(Exception):
+    """Malformed or unexpected HTTP response."""
+
+
+class Connection:
+    """Minimal HTTP/1.1 client connection (kept alive across requests).
+
+    :param host: Address to connect to.
+    :param port: Port to connect to.
+    :param server_name: Name sent as ``Host`` header and TLS SNI.
+    :param ssl_context: An instance of ``ssl.SSLContext`` (plain HTTP if omitted).
+    """
+
+    def __init__(self, host, port, server_name, ssl_context=None):
+        self.host = host
+        self.port = port
+        self.server_name = server_name
+        self.ssl_context = ssl_context
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host,
+            self.port,
+            ssl=self.ssl_context,
+            server_hostname=self.server_name if self.ssl_context else None,
+        )
+
+    def close(self):
+        """Close the connection (if open)."""
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, req):
+        """Send a request and read its response.
+
+        :returns: A ``tuple`` of status code and body.
+        """
+        if self.writer is None:
+            await self._connect()
+
+        headers = dict(req.headers, Host=self.server_name, Connection="keep-alive")
+        if req.body or req.method == "POST":
+            headers["Content-Length"] = str(len(req.body))
+        head = f"{req.method} {req.path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        self.writer.write(head.encode() + b"\r\n" + req.body)
+        await self.writer.drain()
+
+        try:
+            status, body, keep_alive = await self._read_response()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as exc:
+            self.close()
+            raise HTTPError(f"malformed response; reason={exc}")
+
+        if not keep_alive:
+            self.close()
+        return status, body
+
+    async def _read_response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        parts = status_line.decode("latin-1").split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise ValueError(f"invalid status line {status_line!r}")
+        status = int(parts[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+
+        keep_alive = parts[0] != "HTTP/1.0" and headers.get("connection", "").lower() != "close"
+        return status, body, keep_alive
+
+
+def schedule(weights):
+    """Get a cycle of scenario names interleaved by their weights (smooth weighted round-robin).
+
+    :param weights: A mapping of scenario name and its (integer) weight.
+    """
+    current = dict.fromkeys(weights, 0)
+    total = sum(weights.values())
+    cycle = []
+    for _ in range(total):
+        for name, weight in weights.items():
+            current[name] += weight
+        name = max(current, key=current.get)
+        current[name] -= total
+        cycle.append(name)
+    return cycle
+
+
+class LoadGenerator:
+    """Send requests of weighted scenarios at a target rate (open loop).
+
+    Requests are scheduled at fixed intervals regardless of responses; each of ``connections``
+    workers takes the next scheduled slot once its previous request completes.
+    If all workers are busy, requests fall behind their schedule and their latency grows
+    accordingly (as experienced by clients arriving at the target rate).
+
+    :param url: Base URL of the application (e.g. ``https://10.0.0.5``).
+    :param server_name: Name sent as ``Host`` header and TLS SNI (e.g. FQDN of the application).
+    :param weights: A mapping of scenario name and its weight.
+    :param options: An instance of :class:`Options`.
+    :param rate: Target rate (requests per second).
+    :param duration: Duration (in seconds) of measured load.
+    :param warmup: Duration (in seconds) of load sent before measurement.
+    :param connections: Number of concurrent connections.
+    :param verify: Verify TLS certificate of the application (self-signed by default).
+    """
+
+    def __init__(self, url, server_name, weights, options, rate=50.0, duration=30.0, warmup=0.0,
+                 connections=16, verify=False):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.server_name = server_name or parts.hostname
+        self.ssl_context = None
+        if parts.scheme == "https":
+            self.ssl_context = ssl.create_default_context()
+            if not verify:
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+
+        self.cycle = [(name, SCENARIOS[name].build(options)) for name in schedule(weights)]
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.connections = connections
+        self.stats = collections.OrderedDict((name, Stats()) for name in weights)
+        self.elapsed = 0.0
+
+    async def _send(self, conn, req):
+        """Send a request, reconnecting on next request if the connection fails.
+
+        :returns: Error of the request (empty if it succeeded).
+        """
+        try:
+            status, _ = await asyncio.wait_for(conn.request(req), REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            conn.close()
+            return "timeout"
+        except (OSError, HTTPError) as exc:
+            conn.close()
+            return type(exc).__name__
+        return f"HTTP {status}" if status >= 400 else ""
+
+    async def _worker(self, slots, started):
+        conn = Connection(self.host, self.port, self.server_name, self.ssl_context)
+        loop = asyncio.get_event_loop()
+        total = (self.warmup + self.duration) * self.rate
+        try:
+            while True:
+                index = next(slots)
+                if index >= total:
+                    break
+                scheduled = started + index / self.rate
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                name, req = self.cycle[index % len(self.cycle)]
+                error = await self._send(conn, req)
+                if scheduled - started < self.warmup:
+                    continue
+                stats = self.stats[name]
+                stats.requests += 1
+                stats.latency.record((loop.time() - scheduled) * 1e6)
+                if error:
+                    stats.errors[error] += 1
+        finally:
+            conn.close()
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        slots = iter(range(2 ** 62))
+        started = loop.time()
+        await asyncio.gather(*[self._worker(slots, started) for _ in range(self.connections)])
+        self.elapsed = max(loop.time() - started - self.warmup, 1e-9)
+
+    def run(self):
+        """Run the load and collect stats of each scenario."""
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._run())
+        finally:
+            loop.close()
+        return self.stats
+
+    def report(self):
+        """Get summary of the run as JSON-serializable mapping."""
+        total = Stats()
+        for stats in self.stats.values():
+            total.merge(stats)
+        return {
+            "target_rate": self.rate,
+            "duration": self.elapsed,
+            "scenarios": {name: stats.as_dict(self.elapsed) for name, stats in self.stats.items()},
+            "total": total.as_dict(self.elapsed),
+        }
+
+
+def summary(report):
+    """Render report of a run as table of scenarios, followed by warnings of failed requests and missed target rate.
+
+    :param report: A mapping as returned by :meth:`LoadGenerator.report`.
+    :returns: List of lines.
+    """
+    lines = [
+        f"{'SCENARIO':<12}{'REQUESTS':>10}{'REQ/S':>10}{'ERRORS':>9}"
+        f"{'P50':>10}{'P90':>10}{'P99':>10}{'P99.9':>10}{'MAX':>10}"
+    ]
+    for name, stats in list(report["scenarios"].items()) + [("total", report["total"])]:
+        latency = stats["latency_ms"]
+        lines.append(
+            f"{name:<12}{stats['requests']:>10}{stats['throughput']:>10.1f}{stats['error_rate']:>9.1%}"
+            + "".join(f"{latency[key]:>8.1f}ms" for key in ("p50", "p90", "p99", "p99.9", "max"))
+        )
+
+    for name, stats in report["scenarios"].items():
+        for error, count in stats["errors"].items():
+            lines.append(f"[W] {name}: {count} requests failed with {error}")
+
+    # requests behind schedule (e.g. too few connections or saturated stack) lower the achieved rate
+    rate = report["target_rate"]
+    if report["total"]["throughput"] < rate * MIN_THROUGHPUT:
+        lines.append(
+            f"[W] Achieved {report['total']['throughput']:.1f} requests/s is below target rate of {rate:g}; "
+            "the application is saturated or more --connections are needed"
+        )
+    return lines
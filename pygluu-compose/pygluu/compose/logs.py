@@ -0,0 +1,215 @@
+"""Stream logs of multiple containers concurrently."""
+
+import asyncio
+import contextlib
+import json
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+#: Severity of known log levels.
+LEVELS = {
+    "TRACE": 0,
+    "DEBUG": 1,
+    "INFO": 2,
+    "WARN": 3,
+    "WARNING": 3,
+    "ERROR": 4,
+    "SEVERE": 4,
+    "FATAL": 5,
+    "CRITICAL": 5,
+}
+
+LEVEL_RGX = re.compile(r"\b({})\b".format("|".join(LEVELS)), re.IGNORECASE)
+
+SINCE_RGX = re.compile(r"^(\d+)([smhd])$")
+
+SINCE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+#: Colors used to prefix lines of each container (if output is a TTY).
+COLORS = ["cyan", "yellow", "green", "magenta", "blue", "red"]
+
+
+def parse_since(value):
+    """Parse ``--since`` value.
+
+    :param value: Relative duration (e.g. ``30s``, ``10m``, ``2h``, ``1d``),
+                  UNIX timestamp, or datetime in ``YYYY-MM-DDTHH:MM:SS`` format.
+    :returns: UNIX timestamp as ``int`` or ``None`` if value is empty.
+    """
+    if not value:
+        return None
+
+    match = SINCE_RGX.match(value)
+    if match:
+        return int(time.time()) - int(match.group(1)) * SINCE_UNITS[match.group(2)]
+
+    if value.isdigit():
+        return int(value)
+
+    try:
+        return int(datetime.strptime(value, "%Y-%m-%dT%H:%M:%S").timestamp())
+    except ValueError:
+        raise ValueError(f"Invalid value {value}; use duration (e.g. 10m), UNIX timestamp, or YYYY-MM-DDTHH:MM:SS")
+
+
+def parse_level(message):
+    """Get log level mentioned in a message (if any)."""
+    match = LEVEL_RGX.search(message)
+    if match:
+        return match.group(1).upper()
+    return ""
+
+
+class LogMultiplexer:
+    """Multiplex log streams of containers into single output.
+
+    Each container is streamed over Docker API by its own reader thread (as Docker client is blocking)
+    into a bounded queue consumed by the event loop; once a queue is full, the reader
+    stops reading the stream until the output catches up.
+
+    Lines without log level (e.g. stack traces) inherit level of previous line of the same container.
+
+    :param client: An instance of Docker API client.
+    :param containers: List of :class:`~pygluu.compose.status.ContainerStatus`.
+    :param clients: A mapping of container ID and Docker API client of its host
+                    (e.g. in multi-node mode); ``client`` is used for the rest of containers.
+    :param follow: Keep streaming new output.
+    :param tail: Number of lines to show from the end of the logs (or ``all``).
+    :param since: Show logs since UNIX timestamp.
+    :param pattern: Show only lines matching the regex.
+    :param level: Show only lines with at least given log level.
+    :param as_json: Print each line as JSON document.
+    :param buffer_size: Maximum number of lines buffered per container.
+    :param stream: Output stream.
+    """
+
+    def __init__(self, client, containers, follow=False, tail="all", since=None, pattern="",
+                 level="", as_json=False, buffer_size=1000, stream=None, clients=None):
+        self.client = client
+        self.clients = clients or {}
+        self.containers = list(containers)
+        self.follow = follow
+        self.tail = int(tail) if str(tail).isdigit() else "all"
+        self.since = since
+        self.pattern = re.compile(pattern) if pattern else None
+        self.min_level = LEVELS[level.upper()] if level else None
+        self.as_json = as_json
+        self.buffer_size = buffer_size
+        self.stream = stream or sys.stdout
+        self.color = not as_json and self.stream.isatty()
+        self.width = max([len(c.name) for c in self.containers] or [0])
+
+        self._responses = []
+        self._closed = threading.Event()
+
+    def _read(self, container, queue, loop):
+        """Read log stream of a container and push each line into the queue."""
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        error = None
+        try:
+            client = self.clients.get(container.id, self.client)
+            response = client.logs(
+                container.id,
+                stream=True,
+                follow=self.follow,
+                timestamps=True,
+                tail=self.tail,
+                since=self.since,
+            )
+            self._responses.append(response)
+
+            pending = b""
+            for chunk in response:
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    put(line)
+            if pending:
+                put(pending)
+        except Exception as exc:
+            error = exc
+
+        # the loop may be closed already
+        with contextlib.suppress(RuntimeError):
+            if error is not None and not self._closed.is_set():
+                put(error)
+            put(None)
+
+    def _match(self, message, level):
+        if self.pattern and not self.pattern.search(message):
+            return False
+        if self.min_level is not None and LEVELS.get(level, -1) < self.min_level:
+            return False
+        return True
+
+    def _emit(self, container, color, timestamp, level, message):
+        if self.as_json:
+            line = json.dumps({
+                "timestamp": timestamp,
+                "service": container.service,
+                "container": container.name,
+                "level": level,
+                "message": message,
+            })
+        else:
+            prefix = f"{container.name:<{self.width}} |"
+            if self.color:
+                import click
+
+                prefix = click.style(prefix, fg=color)
+            line = f"{prefix} {message}"
+        self.stream.write(line + "\n")
+        self.stream.flush()
+
+    async def _drain(self, container, color, queue):
+        """Filter and print lines of a container from its queue."""
+        level = ""
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+
+            if isinstance(item, Exception):
+                print(f"[W] Unable to stream logs of {container.name}; reason={item}", file=sys.stderr)
+                continue
+
+            timestamp, _, message = item.decode(errors="replace").rstrip("\r").partition(" ")
+            level = parse_level(message) or level
+            if self._match(message, level):
+                self._emit(container, color, timestamp, level, message)
+
+    async def _run(self, loop):
+        tasks = []
+        for index, container in enumerate(self.containers):
+            queue = asyncio.Queue(maxsize=self.buffer_size)
+            threading.Thread(target=self._read, args=(container, queue, loop), daemon=True).start()
+            tasks.append(self._drain(container, COLORS[index % len(COLORS)], queue))
+        await asyncio.gather(*tasks)
+
+    def close(self):
+        """Stop all streams."""
+        self._closed.set()
+        for response in self._responses:
+            with contextlib.suppress(Exception):
+                response.close()
+
+    def run(self):
+        """Stream logs until all streams are exhausted (or interrupted)."""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        main = loop.create_task(self._run(loop))
+        try:
+            loop.run_until_complete(main)
+        except (KeyboardInterrupt, BrokenPipeError):
+            main.cancel()
+            with contextlib.suppress(BaseException):
+                loop.run_until_complete(main)
+        finally:
+            self.close()
+            loop.close()
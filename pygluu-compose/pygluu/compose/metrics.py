@@ -0,0 +1,272 @@
+"""Export resource use of containers against their limits in Prometheus text format."""
+
+import collections
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+
+from .status import StatusSnapshot
+
+# content type of Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# health states exposed as ``gluu_container_health_status`` (empty state means no healthcheck)
+HEALTH_STATES = ("starting", "healthy", "unhealthy")
+
+Sample = namedtuple(
+    "Sample",
+    ["service", "container", "time", "memory", "memory_limit", "cpu", "cpu_limit",
+     "periods", "throttled_periods", "throttled_time", "restarts", "state", "health"],
+)
+Sample.__doc__ = """Resource use of a container at a point in time.
+
+:param service: Name of the service.
+:param container: Name of the container.
+:param time: UNIX timestamp of the sample.
+:param memory: Memory used (in bytes) excluding page cache, as reported by ``docker stats``.
+:param memory_limit: Memory limit (in bytes) of the container (``mem_limit``), or host memory if unlimited.
+:param cpu: CPU used (in cores) since the previous stats of the daemon.
+:param cpu_limit: CPU limit (in cores) of the container (``cpus``), or number of host CPUs if unlimited.
+:param periods: Total number of CFS periods.
+:param throttled_periods: Total number of CFS periods the container was throttled in.
+:param throttled_time: Total time (in nanoseconds) the container was throttled for.
+:param restarts: Number of restarts of the container (by restart policy).
+:param state: State of the container (e.g. ``running``).
+:param health: Health state of the container (empty if it has no healthcheck).
+"""
+
+
+def parse_sample(status, stats, info, now=None):
+    """Build a sample from ``stats`` and ``inspect`` API responses.
+
+    :param status: An instance of :class:`~pygluu.compose.status.ContainerStatus`.
+    :param stats: A mapping of ``stats`` API response (empty for stopped container).
+    :param info: A mapping of ``inspect`` API response.
+    :param now: UNIX timestamp of the sample (current time if omitted).
+    :returns: An instance of :class:`Sample`.
+    """
+    mem_stats = stats.get("memory_stats") or {}
+    details = mem_stats.get("stats") or {}
+    # page cache is reclaimable, hence excluded as does ``docker stats`` (cgroup v1 and v2 respectively)
+    cache = details.get("cache", details.get("inactive_file", 0))
+    memory = max(mem_stats.get("usage", 0) - cache, 0)
+
+    cpu_stats = stats.get("cpu_stats") or {}
+    precpu_stats = stats.get("precpu_stats") or {}
+    usage = cpu_stats.get("cpu_usage") or {}
+    online_cpus = cpu_stats.get("online_cpus") or len(usage.get("percpu_usage") or []) or 1
+    cpu_delta = usage.get("total_usage", 0) - (precpu_stats.get("cpu_usage") or {}).get("total_usage", 0)
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+    cpu = cpu_delta / system_delta * online_cpus if cpu_delta > 0 and system_delta > 0 else 0.0
+    throttling = cpu_stats.get("throttling_data") or {}
+
+    host_config = info.get("HostConfig") or {}
+    state = info.get("State") or {}
+    return Sample(
+        service=status.service,
+        container=status.name,
+        time=now if now is not None else time.time(),
+        memory=memory,
+        memory_limit=host_config.get("Memory") or mem_stats.get("limit", 0),
+        cpu=cpu,
+        cpu_limit=(host_config.get("NanoCpus") or 0) / 1e9 or online_cpus,
+        periods=throttling.get("periods", 0),
+        throttled_periods=throttling.get("throttled_periods", 0),
+        throttled_time=throttling.get("throttled_time", 0),
+        restarts=info.get("RestartCount", 0),
+        state=state.get("Status", status.state),
+        health=(state.get("Health") or {}).get("Status", ""),
+    )
+
+
+def _ratio(value, limit):
+    return value / limit if limit else 0.0
+
+
+def _value(value):
+    # integers (e.g. bytes) are rendered in full precision
+    return str(int(value)) if isinstance(value, int) else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Collector:
+    """Sample resource use of containers of a project.
+
+    Each round fetches ``stats`` and ``inspect`` of all containers concurrently. Samples are kept
+    in a fixed-size ring buffer per service, hence peak and average utilization over the window
+    are available next to the latest value of each container.
+
+    :param client: An instance of Docker API client.
+    :param project: Name of the Compose project.
+    :param window: Maximum number of samples kept per service.
+    :param max_workers: Maximum number of containers sampled concurrently.
+    """
+
+    def __init__(self, client, project, window=60, max_workers=8):
+        self.client = client
+        self.project = project
+        self.window = window
+        self.rings = {}
+        self.latest = {}
+        self.transitions = collections.Counter()
+        self.duration = 0.0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _sample(self, status):
+        # stats of stopped containers are empty, yet their restart count and state are relevant
+        stats = self.client.stats(status.id, stream=False) if status.state == "running" else {}
+        return parse_sample(status, stats, self.client.inspect_container(status.id))
+
+    def sample(self):
+        """Take a sample of all containers of the project."""
+        started = time.monotonic()
+        snapshot = StatusSnapshot.fetch(self.client, self.project)
+        statuses = [status for containers in snapshot.services.values() for status in containers]
+        futures = [self.executor.submit(self._sample, status) for status in statuses]
+
+        samples = []
+        errors = 0
+        for future in futures:
+            try:
+                samples.append(future.result())
+            except Exception:  # noqa: B902
+                # container removed in the meantime or daemon hiccup; skipped until next round
+                errors += 1
+
+        with self.lock:
+            for sample in samples:
+                previous = self.latest.get(sample.container)
+                if previous and previous.health and sample.health and previous.health != sample.health:
+                    self.transitions[sample.service] += 1
+                self.rings.setdefault(
+                    sample.service, collections.deque(maxlen=self.window),
+                ).append(sample)
+            self.latest = {sample.container: sample for sample in samples}
+            self.duration = time.monotonic() - started
+            self.errors += errors
+
+    def close(self):
+        """Stop sampling threads."""
+        self.executor.shutdown(wait=False)
+
+    def render(self):
+        """Render metrics in Prometheus text format."""
+        families = collections.OrderedDict()
+
+        def add(name, kind, doc, labels, value):
+            family = families.setdefault(name, [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"])
+            family.append(f"{name}{_labels(**labels) if labels else ''} {_value(value)}")
+
+        with self.lock:
+            for sample in sorted(self.latest.values(), key=lambda s: (s.service, s.container)):
+                labels = {"service": sample.service, "container": sample.container}
+                add("gluu_container_memory_usage_bytes", "gauge",
+                    "Memory used by the container excluding page cache.", labels, sample.memory)
+                add("gluu_container_memory_limit_bytes", "gauge",
+                    "Memory limit of the container (host memory if unlimited).", labels, sample.memory_limit)
+                add("gluu_container_memory_utilization_ratio", "gauge",
+                    "Memory used by the container relative to its limit.", labels,
+                    _ratio(sample.memory, sample.memory_limit))
+                add("gluu_container_cpu_usage_cores", "gauge",
+                    "CPU used by the container (in cores).", labels, sample.cpu)
+                add("gluu_container_cpu_limit_cores", "gauge",
+                    "CPU limit of the container (host CPUs if unlimited).", labels, sample.cpu_limit)
+                add("gluu_container_cpu_utilization_ratio", "gauge",
+                    "CPU used by the container relative to its limit.", labels, _ratio(sample.cpu, sample.cpu_limit))
+                add("gluu_container_cpu_periods_total", "counter",
+                    "CFS periods of the container.", labels, sample.periods)
+                add("gluu_container_cpu_throttled_periods_total", "counter",
+                    "CFS periods in which the container was throttled.", labels, sample.throttled_periods)
+                add("gluu_container_cpu_throttled_seconds_total", "counter",
+                    "Time the container was throttled for.", labels, sample.throttled_time / 1e9)
+                add("gluu_container_restarts_total", "counter",
+                    "Restarts of the container by its restart policy.", labels, sample.restarts)
+                add("gluu_container_running", "gauge",
+                    "Whether the container is running.", labels, sample.state == "running")
+                for health in HEALTH_STATES if sample.health else ():
+                    add("gluu_container_health_status", "gauge",
+                        "Health state of the container (containers without healthcheck are omitted).",
+                        dict(labels, status=health), sample.health == health)
+
+            for service, ring in sorted(self.rings.items()):
+                labels = {"service": service}
+                memory = [_ratio(s.memory, s.memory_limit) for s in ring]
+                cpu = [_ratio(s.cpu, s.cpu_limit) for s in ring]
+                add("gluu_service_memory_utilization_ratio_max", "gauge",
+                    "Peak memory utilization of containers of the service over the sampling window.",
+                    labels, max(memory))
+                add("gluu_service_memory_utilization_ratio_avg", "gauge",
+                    "Average memory utilization of containers of the service over the sampling window.",
+                    labels, sum(memory) / len(memory))
+                add("gluu_service_cpu_utilization_ratio_max", "gauge",
+                    "Peak CPU utilization of containers of the service over the sampling window.", labels, max(cpu))
+                add("gluu_service_cpu_utilization_ratio_avg", "gauge",
+                    "Average CPU utilization of containers of the service over the sampling window.",
+                    labels, sum(cpu) / len(cpu))
+
+                # throttled share of CFS periods between the oldest and newest sample of each container
+                first, last = {}, {}
+                for s in ring:
+                    first.setdefault(s.container, s)
+                    last[s.container] = s
+                periods = sum(max(last[c].periods - first[c].periods, 0) for c in last)
+                throttled = sum(max(last[c].throttled_periods - first[c].throttled_periods, 0) for c in last)
+                add("gluu_service_cpu_throttled_ratio", "gauge",
+                    "Share of CFS periods in which containers of the service were throttled over the sampling window.",
+                    labels, _ratio(throttled, periods))
+                add("gluu_service_health_transitions_total", "counter",
+                    "Health state changes of containers of the service (e.g. healthy to unhealthy).",
+                    labels, self.transitions[service])
+                add("gluu_service_samples", "gauge",
+                    "Samples of the service in the sampling window.", labels, len(ring))
+
+            add("gluu_exporter_sample_duration_seconds", "gauge",
+                "Duration of the latest sampling round.", {}, self.duration)
+            add("gluu_exporter_sample_errors_total", "counter",
+                "Containers failed to be sampled.", {}, self.errors)
+
+        return "\n".join(line for family in families.values() for line in family) + "\n"
+
+
+class MetricsServer(ThreadingMixIn, HTTPServer):
+    """HTTP server exposing metrics of a collector at ``/metrics``.
+
+    :param collector: An instance of :class:`Collector`.
+    :param host: Address to listen on.
+    :param port: Port to listen on.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, collector, host="127.0.0.1", port=9101):
+        self.collector = collector
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = self.server.collector.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+        super().__init__((host, port), Handler)
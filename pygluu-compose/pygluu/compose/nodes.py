@@ -0,0 +1,369 @@
+"""Spread services across multiple Docker hosts (nodes)."""
+
+import copy
+import ipaddress
+import os
+from collections import OrderedDict
+from collections import namedtuple
+
+from .profiler import span
+from .status import StatusSnapshot
+
+# services running on every node; consul forms a cluster and registrator registers containers of its node
+NODE_LOCAL_SERVICES = ("consul", "registrator")
+
+# number of consul servers (the rest of nodes run consul clients)
+CONSUL_SERVERS = 3
+
+# ports used by consul servers to form a cluster (RPC, LAN and WAN gossip)
+CONSUL_CLUSTER_PORTS = ("8300", "8301", "8301/udp", "8302", "8302/udp")
+
+# ports of services reached by hostname from other services; published on the same port of their node
+SERVICE_PORTS = {
+    "vault": (8200, 8201),
+    "ldap": (1636, 4444, 8989),
+    "redis": (6379,),
+    "mysql": (3306,),
+    "postgresql": (5432,),
+    "jackrabbit": (8080,),
+    "oxd_server": (8443, 8444),
+}
+
+# ports of services load-balanced by nginx; published on random ports of their node and registered
+# to consul by registrator, hence replicas of the same service can share a node
+UPSTREAM_PORTS = {
+    "oxauth": (8080,),
+    "oxtrust": (8080,),
+    "oxshibboleth": (8080,),
+    "oxpassport": (8090,),
+    "casa": (8080,),
+    "scim": (8080,),
+    "fido2": (8080,),
+}
+
+Node = namedtuple("Node", ["name", "docker_host", "address", "services"])
+Node.__doc__ = """A Docker host of multi-node deployment.
+
+:param name: Name of the node.
+:param docker_host: URL of Docker API of the node, e.g. ``tcp://10.0.0.11:2375``.
+:param address: IP address of the node reachable from other nodes.
+:param services: Names of services assigned to the node.
+"""
+
+
+class Inventory:
+    """Assignment of services to nodes.
+
+    Services not assigned to any node run on the first node. Each node runs its own
+    ``consul`` agent (servers on the first 3 nodes, forming a cluster used as Vault HA storage)
+    and ``registrator``; ports of services reached from other nodes are published on node address,
+    and their hostnames are resolved to node address on other nodes.
+
+    The working directory must be present at the same path on all nodes (e.g. shared storage),
+    as bind-mounted files are resolved by each Docker host.
+
+    :param nodes: List of :class:`Node`.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+
+        if len(self.nodes) < CONSUL_SERVERS:
+            raise ValueError(f"Multi-node deployment requires at least {CONSUL_SERVERS} nodes to form Consul cluster")
+
+        assigned = {}
+        for node in self.nodes:
+            if not node.docker_host:
+                raise ValueError(f"Node {node.name} has no docker_host")
+            try:
+                ipaddress.ip_address(node.address)
+            except ValueError:
+                raise ValueError(f"Node {node.name} has invalid address {node.address!r}")
+
+            for name in node.services:
+                if name in NODE_LOCAL_SERVICES:
+                    raise ValueError(f"Service {name} runs on every node and can't be assigned to node {node.name}")
+                if name in assigned:
+                    raise ValueError(f"Service {name} is assigned to both node {assigned[name]} and {node.name}")
+                assigned[name] = node.name
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Create inventory from ``NODES`` setting.
+
+        The setting maps node name to a mapping of ``docker_host``, ``address``, and ``services``, e.g.::
+
+            NODES = {
+                "node1": {"docker_host": "tcp://10.0.0.11:2375", "address": "10.0.0.11", "services": ["ldap"]},
+                ...
+            }
+
+        :returns: An instance of :class:`Inventory` or ``None`` if all services run on single host.
+        """
+        nodes = settings.get("NODES") or {}
+        if not nodes:
+            return None
+        return cls(
+            Node(name, spec.get("docker_host", ""), spec.get("address", ""), tuple(spec.get("services") or ()))
+            for name, spec in nodes.items()
+        )
+
+    def node_of(self, service):
+        """Get node of a service (first node if the service is not assigned)."""
+        for node in self.nodes:
+            if service in node.services:
+                return node
+        return self.nodes[0]
+
+    @property
+    def consul_servers(self):
+        """Get nodes running consul servers."""
+        return self.nodes[:CONSUL_SERVERS]
+
+    def _consul(self, svc, node):
+        joins = " ".join(f"-retry-join={server.address}" for server in self.consul_servers)
+        if node in self.consul_servers:
+            svc["command"] = f"agent -server -bootstrap-expect={CONSUL_SERVERS} -ui -advertise={node.address} {joins}"
+        else:
+            svc["command"] = f"agent -advertise={node.address} {joins}"
+        # node name of consul is derived from hostname, hence it must be unique across the cluster
+        svc["hostname"] = f"consul-{self.nodes.index(node) + 1}"
+        svc["ports"] = list(svc.get("ports") or []) + [
+            f"{node.address}:{port.split('/')[0]}:{port}" for port in CONSUL_CLUSTER_PORTS
+        ]
+        return svc
+
+    def _registrator(self, svc, node):
+        # register published ports on node address rather than internal addresses of containers
+        svc["command"] = svc.get("command", "").replace("-internal", f"-ip {node.address}")
+        return svc
+
+    def _placed(self, name, svc, node, placement):
+        colocated = {other for other, node_name in placement.items() if node_name == node.name}
+        colocated.update(NODE_LOCAL_SERVICES)
+
+        depends_on = svc.get("depends_on")
+        if isinstance(depends_on, dict):
+            svc["depends_on"] = {dep: cond for dep, cond in depends_on.items() if dep in colocated}
+        elif depends_on:
+            svc["depends_on"] = [dep for dep in depends_on if dep in colocated]
+        if not svc.get("depends_on"):
+            svc.pop("depends_on", None)
+
+        extra_hosts = svc.get("extra_hosts") or []
+        if isinstance(extra_hosts, dict):
+            extra_hosts = [f"{host}:{ip}" for host, ip in extra_hosts.items()]
+        extra_hosts += [
+            f"{other}:{self.node_of(other).address}"
+            for other in sorted(placement)
+            if other not in colocated
+        ]
+        if extra_hosts:
+            svc["extra_hosts"] = extra_hosts
+
+        ports = list(svc.get("ports") or [])
+        # ports already published by the service (e.g. vault) are kept as-is
+        published = self._published(ports)
+        ports += [
+            f"{node.address}:{port}:{port}"
+            for port in SERVICE_PORTS.get(name, ())
+            if (str(port), "tcp") not in published
+        ]
+        ports += [f"{node.address}::{port}" for port in UPSTREAM_PORTS.get(name, ())]
+        if ports:
+            svc["ports"] = ports
+        return svc
+
+    def _published(self, ports):
+        published = []
+        for port in ports:
+            parts = str(port).split("/")[0].split(":")
+            if len(parts) >= 2 and parts[-2]:
+                published.append((parts[-2], str(port).partition("/")[2] or "tcp"))
+        return published
+
+    def render(self, config):
+        """Render Compose definitions of each node.
+
+        Ports published on loopback address are published on node address instead,
+        as the CLI (e.g. bootstrapping Vault) runs on another host.
+
+        :param config: A mapping of merged Compose config of all services.
+        :returns: A mapping of node name and its Compose file content.
+        """
+        services = config.get("services", {})
+        placement = {
+            name: self.node_of(name).name
+            for name in services
+            if name not in NODE_LOCAL_SERVICES
+        }
+
+        rendered = OrderedDict()
+        for node in self.nodes:
+            definitions = {}
+            for name, svc in services.items():
+                svc = copy.deepcopy(svc)
+                svc["ports"] = [
+                    str(port).replace("127.0.0.1:", f"{node.address}:", 1)
+                    for port in svc.get("ports") or []
+                ]
+                if name == "consul":
+                    definitions[name] = self._consul(svc, node)
+                elif name == "registrator":
+                    definitions[name] = self._registrator(svc, node)
+                elif placement[name] == node.name:
+                    definitions[name] = self._placed(name, svc, node, placement)
+                if name in definitions and not definitions[name]["ports"]:
+                    del definitions[name]["ports"]
+
+            published = {}
+            for name, svc in definitions.items():
+                for port in self._published(svc.get("ports") or []):
+                    if port in published:
+                        raise ValueError(
+                            f"Services {published[port]} and {name} on node {node.name} "
+                            f"both publish port {port[0]}/{port[1]}; assign them to different nodes"
+                        )
+                    published[port] = name
+
+            rendered[node.name] = dict(
+                {key: copy.deepcopy(value) for key, value in config.items() if key != "services"},
+                services=definitions,
+            )
+        return rendered
+
+
+class Cluster:
+    """Compose projects of all nodes, each talking to Docker API of its node.
+
+    :param projects: A mapping of :class:`Node` and its ``compose.project.Project``.
+    """
+
+    def __init__(self, projects):
+        self.projects = OrderedDict(projects)
+
+    @classmethod
+    def load(cls, nodes, paths, project_name, environment):
+        """Resolve project of each node (concurrently) from Compose file of the node.
+
+        :param nodes: List of :class:`Node`.
+        :param paths: A mapping of node name and absolute path to its Compose file.
+        :param project_name: Name of the project shared by all nodes.
+        :param environment: An instance of ``compose.config.environment.Environment``
+                            (``DOCKER_HOST`` is set to Docker API of each node).
+        :returns: An instance of :class:`Cluster`.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        from compose.cli.command import get_project
+        from compose.config.environment import Environment
+
+        def resolve(node):
+            with span(f"resolve project of {node.name}", "compose"):
+                return get_project(
+                    os.getcwd(),
+                    [paths[node.name]],
+                    project_name=project_name,
+                    environment=Environment(environment, DOCKER_HOST=node.docker_host),
+                    override_dir=os.getcwd(),
+                )
+
+        nodes = list(nodes)
+        with ThreadPoolExecutor(max_workers=len(nodes)) as executor:
+            return cls(zip(nodes, executor.map(resolve, nodes)))
+
+    def client(self, node):
+        """Get Docker client of a node."""
+        return self.projects[node].client
+
+    def run(self, func):
+        """Run a function against project of each node concurrently.
+
+        :param func: A callable accepting :class:`Node` and its project.
+        :returns: A mapping of node name and value returned by the function.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(self.projects)) as executor:
+            futures = OrderedDict(
+                (node.name, executor.submit(func, node, project))
+                for node, project in self.projects.items()
+            )
+            return OrderedDict((name, future.result()) for name, future in futures.items())
+
+    def snapshot(self, health=False):
+        """Get containers state of all services across nodes.
+
+        :param health: Get health state of containers.
+        :returns: A ``tuple`` of :class:`~pygluu.compose.status.StatusSnapshot` (of all nodes)
+                  and a mapping of container ID and Docker client of its node.
+        """
+        snapshots = self.run(
+            lambda node, project: StatusSnapshot.fetch(
+                project.client, project.name, services=project.service_names, health=health,
+            ),
+        )
+
+        containers = []
+        clients = {}
+        for node, project in self.projects.items():
+            for service_containers in snapshots[node.name].services.values():
+                containers.extend(service_containers)
+                clients.update((container.id, project.client) for container in service_containers)
+
+        services = [name for snapshot in snapshots.values() for name in snapshot.services]
+        return StatusSnapshot(containers, list(dict.fromkeys(services))), clients
+
+    def prepare(self):
+        """Create networks and volumes, remove orphan containers, and pull images on all nodes."""
+        from compose.service import BuildAction
+
+        def prepare(node, project):
+            project.initialize()
+            project.find_orphan_containers(remove_orphans=True)
+            for svc in project.services:
+                svc.ensure_image_exists(do_build=BuildAction.skip, silent=True)
+
+        self.run(prepare)
+
+    def up(self, select, replicas):
+        """Create (or recreate) and start selected services on all nodes.
+
+        :param select: A callable accepting service name and returning whether to start the service.
+        :param replicas: A mapping of service name and its number of replicas (``1`` if omitted).
+        """
+        from compose.service import BuildAction
+
+        def start(node, project):
+            names = [svc.name for svc in project.services if select(svc.name)]
+            if names:
+                project.up(
+                    service_names=names,
+                    start_deps=False,
+                    do_build=BuildAction.skip,
+                    detached=True,
+                    ignore_orphans=True,
+                    silent=True,
+                    scale_override={name: replicas.get(name, 1) for name in names},
+                )
+
+        self.run(start)
+
+    def down(self):
+        """Stop and remove containers (and orphans) on all nodes."""
+        from compose.service import ImageType
+
+        self.run(lambda node, project: project.down(ImageType.none, False, remove_orphans=True))
+
+    def ready(self, ignored=()):
+        """Check whether all containers across nodes are running (and healthy, if they have healthcheck).
+
+        :param ignored: Names of services to ignore (e.g. one-off jobs).
+        """
+        snapshot, _ = self.snapshot(health=True)
+        return all(
+            snapshot.get(svc) and len(snapshot.running(svc)) == len(snapshot.get(svc))
+            and all(c.health in ("healthy", "") for c in snapshot.get(svc))
+            for svc in snapshot.services
+            if svc not in ignored
+        )
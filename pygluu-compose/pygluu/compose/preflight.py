@@ -0,0 +1,187 @@
+"""Check host resources required by the application before deploying containers."""
+
+import contextlib
+import ipaddress
+import shutil
+import socket
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# timeout (in seconds) of each network probe; probes run against local host, hence they are either fast or hopeless
+PROBE_TIMEOUT = 0.5
+
+# minimum free disk space (in bytes) for persistent volumes
+MIN_DISK_SPACE = 5 * 1024 ** 3
+
+# minimum Docker Engine version supporting Compose file format 2.4
+MIN_DOCKER_VERSION = (17, 12)
+
+# API version of the minimum Docker Engine version
+MIN_API_VERSION = "1.35"
+
+# prefixes of interfaces created by Docker (or other virtual networks) which are not reachable from outside
+VIRTUAL_INTERFACES = ("lo", "docker", "br-", "veth", "virbr")
+
+CheckResult = namedtuple("CheckResult", ["name", "ok", "message", "fatal"])
+CheckResult.__doc__ = """Outcome of a preflight check.
+
+:param name: Short name of the check.
+:param ok: Whether the check passed.
+:param message: Description of the outcome.
+:param fatal: Whether failure of the check prevents deployment.
+"""
+
+
+def port_in_use(host, port, timeout=PROBE_TIMEOUT):
+    """Check whether a TCP port accepts connections.
+
+    :param host: Host address (unspecified address, e.g. ``0.0.0.0``, is probed via loopback).
+    :param port: Port number.
+    :param timeout: Timeout (in seconds) of the probe.
+    """
+    if host in ("", "0.0.0.0", "::"):
+        host = "127.0.0.1"
+
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        return sock.connect_ex((host, port)) == 0
+
+
+def check_port(host, port):
+    """Check whether a port required by the application is available."""
+    if port_in_use(host, port):
+        return CheckResult(f"port {port}", False, f"Required port {port} is bind to another process", True)
+    return CheckResult(f"port {port}", True, f"Port {port} is available", True)
+
+
+def check_disk(path, min_free=MIN_DISK_SPACE):
+    """Check whether the filesystem of a path has enough free space."""
+    free = shutil.disk_usage(path).free
+    ok = free >= min_free
+    message = f"{free / 1024 ** 3:.1f}GB free disk space under {path}"
+    if not ok:
+        message += f"; at least {min_free / 1024 ** 3:.0f}GB is recommended"
+    return CheckResult("disk", ok, message, False)
+
+
+def check_docker(environment=None, timeout=PROBE_TIMEOUT):
+    """Check whether Docker daemon is reachable and recent enough.
+
+    The probe uses its own low-level client bounded by ``timeout``, as the client of the project
+    waits for the (long) HTTP timeout of Compose before giving up on unreachable daemon.
+
+    :param environment: A mapping of environment variables configuring the client (``os.environ`` if omitted).
+    :param timeout: Timeout (in seconds) of the probe.
+    """
+    from docker import APIClient
+    from docker.utils import kwargs_from_env
+
+    try:
+        # API version is set, hence the client doesn't query it on creation
+        client = APIClient(version=MIN_API_VERSION, timeout=timeout, **kwargs_from_env(environment=environment))
+        with contextlib.closing(client):
+            version = client.version(api_version=False).get("Version", "")
+    except Exception as exc:  # noqa: B902
+        return CheckResult("docker", False, f"Unable to reach Docker daemon; reason={exc}", True)
+
+    parsed = tuple(int(part) for part in version.split("-")[0].split(".")[:2] if part.isdigit())
+    if parsed and parsed < MIN_DOCKER_VERSION:
+        return CheckResult(
+            "docker",
+            False,
+            f"Docker {version} is not supported; "
+            f"at least {'.'.join(map(str, MIN_DOCKER_VERSION))} is required",
+            True,
+        )
+    return CheckResult("docker", True, f"Docker {version}", True)
+
+
+def interface_addresses():
+    """Get IPv4 addresses of local network interfaces (except loopback and virtual ones).
+
+    Addresses are read via ``SIOCGIFADDR`` ioctl (Linux only); an empty list is returned elsewhere.
+    """
+    addresses = []
+    with contextlib.suppress(ImportError, AttributeError, OSError):
+        import fcntl
+        import struct
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for _, name in socket.if_nameindex():
+                if name.startswith(VIRTUAL_INTERFACES):
+                    continue
+                with contextlib.suppress(OSError):
+                    # SIOCGIFADDR
+                    packed = fcntl.ioctl(sock.fileno(), 0x8915, struct.pack("256s", name[:15].encode()))
+                    addresses.append(socket.inet_ntoa(packed[20:24]))
+    return addresses
+
+
+def detect_ip():
+    """Detect IP address of the host.
+
+    Source address of the default route is preferred; connecting a UDP socket only selects
+    the route (no packet is sent), hence it fails immediately on hosts without external route.
+    Otherwise, address of the first local interface is used.
+
+    :returns: IP address or an empty string if none is found.
+    """
+    with contextlib.suppress(OSError):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(PROBE_TIMEOUT)
+            sock.connect(("8.8.8.8", 80))
+            ip = sock.getsockname()[0]
+            if not ipaddress.ip_address(ip).is_unspecified:
+                return ip
+
+    addresses = interface_addresses()
+    return addresses[0] if addresses else ""
+
+
+class Probes:
+    """Run probes (preflight checks and detection of IP address) concurrently, each bounded by its own timeout.
+
+    Probes start as soon as their input is known, e.g. Docker daemon and IP address of the host
+    before the project is resolved, and published ports of services afterwards.
+
+    :param max_workers: Maximum number of concurrent probes.
+    """
+
+    def __init__(self, max_workers=16):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.checks = []
+
+    def check(self, check, *args):
+        """Start a check returning :class:`CheckResult` (collected by :meth:`results`)."""
+        self.checks.append(self.executor.submit(check, *args))
+
+    def detect_ip(self):
+        """Start detection of IP address of the host (see :func:`detect_ip`).
+
+        :returns: A future of the IP address.
+        """
+        return self.executor.submit(detect_ip)
+
+    def results(self):
+        """Wait for all checks.
+
+        :returns: List of :class:`CheckResult` (in order of checks).
+        """
+        try:
+            return [future.result() for future in self.checks]
+        finally:
+            self.executor.shutdown(wait=False)
+
+
+def run_checks(checks, max_workers=16):
+    """Run checks concurrently.
+
+    :param checks: List of callables without argument, each returning :class:`CheckResult`.
+    :param max_workers: Maximum number of concurrent checks.
+    :returns: List of :class:`CheckResult` (in order of checks).
+    """
+    probes = Probes(max_workers=min(max_workers, len(checks) or 1))
+    for check in checks:
+        probes.check(check)
+    return probes.results()
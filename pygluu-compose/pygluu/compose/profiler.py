@@ -0,0 +1,140 @@
+"""Timing spans to profile commands.
+
+Spans are recorded only when the profiler is enabled (e.g. by ``--profile`` option),
+otherwise :func:`span` is a no-op.
+"""
+
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import namedtuple
+
+Span = namedtuple("Span", ["name", "category", "started", "finished", "thread", "args"])
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _ActiveSpan:
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        args = dict(self.args)
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        self.profiler.add(self.name, self.category, self.started, time.perf_counter(), args)
+        return False
+
+
+class Profiler:
+    """Collector of timing spans."""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Start collecting spans."""
+        self.enabled = True
+        self.spans = []
+        self.started_at = time.perf_counter()
+
+    def span(self, name, category="app", **args):
+        """Measure a block of code.
+
+        Usage::
+
+            with profiler.span("vault unseal", "vault"):
+                ...
+
+        :param name: Name of the span.
+        :param category: Category of the span (e.g. ``vault``, ``http``, ``exec``).
+        :param args: Additional details attached to the span; must not contain secrets.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _ActiveSpan(self, name, category, args)
+
+    def add(self, name, category, started, finished, args=None):
+        """Record a span measured elsewhere (timestamps are taken from ``time.perf_counter``)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.spans.append(Span(name, category, started, finished, threading.get_ident(), args or {}))
+
+    def trace(self):
+        """Get spans in Chrome trace event format (viewable in ``chrome://tracing`` or Perfetto)."""
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.started):
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.started - self.started_at) * 1e6, 1),
+                "dur": round((span.finished - span.started) * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+                "args": span.args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path):
+        """Write spans to a JSON file in Chrome trace event format."""
+        pathlib.Path(path).write_text(json.dumps(self.trace()))
+
+    def summary(self):
+        """Aggregate spans by category and name.
+
+        :returns: List of ``(category, name, count, total, max)`` tuples sorted by total time.
+        """
+        stats = {}
+        for span in self.spans:
+            elapsed = span.finished - span.started
+            count, total, max_ = stats.get((span.category, span.name), (0, 0.0, 0.0))
+            stats[(span.category, span.name)] = (count + 1, total + elapsed, max(max_, elapsed))
+        rows = [(cat, name, count, total, max_) for (cat, name), (count, total, max_) in stats.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def report(self, limit=30):
+        """Print summary table of the slowest spans."""
+        rows = self.summary()
+        if not rows:
+            return
+
+        width = min(max(len(row[1]) for row in rows), 48)
+        print(f"[I] Profile summary (top {min(limit, len(rows))} of {len(rows)} spans by total time):")
+        print(f"    {'CATEGORY':<10}{'SPAN':<{width + 2}}{'COUNT':>7}{'TOTAL':>11}{'MEAN':>11}{'MAX':>11}")
+        for category, name, count, total, max_ in rows[:limit]:
+            print(
+                f"    {category:<10}{name[:width]:<{width + 2}}{count:>7}"
+                f"{total:>10.3f}s{total / count:>10.3f}s{max_:>10.3f}s"
+            )
+
+
+#: Profiler shared by all modules.
+PROFILER = Profiler()
+
+span = PROFILER.span
@@ -0,0 +1,157 @@
+"""Provision multi-node Redis topology (cluster or sentinel) for the cache layer."""
+
+import copy
+import re
+
+REDIS_PORT = 6379
+
+SENTINEL_PORT = 26379
+
+#: Names of services generated for Redis topology, e.g. ``redis-1`` or ``redis-sentinel-1``.
+NODE_RGX = re.compile(r"^redis(-sentinel)?-\d+$")
+
+#: Memory limit of each sentinel (sentinels keep no data).
+SENTINEL_MEM_LIMIT = "64M"
+
+
+def is_redis_node(name):
+    """Check whether a service is part of generated Redis topology."""
+    return bool(NODE_RGX.match(name))
+
+
+class RedisTopology:
+    """Layout of Redis nodes.
+
+    In ``CLUSTER`` mode, keys are sharded across all masters (``nodes / (replicas + 1)``),
+    each having ``replicas`` replica(s) for failover.
+    In ``SENTINEL`` mode, the first node is the master replicated to the rest of nodes,
+    and sentinels promote a replica once the master is unreachable.
+
+    :param mode: Either ``CLUSTER`` or ``SENTINEL``.
+    :param nodes: Number of ``redis-server`` nodes.
+    :param replicas: Number of replicas of each master (``CLUSTER`` mode only).
+    :param sentinels: Number of sentinels (``SENTINEL`` mode only).
+    :param group: Name of master group monitored by sentinels.
+    """
+
+    MODES = ("CLUSTER", "SENTINEL")
+
+    def __init__(self, mode, nodes=3, replicas=0, sentinels=3, group="gluu"):
+        self.mode = mode
+        self.nodes = nodes
+        self.replicas = replicas
+        self.sentinels = sentinels
+        self.group = group
+
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported Redis type {mode}; choose from {', '.join(self.MODES)}")
+        if mode == "CLUSTER" and nodes < 3 * (replicas + 1):
+            raise ValueError(
+                f"Redis cluster with {replicas} replica(s) per master requires at least {3 * (replicas + 1)} nodes"
+            )
+        if mode == "SENTINEL" and (nodes < 1 or sentinels < 1):
+            raise ValueError("Redis sentinel requires at least 1 node and 1 sentinel")
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Create topology from settings.
+
+        :returns: An instance of :class:`RedisTopology` or ``None`` if bundled Redis runs as single node.
+        """
+        mode = str(settings.get("REDIS_TYPE", "")).upper()
+        if not settings.get("SVC_REDIS") or mode not in cls.MODES:
+            return None
+        return cls(
+            mode,
+            nodes=int(settings.get("REDIS_NODES") or 3),
+            replicas=int(settings.get("REDIS_CLUSTER_REPLICAS") or 0),
+            sentinels=int(settings.get("REDIS_SENTINELS") or 3),
+            group=settings.get("REDIS_SENTINEL_GROUP") or "gluu",
+        )
+
+    @property
+    def node_names(self):
+        """Get service names of ``redis-server`` nodes."""
+        return [f"redis-{index}" for index in range(1, self.nodes + 1)]
+
+    @property
+    def sentinel_names(self):
+        """Get service names of sentinels."""
+        if self.mode != "SENTINEL":
+            return []
+        return [f"redis-sentinel-{index}" for index in range(1, self.sentinels + 1)]
+
+    def connection_settings(self):
+        """Get settings used by Gluu services to connect to the topology."""
+        if self.mode == "CLUSTER":
+            url = ",".join(f"{name}:{REDIS_PORT}" for name in self.node_names)
+        else:
+            url = ",".join(f"{name}:{SENTINEL_PORT}" for name in self.sentinel_names)
+        return {"REDIS_TYPE": self.mode, "REDIS_URL": url, "REDIS_SENTINEL_GROUP": self.group}
+
+    def _server_command(self, name):
+        args = ["redis-server", "--port", str(REDIS_PORT), "--appendonly", "yes"]
+        if self.mode == "CLUSTER":
+            args += ["--cluster-enabled", "yes", "--cluster-config-file", "nodes.conf", "--cluster-node-timeout", "5000"]
+        elif name != self.node_names[0]:
+            args += ["--replicaof", self.node_names[0], str(REDIS_PORT)]
+
+        # password (if any) is passed via environment to keep it out of generated file;
+        # ``$$`` escapes variable from Compose interpolation
+        auth = '$${REDIS_PW:+--requirepass "$$REDIS_PW" --masterauth "$$REDIS_PW"}'
+        return ["sh", "-c", f"exec {' '.join(args)} {auth}"]
+
+    def _sentinel_command(self):
+        quorum = self.sentinels // 2 + 1
+        lines = [
+            f"port {SENTINEL_PORT}",
+            "sentinel resolve-hostnames yes",
+            f"sentinel monitor {self.group} {self.node_names[0]} {REDIS_PORT} {quorum}",
+            f"sentinel down-after-milliseconds {self.group} 5000",
+            f"sentinel failover-timeout {self.group} 10000",
+        ]
+
+        # sentinel rewrites its config file, hence the file is generated inside the container
+        conf = "/tmp/sentinel.conf"
+        script = " && ".join(
+            [f": > {conf}"]
+            + [f"echo '{line}' >> {conf}" for line in lines]
+            + [
+                f'if [ -n "$$REDIS_PW" ]; then echo "sentinel auth-pass {self.group} $$REDIS_PW" >> {conf}; fi',
+                f"exec redis-sentinel {conf}",
+            ]
+        )
+        return ["sh", "-c", script]
+
+    def definitions(self, base):
+        """Get Compose definitions of all services of the topology.
+
+        :param base: Definition of ``redis`` service (from ``svc.redis.yml``) used as template of each node.
+        :returns: A mapping of Compose file content.
+        """
+        template = {k: v for k, v in base.items() if k not in ("container_name", "command", "hostname")}
+        template["environment"] = ["REDIS_PW=${REDIS_PW}"]
+
+        services = {}
+        for name in self.node_names:
+            services[name] = dict(copy.deepcopy(template), command=self._server_command(name))
+
+        for name in self.sentinel_names:
+            services[name] = dict(
+                copy.deepcopy(template),
+                command=self._sentinel_command(),
+                depends_on=[self.node_names[0]],
+                mem_limit=SENTINEL_MEM_LIMIT,
+            )
+        return {"version": "2.4", "services": services}
+
+    def bootstrap_command(self, addresses):
+        """Get command to create cluster slots across nodes.
+
+        :param addresses: IP addresses of nodes (``redis-cli`` requires IP addresses rather than hostnames).
+        """
+        nodes = " ".join(f"{address}:{REDIS_PORT}" for address in addresses)
+        return (
+            'sh -c \'REDISCLI_AUTH="$REDIS_PW" redis-cli --cluster create '
+            f"{nodes} --cluster-replicas {self.replicas} --cluster-yes'"
+        )
@@ -0,0 +1,200 @@
+"""Replace containers of stateless services one batch at a time, without downtime."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .backends import APIError
+from .profiler import span
+from .wait import wait_for
+
+
+class RolloutError(Exception):
+    """Error while replacing container."""
+
+
+class Rollout:
+    """Replace outdated containers while their old counterparts keep serving requests.
+
+    Each container is replaced as follows:
+
+    1. the old container is renamed to free its name (it keeps running);
+    2. a new container is created using current config and started next to the old one;
+    3. once the new container is healthy (and registered to consul by registrator,
+       hence added to nginx upstreams), the old one is deregistered from consul;
+    4. after draining in-flight requests, the old container is stopped and removed.
+
+    If the new container fails to become healthy, it is removed and the old container
+    is renamed back, hence the service is left as it was. If the old container fails to be
+    stopped or removed (e.g. Docker or consul error), the new one keeps serving and the error
+    stops the rollout as well.
+
+    :param project: An instance of ``compose.project.Project``.
+    :param consul: An instance of :class:`~pygluu.compose.backends.ConsulAPI` (optional).
+    :param max_unavailable: Maximum number of containers replaced at once.
+    :param drain: Time (in seconds) to wait for in-flight requests before stopping old container.
+    :param timeout: Maximum time (in seconds) to wait for new container to be healthy.
+    """
+
+    def __init__(self, project, consul=None, max_unavailable=1, drain=5.0, timeout=300.0):
+        self.project = project
+        self.consul = consul
+        self.max_unavailable = max_unavailable
+        self.drain = drain
+        self.timeout = timeout
+
+    def outdated(self, services, force=False):
+        """Get containers whose config differs from current config of their service.
+
+        :param services: Names of services.
+        :param force: Include all containers regardless of their config.
+        :returns: List of ``(service, container)`` pairs.
+        """
+        from compose.const import LABEL_CONFIG_HASH
+
+        pairs = []
+        for name in services:
+            service = self.project.get_service(name)
+            config_hash = service.config_hash
+            for container in sorted(service.containers(), key=lambda c: c.number or 0):
+                if force or container.labels.get(LABEL_CONFIG_HASH) != config_hash:
+                    pairs.append((service, container))
+        return pairs
+
+    def _service_name(self, container):
+        # registrator reads service name from either labels or environment variables
+        return container.labels.get("SERVICE_NAME") or container.environment.get("SERVICE_NAME")
+
+    def _addresses(self, container):
+        container.inspect()
+        networks = container.get("NetworkSettings.Networks") or {}
+        return {net.get("IPAddress") for net in networks.values() if net.get("IPAddress")}
+
+    def _registrations(self, container):
+        """Get consul registrations (as returned by catalog API) of a container."""
+        name = self._service_name(container)
+        if not name or not self.consul:
+            return []
+        addresses = self._addresses(container)
+        return [entry for entry in self.consul.catalog_service(name) if entry.get("ServiceAddress") in addresses]
+
+    def _wait_healthy(self, container):
+        def healthy():
+            container.inspect()
+            state = container.get("State") or {}
+            if not state.get("Running"):
+                raise RolloutError(f"container {container.name} exited with code {state.get('ExitCode')}")
+
+            health = (state.get("Health") or {}).get("Status")
+            if health == "unhealthy":
+                raise RolloutError(f"container {container.name} is unhealthy")
+            # containers without healthcheck are considered ready once running
+            return health in ("healthy", None)
+
+        return wait_for(healthy, f"{container.name} to be healthy", timeout=self.timeout, max_delay=5.0).ok
+
+    def _wait_registered(self, container):
+        """Wait for registrator to register a container in consul.
+
+        :returns: List of registrations of the container.
+        """
+        if not self.consul or not self._service_name(container):
+            return []
+        try:
+            return wait_for(
+                lambda: self._registrations(container),
+                f"{container.name} to be registered in consul",
+                timeout=60.0,
+                max_delay=2.0,
+            ).value or []
+        except APIError as exc:
+            print(f"[W] Unable to check registration of {container.name} in consul; reason={exc}")
+            return []
+
+    def _deregister(self, container):
+        if not self.consul:
+            return
+        try:
+            for entry in self._registrations(container):
+                self.consul.deregister_service(entry["ServiceID"])
+        except APIError as exc:
+            # registrator deregisters the container once it is stopped
+            print(f"[W] Unable to deregister {container.name} from consul; reason={exc}")
+
+    def _restore(self, container, registrations):
+        """Restore registrations of a container removed by registrator.
+
+        Registrator derives service ID from container name, hence stopping the old container
+        deregisters the ID shared with the new container (until registrator resyncs).
+        """
+        if not registrations:
+            return
+        try:
+            if not self._registrations(container):
+                for entry in registrations:
+                    self.consul.register_service(entry)
+        except APIError as exc:
+            print(f"[W] Unable to restore registration of {container.name} in consul; reason={exc}")
+
+    def replace(self, service, old):
+        """Replace a container with new one created from current config of its service.
+
+        :param service: An instance of ``compose.service.Service``.
+        :param old: An instance of ``compose.container.Container``.
+        """
+        from compose.const import LABEL_CONFIG_HASH
+
+        name = old.name
+        with span(f"rollout {name}", "rollout"):
+            old.rename_to_tmp_name()
+            new = None
+            try:
+                # passing overrides disables config hash label, hence the label is set explicitly
+                new = service.create_container(
+                    number=old.number,
+                    quiet=True,
+                    labels={LABEL_CONFIG_HASH: service.config_hash},
+                )
+                service.start_container(new)
+                if not self._wait_healthy(new):
+                    raise RolloutError(f"container {new.name} is not healthy after {self.timeout:.0f}s")
+            except Exception as exc:
+                if new is not None:
+                    new.stop(timeout=service.stop_timeout(None))
+                    new.remove()
+                self.project.client.rename(old.id, name)
+                raise RolloutError(f"Unable to replace {name}; reason={exc}") from exc
+
+            # the new container serves requests already, hence it is kept even if the old one lingers
+            try:
+                registrations = self._wait_registered(new)
+                self._deregister(old)
+                time.sleep(self.drain)
+
+                old.stop(timeout=service.stop_timeout(None))
+                old.remove()
+                self._restore(new, registrations)
+            except Exception as exc:
+                raise RolloutError(f"Unable to remove old container of {name} ({old.name}); reason={exc}") from exc
+            print(f"[I] Replaced {name}")
+
+    def run(self, pairs):
+        """Replace containers in batches of ``max_unavailable``.
+
+        Rollout stops after the first batch having failed replacement.
+
+        :param pairs: List of ``(service, container)`` pairs (see :meth:`outdated`).
+        :returns: List of errors (empty if all containers are replaced).
+        """
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_unavailable) as executor:
+            for index in range(0, len(pairs), self.max_unavailable):
+                batch = pairs[index:index + self.max_unavailable]
+                futures = [executor.submit(self.replace, service, container) for service, container in batch]
+                for future in futures:
+                    try:
+                        future.result()
+                    except RolloutError as exc:
+                        errors.append(str(exc))
+                if errors:
+                    break
+        return errors
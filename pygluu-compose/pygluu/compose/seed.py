@@ -0,0 +1,126 @@
+"""Seed configs (Consul KV) and secrets (Vault) in bulk from dumps of ``config-init``."""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .profiler import span
+
+# prefix of config keys in Consul KV (as used by Gluu containers)
+CONFIG_PREFIX = "gluu/config"
+
+# path of secrets in Vault (as used by Gluu containers)
+SECRET_PREFIX = "secret/gluu"
+
+# Consul KV key of checksums of seeded configs and secrets
+CHECKSUM_KEY = "gluu/seed/checksums"
+
+# maximum number of operations per Consul transaction
+TXN_MAX_OPS = 64
+
+SeedResult = namedtuple("SeedResult", ["configs", "secrets", "unchanged"])
+SeedResult.__doc__ = """Outcome of :meth:`Seeder.seed`.
+
+:param configs: Names of written configs.
+:param secrets: Names of written secrets.
+:param unchanged: Number of configs and secrets skipped as unchanged.
+"""
+
+
+def encode(value):
+    """Encode value as stored by Gluu containers (non-string values are stored as JSON)."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def load_dump(config_file, secret_file):
+    """Load configs and secrets from JSON files as dumped by ``config-init``.
+
+    :param config_file: Path to ``config.json`` (configs under ``_config`` key).
+    :param secret_file: Path to ``secret.json`` (secrets under ``_secret`` key).
+    :returns: A ``tuple`` of configs and secrets mappings.
+    """
+    with open(config_file) as f:
+        configs = json.load(f).get("_config", {})
+    with open(secret_file) as f:
+        secrets = json.load(f).get("_secret", {})
+    return configs, secrets
+
+
+class Seeder:
+    """Write configs to Consul KV and secrets to Vault in bulk.
+
+    Configs are written using Consul transactions (up to :data:`TXN_MAX_OPS` keys each),
+    and secrets are written concurrently. Checksum of each value is recorded in Consul KV
+    right after all values are written, hence re-seeding unchanged values is a no-op
+    and an interrupted seed is resumed by the next run. Checksums of secrets are keyed (HMAC)
+    by a random salt, so they can't be matched against precomputed hashes; as the salt is stored
+    next to them, low-entropy secrets (e.g. passwords) can still be brute-forced by whoever
+    can read Consul KV.
+
+    :param consul: An instance of :class:`~pygluu.compose.backends.ConsulAPI`.
+    :param vault: An instance of :class:`~pygluu.compose.backends.VaultAPI` (logged in).
+    :param max_workers: Maximum number of concurrent Vault writes.
+    """
+
+    def __init__(self, consul, vault, max_workers=4):
+        self.consul = consul
+        self.vault = vault
+        self.max_workers = max_workers
+
+    def recorded(self):
+        """Get checksums recorded by last seed."""
+        try:
+            return json.loads(self.consul.kv_get(CHECKSUM_KEY) or "{}")
+        except ValueError:
+            return {}
+
+    def checksums(self, configs, secrets, salt):
+        """Get checksum of each config and secret (keyed by ``config/NAME`` and ``secret/NAME``)."""
+        sums = {
+            f"config/{key}": hashlib.sha256(encode(value).encode()).hexdigest()
+            for key, value in configs.items()
+        }
+        sums.update({
+            f"secret/{key}": hmac.new(salt.encode(), encode(value).encode(), hashlib.sha256).hexdigest()
+            for key, value in secrets.items()
+        })
+        return sums
+
+    def _kv_op(self, key, value):
+        return {"KV": {"Verb": "set", "Key": key, "Value": base64.b64encode(value.encode()).decode()}}
+
+    def seed(self, configs, secrets):
+        """Write changed configs and secrets.
+
+        :param configs: A mapping of config name and value.
+        :param secrets: A mapping of secret name and value.
+        :returns: An instance of :class:`SeedResult`.
+        """
+        recorded = self.recorded()
+        salt = recorded.get("salt") or os.urandom(16).hex()
+        sums = self.checksums(configs, secrets, salt)
+        previous = recorded.get("checksums", {})
+
+        changed_configs = [key for key in configs if previous.get(f"config/{key}") != sums[f"config/{key}"]]
+        changed_secrets = [key for key in secrets if previous.get(f"secret/{key}") != sums[f"secret/{key}"]]
+        unchanged = len(configs) + len(secrets) - len(changed_configs) - len(changed_secrets)
+        if not changed_configs and not changed_secrets:
+            return SeedResult([], [], unchanged)
+
+        with span("write secrets", "vault"), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(
+                lambda key: self.vault.write(f"{SECRET_PREFIX}/{key}", {"value": encode(secrets[key])}),
+                changed_secrets,
+            ))
+
+        # checksums are recorded in the last transaction, i.e. only after all values are written
+        ops = [self._kv_op(f"{CONFIG_PREFIX}/{key}", encode(configs[key])) for key in changed_configs]
+        ops.append(self._kv_op(CHECKSUM_KEY, json.dumps({"salt": salt, "checksums": sums}, sort_keys=True)))
+        with span("write configs", "consul"):
+            for index in range(0, len(ops), TXN_MAX_OPS):
+                self.consul.txn(ops[index:index + TXN_MAX_OPS])
+        return SeedResult(changed_configs, changed_secrets, unchanged)
@@ -11,6 +11,9 @@ DEFAULT_SETTINGS = {
     "REDIS_USE_SSL": False,
     "REDIS_SSL_TRUSTSTORE": "",
     "REDIS_SENTINEL_GROUP": "",
+    "REDIS_NODES": 3,
+    "REDIS_CLUSTER_REPLICAS": 0,
+    "REDIS_SENTINELS": 3,
     "EMAIL": "",
     "ORG_NAME": "",
     "COUNTRY_CODE": "",
@@ -63,6 +66,20 @@ DEFAULT_SETTINGS = {
     "GOOGLE_SPANNER_DATABASE_ID": "",
     "SPANNER_EMULATOR_HOST": "",
     "ENABLE_DEV_OVERRIDE": False,
+    "ENABLE_AUTO_SIZING": False,
+    "SIZING_MEMORY": "",
+    "SIZING_CPUS": 0,
+    "ENABLE_SQL_TUNING": False,
+    "SQL_TUNING_PROFILE": "balanced",
+    "ENABLE_LDAP_TUNING": False,
+    "SCALE_OXAUTH": 1,
+    "SCALE_OXTRUST": 1,
+    "SCALE_OXPASSPORT": 1,
+    "SCALE_OXSHIBBOLETH": 1,
+    "SCALE_CASA": 1,
+    "SCALE_SCIM": 1,
+    "SCALE_FIDO2": 1,
+    "NODES": {},
 }
 
 COMPOSE_MAPPINGS = {
@@ -86,3 +103,15 @@ COMPOSE_MAPPINGS = {
     "JOB_PERSISTENCE": "job.persistence.yml",
     "JOB_CONFIGURATION": "job.configuration.yml",
 }
+
+# services which can run multiple replicas (stateless, registered to consul via registrator
+# and load-balanced by nginx) and their setting of number of replicas
+SCALE_MAPPINGS = {
+    "SCALE_OXAUTH": "oxauth",
+    "SCALE_OXTRUST": "oxtrust",
+    "SCALE_OXPASSPORT": "oxpassport",
+    "SCALE_OXSHIBBOLETH": "oxshibboleth",
+    "SCALE_CASA": "casa",
+    "SCALE_SCIM": "scim",
+    "SCALE_FIDO2": "fido2",
+}
@@ -0,0 +1,244 @@
+"""Size memory and CPU of services based on host resources."""
+
+import copy
+import os
+import re
+from collections import namedtuple
+
+MB = 1024 * 1024
+
+Profile = namedtuple("Profile", ["default_mb", "min_mb", "max_mb", "cpu_shares", "background", "jvm"])
+Profile.__doc__ = """Sizing profile of a service.
+
+:param default_mb: Memory limit (in MB) set by the templates; used as relative weight of the service.
+:param min_mb: Minimum memory limit (in MB) required by the service to function.
+:param max_mb: Memory limit (in MB) beyond which the service gains nothing.
+:param cpu_shares: Relative CPU weight of the service under contention (Docker default is 1024).
+:param background: Whether the service is non-critical (e.g. one-off jobs) and may use only part of CPUs.
+:param jvm: Whether the service runs on JVM (and accepts ``GLUU_MAX_RAM_PERCENTAGE``).
+"""
+
+#: Sizing profiles of known services.
+SERVICE_PROFILES = {
+    "consul": Profile(512, 256, 1024, 512, False, False),
+    "vault": Profile(512, 256, 1024, 512, False, False),
+    "registrator": Profile(512, 128, 512, 256, True, False),
+    "nginx": Profile(512, 256, 1024, 1024, False, False),
+    "configuration": Profile(512, 512, 1024, 512, True, False),
+    "persistence": Profile(512, 512, 1024, 512, True, False),
+    "ldap": Profile(2048, 1024, 8192, 1536, False, True),
+    "oxauth": Profile(1536, 1024, 8192, 2048, False, True),
+    "oxtrust": Profile(1536, 1024, 6144, 1024, False, True),
+    "oxpassport": Profile(1024, 512, 2048, 512, False, False),
+    "oxshibboleth": Profile(1024, 768, 4096, 512, False, True),
+    "oxd_server": Profile(1024, 512, 4096, 512, False, True),
+    "casa": Profile(1024, 512, 4096, 512, False, True),
+    "fido2": Profile(1024, 512, 4096, 512, False, True),
+    "scim": Profile(1024, 512, 4096, 512, False, True),
+    "jackrabbit": Profile(1024, 512, 4096, 512, False, True),
+    "redis": Profile(512, 256, 2048, 512, False, False),
+    "mysql": Profile(1024, 512, 8192, 1024, False, False),
+    "postgresql": Profile(1024, 512, 8192, 1024, False, False),
+    "cr_rotate": Profile(512, 128, 512, 256, True, False),
+    "autoheal": Profile(512, 64, 256, 256, True, False),
+}
+
+#: Services defined in ``docker-compose.yml``.
+BASE_SERVICES = ("consul", "vault", "registrator", "nginx")
+
+#: Memory (in MB) used by JVM outside of heap (metaspace, threads, code cache, etc).
+JVM_OVERHEAD_MB = 384
+
+SIZE_RGX = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?$", re.IGNORECASE)
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": MB, "G": 1024 * MB, "T": 1024 * 1024 * MB}
+
+Allocation = namedtuple(
+    "Allocation",
+    ["service", "replicas", "default_mb", "mem_mb", "cpu_shares", "cpus", "max_ram_percentage", "note"],
+)
+
+Plan = namedtuple("Plan", ["memory_mb", "cpus", "reserved_mb", "allocations", "undersized"])
+
+
+def parse_size(value):
+    """Parse size (e.g. ``16G``, ``512M``, or number of bytes).
+
+    :returns: Size in bytes.
+    """
+    match = SIZE_RGX.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid size {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def host_resources():
+    """Get total memory (in bytes) and number of CPUs of current host.
+
+    :returns: A ``tuple`` of memory (``0`` if unknown) and CPUs.
+    """
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory = 0
+    return memory, os.cpu_count() or 1
+
+
+def enabled_services(compose_files):
+    """Get names of sizeable services defined in Compose files.
+
+    :param compose_files: List of Compose files (e.g. ``svc.oxauth.yml``).
+    """
+    services = list(BASE_SERVICES)
+    for file_ in compose_files:
+        parts = os.path.basename(file_).split(".")
+        if len(parts) == 3 and parts[0] in ("svc", "job") and parts[1] in SERVICE_PROFILES:
+            services.append(parts[1])
+    return list(dict.fromkeys(services))
+
+
+def max_ram_percentage(mem_mb):
+    """Get percentage of container memory usable by JVM heap, leaving room for non-heap memory."""
+    return max(50, min(85, int(100 * (mem_mb - JVM_OVERHEAD_MB) / mem_mb)))
+
+
+def _distribute(services, available_mb, replicas):
+    """Distribute memory proportionally to default limits, honoring min/max of each service.
+
+    Services hitting their bounds are fixed at the bound and the rest is redistributed
+    to remaining services (water-filling). Sizes are totals of all replicas of each service.
+    """
+    allocated = {}
+    free = {svc: SERVICE_PROFILES[svc].default_mb * replicas[svc] for svc in services}
+    remaining = available_mb
+
+    while free:
+        scale = remaining / sum(free.values())
+        bounded = {}
+        for svc, weight in free.items():
+            profile = SERVICE_PROFILES[svc]
+            size = weight * scale
+            if size < profile.min_mb * replicas[svc]:
+                bounded[svc] = profile.min_mb * replicas[svc]
+            elif size > profile.max_mb * replicas[svc]:
+                bounded[svc] = profile.max_mb * replicas[svc]
+
+        if not bounded:
+            allocated.update({svc: weight * scale for svc, weight in free.items()})
+            break
+
+        for svc, size in bounded.items():
+            allocated[svc] = size
+            remaining -= size
+            del free[svc]
+    return allocated
+
+
+def plan_resources(services, memory, cpus, replicas=None):
+    """Compute memory limit, CPU shares, and JVM heap hint of each service.
+
+    A part of host memory (10%, at least 1 GB) is reserved for the OS and Docker itself;
+    the rest is shared by services proportionally to their default limits.
+
+    :param services: Names of enabled services.
+    :param memory: Total memory of the host (in bytes).
+    :param cpus: Number of CPUs of the host.
+    :param replicas: A mapping of service name and its number of replicas (``1`` if omitted).
+    :returns: An instance of :class:`Plan`.
+    :raises ValueError: If memory is unknown (``0``).
+    """
+    if memory <= 0:
+        raise ValueError("Unknown host memory")
+
+    services = [svc for svc in services if svc in SERVICE_PROFILES]
+    replicas = {svc: (replicas or {}).get(svc, 1) for svc in services}
+    memory_mb = memory // MB
+    reserved_mb = max(1024, memory_mb // 10)
+    available_mb = max(memory_mb - reserved_mb, 0)
+
+    undersized = sum(SERVICE_PROFILES[svc].min_mb * replicas[svc] for svc in services) > available_mb
+    if undersized:
+        # not enough memory to satisfy minimums; shrink all services proportionally
+        total = sum(SERVICE_PROFILES[svc].default_mb * replicas[svc] for svc in services)
+        sizes = {
+            svc: SERVICE_PROFILES[svc].default_mb * replicas[svc] * available_mb / total
+            for svc in services
+        }
+    else:
+        sizes = _distribute(services, available_mb, replicas)
+
+    allocations = []
+    for svc in services:
+        profile = SERVICE_PROFILES[svc]
+        # limit applies to each replica; round down to multiple of 64MB
+        mem_mb = max(int(sizes[svc] / replicas[svc]) // 64 * 64, 64)
+
+        note = ""
+        if undersized:
+            note = "below minimum"
+        elif mem_mb >= profile.max_mb:
+            note = "capped at maximum"
+        elif mem_mb <= profile.min_mb:
+            note = "raised to minimum"
+
+        allocations.append(Allocation(
+            service=svc,
+            replicas=replicas[svc],
+            default_mb=profile.default_mb,
+            mem_mb=mem_mb,
+            cpu_shares=profile.cpu_shares,
+            cpus=max(1, cpus // 2) if profile.background and cpus > 1 else 0,
+            max_ram_percentage=max_ram_percentage(mem_mb) if profile.jvm else 0,
+            note=note,
+        ))
+    return Plan(memory_mb, cpus, reserved_mb, allocations, undersized)
+
+
+def overrides(plan, aliases=None):
+    """Get Compose overrides of a plan.
+
+    :param plan: An instance of :class:`Plan`.
+    :param aliases: A mapping of service name and names of services actually defined in its place (if any).
+    :returns: A mapping of Compose file content.
+    """
+    aliases = aliases or {}
+    services = {}
+    for alloc in plan.allocations:
+        svc = {"mem_limit": f"{alloc.mem_mb}M", "cpu_shares": alloc.cpu_shares}
+        if alloc.cpus:
+            svc["cpus"] = alloc.cpus
+        if alloc.max_ram_percentage:
+            svc["environment"] = {"GLUU_MAX_RAM_PERCENTAGE": str(alloc.max_ram_percentage)}
+        for name in aliases.get(alloc.service, [alloc.service]):
+            services[name] = copy.deepcopy(svc)
+    return {"version": "2.4", "services": services}
+
+
+def summary(plan):
+    """Render a plan as table of services, followed by total memory limit and warning of undersized host.
+
+    :param plan: An instance of :class:`Plan`.
+    :returns: List of lines.
+    """
+    lines = [
+        f"[I] Host has {plan.memory_mb}MB of memory and {plan.cpus} CPU(s); "
+        f"{plan.reserved_mb}MB is reserved for OS and Docker",
+        f"    {'SERVICE':<16}{'REPLICAS':>9}{'DEFAULT':>9}{'LIMIT':>9}{'SHARES':>8}{'CPUS':>6}{'HEAP %':>8}  NOTE",
+    ]
+    for alloc in plan.allocations:
+        cpus = alloc.cpus or "-"
+        heap = alloc.max_ram_percentage or "-"
+        lines.append(
+            f"    {alloc.service:<16}{alloc.replicas:>9}{alloc.default_mb:>7}MB{alloc.mem_mb:>7}MB"
+            f"{alloc.cpu_shares:>8}{cpus:>6}{heap:>8}  {alloc.note}".rstrip()
+        )
+
+    total = sum(alloc.mem_mb * alloc.replicas for alloc in plan.allocations)
+    default = sum(alloc.default_mb * alloc.replicas for alloc in plan.allocations)
+    lines.append(f"[I] Total memory limit is {total}MB (default {default}MB)")
+    if plan.undersized:
+        lines.append(
+            "[W] Host memory is below minimum requirement of enabled services; "
+            "consider disabling some services or adding more memory"
+        )
+    return lines
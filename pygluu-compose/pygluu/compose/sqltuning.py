@@ -0,0 +1,320 @@
+"""Tune bundled SQL database (MySQL or PostgreSQL) and connection pools of Gluu services."""
+
+import collections
+from collections import namedtuple
+
+#: Engines of bundled SQL database, their Compose file, and path of config file in the container.
+ENGINES = collections.OrderedDict([
+    ("mysql", ("svc.mysql.yml", "/etc/mysql/conf.d/gluu-tuning.cnf")),
+    ("postgresql", ("svc.postgresql.yml", "/etc/postgresql/postgresql.conf")),
+])
+
+#: Config files generated for each engine (relative to working directory).
+CONFIG_FILES = {"mysql": "sql-tuning.cnf", "postgresql": "sql-tuning.conf"}
+
+#: Durability and throughput trade-offs.
+#:
+#: - ``balanced``: every commit is durable (flushed to disk).
+#: - ``write-heavy``: commits are flushed about once per second, hence a crash of the database
+#:   may lose the last second of writes (e.g. tokens and sessions, which clients can request again).
+PROFILES = ("balanced", "write-heavy")
+
+#: Relative weight of connection pool of each service hitting the database.
+POOL_WEIGHTS = collections.OrderedDict([
+    ("oxauth", 4),
+    ("oxtrust", 2),
+    ("scim", 2),
+    ("oxshibboleth", 1),
+    ("casa", 1),
+    ("fido2", 1),
+    ("oxd_server", 1),
+    ("cr_rotate", 1),
+    ("persistence", 1),
+])
+
+# connections per unit of pool weight
+POOL_UNIT = 5
+
+# minimum size of each pool
+MIN_POOL = 2
+
+# connections kept for administration, healthchecks and replication
+RESERVED_CONNECTIONS = 10
+
+# connections accepted by each engine out of the box; services not reading ``GLUU_SQL_POOL_*`` keep
+# their default pools, hence the database never accepts fewer connections than this
+STOCK_MAX_CONNECTIONS = {"mysql": 151, "postgresql": 100}
+
+# memory (in MB) used by each connection; per-thread buffers of MySQL, backend process and work_mem of PostgreSQL
+CONNECTION_MB = {"mysql": 4, "postgresql": 6}
+
+# share of database memory usable by connections; the rest goes to caches
+CONNECTION_SHARE = 0.25
+
+# share of host memory assumed for database without memory limit (the rest is shared with Gluu services)
+HOST_SHARE = 0.25
+
+Pool = namedtuple("Pool", ["service", "replicas", "max_total", "max_idle", "min_idle"])
+Pool.__doc__ = """Connection pool of each replica of a service.
+
+:param service: Name of the service.
+:param replicas: Number of replicas of the service.
+:param max_total: Maximum number of connections.
+:param max_idle: Maximum number of idle connections.
+:param min_idle: Minimum number of idle connections.
+"""
+
+SqlPlan = namedtuple("SqlPlan", ["engine", "profile", "mem_mb", "max_connections", "pools", "settings", "note"])
+SqlPlan.__doc__ = """Tuning of SQL database.
+
+:param engine: Name of the engine (``mysql`` or ``postgresql``).
+:param profile: Name of the profile (see :data:`PROFILES`).
+:param mem_mb: Memory (in MB) of the database the tuning is based on.
+:param max_connections: Maximum number of connections accepted by the database.
+:param pools: List of :class:`Pool`.
+:param settings: A mapping of database setting and its (rendered) value.
+:param note: Remark on the plan (e.g. pools are shrunk to fit memory).
+"""
+
+
+def _clamp(value, lower, upper):
+    return max(lower, min(upper, value))
+
+
+def plan_pools(engine, mem_mb, clients):
+    """Size connection pools of services proportionally to their weight within memory of the database.
+
+    Maximum number of connections covers all pools, yet never drops below the stock limit of the engine.
+
+    :param engine: Name of the engine.
+    :param mem_mb: Memory (in MB) of the database.
+    :param clients: A mapping of service name and its number of replicas.
+    :returns: A ``tuple`` of list of :class:`Pool`, maximum number of connections, and note.
+    """
+    sizes = {svc: POOL_WEIGHTS[svc] * POOL_UNIT for svc in POOL_WEIGHTS if svc in clients}
+    total = sum(size * clients[svc] for svc, size in sizes.items())
+    capacity = int(mem_mb * CONNECTION_SHARE / CONNECTION_MB[engine]) - RESERVED_CONNECTIONS
+
+    note = ""
+    if total > capacity:
+        scale = max(capacity, 0) / total
+        sizes = {svc: max(int(size * scale), MIN_POOL) for svc, size in sizes.items()}
+        note = "pools are shrunk to fit memory"
+
+    pools = [
+        Pool(svc, clients[svc], size, size, max(size // 4, 1))
+        for svc, size in sizes.items()
+    ]
+    max_connections = sum(pool.max_total * pool.replicas for pool in pools) + RESERVED_CONNECTIONS
+    max_connections = max(max_connections, STOCK_MAX_CONNECTIONS[engine])
+    return pools, max_connections, note
+
+
+def mysql_settings(mem_mb, max_connections, profile):
+    """Compute settings of MySQL (8.0.30 or newer).
+
+    Buffer pool takes memory left by connections and server overhead, while redo log
+    is sized to a quarter of buffer pool so bursts of writes do not force early checkpoints.
+    """
+    write_heavy = profile == "write-heavy"
+    # performance schema reserves hundreds of MB upfront; too costly for small containers
+    perf_schema = mem_mb >= 2048
+    overhead_mb = 256 if perf_schema else 64
+
+    buffer_pool = mem_mb * 0.75 - max_connections * CONNECTION_MB["mysql"] - overhead_mb
+    instances = _clamp(int(buffer_pool) // 1024, 1, 8)
+    # buffer pool size must be multiple of chunk size (128MB) times number of instances
+    buffer_pool = max(int(buffer_pool) // (128 * instances) * 128 * instances, 128)
+
+    settings = collections.OrderedDict([
+        ("innodb_buffer_pool_size", f"{buffer_pool}M"),
+        ("innodb_buffer_pool_instances", instances),
+        ("innodb_redo_log_capacity", f"{_clamp(buffer_pool // 4, 256, 4096)}M"),
+        ("innodb_log_buffer_size", "64M" if write_heavy else "32M"),
+        ("innodb_flush_log_at_trx_commit", 2 if write_heavy else 1),
+        ("innodb_flush_method", "O_DIRECT"),
+        ("innodb_io_capacity", 2000 if write_heavy else 1000),
+        ("innodb_io_capacity_max", 4000 if write_heavy else 2000),
+        ("max_connections", max_connections),
+        ("thread_cache_size", min(max_connections, 100)),
+        ("skip_name_resolve", "ON"),
+        ("tmp_table_size", "32M"),
+        ("max_heap_table_size", "32M"),
+        ("performance_schema", "ON" if perf_schema else "OFF"),
+    ])
+    if write_heavy:
+        # binary log is only needed by replication and point-in-time recovery
+        settings["disable_log_bin"] = None
+    else:
+        settings["sync_binlog"] = 1
+        settings["binlog_expire_logs_seconds"] = 3 * 86400
+    return settings
+
+
+def postgresql_settings(mem_mb, max_connections, profile):
+    """Compute settings of PostgreSQL.
+
+    As the file replaces ``postgresql.conf`` of the image, it also carries the settings
+    the image changes from built-in defaults (e.g. ``listen_addresses``).
+    """
+    write_heavy = profile == "write-heavy"
+    shared_buffers = max(mem_mb // 4, 128)
+    max_wal_mb = 4096 if write_heavy else 2048
+
+    return collections.OrderedDict([
+        ("listen_addresses", "'*'"),
+        ("dynamic_shared_memory_type", "posix"),
+        ("timezone", "'Etc/UTC'"),
+        ("log_timezone", "'Etc/UTC'"),
+        ("max_connections", max_connections),
+        ("shared_buffers", f"{shared_buffers}MB"),
+        ("effective_cache_size", f"{max(mem_mb * 7 // 10, shared_buffers)}MB"),
+        ("work_mem", f"{_clamp(int(mem_mb * 0.2 / max_connections), 4, 64)}MB"),
+        ("maintenance_work_mem", f"{_clamp(mem_mb // 16, 64, 1024)}MB"),
+        ("wal_buffers", "16MB"),
+        ("wal_compression", "on"),
+        ("min_wal_size", f"{max_wal_mb // 4}MB"),
+        ("max_wal_size", f"{max_wal_mb}MB"),
+        ("checkpoint_timeout", "15min"),
+        ("checkpoint_completion_target", 0.9),
+        ("synchronous_commit", "off" if write_heavy else "on"),
+        ("random_page_cost", 1.1),
+        ("effective_io_concurrency", 200),
+        # tokens and sessions are deleted as they expire; vacuum their tables early
+        ("autovacuum_vacuum_scale_factor", 0.05),
+        ("autovacuum_analyze_scale_factor", 0.02),
+        ("autovacuum_vacuum_cost_limit", 1000),
+    ])
+
+
+def plan_sql(engine, mem_mb, host_mb, clients, profile="balanced"):
+    """Compute tuning of SQL database and connection pools of its clients.
+
+    :param engine: Name of the engine (``mysql`` or ``postgresql``).
+    :param mem_mb: Memory limit (in MB) of the database; ``0`` if unlimited.
+    :param host_mb: Memory (in MB) of the host.
+    :param clients: A mapping of name of service hitting the database and its number of replicas.
+    :param profile: Name of the profile (see :data:`PROFILES`).
+    :returns: An instance of :class:`SqlPlan`.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported SQL engine {engine!r}")
+    if profile not in PROFILES:
+        raise ValueError(f"Unsupported SQL tuning profile {profile!r}; choose one of {', '.join(PROFILES)}")
+
+    if not mem_mb:
+        mem_mb = int(host_mb * HOST_SHARE)
+    if host_mb:
+        mem_mb = min(mem_mb, host_mb)
+    mem_mb = max(mem_mb, 512)
+
+    pools, max_connections, note = plan_pools(engine, mem_mb, clients)
+    if engine == "mysql":
+        settings = mysql_settings(mem_mb, max_connections, profile)
+    else:
+        settings = postgresql_settings(mem_mb, max_connections, profile)
+    return SqlPlan(engine, profile, mem_mb, max_connections, pools, settings, note)
+
+
+def enabled_engines(files):
+    """Get engines of bundled SQL databases enabled by Compose files.
+
+    :param files: List of enabled Compose files.
+    :returns: List of ``(engine, filename)`` pairs.
+    """
+    return [(engine, filename) for engine, (filename, _) in ENGINES.items() if filename in files]
+
+
+def plan_databases(mem_limits, sizing, services, profile="balanced", auto_sizing=False):
+    """Compute tuning of bundled SQL databases and connection pools of their clients.
+
+    Memory of each database is taken from its sizing plan (if ``auto_sizing`` is on),
+    otherwise from its memory limit, otherwise from a share of host memory.
+
+    :param mem_limits: A mapping of enabled engine and memory limit (in MB) of its database (``0`` if unset).
+    :param sizing: An instance of :class:`~pygluu.compose.sizing.Plan`.
+    :param services: Names of enabled services.
+    :param profile: Name of the profile (see :data:`PROFILES`).
+    :param auto_sizing: Whether memory of services is set by the sizing plan.
+    :returns: List of :class:`SqlPlan`.
+    """
+    replicas = {alloc.service: alloc.replicas for alloc in sizing.allocations}
+    allocated = {alloc.service: alloc.mem_mb for alloc in sizing.allocations}
+    clients = {svc: replicas.get(svc, 1) for svc in services if svc in POOL_WEIGHTS}
+
+    return [
+        plan_sql(engine, allocated.get(engine, mem_limit) if auto_sizing else mem_limit,
+                 sizing.memory_mb, clients, profile)
+        for engine, mem_limit in mem_limits.items()
+    ]
+
+
+def render(plan):
+    """Render config file of the database."""
+    lines = ["# generated by pygluu-compose; changes will be overwritten"]
+    if plan.engine == "mysql":
+        lines.append("[mysqld]")
+    for key, value in plan.settings.items():
+        lines.append(key if value is None else f"{key} = {value}")
+    return "\n".join(lines) + "\n"
+
+
+def summary(plan):
+    """Render a plan as tables of database settings and pools of its clients.
+
+    :param plan: An instance of :class:`SqlPlan`.
+    :returns: List of lines.
+    """
+    lines = [
+        f"[I] SQL database {plan.engine} is tuned for {plan.mem_mb}MB of memory and "
+        f"{plan.max_connections} connections ({plan.profile} profile)",
+        f"    {'SETTING':<34}VALUE",
+    ]
+    for key, value in plan.settings.items():
+        lines.append(f"    {key:<34}{'(set)' if value is None else value}")
+
+    lines.append(f"    {'CLIENT':<16}{'REPLICAS':>9}{'POOL':>6}{'IDLE':>6}{'MIN':>5}")
+    for pool in plan.pools:
+        lines.append(f"    {pool.service:<16}{pool.replicas:>9}{pool.max_total:>6}{pool.max_idle:>6}{pool.min_idle:>5}")
+    if plan.note:
+        lines.append(f"[W] SQL connection {plan.note}; consider raising memory limit of {plan.engine}")
+    return lines
+
+
+def overrides(plan):
+    """Get Compose overrides mounting config file into the database and sizing pools of its clients.
+
+    Pool sizes are passed as ``GLUU_SQL_POOL_*`` environment variables for images mapping them to
+    ``connection.pool.*`` properties of ``gluu-sql.properties``; stock images ignore them, hence
+    ``max_connections`` of the plan is kept at or above the stock limit of the engine.
+
+    :param plan: An instance of :class:`SqlPlan`.
+    :returns: A mapping of Compose file content.
+    """
+    _, target = ENGINES[plan.engine]
+    db = {"volumes": [f"./{CONFIG_FILES[plan.engine]}:{target}:ro"]}
+    if plan.engine == "postgresql":
+        db["command"] = ["postgres", "-c", f"config_file={target}"]
+        # dynamic shared memory (e.g. parallel queries) lives in /dev/shm, which is 64MB by default
+        db["shm_size"] = "256m"
+
+    services = {plan.engine: db}
+    for pool in plan.pools:
+        services[pool.service] = {"environment": {
+            "GLUU_SQL_POOL_MAX_TOTAL": str(pool.max_total),
+            "GLUU_SQL_POOL_MAX_IDLE": str(pool.max_idle),
+            "GLUU_SQL_POOL_MIN_IDLE": str(pool.min_idle),
+        }}
+    return {"version": "2.4", "services": services}
+
+
+def merged_overrides(plans):
+    """Get Compose overrides of all databases and clients of their pools (see :func:`overrides`).
+
+    :param plans: List of :class:`SqlPlan`.
+    :returns: A mapping of Compose file content.
+    """
+    services = {}
+    for plan in plans:
+        services.update(overrides(plan)["services"])
+    return {"version": "2.4", "services": services}
@@ -0,0 +1,106 @@
+"""Snapshot of containers state."""
+
+from collections import OrderedDict
+from collections import namedtuple
+
+# health states of containers having healthcheck, as matched by ``health`` filter of ``containers`` API
+HEALTH_STATES = ("starting", "healthy", "unhealthy")
+
+ContainerStatus = namedtuple("ContainerStatus", ["id", "name", "service", "number", "state", "health", "status"])
+
+
+def parse_container(container, health=""):
+    """Get status of a container from an item of ``containers`` API response.
+
+    :param container: A mapping of container summary.
+    :param health: Health state of the container (empty if it has no healthcheck or isn't running).
+    :returns: An instance of :class:`ContainerStatus`.
+    """
+    labels = container.get("Labels") or {}
+    names = container.get("Names") or []
+
+    try:
+        number = int(labels.get("com.docker.compose.container-number", 0))
+    except ValueError:
+        number = 0
+
+    return ContainerStatus(
+        id=container.get("Id", ""),
+        # crop leading slash
+        name=names[0][1:] if names else "",
+        service=labels.get("com.docker.compose.service", ""),
+        number=number,
+        state=container.get("State", ""),
+        health=health,
+        status=container.get("Status", ""),
+    )
+
+
+class StatusSnapshot:
+    """Containers state indexed by service name.
+
+    :param containers: List of :class:`ContainerStatus`.
+    :param services: Service names to include even if they have no container.
+    :param project: Name of the project (if any).
+    """
+
+    def __init__(self, containers, services=(), project=""):
+        self.project = project
+        self.services = OrderedDict((name, []) for name in services)
+        for container in sorted(containers, key=lambda c: (c.service, c.number)):
+            self.services.setdefault(container.service, []).append(container)
+
+    @classmethod
+    def fetch(cls, client, project="", working_dir="", services=(), health=False):
+        """Take snapshot using single ``containers`` API call.
+
+        Container summaries carry no health state (except within human-readable ``Status``),
+        hence, if requested, running containers are listed once more per health state using ``health`` filter.
+
+        :param client: An instance of Docker API client.
+        :param project: Filter containers by Compose project name.
+        :param working_dir: Filter containers by Compose working directory.
+        :param services: Service names to include even if they have no container.
+        :param health: Get health state of containers.
+        :returns: An instance of :class:`StatusSnapshot`.
+        """
+        labels = ["com.docker.compose.oneoff=False"]
+        if project:
+            labels.append(f"com.docker.compose.project={project}")
+        if working_dir:
+            labels.append(f"com.docker.compose.project.working_dir={working_dir}")
+
+        containers = client.containers(all=True, filters={"label": labels})
+
+        states = {}
+        if health and any(c.get("State") == "running" for c in containers):
+            for state in HEALTH_STATES:
+                for container in client.containers(filters={"label": labels, "health": state}):
+                    states[container.get("Id")] = state
+        return cls([parse_container(c, states.get(c.get("Id"), "")) for c in containers], services, project)
+
+    def get(self, service):
+        """Get all containers (including stopped ones) of a service."""
+        return self.services.get(service, [])
+
+    def running(self, service):
+        """Get running containers of a service."""
+        return [c for c in self.get(service) if c.state == "running"]
+
+    def container_name(self, service):
+        """Get name of a container of a service, preferring running one.
+
+        :returns: Container name or empty string if service has no container.
+        """
+        containers = self.running(service) or self.get(service)
+        return containers[0].name if containers else ""
+
+    def as_dict(self):
+        """Get snapshot as JSON-serializable mapping."""
+        return {
+            "project": self.project,
+            "services": {
+                service: [container._asdict() for container in containers]
+                for service, containers in self.services.items()
+            },
+        }
@@ -0,0 +1,60 @@
+"""Condition-based waiting with exponential backoff."""
+
+import contextlib
+import time
+from collections import namedtuple
+
+from .profiler import span
+
+WaitResult = namedtuple("WaitResult", ["value", "ok", "elapsed", "attempts"])
+WaitResult.__doc__ = """Outcome of :func:`wait_for`.
+
+:param value: Last value returned by the condition.
+:param ok: Whether the condition is satisfied before deadline.
+:param elapsed: Time spent (in seconds).
+:param attempts: Number of times the condition was evaluated.
+"""
+
+
+def wait_for(condition, label, timeout=30.0, initial_delay=0.05, max_delay=2.0, factor=2.0, exceptions=()):
+    """Wait until condition returns a truthy value.
+
+    The condition is evaluated immediately, and then repeatedly using exponential backoff
+    (starting at ``initial_delay``, capped at ``max_delay``) until it is satisfied or
+    the deadline is reached.
+
+    :param condition: A callable without argument.
+    :param label: Short description of the awaited condition (used in timing output).
+    :param timeout: Maximum time (in seconds) to wait.
+    :param initial_delay: Delay (in seconds) before the 2nd attempt.
+    :param max_delay: Maximum delay (in seconds) between attempts.
+    :param factor: Multiplier applied to delay after each attempt.
+    :param exceptions: Exception classes raised by condition that should be treated as unsatisfied.
+    :returns: An instance of :class:`WaitResult`.
+    """
+    started_at = time.monotonic()
+    deadline = started_at + timeout
+    delay = initial_delay
+    attempts = 0
+    value = None
+
+    with span(label, "wait"):
+        while True:
+            attempts += 1
+            value = None
+
+            with contextlib.suppress(*exceptions):
+                value = condition()
+
+            elapsed = time.monotonic() - started_at
+            if value:
+                print(f"[I] Waited {elapsed:.2f}s for {label} ({attempts} attempt(s))")
+                return WaitResult(value, True, elapsed, attempts)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"[W] Timed out after {elapsed:.2f}s waiting for {label} ({attempts} attempt(s))")
+                return WaitResult(value, False, elapsed, attempts)
+
+            time.sleep(min(delay, remaining))
+            delay = min(delay * factor, max_delay)
@@ -0,0 +1,16 @@
+"""Fixtures shared by tests."""
+
+import pathlib
+import sys
+
+import pytest
+
+# fake servers (Docker, Vault, Consul, oxAuth) and helpers are shared with benchmarks
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "benchmarks"))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run test inside empty temporary working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,264 @@
+import socket
+
+import pytest
+
+from fakedocker import FakeConsul
+from fakedocker import FakeConsulServer
+from fakedocker import FakeVault
+from fakedocker import FakeVaultServer
+from pygluu.compose import app
+from pygluu.compose.app import Config
+from pygluu.compose.app import Secret
+from pygluu.compose.backends import APIError
+from pygluu.compose.backends import ConsulAPI
+from pygluu.compose.backends import VaultAPI
+from pygluu.compose.status import StatusSnapshot
+from pygluu.compose.wait import wait_for
+
+
+class StubDocker:
+    """Docker client running exec commands against CLI of fake Vault or Consul."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.commands = []
+        self.results = {}
+
+    def exec_create(self, container, cmd):
+        self.commands.append(cmd)
+        exec_id = str(len(self.commands))
+        self.results[exec_id] = self.backend.exec_cli(cmd)
+        return {"Id": exec_id}
+
+    def exec_start(self, exec_id):
+        return self.results[exec_id][0]
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": self.results[exec_id][1]}
+
+
+class FailingVaultServer(FakeVaultServer):
+    """Fake Vault HTTP API returning server error for selected paths (all except health if omitted)."""
+
+    def __init__(self, vault, paths=()):
+        super().__init__(vault)
+        self.paths = paths
+
+    def handle(self, req, method, path, query, body):
+        if path != "/v1/sys/health" and (not self.paths or path in self.paths):
+            return req.send_json(500, {"errors": ["internal error"]})
+        super().handle(req, method, path, query, body)
+
+
+class ConflictConsulServer(FakeConsulServer):
+    """Fake Consul HTTP API rolling back every transaction."""
+
+    def handle(self, req, method, path, query, body):
+        if path == "/v1/txn":
+            return req.send_json(409, {"Results": None, "Errors": [{"OpIndex": 0, "What": "index mismatch"}]})
+        super().handle(req, method, path, query, body)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.port}"
+
+
+@pytest.fixture
+def vault():
+    return FakeVault()
+
+
+@pytest.fixture
+def vault_server(vault):
+    with FakeVaultServer(vault) as server:
+        yield server
+
+
+@pytest.fixture
+def consul():
+    return FakeConsul()
+
+
+@pytest.fixture
+def consul_server(consul):
+    with FakeConsulServer(consul) as server:
+        yield server
+
+
+@pytest.fixture
+def short_waits(monkeypatch):
+    """Cap timeouts of waits so unreachable APIs are given up quickly."""
+    def capped(condition, label, timeout=30.0, **kwargs):
+        return wait_for(condition, label, timeout=min(timeout, 0.5), **kwargs)
+
+    monkeypatch.setattr(app, "wait_for", capped)
+
+
+def make_secret(vault, api):
+    return Secret(StubDocker(vault), api, StatusSnapshot([]))
+
+
+def test_vault_api_init_and_unseal(vault_server):
+    api = VaultAPI(url(vault_server))
+
+    assert api.available()
+    assert api.seal_status()["initialized"] is False
+
+    data = api.init()
+    assert data["root_token"] == "fake-root-token"
+
+    assert api.unseal(data["keys_base64"][0])["sealed"] is False
+
+
+def test_vault_api_token_valid(vault_server):
+    api = VaultAPI(url(vault_server))
+
+    api.token = "wrong-token"
+    assert api.token_valid() is False
+
+    api.token = "fake-root-token"
+    assert api.token_valid() is True
+
+
+def test_vault_api_error_status(vault, vault_server):
+    api = VaultAPI(url(vault_server))
+
+    with pytest.raises(APIError, match="returned 404"):
+        api.read("secret/missing")
+
+    with FailingVaultServer(vault) as server:
+        with pytest.raises(APIError, match="returned 500"):
+            VaultAPI(url(server)).policies()
+
+
+def test_vault_api_unreachable():
+    api = VaultAPI(f"http://127.0.0.1:{closed_port()}", timeout=1.0)
+
+    assert not api.available()
+    with pytest.raises(APIError, match="failed"):
+        api.seal_status()
+
+
+def test_consul_api_kv(consul, consul_server):
+    api = ConsulAPI(url(consul_server))
+    consul.kv["gluu/config/hostname"] = "demoexample.gluu.org"
+
+    assert api.kv_get("gluu/config/hostname") == "demoexample.gluu.org"
+    assert api.kv_get("gluu/config/missing") is None
+
+    ops = [{"KV": {"Verb": "set", "Key": "gluu/config/city", "Value": "QXVzdGlu"}}]
+    assert api.txn(ops) == [{"KV": {"Key": "gluu/config/city"}}]
+    assert consul.kv["gluu/config/city"] == "Austin"
+
+
+def test_consul_api_txn_rolled_back(consul):
+    ops = [{"KV": {"Verb": "cas", "Key": "gluu/config/city", "Value": "QXVzdGlu", "Index": 1}}]
+
+    with ConflictConsulServer(consul) as server:
+        with pytest.raises(APIError, match="rolled back; reason=index mismatch"):
+            ConsulAPI(url(server)).txn(ops)
+    assert consul.kv == {}
+
+
+def test_consul_api_catalog(consul_server):
+    api = ConsulAPI(url(consul_server))
+    entry = {"ServiceID": "oxauth-1", "ServiceName": "oxauth", "ServiceAddress": "10.0.0.2", "ServicePort": 8080}
+
+    api.register_service(entry)
+    assert [e["ServiceID"] for e in api.catalog_service("oxauth")] == ["oxauth-1"]
+
+    api.deregister_service("oxauth-1")
+    assert api.catalog_service("oxauth") == []
+
+
+def test_secret_setup_api(workdir, vault, vault_server):
+    (workdir / Secret.POLICY_FILE).write_text('path "secret/gluu/*" {}')
+    secret = make_secret(vault, VaultAPI(url(vault_server)))
+
+    secret.setup()
+
+    assert secret.api is not None
+    assert secret.container.docker.commands == []
+    assert "Initial Root Token: fake-root-token" in (workdir / "vault_key_token.txt").read_text()
+    assert vault.initialized and not vault.sealed
+    assert "gluu" in vault.policies
+    assert "approle/" in vault.auth
+    assert (workdir / "vault_role_id.txt").read_text() == "fake-role-id"
+    assert (workdir / "vault_secret_id.txt").read_text() == "fake-secret-id"
+
+
+def test_secret_setup_api_error_fallback(workdir, vault, capsys):
+    with FailingVaultServer(vault) as server:
+        secret = make_secret(vault, VaultAPI(url(server)))
+        secret.setup()
+
+    assert secret.api is None
+    assert "[W] Unable to use Vault HTTP API; falling back to Vault CLI" in capsys.readouterr().out
+    commands = secret.container.docker.commands
+    assert commands[0] == "vault status -format yaml"
+    assert "vault policy write gluu /vault/config/policy.hcl" in commands
+    assert vault.initialized and not vault.sealed
+    assert (workdir / "vault_role_id.txt").read_text() == "fake-role-id"
+
+
+def test_secret_token_error_fallback(workdir, vault):
+    vault.init()
+    vault.unseal(vault.unseal_key)
+    (workdir / "vault_key_token.txt").write_text("Unseal Key 1: fake-unseal-key\n\nInitial Root Token: fake-root-token\n")
+
+    with FailingVaultServer(vault, paths=("/v1/auth/token/lookup-self",)) as server:
+        secret = make_secret(vault, VaultAPI(url(server)))
+        with secret.login():
+            pass
+
+    # CLI is logged in with the same token once the API is given up
+    assert secret.api is None
+    assert secret.container.docker.commands == ["vault login fake-root-token"] * 2
+
+
+def test_secret_setup_unreachable_fallback(workdir, vault, short_waits, capsys):
+    secret = make_secret(vault, VaultAPI(f"http://127.0.0.1:{closed_port()}", timeout=0.1))
+
+    secret.setup()
+
+    assert secret.api is None
+    assert "[W] Vault HTTP API is unreachable; falling back to Vault CLI" in capsys.readouterr().out
+    assert vault.initialized and not vault.sealed
+    assert "approle/" in vault.auth
+
+
+def test_config_hostname_from_backend(consul, consul_server):
+    consul.kv["gluu/config/hostname"] = "demoexample.gluu.org\n"
+    config = Config(StubDocker(consul), ConsulAPI(url(consul_server)), StatusSnapshot([]))
+
+    assert config.hostname_from_backend() == "demoexample.gluu.org"
+    assert config.container.docker.commands == []
+
+
+def test_config_hostname_missing(consul_server, consul):
+    config = Config(StubDocker(consul), ConsulAPI(url(consul_server)), StatusSnapshot([]))
+
+    assert config.hostname_from_backend() == ""
+
+
+def test_config_hostname_fallback(consul):
+    consul.kv["gluu/config/hostname"] = "demoexample.gluu.org"
+    api = ConsulAPI(f"http://127.0.0.1:{closed_port()}", timeout=0.1)
+    config = Config(StubDocker(consul), api, StatusSnapshot([]))
+
+    assert config.hostname_from_backend() == "demoexample.gluu.org"
+    assert config.container.docker.commands == ["consul kv get -http-addr=http://consul:8500 gluu/config/hostname"]
+
+
+def test_config_hostname_from_file(workdir):
+    config = Config(StubDocker(FakeConsul()), snapshot=StatusSnapshot([]))
+    (workdir / "generate.json").write_text('{"_config": {"hostname": "demoexample.gluu.org"}}')
+
+    assert config.hostname_from_file("generate.json") == "demoexample.gluu.org"
+    assert config.hostname_from_file("missing.json") == ""
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+from pygluu.compose.backup import Repository
+
+
+@pytest.fixture
+def stack():
+    with fake_stack({"health": 0.0}) as servers:
+        with workdir():
+            with quiet():
+                App().up()
+            yield servers
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def containers(docker, service):
+    return [
+        c for c in docker.containers.values()
+        if c["Config"]["Labels"].get("com.docker.compose.service") == service
+    ]
+
+
+def test_backup_opendj_password_file(stack):
+    docker = stack["docker"]
+    os.makedirs("volumes/opendj/db/userRoot")
+
+    with quiet():
+        App().backup()
+
+    commands = [" ".join(e["cmd"]) if isinstance(e["cmd"], list) else e["cmd"] for e in docker.execs.values()]
+    backups = [cmd for cmd in commands if "/opt/opendj/bin/backup" in cmd]
+    assert len(backups) == 1
+    assert "--bindPasswordFile /tmp/.pygluu-" in backups[0]
+    assert not any("Secret1234%" in cmd for cmd in commands)
+
+    # the password file is removed once the backup is done
+    assert docker.calls["PUT /containers/{id}/archive"] == 1
+    assert containers(docker, "ldap")[0]["_files"] == {}
+
+
+def test_backup_consul_snapshot(stack):
+    docker = stack["docker"]
+    docker.consul.kv["gluu/config/hostname"] = "demoexample.gluu.org"
+    write("volumes/consul/raft/raft.db", "live")
+
+    with quiet():
+        App().backup()
+
+    manifest = Repository("backups").load()
+    paths = {entry["path"] for entry in manifest["entries"]}
+    assert "volumes/consul/backup/consul.snap" in paths
+    assert "volumes/consul/raft/raft.db" not in paths
+    assert manifest["consul_snapshot"] == "/consul/data/backup/consul.snap"
+
+    with quiet():
+        App().down()
+    docker.consul.kv.clear()
+
+    with quiet():
+        App().restore()
+
+    assert docker.consul.kv == {"gluu/config/hostname": "demoexample.gluu.org"}
+    # live data of Consul is left as-is, and Consul is stopped after the restore
+    assert open("volumes/consul/raft/raft.db").read() == "live"
+    assert not any(c["State"]["Running"] for c in containers(docker, "consul"))
+
+
+def test_restore_removes_extra_files(workdir):
+    write("volumes/ldap/keep.txt", "keep")
+    write("volumes/consul/raft/raft.db", "live")
+    repository = Repository("backups")
+    snapshot_id = repository.backup("volumes", exclude=["volumes/consul/raft"]).snapshot
+
+    write("volumes/ldap/new/extra.txt", "extra")
+    write("volumes/ldap/keep.txt", "changed")
+
+    result = repository.restore(snapshot_id)
+
+    assert (result.changed, result.removed) == (1, 1)
+    assert not os.path.exists("volumes/ldap/new")
+    assert open("volumes/ldap/keep.txt").read() == "keep"
+    # excluded paths are left as-is
+    assert open("volumes/consul/raft/raft.db").read() == "live"
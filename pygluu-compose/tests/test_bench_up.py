@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from bench_up import DEFAULT_BASELINE
+from bench_up import PHASES
+from bench_up import compare
+from bench_up import load_baseline
+from bench_up import run_phases
+from fakedocker import DEFAULT_LATENCIES
+
+
+def test_baseline_recorded_with_default_latencies():
+    baseline = load_baseline(DEFAULT_BASELINE, DEFAULT_LATENCIES)
+
+    assert list(baseline) == list(PHASES)
+
+
+def test_baseline_latencies_mismatch(tmp_path):
+    path = tmp_path / "bench_up.json"
+    path.write_text(json.dumps({"latencies": dict(DEFAULT_LATENCIES, health=2.0), "phases": {}}))
+
+    with pytest.raises(ValueError, match="recorded with latencies"):
+        load_baseline(path, DEFAULT_LATENCIES)
+
+
+def test_baseline_missing(tmp_path):
+    assert load_baseline(tmp_path / "bench_up.json", DEFAULT_LATENCIES) == {}
+
+
+def test_api_calls_within_baseline():
+    # wall time and memory depend on the machine, API calls do not
+    results = run_phases(DEFAULT_LATENCIES)
+
+    assert compare(results, load_baseline(DEFAULT_BASELINE, DEFAULT_LATENCIES), names=("calls",)) == []
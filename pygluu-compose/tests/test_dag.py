@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from pygluu.compose.dag import DAG
+
+
+def test_run_in_dependency_order():
+    order = []
+    dag = DAG()
+    dag.add("b", lambda: order.append("b") or "B", ["a"])
+    dag.add("a", lambda: order.append("a") or "A")
+    dag.add("c", lambda: order.append("c") or "C", ["a", "b"])
+
+    assert dag.run() == {"a": "A", "b": "B", "c": "C"}
+    assert order == ["a", "b", "c"]
+
+
+def test_run_concurrently():
+    # both tasks wait for each other, hence they only finish if run at the same time
+    barrier = threading.Barrier(2, timeout=5.0)
+    dag = DAG()
+    dag.add("x", barrier.wait)
+    dag.add("y", barrier.wait)
+
+    assert sorted(dag.run().values()) == [0, 1]
+
+
+def test_error_propagates():
+    dag = DAG()
+    dag.add("a", lambda: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        dag.run()
+
+
+def test_error_skips_dependents():
+    started = []
+
+    def slow():
+        time.sleep(0.1)
+        started.append("slow")
+
+    def fail():
+        raise RuntimeError("failed")
+
+    dag = DAG()
+    dag.add("fail", fail)
+    dag.add("slow", slow)
+    dag.add("child", lambda: started.append("child"), ["fail"])
+    dag.add("after-slow", lambda: started.append("after-slow"), ["slow"])
+
+    with pytest.raises(RuntimeError, match="failed"):
+        dag.run()
+
+    # running task is awaited, yet no new task is started after the failure
+    assert started == ["slow"]
+    assert set(dag.timings) == {"fail", "slow"}
+
+
+def test_duplicate_task():
+    dag = DAG()
+    dag.add("a", lambda: None)
+
+    with pytest.raises(ValueError, match="already defined"):
+        dag.add("a", lambda: None)
+
+
+def test_unknown_dependency():
+    dag = DAG()
+    dag.add("a", lambda: None, ["missing"])
+
+    with pytest.raises(ValueError, match="unknown task"):
+        dag.run()
+
+
+def test_cycle():
+    called = []
+    dag = DAG()
+    dag.add("root", lambda: called.append("root"))
+    dag.add("a", lambda: None, ["root", "b"])
+    dag.add("b", lambda: None, ["a"])
+
+    with pytest.raises(ValueError, match="Cyclic dependency between task.s. a, b"):
+        dag.run()
+    assert called == []
+
+
+def test_critical_path():
+    dag = DAG()
+    dag.add("fast", lambda: None)
+    dag.add("slow", lambda: time.sleep(0.1))
+    dag.add("end", lambda: None, ["fast", "slow"])
+    dag.add("side", lambda: None, ["fast"])
+
+    assert dag.critical_path() == []
+
+    dag.run()
+
+    assert dag.critical_path() == ["slow", "end"]
+    assert all(timing.started <= timing.finished for timing in dag.timings.values())
+
+
+def test_report(capsys):
+    dag = DAG()
+    dag.add("a", lambda: None)
+    dag.add("b", lambda: None, ["a"])
+    dag.run()
+    dag.report()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("[I] Critical path (")
+    assert [line.split()[0] for line in lines[1:]] == ["a", "b"]
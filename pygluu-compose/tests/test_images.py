@@ -0,0 +1,132 @@
+import io
+import json
+
+from docker.errors import ImageNotFound
+
+from pygluu.compose.images import ImageManifest
+from pygluu.compose.images import ImagePuller
+from pygluu.compose.images import PullProgress
+
+
+class StubClient:
+    def __init__(self, images=None, errors=None):
+        # mapping of image reference and its ID
+        self.images = dict(images or {})
+        self.errors = errors or {}
+        self.pulls = []
+
+    def inspect_image(self, ref):
+        if ref not in self.images:
+            raise ImageNotFound(f"No such image: {ref}")
+        return {"Id": self.images[ref], "RepoDigests": [f"{ref.split(':')[0]}@sha256:{self.images[ref]}"]}
+
+    def pull(self, repo, tag, stream, decode):
+        ref = f"{repo}:{tag}"
+        self.pulls.append(ref)
+        yield {"status": f"Pulling from {repo}", "id": tag}
+        yield {"status": "Downloading", "id": "layer", "progressDetail": {"current": 1024, "total": 2048}}
+        if ref in self.errors:
+            yield {"error": self.errors[ref]}
+            return
+        yield {"status": "Pull complete", "id": "layer"}
+        self.images[ref] = f"new-{tag}"
+
+
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_manifest_roundtrip(tmp_path):
+    manifest = ImageManifest(tmp_path / "state" / "images.json")
+    manifest.record("gluufederation/oxauth:4.5.5-1", {"Id": "sha256:abc"})
+    manifest.save()
+
+    assert ImageManifest(tmp_path / "state" / "images.json").get("gluufederation/oxauth:4.5.5-1") == "sha256:abc"
+    assert manifest.get("gluufederation/casa:4.5.5-1") == ""
+    assert not (tmp_path / "state" / "images.tmp").exists()
+
+
+def test_manifest_corrupted(tmp_path):
+    (tmp_path / "images.json").write_text("{not json")
+
+    assert ImageManifest(tmp_path / "images.json").images == {}
+
+
+def test_pull_skips_current(tmp_path):
+    manifest = ImageManifest(tmp_path / "images.json")
+    manifest.record("oxauth:1", {"Id": "old-1"})
+    manifest.record("oxtrust:1", {"Id": "stale"})
+    client = StubClient({"oxauth:1": "old-1", "oxtrust:1": "old-1"})
+    stream = io.StringIO()
+
+    pulled, skipped, failed = ImagePuller(client, manifest).pull(["oxauth:1", "oxtrust:1", "ldap:1", "ldap:1"], stream=stream)
+
+    # image replaced locally since last pull is pulled again
+    assert sorted(pulled) == ["ldap:1", "oxtrust:1"]
+    assert skipped == ["oxauth:1"]
+    assert failed == {}
+    assert sorted(client.pulls) == ["ldap:1", "oxtrust:1"]
+    assert json.loads((tmp_path / "images.json").read_text())["ldap:1"]["id"] == "new-1"
+    assert "[I] Pulled ldap:1" in stream.getvalue()
+
+
+def test_pull_force(tmp_path):
+    manifest = ImageManifest(tmp_path / "images.json")
+    manifest.record("oxauth:1", {"Id": "old-1"})
+    client = StubClient({"oxauth:1": "old-1"})
+
+    pulled, skipped, _ = ImagePuller(client, manifest).pull(["oxauth:1"], force=True, stream=io.StringIO())
+
+    assert (pulled, skipped) == (["oxauth:1"], [])
+    assert manifest.get("oxauth:1") == "new-1"
+
+
+def test_pull_error(tmp_path):
+    manifest = ImageManifest(tmp_path / "images.json")
+    client = StubClient(errors={"casa:1": "manifest unknown"})
+    stream = io.StringIO()
+
+    pulled, _, failed = ImagePuller(client, manifest).pull(["casa:1", "oxauth:1"], stream=stream)
+
+    assert pulled == ["oxauth:1"]
+    assert str(failed["casa:1"]) == "manifest unknown"
+    assert manifest.get("casa:1") == ""
+    # successful pulls are recorded regardless of failed ones
+    assert manifest.get("oxauth:1") == "new-1"
+    assert "[E] Unable to pull casa:1; reason=manifest unknown" in stream.getvalue()
+
+
+def test_nothing_to_pull(tmp_path):
+    manifest = ImageManifest(tmp_path / "images.json")
+    manifest.record("oxauth:1", {"Id": "old-1"})
+
+    assert ImagePuller(StubClient({"oxauth:1": "old-1"}), manifest).pull(["oxauth:1"]) == ([], ["oxauth:1"], {})
+    assert not (tmp_path / "images.json").exists()
+
+
+def test_progress_tty():
+    stream = TtyStream()
+    progress = PullProgress(2, stream)
+    progress.update("oxauth:1", {"status": "Pulling from oxauth", "id": "1"})
+    detail = {"current": 512 * 1024, "total": 2 * 1024 * 1024}
+    progress.update("oxauth:1", {"status": "Downloading", "id": "a", "progressDetail": detail})
+    progress.update("oxauth:1", {"status": "Already exists", "id": "b"})
+    progress.done("oxauth:1", "[I] Pulled oxauth:1")
+    progress.close()
+
+    output = stream.getvalue()
+    # tag events are not counted as layers
+    assert set(progress.layers) == {("oxauth:1", "a"), ("oxauth:1", "b")}
+    assert "\r\033[K[I] Pulled oxauth:1\n" in output
+    assert output.endswith("[I] Pulled 1/2 image(s); downloaded 0.5/2.0 MB\n")
+
+
+def test_progress_not_tty():
+    stream = io.StringIO()
+    progress = PullProgress(1, stream)
+    progress.update("oxauth:1", {"status": "Downloading", "id": "a", "progressDetail": {"current": 1, "total": 2}})
+    progress.done("oxauth:1", "[I] Pulled oxauth:1")
+    progress.close()
+
+    assert stream.getvalue() == "[I] Pulled oxauth:1\n"
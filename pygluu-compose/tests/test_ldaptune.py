@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+from pygluu.compose.ldaptune import UnindexedSearch
+from pygluu.compose.ldaptune import admin_args
+from pygluu.compose.ldaptune import backup_command
+from pygluu.compose.ldaptune import rebuild_command
+from pygluu.compose.ldaptune import summary
+
+
+@pytest.fixture
+def stack():
+    with fake_stack({"health": 0.0}) as servers:
+        with workdir():
+            with quiet():
+                App().up()
+            yield servers
+
+
+def test_admin_args_password_file():
+    args = admin_args("/tmp/.pw")
+
+    assert args[args.index("--bindPasswordFile") + 1] == "/tmp/.pw"
+    assert "--bindPassword" not in args
+    assert args[-1] == "--no-prompt"
+    assert "--no-prompt" not in admin_args("/tmp/.pw", prompt=False)
+
+
+def test_task_commands_without_prompt():
+    assert "--no-prompt" not in rebuild_command("userRoot", ["exp"], "/tmp/.pw")
+
+    cmd = backup_command("userRoot", "/opt/opendj/bak/userRoot", "/tmp/.pw", incremental=True)
+    assert "--bindPasswordFile /tmp/.pw" in cmd
+    assert "--incremental" in cmd
+    assert "--no-prompt" not in cmd
+
+
+def test_ldap_tune_password_file(stack):
+    docker = stack["docker"]
+    for backend in ("userRoot", "metric", "site"):
+        os.makedirs(f"volumes/opendj/db/{backend}")
+
+    with quiet():
+        App().ldap_tune()
+
+    commands = [" ".join(e["cmd"]) if isinstance(e["cmd"], list) else e["cmd"] for e in docker.execs.values()]
+    tools = [cmd for cmd in commands if "/opt/opendj/bin/" in cmd]
+    assert any("rebuild-index" in cmd for cmd in tools)
+    assert all("--bindPasswordFile /tmp/.pygluu-" in cmd for cmd in tools)
+    assert not any("Secret1234%" in cmd for cmd in commands)
+
+    # a single password file is shared by all tools, and removed afterwards
+    ldap = [c for c in docker.containers.values() if c["Config"]["Labels"].get("com.docker.compose.service") == "ldap"]
+    assert docker.calls["PUT /containers/{id}/archive"] == 1
+    assert ldap[0]["_files"] == {}
+
+
+def test_summary():
+    assert summary([], 12, 2) == ["[I] No unindexed searches found among 12 search(es) in 2 access log(s)"]
+
+    unindexed = [
+        UnindexedSearch("(&(objectClass=x)(description=?))", "o=gluu", 3, 900, 500, ("description",)),
+        UnindexedSearch("(mail=?)", "ou=people,o=gluu", 2, 40, 30, ("mail",)),
+    ]
+    lines = summary(unindexed, 12, 2, top=1)
+
+    assert lines[0] == "[W] Found 5 unindexed search(es) of 2 filter(s) among 12 search(es) in 2 access log(s)"
+    assert lines[2].split() == ["3", "900ms", "500ms", "o=gluu", "(&(objectClass=x)(description=?))"]
+    assert lines[3] == "[W] Attributes of unindexed searches outside the index catalogue: description"
+    assert len(lines) == 4
@@ -0,0 +1,99 @@
+import socket
+
+import pytest
+
+from bench_loadgen import WEIGHTS
+from bench_loadgen import check_histogram
+from bench_loadgen import check_load
+from fakedocker import FakeOxauthServer
+from pygluu.compose.loadgen import Histogram
+from pygluu.compose.loadgen import LoadGenerator
+from pygluu.compose.loadgen import Options
+from pygluu.compose.loadgen import schedule
+from pygluu.compose.loadgen import summary
+
+
+def generator(port, weights=WEIGHTS, options=Options("bench", "secret", ""), **kwargs):
+    kwargs = dict(dict(rate=100.0, duration=0.5, connections=4), **kwargs)
+    return LoadGenerator(f"http://127.0.0.1:{port}", "bench.gluu.org", weights, options, **kwargs)
+
+
+def test_schedule_interleaves_by_weight():
+    assert schedule({"discovery": 2, "jwks": 1}) == ["discovery", "jwks", "discovery"]
+    assert sorted(schedule(WEIGHTS)) == ["discovery"] * 2 + ["jwks", "token"]
+
+
+def test_histogram_accuracy():
+    assert check_histogram() == []
+
+
+def test_histogram_merge():
+    first, second = Histogram(), Histogram()
+    for value in range(1, 101):
+        (first if value % 2 else second).record(value * 1000)
+
+    first.merge(second)
+
+    assert (first.count, first.min, first.max) == (100, 1000, 100000)
+    assert first.percentile(50) == pytest.approx(50000, rel=0.01)
+    assert Histogram().percentile(99) == 0
+
+
+def test_load_against_oxauth():
+    report, failures = check_load(rate=200.0, duration=1.0, latency=0.01, connections=16, error_every=50)
+
+    assert failures == []
+    scenarios = report["scenarios"]
+    # requests of each scenario follow their weights
+    assert scenarios["discovery"]["requests"] == pytest.approx(2 * scenarios["jwks"]["requests"], abs=2)
+    assert scenarios["token"]["errors"].keys() <= {"HTTP 503"}
+
+
+def test_load_rejected_client():
+    with FakeOxauthServer() as server:
+        gen = generator(server.port, {"token": 1}, Options("bench", "wrong", "openid"))
+        gen.run()
+
+    report = gen.report()["scenarios"]["token"]
+    assert report["error_rate"] == 1.0
+    assert report["errors"] == {"HTTP 401": report["requests"]}
+    assert server.calls["POST /oxauth/restv1/token"] == report["requests"]
+
+
+def test_load_unreachable():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    gen = generator(port, {"discovery": 1}, duration=0.2)
+    gen.run()
+
+    report = gen.report()["total"]
+    assert report["requests"] == 20
+    assert report["errors"] == {"ConnectionRefusedError": 20}
+
+
+def test_load_counts_queueing():
+    # a single connection serves 20 requests/s at most, hence requests fall behind the schedule
+    with FakeOxauthServer(latency=0.05) as server:
+        gen = generator(server.port, {"jwks": 1}, rate=40.0, duration=0.5, connections=1)
+        gen.run()
+
+    latency = gen.report()["total"]["latency_ms"]
+    assert latency["min"] >= 50
+    assert latency["max"] >= 250
+
+
+def test_summary_warnings():
+    with FakeOxauthServer(error_every=2) as server:
+        gen = generator(server.port, {"jwks": 1}, duration=0.2)
+        gen.run()
+
+    report = gen.report()
+    lines = summary(report)
+    assert lines[0].split()[:2] == ["SCENARIO", "REQUESTS"]
+    assert [line.split()[0] for line in lines[1:3]] == ["jwks", "total"]
+    assert "[W] jwks: 10 requests failed with HTTP 503" in lines
+
+    report["total"]["throughput"] = report["target_rate"] / 2
+    assert summary(report)[-1].startswith("[W] Achieved 50.0 requests/s is below target rate of 100")
@@ -0,0 +1,45 @@
+import io
+
+from pygluu.compose.logs import LogMultiplexer
+from pygluu.compose.logs import parse_level
+from pygluu.compose.status import ContainerStatus
+
+
+class StubClient:
+    """Docker client streaming fixed log lines of each container."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def logs(self, container, **kwargs):
+        return iter([b"".join(f"2020-01-01T00:00:00Z {line}\n".encode() for line in self.lines[container])])
+
+
+def container(id_, service):
+    return ContainerStatus(id_, f"{service}_1", service, 1, "running", "", "Up")
+
+
+def test_parse_level_ignores_case():
+    assert parse_level("2020-01-01 12:00:00 ERROR [main] failed") == "ERROR"
+    assert parse_level("level=warn msg=retrying") == "WARN"
+    assert parse_level("[Info] started") == "INFO"
+    assert parse_level("started in 5s") == ""
+
+
+def test_level_filter_ignores_case():
+    client = StubClient({
+        "a": [
+            "level=info msg=started",
+            "level=error msg=failed",
+            "  at org.gluu.Main.run(Main.java:10)",
+            "level=debug msg=done",
+        ],
+    })
+    stream = io.StringIO()
+
+    LogMultiplexer(client, [container("a", "oxauth")], level="warn", stream=stream).run()
+
+    assert stream.getvalue().splitlines() == [
+        "oxauth_1 | level=error msg=failed",
+        "oxauth_1 |   at org.gluu.Main.run(Main.java:10)",
+    ]
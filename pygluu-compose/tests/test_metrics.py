@@ -0,0 +1,114 @@
+import re
+import threading
+import urllib.error
+import urllib.request
+
+import docker
+import pytest
+
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+from pygluu.compose.metrics import CONTENT_TYPE
+from pygluu.compose.metrics import Collector
+from pygluu.compose.metrics import MetricsServer
+
+# a sample line of text exposition format, i.e. ``name{label="value",...} value``
+SAMPLE_RGX = re.compile(r'^([a-z_]+)(?:\{((?:[a-z_]+="[^"]*",?)*)\})? (\S+)$')
+
+
+@pytest.fixture
+def collector():
+    with fake_stack({"health": 0.0}) as servers:
+        with workdir():
+            with quiet():
+                App().up()
+            collector = Collector(docker.APIClient(base_url=servers["docker"].base_url), "bench", window=3)
+            try:
+                yield collector
+            finally:
+                collector.close()
+
+
+def parse(text):
+    """Parse exposition format into types of families and values of samples keyed by name and labels."""
+    types, samples = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            types[name] = kind
+            continue
+        if line.startswith("#"):
+            continue
+        match = SAMPLE_RGX.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        assert name in types, f"{name} has no TYPE"
+        labels = tuple(sorted(re.findall(r'([a-z_]+)="([^"]*)"', labels or "")))
+        samples[(name, labels)] = float(value)
+    return types, samples
+
+
+def test_collector_render(collector):
+    for _ in range(4):
+        collector.sample()
+
+    types, samples = parse(collector.render())
+
+    assert types["gluu_container_restarts_total"] == "counter"
+    assert types["gluu_container_memory_utilization_ratio"] == "gauge"
+    assert samples[("gluu_exporter_sample_errors_total", ())] == 0
+
+    running = {
+        dict(labels)["container"]: value for (name, labels), value in samples.items()
+        if name == "gluu_container_running"
+    }
+    assert running and all(running.values())
+
+    # the fake daemon reports a quarter of memory limit as used
+    for (name, labels), value in samples.items():
+        if name == "gluu_container_memory_utilization_ratio":
+            assert value == pytest.approx(0.25), labels
+        if name == "gluu_service_samples":
+            # the ring of each service is capped by the window
+            assert value == 3, labels
+
+    ldap = ("gluu_service_memory_utilization_ratio_max", (("service", "ldap"),))
+    assert samples[ldap] == pytest.approx(0.25)
+
+
+def test_collector_stopped_container(collector):
+    client = collector.client
+    ldap = client.containers(filters={"label": "com.docker.compose.service=ldap"})[0]
+    client.stop(ldap["Id"])
+
+    collector.sample()
+    _, samples = parse(collector.render())
+
+    labels = (("container", ldap["Names"][0][1:]), ("service", "ldap"))
+    assert samples[("gluu_container_running", labels)] == 0
+    # stopped containers have no stats, hence no usage
+    assert samples[("gluu_container_memory_usage_bytes", labels)] == 0
+
+
+def test_metrics_server(collector):
+    collector.sample()
+    server = MetricsServer(collector, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}".format(server.server_address[1])
+    try:
+        with urllib.request.urlopen(f"{url}/metrics") as resp:
+            assert resp.headers["Content-Type"] == CONTENT_TYPE
+            body = resp.read().decode()
+
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(f"{url}/")
+        assert exc.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    _, samples = parse(body)
+    assert ("gluu_exporter_sample_errors_total", ()) in samples
+    assert body == collector.render()
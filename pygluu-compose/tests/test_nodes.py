@@ -0,0 +1,139 @@
+import pytest
+
+from fakedocker import FakeDocker
+from harness import SETTINGS
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+from pygluu.compose.nodes import Inventory
+from pygluu.compose.nodes import Node
+
+CONFIG = {
+    "version": "2.4",
+    "services": {
+        "consul": {"image": "consul", "ports": ["127.0.0.1:8500:8500"]},
+        "registrator": {"image": "registrator", "command": "-internal consul://consul:8500"},
+        "vault": {"image": "vault", "ports": ["127.0.0.1:8200:8200"], "depends_on": ["consul"]},
+        "ldap": {"image": "opendj"},
+        "oxauth": {"image": "oxauth", "depends_on": ["ldap"], "extra_hosts": ["demoexample.gluu.org:10.0.0.1"]},
+    },
+}
+
+
+def nodes(count=3, **services):
+    return [
+        Node(f"node{i}", f"tcp://10.0.0.{i}:2375", f"10.0.0.{i}", tuple(services.get(f"node{i}", ())))
+        for i in range(1, count + 1)
+    ]
+
+
+def inventory(count=3, **services):
+    return Inventory(nodes(count, **services))
+
+
+def test_consul_servers_and_clients():
+    rendered = inventory(4).render(CONFIG)
+
+    joins = "-retry-join=10.0.0.1 -retry-join=10.0.0.2 -retry-join=10.0.0.3"
+    for i in (1, 2, 3):
+        consul = rendered[f"node{i}"]["services"]["consul"]
+        assert consul["command"] == f"agent -server -bootstrap-expect=3 -ui -advertise=10.0.0.{i} {joins}"
+        assert consul["hostname"] == f"consul-{i}"
+        assert f"10.0.0.{i}:8300:8300" in consul["ports"]
+
+    client = rendered["node4"]["services"]["consul"]
+    assert client["command"] == f"agent -advertise=10.0.0.4 {joins}"
+    assert client["hostname"] == "consul-4"
+
+
+def test_render_placement():
+    rendered = inventory(3, node2=["oxauth"]).render(CONFIG)
+
+    assert sorted(rendered["node1"]["services"]) == ["consul", "ldap", "registrator", "vault"]
+    assert sorted(rendered["node2"]["services"]) == ["consul", "oxauth", "registrator"]
+
+    oxauth = rendered["node2"]["services"]["oxauth"]
+    # dependency on another node is resolved by hostname instead
+    assert "depends_on" not in oxauth
+    assert "ldap:10.0.0.1" in oxauth["extra_hosts"]
+    assert "demoexample.gluu.org:10.0.0.1" in oxauth["extra_hosts"]
+    assert oxauth["ports"] == ["10.0.0.2::8080"]
+
+    assert rendered["node1"]["services"]["vault"]["ports"] == ["10.0.0.1:8200:8200", "10.0.0.1:8201:8201"]
+    assert rendered["node2"]["services"]["registrator"]["command"] == "-ip 10.0.0.2 consul://consul:8500"
+
+
+def test_render_port_conflict():
+    config = dict(CONFIG, services=dict(CONFIG["services"], redis={"image": "redis", "ports": ["1636:6379"]}))
+
+    with pytest.raises(ValueError, match="Services ldap and redis on node node1 both publish port 1636/tcp"):
+        inventory(3).render(config)
+
+    # no conflict once the services are assigned to different nodes
+    rendered = inventory(3, node3=["redis"]).render(config)
+    assert "10.0.0.3:6379:6379" in rendered["node3"]["services"]["redis"]["ports"]
+
+
+@pytest.mark.parametrize("members, error", [
+    (nodes(2), "at least 3 nodes"),
+    (nodes(3, node1=["ldap"], node2=["ldap"]), "assigned to both node node1 and node2"),
+    (nodes(3, node2=["consul"]), "runs on every node"),
+    (nodes(2) + [Node("node3", "tcp://10.0.0.3:2375", "node3", ())], "invalid address"),
+])
+def test_inventory_invalid(members, error):
+    with pytest.raises(ValueError, match=error):
+        Inventory(members)
+
+
+@pytest.fixture
+def cluster():
+    """Run fake stack (whose daemon is the first node) and daemons of two more nodes."""
+    with fake_stack({"health": 0.0}) as servers:
+        dockers = [servers["docker"], FakeDocker({"health": 0.0}).start(), FakeDocker({"health": 0.0}).start()]
+        nodes = {
+            f"node{i}": {"docker_host": docker.base_url, "address": "127.0.0.1", "services": services}
+            for i, (docker, services) in enumerate(zip(dockers, [[], ["oxauth"], ["oxtrust"]]), 1)
+        }
+        try:
+            with workdir(SETTINGS + f"NODES = {nodes!r}\n"):
+                yield dockers
+        finally:
+            for docker in dockers[1:]:
+                docker.stop()
+
+
+def service(container):
+    return container["Config"]["Labels"]["com.docker.compose.service"]
+
+
+def names(docker):
+    return sorted(service(c) for c in docker.containers.values())
+
+
+def test_nodes_up_ps_logs(cluster):
+    node1, node2, node3 = cluster
+
+    with quiet():
+        App().up()
+
+    assert names(node2) == ["consul", "oxauth", "registrator"]
+    assert names(node3) == ["consul", "oxtrust", "registrator"]
+    assert {"consul", "ldap", "nginx", "registrator", "vault"} <= set(names(node1))
+    assert "oxauth" not in names(node1)
+
+    oxauth_ids = [c["Id"] for c in node2.containers.values() if service(c) == "oxauth"]
+    assert App().ps("oxauth").split() == oxauth_ids
+    assert sorted(App().ps("consul").split()) == sorted(
+        c["Id"] for docker in cluster for c in docker.containers.values() if service(c) == "consul"
+    )
+
+    before = [docker.calls["GET /containers/{id}/logs"] for docker in cluster]
+    with quiet():
+        App().logs(False, "all")
+    after = [docker.calls["GET /containers/{id}/logs"] for docker in cluster]
+    assert [a - b for a, b in zip(after, before)] == [len(docker.containers) for docker in cluster]
+
+    with quiet():
+        App().down()
+    assert [docker.containers for docker in cluster] == [{}, {}, {}]
@@ -0,0 +1,56 @@
+import socket
+import time
+
+from fakedocker import FakeDocker
+from pygluu.compose.preflight import CheckResult
+from pygluu.compose.preflight import Probes
+from pygluu.compose.preflight import check_docker
+from pygluu.compose.preflight import run_checks
+
+
+def test_check_docker():
+    docker = FakeDocker().start()
+    try:
+        result = check_docker({"DOCKER_HOST": docker.base_url})
+    finally:
+        docker.stop()
+
+    assert result.ok, result.message
+    assert result.message.startswith("Docker ")
+
+
+def test_check_docker_unresponsive():
+    # the daemon accepts connections (via backlog) yet never responds
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(8)
+        started = time.monotonic()
+        result = check_docker({"DOCKER_HOST": "tcp://127.0.0.1:{}".format(sock.getsockname()[1])}, timeout=0.2)
+        elapsed = time.monotonic() - started
+
+    assert not result.ok and result.fatal
+    assert result.message.startswith("Unable to reach Docker daemon")
+    assert elapsed < 2.0
+
+
+def test_probes_run_concurrently():
+    def slow(name):
+        time.sleep(0.2)
+        return CheckResult(name, True, name, False)
+
+    probes = Probes()
+    started = time.monotonic()
+    detected = probes.detect_ip()
+    for name in ("a", "b", "c"):
+        probes.check(slow, name)
+
+    assert [result.name for result in probes.results()] == ["a", "b", "c"]
+    assert time.monotonic() - started < 0.5
+    assert isinstance(detected.result(), str)
+
+
+def test_run_checks_keeps_order():
+    checks = [lambda name=name: CheckResult(name, True, "", False) for name in ("x", "y")]
+
+    assert [result.name for result in run_checks(checks)] == ["x", "y"]
+    assert run_checks([]) == []
@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+from pygluu.compose.profiler import Profiler
+
+
+def test_disabled_is_noop():
+    profiler = Profiler()
+    with profiler.span("vault unseal", "vault"):
+        pass
+    profiler.add("pull", "image", 0.0, 1.0)
+
+    assert profiler.spans == []
+    assert profiler.trace()["traceEvents"] == []
+
+
+def test_span():
+    profiler = Profiler()
+    profiler.enable()
+    with profiler.span("vault unseal", "vault", attempt=1):
+        pass
+
+    span, = profiler.spans
+    assert (span.name, span.category, span.args) == ("vault unseal", "vault", {"attempt": 1})
+    assert span.started <= span.finished
+    assert span.thread == threading.get_ident()
+
+
+def test_span_records_error():
+    profiler = Profiler()
+    profiler.enable()
+
+    with pytest.raises(KeyError):
+        with profiler.span("lookup"):
+            raise KeyError("missing")
+
+    assert profiler.spans[0].args == {"error": "KeyError"}
+
+
+def test_enable_resets_spans():
+    profiler = Profiler()
+    profiler.enable()
+    profiler.add("a", "app", 0.0, 1.0)
+    profiler.enable()
+
+    assert profiler.spans == []
+
+
+def test_trace(tmp_path):
+    profiler = Profiler()
+    profiler.enable()
+    origin = profiler.started_at
+    profiler.add("b", "http", origin + 0.5, origin + 0.75, {"status": 200})
+    profiler.add("a", "app", origin + 0.25, origin + 1.0)
+
+    worker = threading.Thread(target=profiler.add, args=("c", "exec", origin + 1.0, origin + 1.5))
+    worker.start()
+    worker.join()
+
+    path = tmp_path / "trace.json"
+    profiler.write_trace(path)
+    trace = json.loads(path.read_text())
+
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == ["a", "b", "c"]
+    assert (events[0]["ts"], events[0]["dur"]) == (250000.0, 750000.0)
+    assert events[1]["args"] == {"status": 200}
+    assert all(event["ph"] == "X" for event in events)
+    # threads are numbered by first appearance
+    assert [event["tid"] for event in events] == [1, 1, 2]
+
+
+def test_summary_and_report(capsys):
+    profiler = Profiler()
+    profiler.enable()
+    profiler.add("pull", "image", 0.0, 1.0)
+    profiler.add("pull", "image", 0.0, 3.0)
+    profiler.add("unseal", "vault", 0.0, 2.0)
+
+    assert profiler.summary() == [("image", "pull", 2, 4.0, 3.0), ("vault", "unseal", 1, 2.0, 2.0)]
+
+    profiler.report(limit=1)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "[I] Profile summary (top 1 of 2 spans by total time):"
+    assert lines[2].split() == ["image", "pull", "2", "4.000s", "2.000s", "3.000s"]
+    assert len(lines) == 3
+
+
+def test_report_without_spans(capsys):
+    Profiler().report()
+
+    assert capsys.readouterr().out == ""
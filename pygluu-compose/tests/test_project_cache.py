@@ -0,0 +1,162 @@
+import os
+import pickle
+import stat
+
+import pytest
+from compose.config import config as compose_config
+from compose.config.environment import Environment
+from compose.config.types import MountSpec
+
+from pygluu.compose.app import App
+from pygluu.compose.app import STATE_DIR
+
+COMPOSE_FILE = """
+version: "2.4"
+services:
+  oxauth:
+    image: "gluufederation/oxauth:${OXAUTH_TAG:-latest}"
+    environment:
+      GLUU_CONFIG_CONSUL_HOST: $CONSUL_HOST
+"""
+
+FULL_COMPOSE_FILE = """
+version: "3.7"
+services:
+  oxauth:
+    image: gluufederation/oxauth:4.5.0
+    ports:
+      - "127.0.0.1:8080:8080"
+      - target: 8443
+        published: 8443
+    volumes:
+      - ./volumes/oxauth:/opt/gluu/jetty/oxauth/logs:rw
+      - type: tmpfs
+        target: /tmp
+        tmpfs:
+          size: 1000
+    secrets:
+      - source: ldap_pw
+        target: /etc/gluu/conf/ldap_pw
+    security_opt:
+      - no-new-privileges
+  ldap:
+    image: gluufederation/opendj:4.5.0
+    volumes_from:
+      - oxauth:ro
+    links:
+      - oxauth:auth.local
+secrets:
+  ldap_pw:
+    file: ./secret.txt
+"""
+
+
+@pytest.fixture
+def loads(workdir, monkeypatch):
+    """Count loads of Compose files (i.e. cache misses)."""
+    (workdir / "docker-compose.yml").write_text(COMPOSE_FILE)
+    calls = []
+    load = compose_config.load
+
+    def counting_load(*args, **kwargs):
+        calls.append(args)
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(compose_config, "load", counting_load)
+    return calls
+
+
+def normalized(config):
+    """Replace mount specs (which can't be compared) by their attributes."""
+    services = [
+        dict(svc, volumes=[vars(v) if isinstance(v, MountSpec) else v for v in svc.get("volumes", [])])
+        for svc in config.services
+    ]
+    return config._replace(services=services)
+
+
+def load_config(env):
+    _, config = App().load_config("docker-compose.yml", Environment(env))
+    return config
+
+
+def test_load_config_cached(loads):
+    env = {"OXAUTH_TAG": "4.5.0", "CONSUL_HOST": "consul"}
+
+    first = load_config(env)
+    second = load_config(env)
+
+    assert len(loads) == 1
+    assert first == second
+    assert second.services[0]["image"] == "gluufederation/oxauth:4.5.0"
+
+
+def test_load_config_referenced_variable_changed(loads):
+    load_config({"OXAUTH_TAG": "4.5.0", "CONSUL_HOST": "consul"})
+    config = load_config({"OXAUTH_TAG": "4.5.0", "CONSUL_HOST": "consul-1"})
+
+    assert len(loads) == 2
+    assert config.services[0]["environment"]["GLUU_CONFIG_CONSUL_HOST"] == "consul-1"
+
+
+def test_load_config_unreferenced_variable_changed(loads):
+    load_config({"OXAUTH_TAG": "4.5.0", "CONSUL_HOST": "consul"})
+    load_config({"OXAUTH_TAG": "4.5.0", "CONSUL_HOST": "consul", "UNUSED": "1"})
+
+    assert len(loads) == 1
+
+
+def test_load_config_file_changed(workdir, loads):
+    load_config({"CONSUL_HOST": "consul"})
+    (workdir / "docker-compose.yml").write_text(COMPOSE_FILE.replace("oxauth:$", "oxauth-fips:$"))
+    config = load_config({"CONSUL_HOST": "consul"})
+
+    assert len(loads) == 2
+    assert config.services[0]["image"] == "gluufederation/oxauth-fips:latest"
+
+
+def test_load_config_cache_private(workdir, loads):
+    load_config({"CONSUL_HOST": "consul"})
+
+    mode = os.stat(workdir / STATE_DIR / "compose-config.json").st_mode
+    assert stat.S_IMODE(mode) == 0o600
+
+
+def test_load_config_rebuilds_config_objects(workdir, loads):
+    (workdir / "docker-compose.yml").write_text(FULL_COMPOSE_FILE)
+    (workdir / "secret.txt").write_text("secret")
+
+    first = load_config({})
+    second = load_config({})
+
+    assert len(loads) == 1
+    assert normalized(first) == normalized(second)
+    assert type(second.services[0]["volumes"][1]) is MountSpec
+
+
+def test_load_config_untrusted_cache(workdir, loads):
+    env = {"CONSUL_HOST": "consul"}
+    load_config(env)
+    cache_file = workdir / STATE_DIR / "compose-config.json"
+    key = cache_file.read_text().partition("\n")[0]
+
+    # neither pickle nor unknown types are loaded; the config is parsed again instead
+    for payload in (pickle.dumps(os.getcwd), '{"__type__": "Popen", "value": ["id"]}'):
+        if isinstance(payload, bytes):
+            cache_file.write_bytes(key.encode() + b"\n" + payload)
+        else:
+            cache_file.write_text(f"{key}\n{payload}")
+        config = load_config(env)
+        assert config.services[0]["image"] == "gluufederation/oxauth:latest"
+
+    assert len(loads) == 3
+
+
+def test_load_config_removes_pickled_cache(workdir, loads):
+    legacy = workdir / STATE_DIR / "compose-config.cache"
+    legacy.parent.mkdir()
+    legacy.write_bytes(pickle.dumps({"key": "", "config": None}))
+
+    load_config({"CONSUL_HOST": "consul"})
+
+    assert not legacy.exists()
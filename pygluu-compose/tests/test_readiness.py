@@ -0,0 +1,143 @@
+from types import SimpleNamespace
+
+import pytest
+
+from pygluu.compose.app import ReadinessWatcher
+from pygluu.compose.status import StatusSnapshot
+
+
+class StubStream:
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def close(self):
+        self.closed = True
+
+
+class StubProject:
+    name = "bench"
+
+    def __init__(self, events=(), healthchecks=(), error=None):
+        self.stream = StubStream(list(events))
+        self.error = error
+        self.healthchecks = healthchecks
+        self.client = SimpleNamespace(events=self.events)
+
+    def events(self, filters, decode):
+        assert filters["label"] == "com.docker.compose.project=bench"
+        if self.error:
+            raise self.error
+        return self.stream
+
+    def get_service(self, name):
+        healthcheck = {"test": ["CMD", "true"]} if name in self.healthchecks else {}
+        return SimpleNamespace(options={"healthcheck": healthcheck})
+
+
+def event(service, status):
+    return {"status": status, "Actor": {"Attributes": {"com.docker.compose.service": service}}}
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    """Running containers (as service and health pairs) reported by resync."""
+    running = []
+
+    def fetch(client, project_name, health=False):
+        assert health
+        return SimpleNamespace(
+            running=lambda service: [SimpleNamespace(health=h) for s, h in running if s == service],
+        )
+
+    monkeypatch.setattr(StatusSnapshot, "fetch", staticmethod(fetch))
+    return running
+
+
+def test_ready_from_events(snapshot):
+    project = StubProject(
+        [
+            event("ldap", "start"),
+            event("consul", "start"),
+            event("unknown", "start"),
+            event("ldap", "health_status: healthy"),
+        ],
+        healthchecks=["ldap"],
+    )
+    watcher = ReadinessWatcher(project, ["consul", "ldap"])
+
+    assert watcher.wait(5.0)
+    assert set(watcher.ready) == {"consul", "ldap"}
+    assert watcher.pending == []
+    assert project.stream.closed
+
+
+def test_unhealthy_start_is_not_ready(snapshot):
+    project = StubProject([event("ldap", "start")], healthchecks=["ldap"])
+    watcher = ReadinessWatcher(project, ["ldap"])
+
+    assert not watcher.wait(0.2)
+    assert watcher.pending == ["ldap"]
+
+
+def test_resync_without_events(snapshot, capsys):
+    project = StubProject(healthchecks=["ldap"], error=ConnectionError("refused"))
+    snapshot.extend([("consul", ""), ("ldap", "starting")])
+    watcher = ReadinessWatcher(project, ["consul", "ldap"])
+    watcher.RESYNC_INTERVAL = 0.05
+
+    assert not watcher.wait(0.2)
+    assert list(watcher.ready) == ["consul"]
+
+    snapshot.append(("ldap", "healthy"))
+    assert watcher.wait(1.0)
+    assert "Unable to watch Docker events; reason=refused" in capsys.readouterr().out
+
+
+def test_probe_backoff(snapshot, monkeypatch):
+    results = [False, False, False, True]
+    project = StubProject()
+    watcher = ReadinessWatcher(project, ["oxauth"], probes={"oxauth": "https://localhost", "casa": "https://casa"})
+    monkeypatch.setattr(watcher, "_probe", lambda url: results.pop(0))
+
+    # probes of unwatched services are dropped
+    assert list(watcher.probes) == ["oxauth"]
+
+    delays = []
+    for _ in range(3):
+        watcher._probe_at["oxauth"] = 0.0
+        watcher._run_probes()
+        delays.append(watcher._probe_delay["oxauth"])
+    assert delays == [0.5, 1.0, 2.0]
+
+    # container (re)start resets the backoff
+    watcher._rewind_probe("oxauth")
+    assert (watcher._probe_delay["oxauth"], watcher._probe_at["oxauth"]) == (watcher.PROBE_MIN_DELAY, 0.0)
+
+    watcher._run_probes()
+    assert "oxauth" in watcher.ready
+
+
+def test_probe_backoff_is_capped(snapshot, monkeypatch):
+    watcher = ReadinessWatcher(StubProject(), ["oxauth"], probes={"oxauth": "https://localhost"})
+    monkeypatch.setattr(watcher, "_probe", lambda url: False)
+
+    for _ in range(10):
+        watcher._probe_at["oxauth"] = 0.0
+        watcher._run_probes()
+
+    assert watcher._probe_delay["oxauth"] == watcher.PROBE_MAX_DELAY
+
+
+def test_report(capsys):
+    watcher = ReadinessWatcher(StubProject(), ["consul", "ldap", "oxauth"], started_at=0.0)
+    watcher.ready = {"ldap": 12.0, "consul": 3.0}
+    watcher.report()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[1:3]] == ["consul", "ldap"]
+    assert lines[3] == "[I] Slowest service is ldap (12.0s)"
+    assert lines[4] == "[W] Services not ready yet: oxauth"
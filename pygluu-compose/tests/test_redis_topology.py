@@ -0,0 +1,93 @@
+import pytest
+
+from pygluu.compose.redis_topology import RedisTopology
+from pygluu.compose.redis_topology import is_redis_node
+
+BASE = {
+    "image": "redis:5.0.6-alpine",
+    "container_name": "redis",
+    "hostname": "redis",
+    "command": "redis-server",
+    "networks": {"cloud_bridge": {}},
+}
+
+
+def test_is_redis_node():
+    assert is_redis_node("redis-1")
+    assert is_redis_node("redis-sentinel-12")
+    assert not is_redis_node("redis")
+    assert not is_redis_node("redis-sentinel")
+    assert not is_redis_node("oxauth-1")
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"mode": "STANDALONE"}, "Unsupported Redis type STANDALONE"),
+    ({"mode": "CLUSTER", "nodes": 5, "replicas": 1}, "requires at least 6 nodes"),
+    ({"mode": "SENTINEL", "sentinels": 0}, "requires at least 1 node and 1 sentinel"),
+])
+def test_invalid(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        RedisTopology(**kwargs)
+
+
+def test_from_settings():
+    assert RedisTopology.from_settings({"SVC_REDIS": True, "REDIS_TYPE": "STANDALONE"}) is None
+    assert RedisTopology.from_settings({"SVC_REDIS": False, "REDIS_TYPE": "CLUSTER"}) is None
+
+    topology = RedisTopology.from_settings({
+        "SVC_REDIS": True,
+        "REDIS_TYPE": "sentinel",
+        "REDIS_NODES": "2",
+        "REDIS_SENTINELS": 5,
+        "REDIS_SENTINEL_GROUP": "",
+    })
+    assert (topology.mode, topology.nodes, topology.sentinels, topology.group) == ("SENTINEL", 2, 5, "gluu")
+
+
+def test_cluster():
+    topology = RedisTopology("CLUSTER", nodes=6, replicas=1)
+
+    assert topology.sentinel_names == []
+    assert topology.connection_settings()["REDIS_URL"] == ",".join(f"redis-{i}:6379" for i in range(1, 7))
+
+    services = topology.definitions(BASE)["services"]
+    assert list(services) == topology.node_names
+    for definition in services.values():
+        assert "--cluster-enabled yes" in definition["command"][2]
+        assert "--replicaof" not in definition["command"][2]
+        assert not {"container_name", "hostname"} & set(definition)
+        assert definition["environment"] == ["REDIS_PW=${REDIS_PW}"]
+
+    command = topology.bootstrap_command(["10.0.0.1", "10.0.0.2"])
+    assert "10.0.0.1:6379 10.0.0.2:6379 --cluster-replicas 1" in command
+    # password is read inside the container rather than passed as argument
+    assert 'REDISCLI_AUTH="$REDIS_PW"' in command
+
+
+def test_sentinel():
+    topology = RedisTopology("SENTINEL", nodes=2, sentinels=3, group="cache")
+
+    assert topology.connection_settings() == {
+        "REDIS_TYPE": "SENTINEL",
+        "REDIS_URL": "redis-sentinel-1:26379,redis-sentinel-2:26379,redis-sentinel-3:26379",
+        "REDIS_SENTINEL_GROUP": "cache",
+    }
+
+    services = topology.definitions(BASE)["services"]
+    assert list(services) == ["redis-1", "redis-2", "redis-sentinel-1", "redis-sentinel-2", "redis-sentinel-3"]
+    assert "--replicaof" not in services["redis-1"]["command"][2]
+    assert "--replicaof redis-1 6379" in services["redis-2"]["command"][2]
+
+    sentinel = services["redis-sentinel-1"]
+    assert sentinel["depends_on"] == ["redis-1"]
+    assert sentinel["mem_limit"] == "64M"
+    # quorum is majority of sentinels
+    assert "sentinel monitor cache redis-1 6379 2" in sentinel["command"][2]
+
+
+def test_definitions_do_not_share_state():
+    services = RedisTopology("CLUSTER").definitions(BASE)["services"]
+    services["redis-1"]["networks"]["cloud_bridge"]["aliases"] = ["cache"]
+
+    assert services["redis-2"]["networks"] == {"cloud_bridge": {}}
+    assert BASE["networks"] == {"cloud_bridge": {}}
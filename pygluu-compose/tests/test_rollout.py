@@ -0,0 +1,98 @@
+from unittest import mock
+
+import click
+import docker
+import pytest
+
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+from pygluu.compose.rollout import Rollout
+
+
+@pytest.fixture
+def stack():
+    with fake_stack({"health": 0.0}) as servers:
+        with workdir():
+            with quiet():
+                App().up()
+            yield servers
+
+
+def containers(docker, service):
+    return [
+        c for c in docker.containers.values()
+        if c["Config"]["Labels"].get("com.docker.compose.service") == service
+    ]
+
+
+def test_rollout_replaces_container(stack):
+    fake = stack["docker"]
+    old, = containers(fake, "oxauth")
+    old_id, old_ip = old["Id"], old["NetworkSettings"]["Networks"]
+
+    with quiet():
+        App().rollout(["oxauth"], drain=0.0, force=True)
+
+    new, = containers(fake, "oxauth")
+    assert new["Id"] != old_id
+    assert new["Name"] == "/oxauth"
+    assert new["State"]["Running"]
+
+    # the new container takes over registration of the old one
+    addresses = {net["IPAddress"] for net in new["NetworkSettings"]["Networks"].values()}
+    registered = {e["ServiceAddress"] for e in fake.consul.catalog.values() if e["ServiceName"] == "oxauth"}
+    assert registered == addresses
+    assert not addresses & {net["IPAddress"] for net in old_ip.values()}
+
+
+def test_rollout_up_to_date(stack):
+    fake = stack["docker"]
+    ids = {c["Id"] for c in fake.containers.values()}
+
+    with quiet():
+        App().rollout()
+
+    assert {c["Id"] for c in fake.containers.values()} == ids
+
+
+def test_rollout_failed_start_keeps_old(stack):
+    fake = stack["docker"]
+    old, = containers(fake, "oxauth")
+
+    with mock.patch("compose.service.Service.start_container", side_effect=docker.errors.APIError("start failed")):
+        with pytest.raises(click.Abort), quiet():
+            App().rollout(["oxauth"], drain=0.0, force=True)
+
+    # the new container is removed and the old one is renamed back
+    current, = containers(fake, "oxauth")
+    assert current["Id"] == old["Id"]
+    assert current["Name"] == "/oxauth"
+    assert current["State"]["Running"]
+
+
+def test_rollout_failed_stop(stack):
+    fake = stack["docker"]
+    app = App()
+
+    with app.top_level_cmd() as tlc:
+        rollout = Rollout(tlc.project, max_unavailable=1, drain=0.0)
+        pairs = rollout.outdated(["oxauth", "oxtrust"], force=True)
+
+        with mock.patch("compose.container.Container.stop", side_effect=docker.errors.APIError("stop failed")):
+            with quiet():
+                errors = rollout.run(pairs)
+
+    # the error is reported instead of escaping, and rollout stops after the failed batch
+    assert len(errors) == 1
+    assert errors[0].startswith("Unable to remove old container of oxauth")
+    assert "stop failed" in errors[0]
+
+    # the new container keeps serving next to the old one
+    oxauth = containers(fake, "oxauth")
+    assert len(oxauth) == 2
+    assert all(c["State"]["Running"] for c in oxauth)
+    assert "/oxauth" in {c["Name"] for c in oxauth}
+    oxtrust, = containers(fake, "oxtrust")
+    assert oxtrust["Name"] == "/oxtrust"
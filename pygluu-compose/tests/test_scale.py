@@ -0,0 +1,79 @@
+import click
+import docker
+import pytest
+
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+
+
+@pytest.fixture
+def stack():
+    with fake_stack({"health": 0.0}) as servers:
+        with workdir():
+            with quiet():
+                App().up()
+            yield servers
+
+
+def names(fake, service):
+    return sorted(
+        c["Name"] for c in fake.containers.values()
+        if c["Config"]["Labels"].get("com.docker.compose.service") == service
+    )
+
+
+def test_scale(stack, capsys):
+    fake = stack["docker"]
+    original = fake.containers.copy()
+
+    App().scale({"oxauth": 2, "oxtrust": 1})
+
+    # running replicas are kept
+    assert names(fake, "oxauth") == ["/bench_oxauth_2", "/oxauth"]
+    assert names(fake, "oxtrust") == ["/oxtrust"]
+    assert all(cid in fake.containers for cid in original)
+    assert "[I] Service oxauth is running 2 replica(s)" in capsys.readouterr().out
+
+    app = App()
+    assert (app.settings["SCALE_OXAUTH"], app.settings["SCALE_OXTRUST"]) == (2, 1)
+
+    app.scale({"oxauth": 1})
+
+    assert names(fake, "oxauth") == ["/oxauth"]
+    assert App().settings["SCALE_OXAUTH"] == 1
+
+
+def test_scale_unsupported(stack, capsys):
+    with pytest.raises(click.Abort):
+        App().scale({"ldap": 2})
+
+    assert "Unable to scale ldap; supported services are oxauth" in capsys.readouterr().out
+    assert "SCALE_" not in open("settings.py").read()
+
+
+def test_scale_disabled(stack, capsys):
+    with pytest.raises(click.Abort):
+        App().scale({"oxauth": 2, "casa": 2})
+
+    assert "Unable to scale disabled service(s) casa" in capsys.readouterr().out
+    assert "SCALE_" not in open("settings.py").read()
+
+
+def test_scale_not_running(stack, capsys):
+    fake = stack["docker"]
+    client = docker.APIClient(base_url=fake.base_url)
+    for c in list(fake.containers.values()):
+        if c["Name"] == "/oxauth":
+            client.stop(c["Id"])
+
+    App().scale({"oxauth": 2})
+
+    out = capsys.readouterr().out
+    assert "[W] Service oxauth is not running; 2 replica(s) will be started on next up" in out
+    # stopped service is not awaited
+    assert "replicas to be healthy" not in out
+    assert names(fake, "oxauth") == ["/oxauth"]
+    # the setting is honored by subsequent up
+    assert App().settings["SCALE_OXAUTH"] == 2
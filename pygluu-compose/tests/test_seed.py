@@ -0,0 +1,138 @@
+import hashlib
+import json
+
+import pytest
+
+from fakedocker import FakeConsul
+from fakedocker import FakeConsulServer
+from fakedocker import FakeVault
+from fakedocker import FakeVaultServer
+from pygluu.compose.backends import APIError
+from pygluu.compose.backends import ConsulAPI
+from pygluu.compose.backends import VaultAPI
+from pygluu.compose.seed import CHECKSUM_KEY
+from pygluu.compose.seed import TXN_MAX_OPS
+from pygluu.compose.seed import Seeder
+
+CONFIGS = {f"config_{i}": f"value-{i}" for i in range(150)}
+CONFIGS["oxauth_openid_jks_fn"] = {"path": "/etc/certs/oxauth-keys.jks"}
+
+SECRETS = {"encoded_admin_password": "Secret1234%", "ldap_pkcs12_base64": "MIIK..."}
+
+
+class RecordingConsulAPI(ConsulAPI):
+    """Consul client recording number of operations per transaction.
+
+    :param fail_at: Index of transaction that fails (as if the process is interrupted), if any.
+    """
+
+    def __init__(self, addr, fail_at=None):
+        super().__init__(addr)
+        self.fail_at = fail_at
+        self.txns = []
+
+    def txn(self, ops):
+        if len(self.txns) == self.fail_at:
+            raise APIError("PUT /v1/txn failed; reason=interrupted")
+        self.txns.append(len(ops))
+        return super().txn(ops)
+
+
+@pytest.fixture
+def consul():
+    return FakeConsul()
+
+
+@pytest.fixture
+def consul_server(consul):
+    with FakeConsulServer(consul) as server:
+        yield server
+
+
+@pytest.fixture
+def vault():
+    return FakeVault()
+
+
+@pytest.fixture
+def vault_server(vault):
+    with FakeVaultServer(vault) as server:
+        yield server
+
+
+def seeder(consul_server, vault_server, fail_at=None):
+    return Seeder(
+        RecordingConsulAPI(f"http://127.0.0.1:{consul_server.port}", fail_at),
+        VaultAPI(f"http://127.0.0.1:{vault_server.port}"),
+    )
+
+
+def vault_writes(vault_server):
+    return sum(count for route, count in vault_server.calls.items() if route.startswith("POST /v1/secret/"))
+
+
+def test_seed_splits_transactions(consul, vault, consul_server, vault_server):
+    seed = seeder(consul_server, vault_server)
+
+    result = seed.seed(CONFIGS, SECRETS)
+
+    # checksums are written by the last transaction
+    ops = len(CONFIGS) + 1
+    assert seed.consul.txns == [TXN_MAX_OPS, TXN_MAX_OPS, ops - 2 * TXN_MAX_OPS]
+    assert (len(result.configs), len(result.secrets), result.unchanged) == (len(CONFIGS), len(SECRETS), 0)
+    assert consul.kv["gluu/config/config_149"] == "value-149"
+    assert json.loads(consul.kv["gluu/config/oxauth_openid_jks_fn"]) == CONFIGS["oxauth_openid_jks_fn"]
+    assert vault.secrets["secret/gluu/encoded_admin_password"] == {"value": "Secret1234%"}
+
+
+def test_seed_unchanged(consul_server, vault_server):
+    seeder(consul_server, vault_server).seed(CONFIGS, SECRETS)
+    writes = vault_writes(vault_server)
+
+    seed = seeder(consul_server, vault_server)
+    result = seed.seed(CONFIGS, SECRETS)
+
+    assert result == ([], [], len(CONFIGS) + len(SECRETS))
+    assert seed.consul.txns == []
+    assert vault_writes(vault_server) == writes
+
+
+def test_seed_changed(consul, consul_server, vault_server):
+    seeder(consul_server, vault_server).seed(CONFIGS, SECRETS)
+
+    seed = seeder(consul_server, vault_server)
+    result = seed.seed(dict(CONFIGS, config_0="changed"), dict(SECRETS, encoded_admin_password="Changed1234%"))
+
+    assert result == (["config_0"], ["encoded_admin_password"], len(CONFIGS) + len(SECRETS) - 2)
+    assert seed.consul.txns == [2]
+    assert consul.kv["gluu/config/config_0"] == "changed"
+
+
+def test_seed_resumes_interrupted(consul, consul_server, vault_server):
+    with pytest.raises(APIError):
+        seeder(consul_server, vault_server, fail_at=1).seed(CONFIGS, SECRETS)
+
+    # values of the first transaction are written, but checksums are not recorded yet
+    assert consul.kv["gluu/config/config_0"] == "value-0"
+    assert "gluu/config/config_149" not in consul.kv
+    assert CHECKSUM_KEY not in consul.kv
+
+    result = seeder(consul_server, vault_server).seed(CONFIGS, SECRETS)
+    assert (len(result.configs), len(result.secrets)) == (len(CONFIGS), len(SECRETS))
+    assert consul.kv["gluu/config/config_149"] == "value-149"
+
+    assert seeder(consul_server, vault_server).seed(CONFIGS, SECRETS) == ([], [], len(CONFIGS) + len(SECRETS))
+
+
+def test_seed_salted_secret_checksums(consul, consul_server, vault_server):
+    seeder(consul_server, vault_server).seed(CONFIGS, SECRETS)
+    recorded = json.loads(consul.kv[CHECKSUM_KEY])
+
+    plain = hashlib.sha256(b"Secret1234%").hexdigest()
+    assert recorded["salt"]
+    assert recorded["checksums"]["secret/encoded_admin_password"] != plain
+    assert recorded["checksums"]["config/config_0"] == hashlib.sha256(b"value-0").hexdigest()
+
+    # salt is kept across runs, hence checksums of unchanged secrets match
+    seeder(consul_server, vault_server).seed(dict(CONFIGS, config_0="changed"), SECRETS)
+    assert json.loads(consul.kv[CHECKSUM_KEY])["salt"] == recorded["salt"]
@@ -0,0 +1,50 @@
+import click
+import pytest
+
+from pygluu.compose import sizing
+from pygluu.compose.app import App
+
+
+@pytest.fixture
+def unknown_memory(workdir, monkeypatch):
+    monkeypatch.setattr(sizing, "host_resources", lambda: (0, 4))
+
+
+def test_plan_resources_unknown_memory():
+    with pytest.raises(ValueError, match="Unknown host memory"):
+        sizing.plan_resources(["oxauth"], 0, 4)
+
+
+def test_plan_resources():
+    plan = sizing.plan_resources(["consul", "oxauth"], 8 * 1024 * sizing.MB, 4)
+
+    assert not plan.undersized
+    assert [(alloc.service, alloc.mem_mb) for alloc in plan.allocations] == [("consul", 1024), ("oxauth", 6144)]
+
+
+def test_write_sizing_overrides_unknown_memory(unknown_memory, workdir, capsys):
+    with pytest.raises(click.Abort):
+        App().write_sizing_overrides(["docker-compose.yml"])
+
+    assert "set SIZING_MEMORY" in capsys.readouterr().out
+    assert not (workdir / "docker-compose.sizing.yml").exists()
+
+
+def test_sizing_plan_memory_setting(unknown_memory, workdir):
+    (workdir / "settings.py").write_text('SIZING_MEMORY = "4G"\n')
+
+    assert App().sizing_plan(["docker-compose.yml"]).memory_mb == 4096
+
+
+def test_summary():
+    plan = sizing.plan_resources(["consul", "oxauth"], 8 * 1024 * sizing.MB, 4, replicas={"oxauth": 2})
+    lines = sizing.summary(plan)
+
+    assert lines[0].startswith("[I] Host has 8192MB of memory and 4 CPU(s)")
+    assert [line.split()[0] for line in lines[2:4]] == ["consul", "oxauth"]
+    total = sum(alloc.mem_mb * alloc.replicas for alloc in plan.allocations)
+    assert lines[4].startswith(f"[I] Total memory limit is {total}MB")
+    assert len(lines) == 5
+
+    lines = sizing.summary(plan._replace(undersized=True))
+    assert lines[-1].startswith("[W] Host memory is below minimum requirement")
@@ -0,0 +1,70 @@
+from pygluu.compose.sizing import Allocation
+from pygluu.compose.sizing import Plan
+from pygluu.compose.sqltuning import enabled_engines
+from pygluu.compose.sqltuning import merged_overrides
+from pygluu.compose.sqltuning import POOL_WEIGHTS
+from pygluu.compose.sqltuning import RESERVED_CONNECTIONS
+from pygluu.compose.sqltuning import STOCK_MAX_CONNECTIONS
+from pygluu.compose.sqltuning import plan_databases
+from pygluu.compose.sqltuning import plan_sql
+from pygluu.compose.sqltuning import summary
+
+
+def sizing(mysql_mb=2048):
+    return Plan(8192, 4, 1024, [
+        Allocation("mysql", 1, 1024, mysql_mb, 1024, 0, 0, ""),
+        Allocation("oxauth", 2, 1024, 1024, 1024, 0, 75, ""),
+    ], False)
+
+
+def test_enabled_engines():
+    files = ["docker-compose.yml", "svc.oxauth.yml", "svc.mysql.yml"]
+
+    assert enabled_engines(files) == [("mysql", "svc.mysql.yml")]
+    assert enabled_engines(files[:2]) == []
+
+
+def test_plan_databases_memory():
+    services = ["mysql", "oxauth", "nginx"]
+
+    # memory of sizing plan applies only if it sizes the services
+    assert plan_databases({"mysql": 1536}, sizing(), services, auto_sizing=True)[0].mem_mb == 2048
+    assert plan_databases({"mysql": 1536}, sizing(), services)[0].mem_mb == 1536
+    # without memory limit, a share of host memory is assumed
+    assert plan_databases({"mysql": 0}, sizing(), services)[0].mem_mb == 2048
+
+
+def test_plan_databases_clients():
+    plan, = plan_databases({"mysql": 0}, sizing(), ["mysql", "oxauth", "nginx"], profile="write-heavy")
+
+    assert plan.profile == "write-heavy"
+    assert [(pool.service, pool.replicas) for pool in plan.pools] == [("oxauth", 2)]
+    services = merged_overrides([plan])["services"]
+    assert sorted(services) == ["mysql", "oxauth"]
+    assert services["oxauth"]["environment"]["GLUU_SQL_POOL_MAX_TOTAL"] == str(plan.pools[0].max_total)
+
+
+def test_max_connections_never_below_stock():
+    clients = {svc: 1 for svc in POOL_WEIGHTS}
+
+    for engine, stock in STOCK_MAX_CONNECTIONS.items():
+        for mem_mb in (512, 1024, 4096, 65536):
+            for replicas in (1, 4):
+                plan = plan_sql(engine, mem_mb, 0, {svc: replicas for svc in clients})
+                assert plan.max_connections >= stock, (engine, mem_mb, replicas)
+                assert plan.settings["max_connections"] == plan.max_connections
+
+    # pools larger than the stock limit still raise it
+    plan = plan_sql("postgresql", 65536, 0, {svc: 8 for svc in clients})
+    assert plan.max_connections == sum(p.max_total * p.replicas for p in plan.pools) + RESERVED_CONNECTIONS
+    assert plan.max_connections > STOCK_MAX_CONNECTIONS["postgresql"]
+
+
+def test_summary():
+    plan, = plan_databases({"mysql": 0}, sizing(), ["mysql", "oxauth"])
+    lines = summary(plan._replace(note="pools are shrunk"))
+
+    assert lines[0].startswith(f"[I] SQL database mysql is tuned for 2048MB of memory and {plan.max_connections} connections")
+    pool = plan.pools[0]
+    assert lines[-2].split() == ["oxauth", "2", str(pool.max_total), str(pool.max_idle), str(pool.min_idle)]
+    assert lines[-1] == "[W] SQL connection pools are shrunk; consider raising memory limit of mysql"
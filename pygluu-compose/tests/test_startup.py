@@ -0,0 +1,31 @@
+import pytest
+
+from bench_startup import COMMAND_BUDGETS
+from bench_startup import IMPORT_BUDGETS
+from bench_startup import RUNS
+from bench_startup import command_time
+from bench_startup import eager_modules
+from bench_startup import import_time
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS))
+def test_import_lazy(module):
+    _, imported = import_time(module)
+
+    assert module in imported
+    assert eager_modules(imported) == []
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS))
+def test_import_budget(module):
+    # best of runs, as timing of a shared test runner is noisy
+    elapsed = min(import_time(module)[0] for _ in range(RUNS))
+
+    assert elapsed <= IMPORT_BUDGETS[module]
+
+
+@pytest.mark.parametrize("command", sorted(COMMAND_BUDGETS))
+def test_command_budget(command, tmp_path):
+    elapsed = min(command_time(command.split(), str(tmp_path)) for _ in range(RUNS))
+
+    assert elapsed <= COMMAND_BUDGETS[command]
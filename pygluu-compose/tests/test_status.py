@@ -0,0 +1,68 @@
+import docker
+import pytest
+
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose.app import App
+from pygluu.compose.status import StatusSnapshot
+
+
+@pytest.fixture
+def stack():
+    with fake_stack({"health": 0.0}) as servers:
+        with workdir():
+            with quiet():
+                App().up()
+            yield servers
+
+
+def container(fake, service):
+    return next(
+        c for c in fake.containers.values()
+        if c["Config"]["Labels"].get("com.docker.compose.service") == service
+    )
+
+
+def test_fetch_health(stack):
+    fake = stack["docker"]
+    client = docker.APIClient(base_url=fake.base_url)
+    container(fake, "oxauth")["State"]["Health"]["Status"] = "unhealthy"
+    container(fake, "oxtrust")["State"]["Health"]["Status"] = "starting"
+
+    calls = fake.calls["GET /containers/json"]
+    snapshot = StatusSnapshot.fetch(client, "bench", health=True)
+
+    assert fake.calls["GET /containers/json"] - calls == 4
+    assert snapshot.running("oxauth")[0].health == "unhealthy"
+    assert snapshot.running("oxtrust")[0].health == "starting"
+    assert snapshot.running("ldap")[0].health == "healthy"
+    # containers without healthcheck have no health state
+    assert all(c.health == "" for c in snapshot.get("registrator"))
+
+
+def test_fetch_without_health(stack):
+    fake = stack["docker"]
+    client = docker.APIClient(base_url=fake.base_url)
+
+    calls = fake.calls["GET /containers/json"]
+    snapshot = StatusSnapshot.fetch(client, "bench", services=["oxauth", "casa"])
+
+    assert fake.calls["GET /containers/json"] - calls == 1
+    assert snapshot.running("oxauth")[0].health == ""
+    assert snapshot.get("casa") == []
+
+
+def test_fetch_stopped(stack):
+    fake = stack["docker"]
+    client = docker.APIClient(base_url=fake.base_url)
+    for c in list(fake.containers.values()):
+        client.stop(c["Id"])
+
+    calls = fake.calls["GET /containers/json"]
+    snapshot = StatusSnapshot.fetch(client, "bench", health=True)
+
+    # health of stopped containers is irrelevant, hence not listed
+    assert fake.calls["GET /containers/json"] - calls == 1
+    assert snapshot.running("oxauth") == []
+    assert snapshot.get("oxauth")[0].health == ""
@@ -0,0 +1,57 @@
+import pytest
+
+from harness import SETTINGS
+from harness import fake_stack
+from harness import quiet
+from harness import workdir
+from pygluu.compose import preflight
+from pygluu.compose.app import App
+
+
+@pytest.fixture
+def stack():
+    with fake_stack({"health": 0.0}) as servers:
+        yield servers
+
+
+def up(stack):
+    """Run ``up`` command and get number of created containers."""
+    before = stack["docker"].calls["POST /containers/create"]
+    with quiet():
+        App().up()
+    return stack["docker"].calls["POST /containers/create"] - before
+
+
+def test_up_keeps_unchanged_services(stack):
+    with workdir():
+        assert up(stack) > 0
+        assert up(stack) == 0
+
+
+def test_up_recreates_on_changed_host_ip(stack):
+    with workdir(SETTINGS.replace('HOST_IP = "127.0.0.1"', 'HOST_IP = "127.0.0.2"')) as tmpdir:
+        up(stack)
+
+        with open(f"{tmpdir}/settings.py", "a") as f:
+            f.write('HOST_IP = "127.0.0.3"\n')
+        # only services with the IP in their definitions (e.g. ``extra_hosts``) are recreated
+        assert up(stack) > 0
+
+
+def test_up_recreates_on_changed_detected_ip(stack, monkeypatch):
+    with workdir(SETTINGS.replace('HOST_IP = "127.0.0.1"', 'HOST_IP = ""')):
+        monkeypatch.setattr(preflight, "detect_ip", lambda: "10.0.0.1")
+        up(stack)
+        assert up(stack) == 0
+
+        monkeypatch.setattr(preflight, "detect_ip", lambda: "10.0.0.2")
+        assert up(stack) > 0
+
+
+def test_up_keeps_services_with_domain_resolved_by_bootstrap(stack):
+    with workdir(SETTINGS.replace('DOMAIN = "demoexample.gluu.org"', 'DOMAIN = ""')) as tmpdir:
+        with open(f"{tmpdir}/generate.json", "w") as f:
+            f.write('{"hostname": "demoexample.gluu.org"}')
+
+        assert up(stack) > 0
+        assert up(stack) == 0
@@ -0,0 +1,74 @@
+import pytest
+
+from pygluu.compose import wait
+from pygluu.compose.wait import wait_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(wait, "time", clock)
+    return clock
+
+
+def test_satisfied_immediately(clock, capsys):
+    result = wait_for(lambda: "value", "condition")
+
+    assert result == wait.WaitResult("value", True, 0.0, 1)
+    assert clock.sleeps == []
+    assert "[I] Waited 0.00s for condition (1 attempt(s))" in capsys.readouterr().out
+
+
+def test_backoff(clock):
+    values = iter([None, 0, "", [], "done"])
+
+    result = wait_for(lambda: next(values), "condition", initial_delay=0.1, max_delay=0.5)
+
+    assert result.ok and result.value == "done"
+    assert result.attempts == 5
+    assert clock.sleeps == pytest.approx([0.1, 0.2, 0.4, 0.5])
+    assert result.elapsed == pytest.approx(1.2)
+
+
+def test_timeout(clock, capsys):
+    result = wait_for(lambda: False, "condition", timeout=1.0, initial_delay=0.3, max_delay=10.0)
+
+    assert not result.ok and result.value is False
+    # the last sleep is cut short by the deadline
+    assert clock.sleeps == pytest.approx([0.3, 0.6, 0.1])
+    assert result.attempts == 4
+    assert result.elapsed == pytest.approx(1.0)
+    assert "[W] Timed out after 1.00s waiting for condition (4 attempt(s))" in capsys.readouterr().out
+
+
+def test_expected_exceptions(clock):
+    calls = []
+
+    def condition():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("refused")
+        return True
+
+    assert wait_for(condition, "condition", exceptions=(ConnectionError,)).attempts == 3
+
+
+def test_unexpected_exception(clock):
+    def condition():
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        wait_for(condition, "condition", exceptions=(ConnectionError,))